@@ -0,0 +1,191 @@
+# 아이템 이름 별칭 색인 - assets/*/lang/{ko_kr,en_us}.json의 item./block. 번역으로 이름 ↔ 아이템 ID 표 구성
+# 한국어 질문("디지털 광부 만들려면?")을 검색 전에 아이템 ID("mekanism:digital_miner")와 영어 이름으로 확장하는 데 사용
+
+import os
+import re
+import glob
+import json
+from typing import List, Dict, Any, Optional, Iterable, Tuple
+import logging
+
+logger = logging.getLogger(__name__)
+
+ALIAS_LANGS = ('ko_kr', 'en_us')
+# 질문에 자주 나오는 짧은 단어와 겹치지 않도록 이 길이 미만 이름은 검색하지 않음 (공백 제외 글자 수)
+MIN_ALIAS_CHARS = {'hangul': 2, 'ascii': 3}
+MAX_ALIAS_CHARS = 48
+MAX_IDS_PER_ALIAS = 3
+
+# 스캔할 언어 파일 위치 (뒤쪽이 우선: 리소스팩/kubejs가 모드 번역을 덮어씀)
+LANG_FILE_PATTERNS = (
+    'assets/*/lang/{lang}.json',
+    'resourcepacks/*/assets/*/lang/{lang}.json',
+    'kubejs/assets/*/lang/{lang}.json',
+)
+
+_FORMAT_CODE_RE = re.compile(r'§.')
+_SPACE_RE = re.compile(r'[\s_]+')
+_HANGUL_RE = re.compile(r'[가-힣]')
+
+
+def alias_key(name: str) -> str:
+    """이름 비교용 키: 서식 코드 제거, 소문자, 공백·밑줄 제거 ("Digital  Miner" → "digitalminer")"""
+    return _SPACE_RE.sub('', _FORMAT_CODE_RE.sub('', name or '').lower())
+
+
+def item_id_from_key(translation_key: str) -> Optional[str]:
+    """번역 키 → 아이템 ID ("block.mekanism.digital_miner" → "mekanism:digital_miner", 하위 키는 None)"""
+    parts = translation_key.split('.')
+    if len(parts) != 3 or parts[0] not in ('item', 'block') or not parts[1] or not parts[2]:
+        return None
+    return f"{parts[1]}:{parts[2]}"
+
+
+class AliasIndex:
+    """아이템 ID ↔ 언어별 이름 색인
+
+    names: 아이템 ID → {언어: 이름}. 이름 → ID 조회용 해시 색인(_lookup)은 names로 만들며,
+    질문 속 이름은 단어 시작 위치마다 긴 이름부터 해시 조회해서 찾는다 (질문 길이 × 이름 길이 종류 수).
+    """
+
+    def __init__(self, names: Optional[Dict[str, Dict[str, str]]] = None):
+        self.names: Dict[str, Dict[str, str]] = {}
+        self._lookup: Dict[str, List[str]] = {}
+        self._lengths: List[int] = []
+        for item_id, by_lang in (names or {}).items():
+            for lang, name in by_lang.items():
+                self.add(item_id, lang, name)
+        self._finish()
+
+    def __len__(self) -> int:
+        return len(self.names)
+
+    def __eq__(self, other: object) -> bool:
+        return isinstance(other, AliasIndex) and self.names == other.names
+
+    def add(self, item_id: str, lang: str, name: str) -> None:
+        if not isinstance(name, str) or not name.strip():
+            return
+        self.names.setdefault(item_id, {})[lang] = name.strip()
+        key = alias_key(name)
+        min_chars = MIN_ALIAS_CHARS['hangul' if _HANGUL_RE.search(key) else 'ascii']
+        if min_chars <= len(key) <= MAX_ALIAS_CHARS:
+            ids = self._lookup.setdefault(key, [])
+            if item_id not in ids and len(ids) < MAX_IDS_PER_ALIAS:
+                ids.append(item_id)
+
+    def add_lang_file(self, lang: str, data: Dict[str, Any]) -> int:
+        """언어 파일 하나의 item./block. 번역 추가 → 추가한 항목 수"""
+        added = 0
+        for key, name in data.items():
+            item_id = item_id_from_key(key)
+            if item_id is not None and isinstance(name, str):
+                self.add(item_id, lang, name)
+                added += 1
+        return added
+
+    def _finish(self) -> "AliasIndex":
+        self._lengths = sorted({len(key) for key in self._lookup}, reverse=True)
+        return self
+
+    def resolve(self, name: str) -> List[str]:
+        """이름(아무 언어) 또는 아이템 ID → 아이템 ID 목록"""
+        if ':' in (name or '') and name.strip().lower() in self.names:
+            return [name.strip().lower()]
+        return list(self._lookup.get(alias_key(name), []))
+
+    def display_name(self, item_id: str, lang: str = 'ko_kr') -> Optional[str]:
+        by_lang = self.names.get(item_id, {})
+        return by_lang.get(lang) or by_lang.get('en_us')
+
+    def find(self, text: str) -> List[Tuple[str, List[str]]]:
+        """질문 속 아이템 이름 찾기 → [(찾은 이름 키, 아이템 ID 목록)]
+        단어 시작 위치에서만 시작하고, 영문 이름은 단어 끝에서 끝나야 한다 ("redstone" 속 "stone" 제외).
+        한글 이름은 조사가 붙어도 일치한다 ("디지털 광부를" → "디지털광부").
+        """
+        if not self._lookup or not text:
+            return []
+        lowered = _FORMAT_CODE_RE.sub('', text).lower()
+        chars: List[str] = []
+        starts: List[bool] = []
+        ends: List[bool] = []
+        for i, ch in enumerate(lowered):
+            if ch.isspace():
+                continue
+            prev = lowered[i - 1] if i else ' '
+            nxt = lowered[i + 1] if i + 1 < len(lowered) else ' '
+            chars.append(ch)
+            starts.append(not prev.isalnum() or (prev.isascii() != ch.isascii()))
+            ends.append(not nxt.isalnum() or (nxt.isascii() != ch.isascii()) or not ch.isascii())
+        joined = ''.join(chars)
+
+        found: List[Tuple[str, List[str]]] = []
+        i = 0
+        while i < len(joined):
+            if starts[i]:
+                for length in self._lengths:
+                    end = i + length
+                    if end > len(joined) or not ends[end - 1]:
+                        continue
+                    ids = self._lookup.get(joined[i:end])
+                    if ids:
+                        found.append((joined[i:end], ids))
+                        i = end
+                        break
+                else:
+                    i += 1
+                continue
+            i += 1
+        return found
+
+    def rewrite(self, query: str) -> str:
+        """검색용 질문 확장: 찾은 이름마다 아이템 ID와 영어 이름을 덧붙임 (없으면 원문 그대로)"""
+        additions: List[str] = []
+        for _, ids in self.find(query):
+            for item_id in ids:
+                english = self.names.get(item_id, {}).get('en_us')
+                term = f"{item_id} {english}" if english and alias_key(english) not in alias_key(query) else item_id
+                if term not in additions:
+                    additions.append(term)
+        return f"{query} ({'; '.join(additions)})" if additions else query
+
+    def to_dict(self) -> Dict[str, Any]:
+        """저장용 열 형식: 아이템 ID 목록 + 언어별 이름 목록(같은 순서, 없으면 null)"""
+        items = list(self.names)
+        return {
+            'items': items,
+            'names': {lang: [self.names[item_id].get(lang) for item_id in items] for lang in ALIAS_LANGS}
+        }
+
+    @classmethod
+    def from_dict(cls, data: Optional[Dict[str, Any]]) -> "AliasIndex":
+        index = cls()
+        if not data:
+            return index
+        items = data.get('items', [])
+        for lang, names in data.get('names', {}).items():
+            for item_id, name in zip(items, names):
+                if name:
+                    index.add(item_id, lang, name)
+        return index._finish()
+
+
+def build_alias_index(roots: Iterable[str], index: Optional[AliasIndex] = None) -> AliasIndex:
+    """모드팩 폴더들의 언어 파일(ko_kr, en_us)로 별칭 색인 구축 (index가 주어지면 그 안에 채움)"""
+    index = index if index is not None else AliasIndex()
+    files = 0
+    for root in roots:
+        for pattern in LANG_FILE_PATTERNS:
+            for lang in ALIAS_LANGS:
+                for fpath in sorted(glob.glob(os.path.join(root, pattern.format(lang=lang)))):
+                    try:
+                        with open(fpath, 'r', encoding='utf-8') as f:
+                            data = json.load(f)
+                    except (OSError, ValueError):
+                        logger.debug(f"언어 파일 읽기 실패 {fpath}")
+                        continue
+                    if isinstance(data, dict) and index.add_lang_file(lang, data):
+                        files += 1
+    index._finish()
+    logger.info(f"🔤 아이템 이름 별칭 색인: 언어 파일 {files}개 → 아이템 {len(index)}개")
+    return index
@@ -1,11 +1,12 @@
-from flask import Flask, request, jsonify
+from flask import Flask, request, jsonify, Response, stream_with_context
 from flask_cors import CORS
 import os
 import json
+import threading
 import requests
 from datetime import datetime
 from dotenv import load_dotenv
-from typing import List, Dict, Any
+from typing import List, Dict, Any, Iterator, Sequence
 from pathlib import Path
 
 # 새로운 Gemini SDK
@@ -14,10 +15,21 @@ from google.genai import types
 
 # 보안 및 모니터링 미들웨어
 from middleware.security import SecurityMiddleware, require_valid_input, measure_performance
-from middleware.monitoring import MonitoringMiddleware, track_model_usage, track_user_activity
+from middleware.monitoring import MonitoringMiddleware, metrics_collector, track_model_usage, track_user_activity
 from modpack_parser import scan_modpack
+from index_manifest import IndexManifest
 # GCP RAG 시스템
-from gcp_rag_system import gcp_rag
+from gcp_rag_system import gcp_rag, EMBEDDING_MODEL_NAME as GCP_EMBEDDING_MODEL_NAME, ORPHAN_MIN_AGE_HOURS
+from embedding_cache import query_embedding_cache, normalize_query
+from response_cache import response_cache
+from job_queue import job_manager
+from single_flight import SingleFlight
+from recipe_store import RecipeStore, recipe_stores, describe_recipe, parse_uses_query, display_name
+from crafting_tree import resolve_crafting_tree, parse_tree_query, format_tree
+from bm25_index import BM25Index, rrf_fuse, hybrid_enabled, HYBRID_CANDIDATES, LEXICAL_MIN_RATIO
+from doc_store import save_flat_index, load_flat_index
+from doc_consolidation import consolidate_docs
+from context_packer import ContextPacker, RAG_MMR_POOL
 
 # 표준 환경 파일 경로 로드
 env_file = Path.home() / "minecraft-ai-backend" / ".env"
@@ -25,8 +37,11 @@ load_dotenv(env_file)
 
 # ========= 🔧 개선된 모드팩 타겟팅 시스템 =========
 
+# 마지막으로 읽은 RAG 설정: (파일 수정 시각, 설정) - 레시피 조회처럼 빈번한 요청마다 다시 파싱하지 않음
+_rag_config_cache: Dict[str, Any] = {}
+
 def load_rag_config():
-    """RAG 설정 파일 로드"""
+    """RAG 설정 파일 로드 (파일 수정 시각이 그대로면 이전에 읽은 설정 재사용)"""
     import json
     from pathlib import Path
     
@@ -40,19 +55,29 @@ def load_rag_config():
         "manual_modpack_path": ""
     }
     
-    if config_file.exists():
-        try:
-            with open(config_file, 'r', encoding='utf-8') as f:
-                config = json.load(f)
-                return {**default_config, **config}
-        except Exception as e:
-            print(f"⚠️ RAG 설정 파일 로드 실패: {e}")
+    try:
+        mtime = config_file.stat().st_mtime
+    except OSError:
+        return default_config
+    cached = _rag_config_cache.get('entry')
+    if cached is not None and cached[0] == mtime:
+        return cached[1]
     
-    return default_config
+    try:
+        with open(config_file, 'r', encoding='utf-8') as f:
+            config = {**default_config, **json.load(f)}
+    except Exception as e:
+        print(f"⚠️ RAG 설정 파일 로드 실패: {e}")
+        config = default_config
+    _rag_config_cache['entry'] = (mtime, config)
+    return config
 
-def get_target_modpack(request_data):
-    """요청에서 타겟 모드팩 결정 (수동 설정 우선, 자동 감지 폴백)"""
+def get_target_modpack(request_data, verbose: bool = True):
+    """요청에서 타겟 모드팩 결정 (수동 설정 우선, 자동 감지 폴백)
+    verbose=False면 결정 과정을 출력하지 않음 (레시피 조회처럼 빈번한 요청용)
+    """
     config = load_rag_config()
+    log = print if verbose else (lambda *args: None)
     
     # 1. 수동 모드: 설정된 모드팩 사용
     if config.get("rag_mode") == "manual":
@@ -60,17 +85,17 @@ def get_target_modpack(request_data):
         manual_version = config.get("current_modpack", {}).get("version", "1.0.0")
         
         if manual_name:
-            print(f"🔧 수동 모드: {manual_name} v{manual_version}")
+            log(f"🔧 수동 모드: {manual_name} v{manual_version}")
             return manual_name, manual_version
         else:
-            print("⚠️ 수동 모드이지만 모드팩이 설정되지 않음, 자동 모드로 폴백")
+            log("⚠️ 수동 모드이지만 모드팩이 설정되지 않음, 자동 모드로 폴백")
     
     # 2. 자동 모드: 요청에서 추출 또는 환경변수 사용
     request_name = request_data.get('modpack_name', '')
     request_version = request_data.get('modpack_version', '1.0.0')
     
     if request_name and request_name != 'Unknown Modpack':
-        print(f"🤖 자동 감지: {request_name} v{request_version}")
+        log(f"🤖 자동 감지: {request_name} v{request_version}")
         return request_name, request_version
     
     # 3. 환경변수 폴백
@@ -78,11 +103,11 @@ def get_target_modpack(request_data):
     env_version = os.getenv('CURRENT_MODPACK_VERSION', '1.0.0')
     
     if env_name:
-        print(f"🌍 환경변수 폴백: {env_name} v{env_version}")
+        log(f"🌍 환경변수 폴백: {env_name} v{env_version}")
         return env_name, env_version
     
     # 4. 기본값
-    print("⚠️ 모드팩 정보 없음, 기본값 사용")
+    log("⚠️ 모드팩 정보 없음, 기본값 사용")
     return "Unknown Modpack", "1.0.0"
 
 app = Flask(__name__)
@@ -91,6 +116,18 @@ CORS(app)
 # 미들웨어 초기화
 security_middleware = SecurityMiddleware(app)
 monitoring_middleware = MonitoringMiddleware(app)
+metrics_collector.register_stats_provider('query_embedding_cache', query_embedding_cache.stats)
+metrics_collector.register_stats_provider('gcp_index_cache', gcp_rag.get_cache_stats)
+metrics_collector.register_stats_provider('gcp_embedding_scheduler', gcp_rag.get_embedding_stats)
+metrics_collector.register_stats_provider('response_cache', response_cache.stats)
+metrics_collector.register_stats_provider('jobs', job_manager.stats)
+metrics_collector.register_stats_provider('recipe_store', recipe_stores.stats)
+
+# 동시에 들어온 같은 질문/레시피 요청은 LLM 호출 한 번으로 처리
+chat_flight = SingleFlight()
+recipe_flight = SingleFlight()
+metrics_collector.register_stats_provider('chat_single_flight', chat_flight.stats)
+metrics_collector.register_stats_provider('recipe_single_flight', recipe_flight.stats)
 
 # API 키 설정
 GOOGLE_API_KEY = os.getenv('GOOGLE_API_KEY')
@@ -104,10 +141,8 @@ GEMINI_MODEL = os.getenv('GEMINI_MODEL', 'gemini-2.5-pro')
 OPENAI_MODEL_PRIMARY = os.getenv('OPENAI_MODEL_PRIMARY', 'gpt-4o-mini')
 OPENAI_MODEL_FALLBACK = os.getenv('OPENAI_MODEL_FALLBACK', 'gpt-3.5-turbo')
 CLAUDE_MODEL = os.getenv('CLAUDE_MODEL', 'claude-3-5-sonnet-20241022')
-# RAG 프롬프트 첨부 예산(환경변수로 조정 가능)
+# RAG 프롬프트에 붙일 문서 수 (토큰 예산/MMR 설정은 context_packer 참고)
 RAG_TOP_K = int(os.getenv('RAG_TOP_K', '5'))
-RAG_SNIPPET_MAX_CHARS = int(os.getenv('RAG_SNIPPET_MAX_CHARS', '500'))
-RAG_TOTAL_MAX_CHARS = int(os.getenv('RAG_TOTAL_MAX_CHARS', '1500'))
 
 # AI 모델 초기화 (안전하게)
 gemini_client = None
@@ -160,17 +195,21 @@ current_model = "gemini" if gemini_client else "openai" if openai_client else "c
 # ========= 간단 RAG 컴포넌트 (FAISS + SentenceTransformer) =========
 rag_enabled = False
 rag_index = None
-rag_documents: List[Dict[str, Any]] = []
+rag_documents: Sequence[Dict[str, Any]] = []  # 디스크에서 로드하면 필요한 문서만 디코딩하는 DocStore
 rag_model = None
 
 RAG_DIR = os.path.join(os.path.expanduser('~'), 'minecraft-ai-backend', 'rag')
+RAG_INDEX_DIR = os.path.join(RAG_DIR, 'local_index')
+RAG_MODEL_NAME = 'sentence-transformers/paraphrase-multilingual-MiniLM-L12-v2'
+rag_lexical = None  # rag_documents의 BM25 역색인 (하이브리드 검색)
+rag_build_lock = threading.Lock()
 
 def init_rag():
     global rag_enabled, rag_index, rag_model
     try:
         from sentence_transformers import SentenceTransformer
         import faiss
-        rag_model = SentenceTransformer('sentence-transformers/paraphrase-multilingual-MiniLM-L12-v2')
+        rag_model = SentenceTransformer(RAG_MODEL_NAME)
         # 빈 인덱스 초기화 (384차원)
         rag_index = faiss.IndexFlatIP(384)
         rag_enabled = True
@@ -185,20 +224,34 @@ def init_rag():
         print(f"⚠️ RAG 초기화 비활성화: {e}")
 
 def build_rag(docs: List[Dict[str, Any]]):
-    """문서 리스트를 받아 임베딩 → 인덱스 구축"""
-    global rag_index, rag_documents
+    """문서 리스트를 받아 임베딩 → 인덱스 구축 (BM25 역색인도 함께)"""
+    global rag_index, rag_documents, rag_lexical
     if not rag_enabled or rag_model is None:
         return False
     try:
         import numpy as np
         texts = [d.get('text', '') for d in docs]
-        emb = rag_model.encode(texts, normalize_embeddings=True)
+        # 현재 인덱스에 같은 텍스트가 있으면 벡터 재사용, 새 텍스트만 인코딩
+        previous_rows = {}
+        if rag_index is not None and rag_index.ntotal == len(rag_documents):
+            previous_rows = {d.get('text', ''): i for i, d in enumerate(rag_documents)}
+        new_texts = [t for t in dict.fromkeys(texts) if t not in previous_rows]
+        encoded = {}
+        if new_texts:
+            encoded = dict(zip(new_texts, rag_model.encode(new_texts, normalize_embeddings=True)))
+        emb = np.vstack([
+            encoded[t] if t in encoded else rag_index.reconstruct(previous_rows[t])
+            for t in texts
+        ])
+        print(f"RAG 임베딩: 신규 {len(new_texts)}개, 재사용 {len(texts) - len(new_texts)}개")
         # 새 인덱스 생성 후 교체
         import faiss
         index = faiss.IndexFlatIP(emb.shape[1])
         index.add(emb.astype('float32'))
+        lexical = BM25Index.build(texts)
         rag_index = index
         rag_documents = docs
+        rag_lexical = lexical
         return True
     except Exception as e:
         print(f"RAG 인덱스 구축 실패: {e}")
@@ -208,43 +261,63 @@ def rag_search(query: str, top_k: int = 5) -> List[Dict[str, Any]]:
     if not rag_enabled or rag_model is None or rag_index is None:
         return []
     try:
-        import numpy as np
-        q = rag_model.encode([query], normalize_embeddings=True).astype('float32')
-        D, I = rag_index.search(q, top_k)
+        # 반복 질문은 쿼리 임베딩 캐시 사용 (GCP RAG와 공유)
+        q = query_embedding_cache.get_or_compute(
+            RAG_MODEL_NAME, query,
+            lambda text: rag_model.encode([text], normalize_embeddings=True)[0]
+        ).reshape(1, -1)
+        lexical = rag_lexical if hybrid_enabled() and rag_lexical is not None \
+            and rag_lexical.num_docs == len(rag_documents) else None
+        candidates = top_k * HYBRID_CANDIDATES if lexical is not None else top_k
+        D, I = rag_index.search(q, candidates)
+        dense = {int(idx): float(score) for idx, score in zip(I[0], D[0]) if 0 <= idx < len(rag_documents)}
+        ranked = list(dense)[:top_k]
+        if lexical is not None:
+            # 벡터 순위와 BM25 순위를 RRF로 합침 (정확한 아이템 이름 일치 문서가 위로)
+            lexical_hits = [i for i, _ in lexical.search(query, candidates, min_ratio=LEXICAL_MIN_RATIO)]
+            ranked = [i for i, _ in rrf_fuse([list(dense), lexical_hits], top_k=top_k)]
         results: List[Dict[str, Any]] = []
-        for idx, score in zip(I[0], D[0]):
-            if 0 <= idx < len(rag_documents):
-                doc = rag_documents[idx].copy()
-                doc['score'] = float(score)
-                results.append(doc)
+        for idx in ranked:
+            doc = rag_documents[idx].copy()
+            # BM25로만 찾은 문서도 실제 코사인 유사도로 표시
+            doc['score'] = dense[idx] if idx in dense else float(rag_index.reconstruct(idx) @ q[0])
+            results.append(doc)
         return results
     except Exception as e:
         print(f"RAG 검색 실패: {e}")
         return []
 
 def rag_save_to_disk() -> bool:
-    """rag_index와 rag_documents를 디스크에 저장"""
+    """rag_index와 rag_documents, BM25 역색인을 디스크에 저장 (mmap으로 바로 열 수 있는 바이너리 형식)"""
     if not rag_enabled or rag_index is None:
         return False
     try:
+        import numpy as np
         os.makedirs(RAG_DIR, exist_ok=True)
-        # 문서 저장
-        docs_path = os.path.join(RAG_DIR, 'rag_docs.json')
-        with open(docs_path, 'w', encoding='utf-8') as f:
-            json.dump(rag_documents, f, ensure_ascii=False)
-        # 인덱스 저장
-        import faiss
-        index_path = os.path.join(RAG_DIR, 'rag.index')
-        faiss.write_index(rag_index, index_path)
+        vectors = rag_index.reconstruct_n(0, rag_index.ntotal) if rag_index.ntotal \
+            else np.zeros((0, rag_index.d), dtype=np.float32)
+        lexical = rag_lexical if rag_lexical is not None and rag_lexical.num_docs == len(rag_documents) else None
+        save_flat_index(RAG_INDEX_DIR, vectors, rag_documents, lexical)
         return True
     except Exception as e:
         print(f"RAG 저장 실패: {e}")
         return False
 
 def rag_load_from_disk() -> bool:
-    """rag_index와 rag_documents를 디스크에서 로드"""
-    global rag_documents, rag_index
+    """rag_index와 rag_documents를 디스크에서 로드
+    벡터/문서/BM25 역색인을 mmap으로 열기만 하므로 문서 수와 무관하게 바로 끝나고, 문서는 검색 결과로 나갈 때만 디코딩된다.
+    이전 형식(rag_docs.json + rag.index)만 있으면 그것을 읽은 뒤 새 형식으로 변환해 둔다.
+    """
+    global rag_documents, rag_index, rag_lexical
     try:
+        loaded = load_flat_index(RAG_INDEX_DIR)
+        if loaded is not None:
+            index, docs, lexical = loaded
+            rag_index, rag_documents = index, docs
+            rag_lexical = lexical if lexical is not None else BM25Index.build(d.get('text', '') for d in docs)
+            print(f"✅ 로컬 RAG 인덱스 로드 (mmap): 문서 {len(docs)}개")
+            return True
+
         docs_path = os.path.join(RAG_DIR, 'rag_docs.json')
         index_path = os.path.join(RAG_DIR, 'rag.index')
         if not (os.path.isfile(docs_path) and os.path.isfile(index_path)):
@@ -253,6 +326,9 @@ def rag_load_from_disk() -> bool:
             rag_documents = json.load(f)
         import faiss
         rag_index = faiss.read_index(index_path)
+        rag_lexical = BM25Index.build(d.get('text', '') for d in rag_documents)
+        if rag_save_to_disk():
+            print(f"🔄 이전 형식 로컬 RAG 인덱스를 변환: {RAG_INDEX_DIR}")
         return True
     except Exception as e:
         print(f"RAG 로드 실패: {e}")
@@ -271,172 +347,247 @@ def health():
         }
     })
 
-@app.route('/chat', methods=['POST'])
-@require_valid_input
-@track_user_activity
-@measure_performance("Chat API")
-def chat():
-    try:
-        data = request.json
-        message = data.get('message', '')
-        player_uuid = data.get('player_uuid', '')
-        
-        # 🔧 개선된 모드팩 타겟팅: 수동 설정 우선, 자동 감지 폴백
-        modpack_name, modpack_version = get_target_modpack(data)
-        
-        print(f"🎯 타겟 모드팩: {modpack_name} v{modpack_version}")
-        print(f"📝 질문: {message[:100]}{'...' if len(message) > 100 else ''}")
-
-        # 마인크래프트 모드팩 컨텍스트 + RAG 첨부 (RAG 우선 사용)
-        rag_snippets = []
-        rag_hits_count = 0
-        rag_used_chars = 0
-        gcp_rag_results = []
-        rag_debug_info = {
-            'rag_attempted': True,
-            'rag_priority': 'gcp_first',
-            'fallback_reason': None
-        }
-        rag_system_used = "none"
-        
-        # 1. GCP RAG 시스템 우선 시도 (기본값)
-        if GCP_RAG_ENABLED and gcp_rag.is_enabled():
-            try:
-                print(f"🔍 GCP RAG 검색 시도: '{message[:50]}...' for {modpack_name} v{modpack_version}")
-                
-                gcp_results = gcp_rag.search_documents(
-                    query=message,
-                    modpack_name=modpack_name,
-                    modpack_version=modpack_version,
-                    top_k=RAG_TOP_K,
-                    min_score=0.6  # 임계값 낮춤 (더 많은 결과)
-                )
+def _cached_chat_payload(entry: Dict[str, Any]) -> Dict[str, Any]:
+    """캐시된 /chat 응답에 캐시 표시와 현재 시각 추가"""
+    return {
+        **entry['payload'],
+        "cached": True,
+        "cached_at": datetime.fromtimestamp(entry['stored_at']).isoformat(),
+        "timestamp": datetime.now().isoformat()
+    }
+
+def _prepare_chat(data: Dict[str, Any]) -> Dict[str, Any]:
+    """질문 처리 준비: 타겟 모드팩 결정, 응답 캐시 조회, RAG 검색, 프롬프트 구성
+    캐시 적중 시 'cached_payload'에 바로 돌려줄 응답이 들어 있다.
+    """
+    message = data.get('message', '')
+    player_uuid = data.get('player_uuid', '')
+    model = current_model
+    
+    # 🔧 개선된 모드팩 타겟팅: 수동 설정 우선, 자동 감지 폴백
+    modpack_name, modpack_version = get_target_modpack(data)
+    
+    print(f"🎯 타겟 모드팩: {modpack_name} v{modpack_version}")
+    print(f"📝 질문: {message[:100]}{'...' if len(message) > 100 else ''}")
+
+    ctx = {
+        "message": message,
+        "player_uuid": player_uuid,
+        "model": model,
+        "modpack_name": modpack_name,
+        "modpack_version": modpack_version,
+        "cached_payload": None
+    }
+
+    # 응답 캐시 (정확 일치) - bypass_cache=true면 건너뜀
+    bypass_cache = bool(data.get('bypass_cache', False))
+    ctx["bypass_cache"] = bypass_cache
+    if not bypass_cache:
+        cached_entry = response_cache.get(modpack_name, modpack_version, model, message)
+        if cached_entry:
+            print("⚡ 응답 캐시 적중 (정확 일치)")
+            ctx["cached_payload"] = _cached_chat_payload(cached_entry)
+            return ctx
+
+    # 마인크래프트 모드팩 컨텍스트 + RAG 첨부 (RAG 우선 사용)
+    rag_snippets = []
+    rag_hits_count = 0
+    # 첨부 예산은 응답할 모델의 토큰 수 기준, 검색은 top_k보다 넓은 후보 풀에서 MMR로 골라 담음
+    packer = ContextPacker(model)
+    candidate_pool = RAG_TOP_K * max(1, RAG_MMR_POOL)
+    gcp_rag_results = []
+    rag_debug_info = {
+        'rag_attempted': True,
+        'rag_priority': 'gcp_first',
+        'fallback_reason': None
+    }
+    rag_system_used = "none"
+
+    # 검색용 질문: 언어 파일의 아이템 표시 이름을 아이템 ID/영어 이름으로 확장 ("디지털 광부" → "mekanism:digital_miner Digital Miner")
+    recipe_store = recipe_stores.get(modpack_name, modpack_version)
+    search_query = recipe_store.aliases.rewrite(message) if recipe_store else message
+    # 질문에서 찾은 아이템 ID (응답 캐시 의미 일치는 아이템이 같은 질문끼리만)
+    query_items = sorted({item_id for _, ids in recipe_store.aliases.find(message) for item_id in ids}) if recipe_store else []
+    ctx["query_items"] = query_items
+    if search_query != message:
+        rag_debug_info['query_rewrite'] = search_query
+        print(f"🔤 질문 확장: {search_query[len(message):][:100]}")
+
+    # 0. 사용처 질문("X로 뭘 만들 수 있어?")은 레시피 DB 재료 역색인으로 바로 답함 (벡터 검색 생략)
+    uses_item = parse_uses_query(message)
+    if uses_item:
+        uses = recipe_stores.uses(modpack_name, modpack_version, uses_item, limit=RAG_TOP_K * 4)
+        for entry in uses:
+            txt = f"{display_name(entry['ingredient'])} x{entry['ingredient_count']} → {describe_recipe(entry)}"
+            line = packer.add(f"- [레시피DB] [출처:{entry.get('source', 'unknown')}] {txt}")
+            if line is None:
+                break
+            rag_snippets.append(line)
+        if rag_snippets:
+            rag_system_used = "recipe_index"
+            rag_hits_count = len(uses)
+            rag_debug_info['recipe_index'] = {'used': True, 'item': uses_item, 'results_count': len(uses)}
+            print(f"✅ 재료 역색인: '{uses_item}' 사용 레시피 {len(uses)}개")
+
+    # 0-1. 제작 트리 질문("X 만들려면 원재료가 뭐가 필요해?")은 레시피 DB로 펼친 트리를 첨부 (벡터 검색과 함께 사용)
+    skip_vector_search = bool(rag_snippets)
+    tree_snippets = []
+    tree_item = parse_tree_query(message)
+    if tree_item and not skip_vector_search:
+        tree = resolve_crafting_tree(recipe_store, tree_item)
+        if tree:
+            # 트리는 예산의 절반까지 (나머지는 검색 결과 몫)
+            txt = packer.add(f"- [제작트리]\n{format_tree(tree)}", max_tokens=packer.max_tokens // 2)
+            if txt:
+                tree_snippets.append(txt)
+            rag_debug_info['crafting_tree'] = {'used': True, 'item': tree['item'], 'nodes': tree['nodes'],
+                                               'elapsed_ms': tree['elapsed_ms']}
+            print(f"✅ 제작 트리: {tree['item']} ({tree['nodes']}개 노드, {tree['elapsed_ms']}ms)")
+
+    # 1. GCP RAG 시스템 우선 시도 (기본값)
+    if not skip_vector_search and GCP_RAG_ENABLED and gcp_rag.is_enabled():
+        try:
+            print(f"🔍 GCP RAG 검색 시도: '{search_query[:50]}...' for {modpack_name} v{modpack_version}")
+            
+            gcp_results = gcp_rag.search_documents(
+                query=search_query,
+                modpack_name=modpack_name,
+                modpack_version=modpack_version,
+                top_k=candidate_pool,
+                min_score=0.6  # 임계값 낮춤 (더 많은 결과)
+            )
+            
+            if gcp_results:
+                gcp_rag_results = gcp_results
+                rag_system_used = "gcp_rag"
                 
-                if gcp_results:
-                    gcp_rag_results = gcp_results
-                    rag_system_used = "gcp_rag"
+                for result in packer.select(gcp_results, RAG_TOP_K, score_key='similarity'):
+                    src = result.get('doc_source', 'unknown')
+                    txt = result.get('text', '').replace('\n', ' ').strip()
+                    similarity = result.get('similarity', 0.0)
                     
-                    for result in gcp_results:
-                        if rag_used_chars >= RAG_TOTAL_MAX_CHARS:
-                            break
-                        
-                        src = result.get('doc_source', 'unknown')
-                        txt = result.get('text', '').replace('\n', ' ').strip()
-                        similarity = result.get('similarity', 0.0)
-                        
-                        if len(txt) > RAG_SNIPPET_MAX_CHARS:
-                            txt = txt[:RAG_SNIPPET_MAX_CHARS] + ' …'
-                        
-                        remaining = RAG_TOTAL_MAX_CHARS - rag_used_chars
-                        if len(txt) > remaining:
-                            if remaining < 50:
-                                break
-                            txt = txt[:remaining] + ' …'
-                        
-                        rag_snippets.append(f"- [GCP-RAG:{similarity:.2f}] [출처:{src}] {txt}")
-                        rag_used_chars += len(txt)
-                    
-                    rag_hits_count = len(gcp_results)
-                    rag_debug_info['gcp_rag'] = {
-                        'used': True,
-                        'results_count': len(gcp_results),
-                        'results': gcp_results[:3],  # 상위 3개만 디버그용으로 저장
-                        'total_chars': rag_used_chars
-                    }
-                    
-                    print(f"✅ GCP RAG 성공: {len(gcp_results)}개 문서 검색됨")
-                    
-                else:
-                    # GCP RAG에서 결과 없음
-                    rag_debug_info['fallback_reason'] = f"GCP RAG에서 '{modpack_name} v{modpack_version}' 모드팩 데이터 없음 또는 관련성 낮음"
-                    rag_debug_info['gcp_rag'] = {
-                        'used': True,
-                        'results_count': 0,
-                        'no_results_reason': 'No matching documents or low similarity scores'
-                    }
-                    print(f"⚠️ GCP RAG: '{modpack_name} v{modpack_version}' 관련 문서 없음")
+                    line = packer.add(f"- [GCP-RAG:{similarity:.2f}] [출처:{src}] {txt}")
+                    if line is None:
+                        break
+                    rag_snippets.append(line)
                 
-            except Exception as e:
-                error_msg = f"GCP RAG 검색 오류: {str(e)}"
-                print(f"❌ {error_msg}")
-                rag_debug_info['fallback_reason'] = error_msg
+                rag_hits_count = len(gcp_results)
                 rag_debug_info['gcp_rag'] = {
-                    'used': False, 
-                    'error': str(e),
-                    'error_type': type(e).__name__
+                    'used': True,
+                    'results_count': len(gcp_results),
+                    'results': gcp_results[:3],  # 상위 3개만 디버그용으로 저장
+                    'total_chars': packer.used_chars,
+                    'total_tokens': packer.used_tokens
                 }
-        else:
-            # GCP RAG 비활성화됨
-            rag_debug_info['fallback_reason'] = "GCP RAG 시스템 비활성화됨"
+                
+                print(f"✅ GCP RAG 성공: {len(gcp_results)}개 문서 검색됨")
+                
+            else:
+                # GCP RAG에서 결과 없음
+                rag_debug_info['fallback_reason'] = f"GCP RAG에서 '{modpack_name} v{modpack_version}' 모드팩 데이터 없음 또는 관련성 낮음"
+                rag_debug_info['gcp_rag'] = {
+                    'used': True,
+                    'results_count': 0,
+                    'no_results_reason': 'No matching documents or low similarity scores'
+                }
+                print(f"⚠️ GCP RAG: '{modpack_name} v{modpack_version}' 관련 문서 없음")
+            
+        except Exception as e:
+            error_msg = f"GCP RAG 검색 오류: {str(e)}"
+            print(f"❌ {error_msg}")
+            rag_debug_info['fallback_reason'] = error_msg
             rag_debug_info['gcp_rag'] = {
-                'used': False,
-                'disabled_reason': 'GCP_RAG_ENABLED=false or gcp_rag not initialized'
+                'used': False, 
+                'error': str(e),
+                'error_type': type(e).__name__
             }
-            print("⚠️ GCP RAG 비활성화 상태")
-        
-        # 2. GCP RAG 실패/결과 없음 시 로컬 RAG 폴백
-        if not rag_snippets and rag_enabled:
-            try:
-                print("🔄 로컬 RAG 폴백 시도...")
-                hits = rag_search(message, top_k=RAG_TOP_K)
+    elif not skip_vector_search:
+        # GCP RAG 비활성화됨
+        rag_debug_info['fallback_reason'] = "GCP RAG 시스템 비활성화됨"
+        rag_debug_info['gcp_rag'] = {
+            'used': False,
+            'disabled_reason': 'GCP_RAG_ENABLED=false or gcp_rag not initialized'
+        }
+        print("⚠️ GCP RAG 비활성화 상태")
+    
+    # 2. GCP RAG 실패/결과 없음 시 로컬 RAG 폴백
+    if not rag_snippets and rag_enabled:
+        try:
+            print("🔄 로컬 RAG 폴백 시도...")
+            hits = rag_search(search_query, top_k=candidate_pool)
+            
+            if hits:
+                rag_hits_count = len(hits)
+                rag_system_used = "local_rag"
                 
-                if hits:
-                    rag_hits_count = len(hits)
-                    rag_system_used = "local_rag"
-                    
-                    for h in hits:
-                        if rag_used_chars >= RAG_TOTAL_MAX_CHARS:
-                            break
-                        src = h.get('source', '') or 'unknown'
-                        txt = (h.get('text', '') or '').replace('\n', ' ').strip()
-                        score = h.get('score', 0.0)
-                        
-                        if len(txt) > RAG_SNIPPET_MAX_CHARS:
-                            txt = txt[:RAG_SNIPPET_MAX_CHARS] + ' …'
-                        remaining = RAG_TOTAL_MAX_CHARS - rag_used_chars
-                        if len(txt) > remaining:
-                            if remaining < 50:
-                                break
-                            txt = txt[:remaining] + ' …'
-                        rag_snippets.append(f"- [로컬-RAG:{score:.2f}] [출처:{src}] {txt}")
-                        rag_used_chars += len(txt)
+                for h in packer.select(hits, RAG_TOP_K):
+                    src = h.get('source', '') or 'unknown'
+                    txt = (h.get('text', '') or '').replace('\n', ' ').strip()
+                    score = h.get('score', 0.0)
                     
-                    rag_debug_info['local_rag'] = {
-                        'used': True,
-                        'results_count': len(hits),
-                        'fallback_from': 'gcp_rag',
-                        'total_chars': rag_used_chars
-                    }
-                    
-                    print(f"✅ 로컬 RAG 폴백 성공: {len(hits)}개 문서 검색됨")
-                    
-                else:
-                    rag_debug_info['local_rag'] = {
-                        'used': True,
-                        'results_count': 0,
-                        'no_results_reason': 'No matching documents in local index'
-                    }
-                    print("⚠️ 로컬 RAG에서도 관련 문서 없음")
-                    
-            except Exception as e:
-                error_msg = f"로컬 RAG 폴백 오류: {str(e)}"
-                print(f"❌ {error_msg}")
+                    line = packer.add(f"- [로컬-RAG:{score:.2f}] [출처:{src}] {txt}")
+                    if line is None:
+                        break
+                    rag_snippets.append(line)
+                
                 rag_debug_info['local_rag'] = {
-                    'used': False,
-                    'error': str(e),
-                    'error_type': type(e).__name__
+                    'used': True,
+                    'results_count': len(hits),
+                    'fallback_from': 'gcp_rag',
+                    'total_chars': packer.used_chars,
+                    'total_tokens': packer.used_tokens
                 }
-        
-        # 3. RAG 결과 없으면 웹검색만 사용한다는 알림
+                
+                print(f"✅ 로컬 RAG 폴백 성공: {len(hits)}개 문서 검색됨")
+                
+            else:
+                rag_debug_info['local_rag'] = {
+                    'used': True,
+                    'results_count': 0,
+                    'no_results_reason': 'No matching documents in local index'
+                }
+                print("⚠️ 로컬 RAG에서도 관련 문서 없음")
+                
+        except Exception as e:
+            error_msg = f"로컬 RAG 폴백 오류: {str(e)}"
+            print(f"❌ {error_msg}")
+            rag_debug_info['local_rag'] = {
+                'used': False,
+                'error': str(e),
+                'error_type': type(e).__name__
+            }
+    
+    # 제작 트리는 검색 결과 앞에 둠
+    if tree_snippets:
         if not rag_snippets:
-            rag_system_used = "web_search_only"
-            if not rag_debug_info.get('fallback_reason'):
-                rag_debug_info['fallback_reason'] = "모든 RAG 시스템에서 관련 문서를 찾을 수 없음"
-            print("⚠️ RAG 시스템 결과 없음 - 웹검색만 사용")
-        
-        rag_block = "\n".join(rag_snippets) if rag_snippets else "(모드팩 관련 문서를 찾을 수 없어서 웹검색만 사용합니다)"
+            rag_system_used = "crafting_tree"
+        rag_snippets = tree_snippets + rag_snippets
+        rag_hits_count += 1
+
+    # 3. RAG 결과 없으면 웹검색만 사용한다는 알림
+    if not rag_snippets:
+        rag_system_used = "web_search_only"
+        if not rag_debug_info.get('fallback_reason'):
+            rag_debug_info['fallback_reason'] = "모든 RAG 시스템에서 관련 문서를 찾을 수 없음"
+        print("⚠️ RAG 시스템 결과 없음 - 웹검색만 사용")
+    
+    # 응답 캐시 (의미 일치) - RAG 검색에서 이미 계산된 질문 임베딩 재사용
+    query_namespace = GCP_EMBEDDING_MODEL_NAME if GCP_RAG_ENABLED and gcp_rag.is_enabled() else RAG_MODEL_NAME
+    query_embedding = query_embedding_cache.peek(query_namespace, search_query)
+    ctx["query_namespace"] = query_namespace
+    ctx["query_embedding"] = query_embedding
+    if not bypass_cache:
+        cached_entry = response_cache.get_similar(modpack_name, modpack_version, model,
+                                                  query_namespace, query_embedding, items=query_items)
+        if cached_entry:
+            print("⚡ 응답 캐시 적중 (의미 일치)")
+            ctx["cached_payload"] = _cached_chat_payload(cached_entry)
+            return ctx
+        response_cache.record_miss()
+
+    rag_block = "\n".join(rag_snippets) if rag_snippets else "(모드팩 관련 문서를 찾을 수 없어서 웹검색만 사용합니다)"
 
-        context = f"""
+    ctx["context"] = f"""
 당신은 마인크래프트 모드팩 전문가 AI 어시스턴트입니다.
 현재 모드팩: {modpack_name} v{modpack_version}
 
@@ -446,50 +597,93 @@ def chat():
 사용자의 질문에 대해 친절하고 정확하게 답변해주세요.
 제작법, 아이템 정보, 모드 설명 등을 포함할 수 있습니다.
 """
+    rag_debug_info['context_packer'] = packer.summary()
+    ctx["rag"] = {
+        "enabled": rag_enabled,
+        "gcp_enabled": GCP_RAG_ENABLED and gcp_rag.is_enabled(),
+        "system_used": rag_system_used,  # 실제 사용된 RAG 시스템
+        "hits": rag_hits_count,
+        "used": rag_hits_count > 0,
+        "success": rag_hits_count > 0,  # RAG 성공 여부
+        "fallback_reason": rag_debug_info.get('fallback_reason'),  # 폴백 이유
+        "top_k": RAG_TOP_K,
+        "candidate_pool": candidate_pool,
+        "max_tokens": packer.max_tokens,
+        "snippet_max_tokens": packer.snippet_max_tokens,
+        "used_tokens": packer.used_tokens,
+        "used_chars": packer.used_chars,
+        # 시스템 프롬프트 + 질문 전체 (모델별 추정치)
+        "prompt_tokens": packer.count(ctx["context"]) + packer.count(message),
+        "debug_info": rag_debug_info,
+        "user_message": rag_debug_info.get('fallback_reason') if rag_hits_count == 0 else None
+    }
+    return ctx
 
-        # 선택된 모델로 응답 생성
-        if current_model == "gemini" and gemini_client:
-            try:
-                # 웹검색 도구 설정
-                config = None
-                if GEMINI_WEBSEARCH_ENABLED:
-                    grounding_tool = types.Tool(google_search=types.GoogleSearch())
-                    config = types.GenerateContentConfig(tools=[grounding_tool])
-                
-                full_message = context + "\n\n사용자: " + message + "\n\n최신 정보가 필요하다면 웹 검색을 활용해서 정확한 답변을 제공해주세요."
-                
-                # 웹검색 지원 모델로 응답 생성
-                with track_model_usage("gemini-2.5-pro-web"):
-                    if config is not None:
-                        response = gemini_client.models.generate_content(
-                            model=GEMINI_MODEL,
-                            contents=full_message,
-                            config=config
-                        )
-                    else:
-                        response = gemini_client.models.generate_content(
-                            model=GEMINI_MODEL,
-                            contents=full_message
-                        )
-                    ai_response = response.text
-            except Exception as e:
-                print(f"Gemini 웹검색 모드 실패, 기본 모드로 폴백: {e}")
-                # 웹검색 실패시 기본 모드로 폴백
-                try:
-                    full_message = context + "\n\n사용자: " + message + "\n\nAI:"
+def _generate_chat_response(ctx: Dict[str, Any]):
+    """선택된 모델로 전체 응답 생성 → (응답 텍스트, 캐시 가능 여부)"""
+    model = ctx["model"]
+    context = ctx["context"]
+    message = ctx["message"]
+
+    # 선택된 모델로 응답 생성 (오류 안내 메시지는 캐시하지 않음)
+    response_ok = True
+    if model == "gemini" and gemini_client:
+        try:
+            # 웹검색 도구 설정
+            config = None
+            if GEMINI_WEBSEARCH_ENABLED:
+                grounding_tool = types.Tool(google_search=types.GoogleSearch())
+                config = types.GenerateContentConfig(tools=[grounding_tool])
+            
+            full_message = context + "\n\n사용자: " + message + "\n\n최신 정보가 필요하다면 웹 검색을 활용해서 정확한 답변을 제공해주세요."
+            
+            # 웹검색 지원 모델로 응답 생성
+            with track_model_usage("gemini-2.5-pro-web"):
+                if config is not None:
+                    response = gemini_client.models.generate_content(
+                        model=GEMINI_MODEL,
+                        contents=full_message,
+                        config=config
+                    )
+                else:
                     response = gemini_client.models.generate_content(
                         model=GEMINI_MODEL,
                         contents=full_message
                     )
-                    ai_response = response.text
-                except Exception as e2:
-                    ai_response = f"Gemini API 오류가 발생했습니다: {str(e2)}"
+                ai_response = response.text
+        except Exception as e:
+            print(f"Gemini 웹검색 모드 실패, 기본 모드로 폴백: {e}")
+            # 웹검색 실패시 기본 모드로 폴백
+            try:
+                full_message = context + "\n\n사용자: " + message + "\n\nAI:"
+                response = gemini_client.models.generate_content(
+                    model=GEMINI_MODEL,
+                    contents=full_message
+                )
+                ai_response = response.text
+            except Exception as e2:
+                response_ok = False
+                ai_response = f"Gemini API 오류가 발생했습니다: {str(e2)}"
 
-        elif current_model == "openai" and openai_client:
+    elif model == "openai" and openai_client:
+        try:
+            # 2025년 최신 OpenAI API 방식
+            response = openai_client.chat.completions.create(
+                model=OPENAI_MODEL_PRIMARY,  # 환경변수로 설정 가능
+                messages=[
+                    {"role": "system", "content": context},
+                    {"role": "user", "content": message}
+                ],
+                max_tokens=1000,
+                temperature=0.7
+            )
+            ai_response = response.choices[0].message.content
+        except Exception as e:
+            print(f"OpenAI GPT-4o-mini 실패, GPT-3.5-turbo로 폴백: {e}")
+            # 폴백 시도
             try:
-                # 2025년 최신 OpenAI API 방식
                 response = openai_client.chat.completions.create(
-                    model=OPENAI_MODEL_PRIMARY,  # 환경변수로 설정 가능
+                    model=OPENAI_MODEL_FALLBACK,
                     messages=[
                         {"role": "system", "content": context},
                         {"role": "user", "content": message}
@@ -498,64 +692,162 @@ def chat():
                     temperature=0.7
                 )
                 ai_response = response.choices[0].message.content
-            except Exception as e:
-                print(f"OpenAI GPT-4o-mini 실패, GPT-3.5-turbo로 폴백: {e}")
-                # 폴백 시도
-                try:
-                    response = openai_client.chat.completions.create(
-                        model=OPENAI_MODEL_FALLBACK,
-                        messages=[
-                            {"role": "system", "content": context},
-                            {"role": "user", "content": message}
-                        ],
-                        max_tokens=1000,
-                        temperature=0.7
-                    )
-                    ai_response = response.choices[0].message.content
-                except Exception as e2:
-                    ai_response = "OpenAI API 오류가 발생했습니다. 할당량이나 API 키를 확인해주세요."
+            except Exception as e2:
+                response_ok = False
+                ai_response = "OpenAI API 오류가 발생했습니다. 할당량이나 API 키를 확인해주세요."
 
-        elif current_model == "claude" and claude_client:
-            try:
-                response = claude_client.messages.create(
-                    model=CLAUDE_MODEL,  # 환경변수로 설정 가능
-                    max_tokens=1000,
+    elif model == "claude" and claude_client:
+        try:
+            response = claude_client.messages.create(
+                model=CLAUDE_MODEL,  # 환경변수로 설정 가능
+                max_tokens=1000,
+                messages=[
+                    {"role": "user", "content": context + "\n\n" + message}
+                ]
+            )
+            ai_response = response.content[0].text
+        except Exception as e:
+            response_ok = False
+            if "credit" in str(e).lower() or "billing" in str(e).lower():
+                ai_response = "Claude API는 유료 서비스입니다. 크레딧을 충전해주세요."
+            else:
+                ai_response = "Claude API 오류가 발생했습니다. API 키를 확인해주세요."
+
+    else:
+        response_ok = False
+        ai_response = "현재 사용 가능한 AI 모델이 없습니다. Gemini API 키를 설정해주세요."
+
+    return ai_response, response_ok
+
+def _stream_attempts(attempts, error_message) -> Iterator[str]:
+    """스트리밍 시도 목록을 순서대로 실행하며 토큰 조각을 반환.
+    첫 토큰 전에 실패하면 다음 시도로 폴백하고, 모두 실패하면 오류 안내 메시지를 반환한다.
+    마지막 실행 결과의 캐시 가능 여부는 StopIteration 값(True/False)으로 알린다.
+    """
+    last_error = None
+    for attempt in attempts:
+        started = False
+        try:
+            for piece in attempt():
+                if piece:
+                    started = True
+                    yield piece
+            return True
+        except Exception as e:
+            last_error = e
+            if started:
+                print(f"스트리밍 응답 중단: {e}")
+                yield "\n(응답이 중단되었습니다)"
+                return False
+            print(f"스트리밍 시도 실패, 다음 방식으로 폴백: {e}")
+    yield error_message(last_error)
+    return False
+
+def _stream_chat_response(ctx: Dict[str, Any]) -> Iterator[str]:
+    """선택된 모델의 스트리밍 API로 응답 토큰 조각 반환 (반환값: 캐시 가능 여부)"""
+    model = ctx["model"]
+    context = ctx["context"]
+    message = ctx["message"]
+
+    if model == "gemini" and gemini_client:
+        def gemini_web():
+            # 웹검색 도구 설정
+            options = {}
+            if GEMINI_WEBSEARCH_ENABLED:
+                grounding_tool = types.Tool(google_search=types.GoogleSearch())
+                options["config"] = types.GenerateContentConfig(tools=[grounding_tool])
+            full_message = context + "\n\n사용자: " + message + "\n\n최신 정보가 필요하다면 웹 검색을 활용해서 정확한 답변을 제공해주세요."
+            with track_model_usage("gemini-2.5-pro-web"):
+                for chunk in gemini_client.models.generate_content_stream(
+                        model=GEMINI_MODEL, contents=full_message, **options):
+                    yield chunk.text
+
+        def gemini_basic():
+            full_message = context + "\n\n사용자: " + message + "\n\nAI:"
+            for chunk in gemini_client.models.generate_content_stream(model=GEMINI_MODEL, contents=full_message):
+                yield chunk.text
+
+        return (yield from _stream_attempts([gemini_web, gemini_basic],
+                                            lambda e: f"Gemini API 오류가 발생했습니다: {str(e)}"))
+
+    if model == "openai" and openai_client:
+        def openai_stream(model_name):
+            def attempt():
+                stream = openai_client.chat.completions.create(
+                    model=model_name,
                     messages=[
-                        {"role": "user", "content": context + "\n\n" + message}
-                    ]
+                        {"role": "system", "content": context},
+                        {"role": "user", "content": message}
+                    ],
+                    max_tokens=1000,
+                    temperature=0.7,
+                    stream=True
                 )
-                ai_response = response.content[0].text
-            except Exception as e:
-                if "credit" in str(e).lower() or "billing" in str(e).lower():
-                    ai_response = "Claude API는 유료 서비스입니다. 크레딧을 충전해주세요."
-                else:
-                    ai_response = "Claude API 오류가 발생했습니다. API 키를 확인해주세요."
+                for chunk in stream:
+                    if chunk.choices:
+                        yield chunk.choices[0].delta.content
+            return attempt
 
-        else:
-            ai_response = "현재 사용 가능한 AI 모델이 없습니다. Gemini API 키를 설정해주세요."
+        return (yield from _stream_attempts(
+            [openai_stream(OPENAI_MODEL_PRIMARY), openai_stream(OPENAI_MODEL_FALLBACK)],
+            lambda e: "OpenAI API 오류가 발생했습니다. 할당량이나 API 키를 확인해주세요."
+        ))
 
-        return jsonify({
-            "success": True,
-            "response": ai_response,
-            "model": current_model,
-            "timestamp": datetime.now().isoformat(),
-            "rag": {
-                "enabled": rag_enabled,
-                "gcp_enabled": GCP_RAG_ENABLED and gcp_rag.is_enabled(),
-                "system_used": rag_system_used,  # 실제 사용된 RAG 시스템
-                "hits": rag_hits_count,
-                "used": rag_hits_count > 0,
-                "success": rag_hits_count > 0,  # RAG 성공 여부
-                "fallback_reason": rag_debug_info.get('fallback_reason'),  # 폴백 이유
-                "top_k": RAG_TOP_K,
-                "snippet_max_chars": RAG_SNIPPET_MAX_CHARS,
-                "total_max_chars": RAG_TOTAL_MAX_CHARS,
-                "used_chars": rag_used_chars,
-                "debug_info": rag_debug_info,
-                "user_message": rag_debug_info.get('fallback_reason') if rag_hits_count == 0 else None
-            },
-            "websearch_enabled": GEMINI_WEBSEARCH_ENABLED
-        })
+    if model == "claude" and claude_client:
+        def claude_stream():
+            with claude_client.messages.stream(
+                    model=CLAUDE_MODEL,
+                    max_tokens=1000,
+                    messages=[{"role": "user", "content": context + "\n\n" + message}]) as stream:
+                yield from stream.text_stream
+
+        def claude_error(e):
+            if "credit" in str(e).lower() or "billing" in str(e).lower():
+                return "Claude API는 유료 서비스입니다. 크레딧을 충전해주세요."
+            return "Claude API 오류가 발생했습니다. API 키를 확인해주세요."
+
+        return (yield from _stream_attempts([claude_stream], claude_error))
+
+    yield "현재 사용 가능한 AI 모델이 없습니다. Gemini API 키를 설정해주세요."
+    return False
+
+def _finish_chat(ctx: Dict[str, Any], ai_response: str, response_ok: bool) -> Dict[str, Any]:
+    """응답 페이로드 구성 후 응답 캐시에 저장 (오류 안내 메시지는 캐시하지 않음)"""
+    payload = {
+        "success": True,
+        "response": ai_response,
+        "model": ctx["model"],
+        "timestamp": datetime.now().isoformat(),
+        "rag": ctx["rag"],
+        "websearch_enabled": GEMINI_WEBSEARCH_ENABLED
+    }
+
+    if response_ok and not ctx["bypass_cache"]:
+        response_cache.put(ctx["modpack_name"], ctx["modpack_version"], ctx["model"], ctx["message"], payload,
+                           namespace=ctx["query_namespace"], embedding=ctx["query_embedding"],
+                           items=ctx.get("query_items", ()))
+    return payload
+
+def _chat_flight_key(ctx: Dict[str, Any]):
+    """요청 합치기 키: 응답 캐시와 같은 기준(모드팩, 버전, 모델, 정규화된 질문)"""
+    return (ctx["modpack_name"], ctx["modpack_version"], ctx["model"], normalize_query(ctx["message"]))
+
+@app.route('/chat', methods=['POST'])
+@require_valid_input
+@track_user_activity
+@measure_performance("Chat API")
+def chat():
+    try:
+        ctx = _prepare_chat(request.json)
+        if ctx["cached_payload"]:
+            return jsonify(ctx["cached_payload"])
+
+        if ctx["bypass_cache"]:
+            payload = _finish_chat(ctx, *_generate_chat_response(ctx))
+        else:
+            payload, _ = chat_flight.do(_chat_flight_key(ctx),
+                                        lambda: _finish_chat(ctx, *_generate_chat_response(ctx)))
+        return jsonify({**payload, "cached": False})
 
     except Exception as e:
         return jsonify({
@@ -563,6 +855,58 @@ def chat():
             "error": str(e)
         }), 500
 
+def _sse_event(event: str, data: Dict[str, Any]) -> str:
+    """Server-Sent Events 메시지 한 개"""
+    return f"event: {event}\ndata: {json.dumps(data, ensure_ascii=False, default=str)}\n\n"
+
+@app.route('/chat/stream', methods=['POST'])
+@require_valid_input
+@track_user_activity
+@measure_performance("Chat Stream API")
+def chat_stream():
+    """/chat의 스트리밍 버전 (Server-Sent Events)
+    meta(RAG 정보) → token(응답 조각, 여러 번) → done(/chat과 같은 최종 페이로드) 순서로 전송
+    """
+    try:
+        ctx = _prepare_chat(request.json)
+    except Exception as e:
+        return jsonify({"success": False, "error": str(e)}), 500
+
+    def events():
+        cached_payload = ctx["cached_payload"]
+        if cached_payload:
+            yield _sse_event('meta', {"model": cached_payload.get("model"), "cached": True,
+                                      "rag": cached_payload.get("rag")})
+            yield _sse_event('token', {"text": cached_payload.get("response", "")})
+            yield _sse_event('done', cached_payload)
+            return
+
+        yield _sse_event('meta', {
+            "model": ctx["model"],
+            "cached": False,
+            "modpack": {"name": ctx["modpack_name"], "version": ctx["modpack_version"]},
+            "rag": ctx["rag"],
+            "websearch_enabled": GEMINI_WEBSEARCH_ENABLED
+        })
+        try:
+            parts = []
+            tokens = _stream_chat_response(ctx)
+            while True:
+                try:
+                    piece = next(tokens)
+                except StopIteration as stop:
+                    response_ok = bool(stop.value)
+                    break
+                parts.append(piece)
+                yield _sse_event('token', {"text": piece})
+            payload = _finish_chat(ctx, "".join(parts), response_ok)
+            yield _sse_event('done', {**payload, "cached": False})
+        except Exception as e:
+            yield _sse_event('error', {"success": False, "error": str(e)})
+
+    return Response(stream_with_context(events()), mimetype='text/event-stream',
+                    headers={'Cache-Control': 'no-cache', 'X-Accel-Buffering': 'no'})
+
 @app.route('/models', methods=['GET'])
 def get_models():
     models = []
@@ -619,6 +963,8 @@ def rag_build():
         if not normalized:
             return jsonify({"success": False, "error": "유효한 문서가 없습니다"}), 400
         ok = build_rag(normalized)
+        if ok:
+            response_cache.invalidate()
         return jsonify({"success": ok, "count": len(normalized)})
     except Exception as e:
         return jsonify({"success": False, "error": str(e)}), 500
@@ -680,6 +1026,7 @@ def api_modpack_switch():
     """간소화된 모드팩 분석 엔드포인트.
     현재는 실제 분석 대신 입력값을 검증하고 기본 메트릭을 반환합니다.
     modpack_switch.sh가 기대하는 필드를 포함해 성공적으로 동작하도록 맞춥니다.
+    async=true면 작업 ID만 바로 반환하고 결과는 /jobs/<job_id>로 조회합니다.
     """
     try:
         data = request.get_json(force=True) or {}
@@ -691,92 +1038,208 @@ def api_modpack_switch():
         if not modpack_name:
             return jsonify({"success": False, "error": "modpack_name is required"}), 400
 
-        # 간단 스캔 + RAG 자동 구축
-        stats = {}
-        built = False
-        if modpack_path and os.path.isdir(modpack_path):
-            scan = scan_modpack(modpack_path)
-            docs = scan.get('docs', [])
-            stats = scan.get('stats', {})
-            if docs:
-                built = build_rag(docs)
-
-        # 반환 포맷은 스크립트가 파싱하는 키와 일치해야 함
-        result = {
-            "success": True,
-            "modpack": {
-                "name": modpack_name,
-                "version": modpack_version,
-                "path": modpack_path,
-            },
-            "mods_count": stats.get('mods', 0),
-            "recipes_count": stats.get('recipes', 0),
-            "items_count": stats.get('kubejs', 0),
-            "rag_built": built,
-            "language_mappings_added": 0,
-            "timestamp": datetime.now().isoformat()
-        }
-        return jsonify(result)
+        job, created = job_manager.submit(
+            'modpack_switch', f"local:{modpack_name}:{modpack_version}",
+            lambda job: _switch_modpack(modpack_name, modpack_version, modpack_path, job),
+            params={'modpack_name': modpack_name, 'modpack_version': modpack_version,
+                    'modpack_path': modpack_path}
+        )
+        if data.get('async'):
+            return _job_accepted(job, created)
+        return _job_result(job)
     except Exception as e:
         return jsonify({"success": False, "error": str(e)}), 500
 
-@app.route('/recipe/<item_name>', methods=['GET'])
-def get_recipe(item_name):
-    try:
-        # 현재 활성 모델을 사용해서 레시피 검색
-        if current_model == "gemini" and gemini_client:
+def _switch_modpack(modpack_name: str, modpack_version: str, modpack_path: str, job) -> Dict[str, Any]:
+    """모드팩 스캔 + 로컬 RAG 구축 (백그라운드 작업 본체)"""
+    # 간단 스캔 + RAG 자동 구축
+    stats = {}
+    consolidation = {}
+    built = False
+    if modpack_path and os.path.isdir(modpack_path):
+        # 매니페스트로 바뀐 파일만 다시 파싱
+        manifest_path = os.path.join(RAG_DIR, 'manifests', f"{modpack_name}_{modpack_version}.json")
+        manifest = IndexManifest.load(manifest_path)
+        scan = scan_modpack(modpack_path, manifest=manifest)
+        manifest.save(manifest_path)
+        docs = scan.get('docs', [])
+        stats = scan.get('stats', {})
+        job.report('scan', len(docs))
+        recipe_stores.put(modpack_name, modpack_version, RecipeStore.from_docs(docs, scan.get('tags'), scan.get('aliases')))
+        # 임베딩 전 정리: 같은 결과 아이템 레시피 묶기, 완전/유사 중복 접기 (레시피 DB는 원본 문서로 구성)
+        docs, consolidation = consolidate_docs(docs)
+        print(f"문서 정리: {consolidation['input']}개 → {consolidation['output']}개 "
+              f"({consolidation['reduction']:.0%} 감소)")
+        job.report('consolidate', len(docs))
+        if docs:
+            # 로컬 인덱스는 하나뿐이므로 다른 모드팩 전환과 동시에 구축하지 않음
+            with rag_build_lock:
+                built = build_rag(docs)
+            job.report('embed', len(docs))
+    if built:
+        # 로컬 인덱스는 모드팩 구분 없이 하나이므로 전체 응답 무효화
+        response_cache.invalidate()
+
+    # 반환 포맷은 스크립트가 파싱하는 키와 일치해야 함
+    return {
+        "success": True,
+        "modpack": {
+            "name": modpack_name,
+            "version": modpack_version,
+            "path": modpack_path,
+        },
+        "mods_count": stats.get('mods', 0),
+        "recipes_count": stats.get('recipes', 0),
+        "items_count": stats.get('kubejs', 0),
+        "rag_built": built,
+        "consolidation": consolidation,
+        "language_mappings_added": 0,
+        "timestamp": datetime.now().isoformat()
+    }
+
+# ---------------- 백그라운드 작업 엔드포인트 ----------------
+def _job_accepted(job, created: bool):
+    """비동기 요청 응답: 작업 ID와 상태 조회 경로"""
+    return jsonify({
+        "success": True,
+        "job_id": job.id,
+        "status": job.status,
+        "deduplicated": not created,
+        "status_url": f"/jobs/{job.id}"
+    }), 202
+
+def _job_conflict(job, kind: str):
+    """같은 키에 다른 종류의 작업이 진행 중이면 409 응답 (아니면 None)"""
+    if job.kind == kind:
+        return None
+    return jsonify({
+        "success": False,
+        "error": f"같은 모드팩의 다른 작업({job.kind})이 진행 중입니다. 끝난 뒤 다시 요청하세요.",
+        "job_id": job.id,
+        "status_url": f"/jobs/{job.id}"
+    }), 409
+
+def _gcp_job_key(modpack_name: str, modpack_version: str) -> str:
+    """GCP 인덱스 구축/삭제 공통 작업 키 - 같은 모드팩의 구축과 삭제가 동시에 돌지 않게 함"""
+    return f"gcp:{modpack_name}:{modpack_version}"
+
+def _job_result(job):
+    """동기 요청 응답: 작업이 끝날 때까지 기다린 뒤 결과 반환"""
+    job.wait()
+    if job.result is not None:
+        return jsonify(job.result)
+    return jsonify({"success": False, "error": job.error or "작업이 취소되었습니다", "job_id": job.id}), 500
+
+@app.route('/jobs', methods=['GET'])
+def jobs_list():
+    return jsonify({"success": True, "jobs": [job.to_dict() for job in job_manager.list()]})
+
+@app.route('/jobs/<job_id>', methods=['GET'])
+def jobs_status(job_id):
+    job = job_manager.get(job_id)
+    if job is None:
+        return jsonify({"success": False, "error": "작업을 찾을 수 없습니다"}), 404
+    return jsonify({"success": True, "job": job.to_dict()})
+
+@app.route('/jobs/<job_id>/cancel', methods=['POST'])
+def jobs_cancel(job_id):
+    job = job_manager.cancel(job_id)
+    if job is None:
+        return jsonify({"success": False, "error": "작업을 찾을 수 없습니다"}), 404
+    return jsonify({"success": True, "job": job.to_dict()})
+
+def _generate_recipe_text(item_name: str, model: str) -> str:
+    """선택된 모델로 레시피 설명 생성 (웹검색 우선)"""
+    # 현재 활성 모델을 사용해서 레시피 검색
+    if model == "gemini" and gemini_client:
+        try:
+            # 웹검색 도구 설정으로 최신 레시피 정보 검색
+            grounding_tool = types.Tool(google_search=types.GoogleSearch())
+            config = types.GenerateContentConfig(tools=[grounding_tool])
+            
+            query = f"마인크래프트에서 {item_name}의 제작법을 알려주세요. 재료와 제작 방법을 포함해서 답변해주세요. 최신 정보를 검색해서 정확한 답변을 제공해주세요."
+            
+            response = gemini_client.models.generate_content(
+                model=GEMINI_MODEL,
+                contents=query,
+                config=config
+            )
+            recipe_text = response.text
+        except Exception as e:
+            print(f"Gemini 웹검색 레시피 검색 실패, 기본 모드로 폴백: {e}")
+            # 폴백: 검색 없이 레시피 생성
             try:
-                # 웹검색 도구 설정으로 최신 레시피 정보 검색
-                grounding_tool = types.Tool(google_search=types.GoogleSearch())
-                config = types.GenerateContentConfig(tools=[grounding_tool])
-                
-                query = f"마인크래프트에서 {item_name}의 제작법을 알려주세요. 재료와 제작 방법을 포함해서 답변해주세요. 최신 정보를 검색해서 정확한 답변을 제공해주세요."
-                
+                query = f"마인크래프트에서 {item_name}의 제작법을 알려주세요. 재료와 제작 방법을 포함해서 답변해주세요."
                 response = gemini_client.models.generate_content(
                     model=GEMINI_MODEL,
-                    contents=query,
-                    config=config
+                    contents=query
                 )
                 recipe_text = response.text
-            except Exception as e:
-                print(f"Gemini 웹검색 레시피 검색 실패, 기본 모드로 폴백: {e}")
-                # 폴백: 검색 없이 레시피 생성
-                try:
-                    query = f"마인크래프트에서 {item_name}의 제작법을 알려주세요. 재료와 제작 방법을 포함해서 답변해주세요."
-                    response = gemini_client.models.generate_content(
-                        model=GEMINI_MODEL,
-                        contents=query
-                    )
-                    recipe_text = response.text
-                except:
-                    recipe_text = f"{item_name}의 제작법을 찾을 수 없습니다. 게임 내 제작법 책을 확인해보세요."
-        
-        elif current_model == "openai" and openai_client:
-            try:
-                query = f"마인크래프트에서 {item_name}의 제작법을 알려주세요. 재료와 제작 방법을 포함해서 답변해주세요."
-                response = openai_client.chat.completions.create(
-                    model=OPENAI_MODEL_PRIMARY,
-                    messages=[{"role": "user", "content": query}],
-                    max_tokens=500,
-                    temperature=0.7
-                )
-                recipe_text = response.choices[0].message.content
-            except:
-                recipe_text = f"{item_name}의 제작법을 찾을 수 없습니다. 게임 내 제작법 책을 확인해보세요."
-        
-        elif current_model == "claude" and claude_client:
-            try:
-                query = f"마인크래프트에서 {item_name}의 제작법을 알려주세요. 재료와 제작 방법을 포함해서 답변해주세요."
-                response = claude_client.messages.create(
-                    model=CLAUDE_MODEL,
-                    max_tokens=500,
-                    messages=[{"role": "user", "content": query}]
-                )
-                recipe_text = response.content[0].text
             except:
                 recipe_text = f"{item_name}의 제작법을 찾을 수 없습니다. 게임 내 제작법 책을 확인해보세요."
-        else:
+    
+    elif model == "openai" and openai_client:
+        try:
+            query = f"마인크래프트에서 {item_name}의 제작법을 알려주세요. 재료와 제작 방법을 포함해서 답변해주세요."
+            response = openai_client.chat.completions.create(
+                model=OPENAI_MODEL_PRIMARY,
+                messages=[{"role": "user", "content": query}],
+                max_tokens=500,
+                temperature=0.7
+            )
+            recipe_text = response.choices[0].message.content
+        except:
+            recipe_text = f"{item_name}의 제작법을 찾을 수 없습니다. 게임 내 제작법 책을 확인해보세요."
+    
+    elif model == "claude" and claude_client:
+        try:
+            query = f"마인크래프트에서 {item_name}의 제작법을 알려주세요. 재료와 제작 방법을 포함해서 답변해주세요."
+            response = claude_client.messages.create(
+                model=CLAUDE_MODEL,
+                max_tokens=500,
+                messages=[{"role": "user", "content": query}]
+            )
+            recipe_text = response.content[0].text
+        except:
             recipe_text = f"{item_name}의 제작법을 찾을 수 없습니다. 게임 내 제작법 책을 확인해보세요."
+    else:
+        recipe_text = f"{item_name}의 제작법을 찾을 수 없습니다. 게임 내 제작법 책을 확인해보세요."
+
+    return recipe_text
+
+def _recipe_info_from_store(item_name: str, entry: Dict[str, Any]) -> Dict[str, Any]:
+    """레시피 DB 항목 → /recipe 응답의 recipe 구조"""
+    recipe_type = entry.get('recipe_type', '')
+    return {
+        "item": item_name,
+        "item_id": entry.get('result_id'),
+        "count": entry.get('result_count', 1),
+        "recipe": describe_recipe(entry),
+        "grid": entry.get('grid') or [[None, None, None], [None, None, None], [None, None, None]],
+        "key": entry.get('key', {}),
+        "materials": entry.get('materials', []),
+        "crafting_type": "crafting_table" if 'crafting_' in recipe_type else recipe_type,
+        "source_file": entry.get('source')
+    }
+
+@app.route('/recipe/<item_name>', methods=['GET'])
+def get_recipe(item_name):
+    try:
+        # 1. 모드팩 레시피 DB (스캔 시 구축) - 찾으면 LLM 호출 없이 바로 응답
+        modpack_name, modpack_version = get_target_modpack(request.args, verbose=False)
+        recipes = recipe_stores.lookup(modpack_name, modpack_version, item_name)
+        if recipes:
+            return jsonify({
+                "success": True,
+                "source": "recipe_store",
+                "recipe": _recipe_info_from_store(item_name, recipes[0]),
+                "alternatives": [_recipe_info_from_store(item_name, entry) for entry in recipes[1:]]
+            })
+
+        # 2. 레시피 DB에 없으면 LLM으로 검색
+        # 같은 아이템 요청이 동시에 들어오면 LLM 호출 한 번의 결과를 공유
+        recipe_text, _ = recipe_flight.do((current_model, item_name.strip().lower()),
+                                          lambda: _generate_recipe_text(item_name, current_model))
 
         # 3x3 레시피 구조(있으면 AI 응답 파싱, 기본은 텍스트만)
         recipe_info = {
@@ -789,6 +1252,7 @@ def get_recipe(item_name):
 
         return jsonify({
             "success": True,
+            "source": "llm",
             "recipe": recipe_info
         })
 
@@ -798,6 +1262,51 @@ def get_recipe(item_name):
             "error": str(e)
         }), 500
 
+@app.route('/recipe/uses/<path:item_name>', methods=['GET'])
+def get_recipe_uses(item_name):
+    """재료로 쓰이는 레시피 목록 (레시피 DB 재료 역색인, LLM 호출 없음)"""
+    try:
+        modpack_name, modpack_version = get_target_modpack(request.args, verbose=False)
+        limit = request.args.get('limit', 50, type=int)
+        uses = recipe_stores.uses(modpack_name, modpack_version, item_name, limit=limit)
+        return jsonify({
+            "success": True,
+            "item": item_name,
+            "modpack_name": modpack_name,
+            "modpack_version": modpack_version,
+            "count": len(uses),
+            "uses": [dict(_recipe_info_from_store(display_name(entry.get('result_id', 'unknown')), entry),
+                          ingredient=entry['ingredient'], ingredient_count=entry['ingredient_count'])
+                     for entry in uses]
+        })
+
+    except Exception as e:
+        return jsonify({
+            "success": False,
+            "error": str(e)
+        }), 500
+
+@app.route('/recipe/tree/<path:item_name>', methods=['GET'])
+def get_recipe_tree(item_name):
+    """전체 제작 트리와 원재료 합계 (레시피 DB 기준, LLM 호출 없음)"""
+    try:
+        modpack_name, modpack_version = get_target_modpack(request.args, verbose=False)
+        quantity = request.args.get('quantity', 1, type=int)
+        tree = resolve_crafting_tree(recipe_stores.get(modpack_name, modpack_version), item_name, quantity)
+        if tree is None:
+            return jsonify({
+                "success": False,
+                "error": f"'{item_name}' 레시피가 {modpack_name} v{modpack_version} 레시피 DB에 없습니다"
+            }), 404
+
+        return jsonify(dict(tree, success=True, summary=format_tree(tree)))
+
+    except Exception as e:
+        return jsonify({
+            "success": False,
+            "error": str(e)
+        }), 500
+
 # =============== GCP RAG 관리 엔드포인트 ===============
 
 @app.route('/gcp-rag/build', methods=['POST'])
@@ -821,9 +1330,28 @@ def gcp_rag_build():
                 "error": "GCP RAG 시스템이 비활성화되어 있습니다. GCP_PROJECT_ID 환경변수와 인증 설정을 확인하세요."
             }), 503
         
-        # 비동기적으로 인덱스 구축 (실제 환경에서는 Celery 등 사용 권장)
-        result = gcp_rag.build_modpack_index(modpack_name, modpack_version, modpack_path)
-        return jsonify(result)
+        # 기본은 증분 구축 (incremental=false면 전체 재구축)
+        incremental = bool(data.get('incremental', True))
+        
+        def run_build(job):
+            result = gcp_rag.build_modpack_index(modpack_name, modpack_version, modpack_path,
+                                                 incremental=incremental, progress=job.report)
+            if result.get('success'):
+                response_cache.invalidate(modpack_name, modpack_version)
+            return result
+        
+        # 백그라운드 작업으로 구축 (같은 모드팩의 구축이 진행 중이면 그 작업을 공유, 삭제 중이면 409)
+        job, created = job_manager.submit(
+            'gcp_rag_build', _gcp_job_key(modpack_name, modpack_version), run_build,
+            params={'modpack_name': modpack_name, 'modpack_version': modpack_version,
+                    'modpack_path': modpack_path, 'incremental': incremental}
+        )
+        conflict = _job_conflict(job, 'gcp_rag_build')
+        if conflict:
+            return conflict
+        if data.get('async'):
+            return _job_accepted(job, created)
+        return _job_result(job)
         
     except Exception as e:
         return jsonify({"success": False, "error": str(e)}), 500
@@ -894,6 +1422,22 @@ def gcp_rag_modpacks():
     except Exception as e:
         return jsonify({"success": False, "error": str(e)}), 500
 
+def _submit_gcp_delete(modpack_name: str, modpack_version: str):
+    """GCP 인덱스 삭제 작업 등록 → (작업, 새로 만들었는지 여부)
+    같은 모드팩의 구축이 진행 중이면 그 구축 작업이 반환됨 (호출 쪽에서 kind로 구분)
+    """
+    def run_delete(job):
+        result = gcp_rag.delete_modpack_index(modpack_name, modpack_version, progress=job.report)
+        if result.get('success'):
+            response_cache.invalidate(modpack_name, modpack_version)
+        result['message'] = f"{modpack_name} v{modpack_version} 인덱스 삭제 {'완료' if result.get('success') else '실패'}"
+        return result
+    
+    return job_manager.submit(
+        'gcp_rag_delete', _gcp_job_key(modpack_name, modpack_version), run_delete,
+        params={'modpack_name': modpack_name, 'modpack_version': modpack_version}
+    )
+
 @app.route('/gcp-rag/delete', methods=['DELETE'])
 def gcp_rag_delete():
     """GCP RAG 인덱스 삭제"""
@@ -914,11 +1458,54 @@ def gcp_rag_delete():
                 "error": "GCP RAG 시스템이 비활성화되어 있습니다."
             }), 503
         
-        success = gcp_rag.delete_modpack_index(modpack_name, modpack_version)
-        return jsonify({
-            "success": success,
-            "message": f"{modpack_name} v{modpack_version} 인덱스 삭제 {'완료' if success else '실패'}"
-        })
+        # 큰 모드팩은 오래 걸리므로 백그라운드 작업으로 삭제 (진행률: progress.delete, 중단 시 다시 요청하면 이어서 삭제)
+        # 구축과 같은 작업 키를 써서 구축 중에는 삭제하지 않음 (409)
+        job, created = _submit_gcp_delete(modpack_name, modpack_version)
+        conflict = _job_conflict(job, 'gcp_rag_delete')
+        if conflict:
+            return conflict
+        if data.get('async'):
+            return _job_accepted(job, created)
+        return _job_result(job)
+        
+    except Exception as e:
+        return jsonify({"success": False, "error": str(e)}), 500
+
+@app.route('/gcp-rag/sweep', methods=['POST'])
+def gcp_rag_sweep():
+    """메타데이터가 가리키지 않는 modpack_* 컬렉션 정리 (dry_run=true면 대상 목록만)"""
+    try:
+        data = request.get_json(silent=True) or {}
+        if not gcp_rag.is_enabled():
+            return jsonify({
+                "success": False,
+                "error": "GCP RAG 시스템이 비활성화되어 있습니다."
+            }), 503
+        
+        dry_run = bool(data.get('dry_run', False))
+        min_age_hours = float(data.get('min_age_hours', ORPHAN_MIN_AGE_HOURS))
+        
+        def resume_delete(name, version):
+            """삭제 도중 멈춘 모드팩은 모드팩별 작업 키로 삭제 작업 등록 (같은 모드팩 구축 중이면 다음 정리로 미룸)"""
+            job, _ = _submit_gcp_delete(name, version)
+            return {
+                "modpack": f"{name}_{version}",
+                "job_id": job.id,
+                "skipped": job.kind != 'gcp_rag_delete',
+                "status_url": f"/jobs/{job.id}"
+            }
+        
+        def run_sweep(job):
+            return gcp_rag.sweep_orphan_collections(min_age_hours=min_age_hours, dry_run=dry_run,
+                                                    progress=job.report, resume=resume_delete)
+        
+        job, created = job_manager.submit(
+            'gcp_rag_sweep', f"gcp-sweep:{dry_run}", run_sweep,
+            params={'dry_run': dry_run, 'min_age_hours': min_age_hours}
+        )
+        if data.get('async'):
+            return _job_accepted(job, created)
+        return _job_result(job)
         
     except Exception as e:
         return jsonify({"success": False, "error": str(e)}), 500
@@ -0,0 +1,245 @@
+#!/usr/bin/env python3
+"""
+ASGI 서빙 모드 - /chat을 비동기로 처리해 LLM 응답을 기다리는 동안 워커 스레드를 점유하지 않음
+
+- POST /chat: RAG 검색(Firestore/FAISS, 동기 코드)은 전용 스레드 풀에서, LLM 호출은 각 SDK의
+  비동기 클라이언트로 await 한다. 동시 처리 수는 CHAT_MAX_CONCURRENCY로 제한한다.
+- 그 밖의 모든 엔드포인트(/chat/stream 포함)는 기존 Flask 앱으로 위임한다.
+
+실행:
+    uvicorn asgi_app:application --host 0.0.0.0 --port 5000
+    python asgi_app.py
+"""
+
+import os
+import json
+import time
+import asyncio
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, Dict, List, Tuple
+import logging
+
+from asgiref.wsgi import WsgiToAsgi
+
+import app as backend
+from chat_limiter import ChatConcurrencyLimiter, ChatOverloaded
+from middleware.monitoring import metrics_collector
+
+logger = logging.getLogger(__name__)
+
+CHAT_MAX_CONCURRENCY = int(os.getenv('CHAT_MAX_CONCURRENCY', '32'))
+CHAT_QUEUE_TIMEOUT = float(os.getenv('CHAT_QUEUE_TIMEOUT', '30'))
+CHAT_RAG_WORKERS = int(os.getenv('CHAT_RAG_WORKERS', '8'))
+
+chat_limiter = ChatConcurrencyLimiter(CHAT_MAX_CONCURRENCY, CHAT_QUEUE_TIMEOUT)
+rag_executor = ThreadPoolExecutor(max_workers=max(1, CHAT_RAG_WORKERS), thread_name_prefix='chat-rag')
+metrics_collector.register_stats_provider('async_chat', chat_limiter.stats)
+
+# 비동기 LLM 클라이언트 (동기 클라이언트가 초기화된 경우에만 생성)
+async_openai_client = None
+async_claude_client = None
+
+if backend.openai_client:
+    try:
+        from openai import AsyncOpenAI
+        async_openai_client = AsyncOpenAI(api_key=backend.OPENAI_API_KEY)
+    except Exception as e:
+        print(f"⚠️ OpenAI 비동기 클라이언트 초기화 실패: {e}")
+
+if backend.claude_client:
+    try:
+        import anthropic
+        async_claude_client = anthropic.AsyncAnthropic(api_key=backend.ANTHROPIC_API_KEY)
+    except Exception as e:
+        print(f"⚠️ Claude 비동기 클라이언트 초기화 실패: {e}")
+
+# Flask 앱의 after_request와 같은 응답 헤더
+RESPONSE_HEADERS = [
+    (b'access-control-allow-origin', b'*'),
+    (b'access-control-allow-methods', b'GET, POST, OPTIONS'),
+    (b'access-control-allow-headers', b'Content-Type, Authorization'),
+    (b'x-content-type-options', b'nosniff'),
+    (b'x-frame-options', b'DENY'),
+    (b'x-xss-protection', b'1; mode=block'),
+]
+
+
+async def _run_attempts(attempts: List[Callable], error_message: Callable[[Exception], str]) -> Tuple[str, bool]:
+    """시도 목록을 순서대로 실행하고 처음 성공한 응답 반환 → (응답 텍스트, 캐시 가능 여부)"""
+    last_error = None
+    for attempt in attempts:
+        try:
+            return await attempt(), True
+        except Exception as e:
+            last_error = e
+            print(f"비동기 응답 생성 실패, 다음 방식으로 폴백: {e}")
+    return error_message(last_error), False
+
+
+async def agenerate_chat_response(ctx: Dict[str, Any]) -> Tuple[str, bool]:
+    """app._generate_chat_response의 비동기 버전 (같은 폴백 순서와 오류 안내 메시지)"""
+    model = ctx["model"]
+    context = ctx["context"]
+    message = ctx["message"]
+
+    if model == "gemini" and backend.gemini_client:
+        aio_models = backend.gemini_client.aio.models
+
+        async def gemini_web():
+            options = {}
+            if backend.GEMINI_WEBSEARCH_ENABLED:
+                grounding_tool = backend.types.Tool(google_search=backend.types.GoogleSearch())
+                options["config"] = backend.types.GenerateContentConfig(tools=[grounding_tool])
+            full_message = context + "\n\n사용자: " + message + "\n\n최신 정보가 필요하다면 웹 검색을 활용해서 정확한 답변을 제공해주세요."
+            metrics_collector.record_model_usage("gemini-2.5-pro-web")
+            response = await aio_models.generate_content(model=backend.GEMINI_MODEL, contents=full_message, **options)
+            return response.text
+
+        async def gemini_basic():
+            full_message = context + "\n\n사용자: " + message + "\n\nAI:"
+            response = await aio_models.generate_content(model=backend.GEMINI_MODEL, contents=full_message)
+            return response.text
+
+        return await _run_attempts([gemini_web, gemini_basic], lambda e: f"Gemini API 오류가 발생했습니다: {str(e)}")
+
+    if model == "openai" and async_openai_client:
+        def openai_attempt(model_name):
+            async def attempt():
+                response = await async_openai_client.chat.completions.create(
+                    model=model_name,
+                    messages=[
+                        {"role": "system", "content": context},
+                        {"role": "user", "content": message}
+                    ],
+                    max_tokens=1000,
+                    temperature=0.7
+                )
+                return response.choices[0].message.content
+            return attempt
+
+        return await _run_attempts(
+            [openai_attempt(backend.OPENAI_MODEL_PRIMARY), openai_attempt(backend.OPENAI_MODEL_FALLBACK)],
+            lambda e: "OpenAI API 오류가 발생했습니다. 할당량이나 API 키를 확인해주세요."
+        )
+
+    if model == "claude" and async_claude_client:
+        async def claude_attempt():
+            response = await async_claude_client.messages.create(
+                model=backend.CLAUDE_MODEL,
+                max_tokens=1000,
+                messages=[{"role": "user", "content": context + "\n\n" + message}]
+            )
+            return response.content[0].text
+
+        def claude_error(e):
+            if "credit" in str(e).lower() or "billing" in str(e).lower():
+                return "Claude API는 유료 서비스입니다. 크레딧을 충전해주세요."
+            return "Claude API 오류가 발생했습니다. API 키를 확인해주세요."
+
+        return await _run_attempts([claude_attempt], claude_error)
+
+    return "현재 사용 가능한 AI 모델이 없습니다. Gemini API 키를 설정해주세요.", False
+
+
+async def _read_body(receive) -> bytes:
+    body = b''
+    while True:
+        message = await receive()
+        body += message.get('body', b'')
+        if not message.get('more_body'):
+            return body
+
+
+async def _send_json(send, status: int, data: Dict[str, Any], headers: List[Tuple[bytes, bytes]] = ()) -> None:
+    body = json.dumps(data, ensure_ascii=False, default=str).encode('utf-8')
+    await send({
+        'type': 'http.response.start',
+        'status': status,
+        'headers': [(b'content-type', b'application/json'), (b'content-length', str(len(body)).encode())]
+                   + RESPONSE_HEADERS + list(headers)
+    })
+    await send({'type': 'http.response.body', 'body': body})
+
+
+async def handle_chat(scope, receive, send) -> None:
+    """POST /chat 비동기 처리 (Flask 버전과 같은 검증, 응답 형식)"""
+    started = time.time()
+    metrics_collector.record_api_call('chat', 'POST')
+    client_ip = (scope.get('client') or ('unknown', 0))[0]
+
+    status, payload, extra_headers = await _chat_response(scope, receive, client_ip)
+
+    duration = time.time() - started
+    metrics_collector.record_response_time('chat', duration)
+    if status >= 400:
+        metrics_collector.record_error('chat', str(status))
+    await _send_json(send, status, payload, [(b'x-response-time', f"{duration:.3f}s".encode())] + extra_headers)
+
+
+async def _chat_response(scope, receive, client_ip: str):
+    security = backend.security_middleware
+    rejected = security.check_request(client_ip)
+    if rejected:
+        body, status = rejected
+        return status, body, []
+
+    headers = dict(scope.get('headers') or [])
+    if not headers.get(b'content-type', b'').startswith(b'application/json'):
+        return 400, {"error": "Content-Type must be application/json"}, []
+    try:
+        data = json.loads(await _read_body(receive) or b'null')
+    except ValueError:
+        data = None
+    if not data:
+        return 400, {"error": "JSON 데이터가 필요합니다"}, []
+    valid, message = security.validate_input(data)
+    if not valid:
+        return 400, {"error": message}, []
+    metrics_collector.record_user_activity(data.get('player_uuid'))
+
+    try:
+        async with chat_limiter:
+            loop = asyncio.get_running_loop()
+            ctx = await loop.run_in_executor(rag_executor, backend._prepare_chat, data)
+            if ctx["cached_payload"]:
+                return 200, ctx["cached_payload"], []
+
+            async def generate():
+                ai_response, response_ok = await agenerate_chat_response(ctx)
+                return backend._finish_chat(ctx, ai_response, response_ok)
+
+            if ctx["bypass_cache"]:
+                payload = await generate()
+            else:
+                payload, _ = await backend.chat_flight.do_async(backend._chat_flight_key(ctx), generate)
+            return 200, {**payload, "cached": False}, []
+    except ChatOverloaded as e:
+        logger.warning(f"채팅 요청 거절: {e}")
+        return 503, {"success": False, "error": "요청이 많아 잠시 후 다시 시도해주세요."}, [(b'retry-after', b'5')]
+    except Exception as e:
+        return 500, {"success": False, "error": str(e)}, []
+
+
+class ChatASGIApp:
+    """POST /chat만 직접 처리하고 나머지는 Flask(WSGI) 앱으로 넘기는 ASGI 앱"""
+
+    def __init__(self, wsgi_app):
+        self.fallback = WsgiToAsgi(wsgi_app)
+
+    async def __call__(self, scope, receive, send):
+        if scope['type'] == 'http' and scope['path'] == '/chat' and scope['method'] == 'POST':
+            await handle_chat(scope, receive, send)
+        else:
+            await self.fallback(scope, receive, send)
+
+
+# uvicorn이 모듈을 불러올 때 로컬 RAG 인덱스 로드 (app.py를 직접 실행할 때와 동일)
+backend.init_rag()
+application = ChatASGIApp(backend.app)
+
+
+if __name__ == '__main__':
+    import uvicorn
+
+    print(f"🚀 마인크래프트 AI 백엔드 (ASGI) 시작 - 채팅 동시 처리 한도 {CHAT_MAX_CONCURRENCY}")
+    uvicorn.run(application, host='0.0.0.0', port=int(os.getenv('PORT', '5000')))
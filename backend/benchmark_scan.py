@@ -0,0 +1,107 @@
+#!/usr/bin/env python3
+"""
+모드팩 스캔 벤치마크 - 직렬 스캔과 병렬(프로세스 풀) 스캔의 초당 처리 파일 수 비교
+
+사용법:
+    python benchmark_scan.py                      # 합성 모드팩(레시피 20000개)으로 측정
+    python benchmark_scan.py --recipes 50000      # 합성 레시피 수 지정
+    python benchmark_scan.py --path <모드팩_경로>  # 실제 모드팩으로 측정
+    python benchmark_scan.py --workers 1 2 4 8    # 측정할 워커 수 목록
+"""
+
+import os
+import sys
+import json
+import time
+import shutil
+import tempfile
+import argparse
+from pathlib import Path
+from typing import List
+
+sys.path.insert(0, str(Path(__file__).parent))
+import modpack_parser
+from modpack_parser import scan_modpack
+
+
+def create_synthetic_modpack(root: str, recipe_count: int) -> str:
+    """shaped/기타 레시피가 섞인 합성 모드팩 생성"""
+    for i in range(recipe_count):
+        namespace = f"mod{i % 50}"
+        recipe_dir = os.path.join(root, 'data', namespace, 'recipes')
+        os.makedirs(recipe_dir, exist_ok=True)
+        if i % 2 == 0:
+            recipe = {
+                "type": "minecraft:crafting_shaped",
+                "pattern": ["III", " S ", " S "],
+                "key": {"I": {"tag": "forge:ingots/steel"}, "S": {"item": "minecraft:stick"}},
+                "result": {"item": f"{namespace}:tool_{i}", "count": 1}
+            }
+        else:
+            recipe = {
+                "type": "mekanism:crushing",
+                "input": {"ingredient": {"tag": "forge:ores/osmium"}},
+                "output": {"item": f"{namespace}:dust_{i}", "count": 2},
+                "result": f"{namespace}:dust_{i}"
+            }
+        with open(os.path.join(recipe_dir, f"recipe_{i}.json"), 'w', encoding='utf-8') as f:
+            json.dump(recipe, f)
+    return root
+
+
+def run_benchmark(modpack_path: str, worker_counts: List[int], repeat: int) -> None:
+    file_count = len(modpack_parser._list_files(os.path.join(modpack_path, 'data'), ('.json',)))
+    print(f"📁 대상: {modpack_path}")
+    print(f"📄 레시피 파일: {file_count}개 (병렬 최소 기준: {modpack_parser.PARALLEL_MIN_FILES}개)")
+    print("-" * 60)
+    print(f"{'워커':<6} {'소요(초)':<10} {'파일/초':<12} {'배속':<8} {'문서 수'}")
+    print("-" * 60)
+
+    baseline = None
+    baseline_docs = None
+    for workers in worker_counts:
+        best = None
+        for _ in range(repeat):
+            start = time.perf_counter()
+            result = scan_modpack(modpack_path, workers=workers)
+            elapsed = time.perf_counter() - start
+            best = elapsed if best is None else min(best, elapsed)
+
+        docs = result['docs']
+        if baseline is None:
+            baseline = best
+            baseline_docs = docs
+        same = "✅" if docs == baseline_docs else "❌ 결과 불일치"
+        rate = file_count / best if best else 0
+        print(f"{workers:<6} {best:<10.3f} {rate:<12.0f} {baseline / best:<8.2f} {len(docs)} {same}")
+
+    print("-" * 60)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="모드팩 스캔 벤치마크 (직렬 vs 병렬)")
+    parser.add_argument('--path', help='실제 모드팩 디렉토리 경로 (미지정 시 합성 모드팩 사용)')
+    parser.add_argument('--recipes', type=int, default=20000, help='합성 레시피 파일 수')
+    parser.add_argument('--workers', type=int, nargs='+',
+                        default=[1, 2, 4, os.cpu_count() or 1], help='측정할 워커 수 목록')
+    parser.add_argument('--repeat', type=int, default=3, help='워커 수별 반복 횟수 (최솟값 사용)')
+    args = parser.parse_args()
+
+    print("⏱️ 모드팩 스캔 벤치마크")
+    print("=" * 60)
+
+    if args.path:
+        run_benchmark(args.path, args.workers, args.repeat)
+        return
+
+    temp_dir = tempfile.mkdtemp(prefix='modpack_bench_')
+    try:
+        print(f"🛠️ 합성 모드팩 생성 중... (레시피 {args.recipes}개)")
+        create_synthetic_modpack(temp_dir, args.recipes)
+        run_benchmark(temp_dir, args.workers, args.repeat)
+    finally:
+        shutil.rmtree(temp_dir, ignore_errors=True)
+
+
+if __name__ == "__main__":
+    main()
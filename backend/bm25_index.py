@@ -0,0 +1,173 @@
+# 어휘(BM25) 역색인 - 벡터 검색과 함께 써서 아이템 ID처럼 정확한 이름이 들어간 질문의 검색 품질 보완
+# "thermal:machine_frame" 같은 ID는 임베딩으로는 비슷한 문서와 구분이 흐려지므로 단어 일치 점수를 RRF로 합친다
+
+import os
+import re
+import json
+from collections import Counter
+from typing import List, Dict, Optional, Tuple, Iterable
+import logging
+
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+BM25_K1 = 1.2
+BM25_B = 0.75
+RRF_K = int(os.getenv('RAG_RRF_K', '60'))
+# 하이브리드 검색 시 벡터/BM25 각각에서 가져올 후보 수 (top_k의 배수)
+HYBRID_CANDIDATES = int(os.getenv('RAG_HYBRID_CANDIDATES', '4'))
+# BM25 후보는 1등 점수의 이 비율 이상만 사용 (흔한 단어만 겹친 문서 제외)
+LEXICAL_MIN_RATIO = 0.3
+
+
+def hybrid_enabled() -> bool:
+    return os.getenv('RAG_HYBRID_ENABLED', 'true').lower() == 'true'
+
+
+# 검색어에서 버리는 흔한 단어 (BM25 idf가 낮긴 하지만 후보를 불필요하게 늘림)
+_STOPWORDS = frozenset("""
+a an and are can do does for from how i in is it me of on or the to what when where which with you
+""".split())
+_TOKEN_RE = re.compile(r"[#\w][\w:/.\-#]*")
+_ID_SPLIT_RE = re.compile(r"[:/_.\-#]+")
+_HANGUL_RE = re.compile(r"[가-힣]")
+
+
+def tokenize(text: str) -> List[str]:
+    """BM25용 토큰화
+    아이템 ID는 전체("thermal:machine_frame")와 네임스페이스 뺀 이름("machine_frame"),
+    부분 단어("thermal", "machine", "frame")를 모두 토큰으로 만든다. 한글 단어는 조사가 붙어도
+    일치하도록 2글자 단위 조각도 추가한다 ("철블록은" → "철블", "블록", "록은").
+    """
+    tokens: List[str] = []
+    for raw in _TOKEN_RE.findall((text or '').lower()):
+        token = raw.rstrip('.:-/')
+        if not token or token in _STOPWORDS:
+            continue
+        tokens.append(token)
+        if _ID_SPLIT_RE.search(token):
+            if ':' in token:
+                tokens.append(token.split(':', 1)[1])
+            tokens.extend(p for p in _ID_SPLIT_RE.split(token) if len(p) > 1 and p not in _STOPWORDS)
+        if _HANGUL_RE.search(token) and len(token) > 2:
+            tokens.extend(token[i:i + 2] for i in range(len(token) - 1))
+    return tokens
+
+
+class BM25Index:
+    """문서 번호 → BM25 점수를 돌려주는 역색인
+
+    postings은 CSR 형태(용어별 offsets 구간에 doc_ids/weights)로 두고, 문서 길이 정규화와 idf를
+    미리 곱한 가중치를 저장해 검색은 질의 용어의 구간을 더하기만 하면 된다.
+    """
+
+    def __init__(self, vocab: Dict[str, int], offsets: np.ndarray, doc_ids: np.ndarray,
+                 weights: np.ndarray, num_docs: int):
+        self.vocab = vocab
+        self.offsets = offsets
+        self.doc_ids = doc_ids
+        self.weights = weights
+        self.num_docs = num_docs
+
+    @property
+    def nbytes(self) -> int:
+        return int(self.offsets.nbytes + self.doc_ids.nbytes + self.weights.nbytes +
+                   sum(len(t) + 60 for t in self.vocab))
+
+    @classmethod
+    def build(cls, texts: Iterable[str], k1: float = BM25_K1, b: float = BM25_B) -> "BM25Index":
+        # (용어, 문서, 빈도) 목록을 한 번에 모은 뒤 용어 순으로 정렬해 CSR 구성
+        vocab: Dict[str, int] = {}
+        term_ids: List[int] = []
+        doc_ids: List[int] = []
+        tfs: List[int] = []
+        doc_lens: List[int] = []
+        for doc_id, text in enumerate(texts):
+            tokens = tokenize(text)
+            doc_lens.append(len(tokens))
+            for token, tf in Counter(tokens).items():
+                term_ids.append(vocab.setdefault(token, len(vocab)))
+                doc_ids.append(doc_id)
+                tfs.append(tf)
+
+        num_docs = len(doc_lens)
+        terms = np.asarray(term_ids, dtype=np.int64)
+        docs = np.asarray(doc_ids, dtype=np.int32)
+        tf = np.asarray(tfs, dtype=np.float32)
+        lengths = np.asarray(doc_lens, dtype=np.float32)
+        avgdl = float(lengths.mean()) if num_docs and lengths.mean() > 0 else 1.0
+
+        df = np.bincount(terms, minlength=len(vocab)).astype(np.float32)
+        idf = np.log(1.0 + (num_docs - df + 0.5) / (df + 0.5))
+        norm = k1 * (1.0 - b + b * lengths[docs] / avgdl) if docs.size else np.zeros(0, dtype=np.float32)
+        weights = (idf[terms] * tf * (k1 + 1.0) / (tf + norm)).astype(np.float32)
+
+        order = np.argsort(terms, kind='stable')
+        offsets = np.concatenate([[0], np.cumsum(df)]).astype(np.int64)
+        return cls(vocab, offsets, docs[order], weights[order], num_docs)
+
+    def scores(self, query: str) -> np.ndarray:
+        """문서별 BM25 점수 (num_docs,)"""
+        scores = np.zeros(self.num_docs, dtype=np.float32)
+        for term in set(tokenize(query)):
+            term_id = self.vocab.get(term)
+            if term_id is None:
+                continue
+            start, end = self.offsets[term_id], self.offsets[term_id + 1]
+            # 한 용어의 posting 안에서 문서 번호는 중복되지 않으므로 바로 더함
+            scores[self.doc_ids[start:end]] += self.weights[start:end]
+        return scores
+
+    def search(self, query: str, top_k: int = 5, min_ratio: float = 0.0) -> List[Tuple[int, float]]:
+        """BM25 상위 문서 [(문서 번호, 점수)] - min_ratio: 1등 점수 대비 이 비율 미만은 제외"""
+        if self.num_docs == 0 or top_k <= 0:
+            return []
+        scores = self.scores(query)
+        top_k = min(top_k, self.num_docs)
+        positions = np.argpartition(-scores, top_k - 1)[:top_k]
+        positions = positions[np.argsort(-scores[positions], kind='stable')]
+        best = float(scores[positions[0]]) if positions.size else 0.0
+        if best <= 0:
+            return []
+        return [(int(i), float(scores[i])) for i in positions if scores[i] > 0 and scores[i] >= best * min_ratio]
+
+    def save(self, index_dir: str, prefix: str = 'bm25') -> None:
+        np.save(os.path.join(index_dir, f'{prefix}_offsets.npy'), self.offsets)
+        np.save(os.path.join(index_dir, f'{prefix}_doc_ids.npy'), self.doc_ids)
+        np.save(os.path.join(index_dir, f'{prefix}_weights.npy'), self.weights)
+        with open(os.path.join(index_dir, f'{prefix}_vocab.json'), 'w', encoding='utf-8') as f:
+            json.dump({'num_docs': self.num_docs, 'terms': list(self.vocab)}, f, ensure_ascii=False)
+
+    @classmethod
+    def load(cls, index_dir: str, prefix: str = 'bm25', mmap: bool = False) -> Optional["BM25Index"]:
+        """저장된 역색인 로드 (없거나 손상되었으면 None) - mmap=True면 posting 배열을 읽기 전용 mmap으로 연다"""
+        vocab_path = os.path.join(index_dir, f'{prefix}_vocab.json')
+        if not os.path.isfile(vocab_path):
+            return None
+        try:
+            with open(vocab_path, 'r', encoding='utf-8') as f:
+                meta = json.load(f)
+            mmap_mode = 'r' if mmap else None
+            return cls(
+                {term: i for i, term in enumerate(meta['terms'])},
+                np.load(os.path.join(index_dir, f'{prefix}_offsets.npy'), mmap_mode=mmap_mode),
+                np.load(os.path.join(index_dir, f'{prefix}_doc_ids.npy'), mmap_mode=mmap_mode),
+                np.load(os.path.join(index_dir, f'{prefix}_weights.npy'), mmap_mode=mmap_mode),
+                meta['num_docs']
+            )
+        except Exception as e:
+            logger.warning(f"BM25 역색인 로드 실패 {index_dir}: {e}")
+            return None
+
+
+def rrf_fuse(rankings: Iterable[List[int]], k: int = RRF_K, top_k: Optional[int] = None) -> List[Tuple[int, float]]:
+    """Reciprocal Rank Fusion: 순위 목록 여러 개 → [(문서 번호, RRF 점수)] (점수 높은 순)
+    점수 척도가 다른 벡터 유사도와 BM25를 순위만으로 합친다 (1 / (k + 순위)).
+    """
+    fused: Dict[int, float] = {}
+    for ranking in rankings:
+        for rank, doc_id in enumerate(ranking):
+            fused[doc_id] = fused.get(doc_id, 0.0) + 1.0 / (k + rank + 1)
+    ordered = sorted(fused.items(), key=lambda item: -item[1])
+    return ordered[:top_k] if top_k is not None else ordered
@@ -0,0 +1,67 @@
+# 채팅 요청 동시 처리 수 제한 - 비동기(ASGI) 서빙 모드에서 사용
+# 한도를 넘는 요청은 잠시 대기하고, queue_timeout 안에 자리가 나지 않으면 거절(503)
+
+import time
+import asyncio
+from typing import Dict, Any, Optional
+
+
+class ChatOverloaded(Exception):
+    """대기 시간 안에 처리 슬롯을 얻지 못한 경우"""
+
+
+class ChatConcurrencyLimiter:
+    """asyncio 세마포어 기반 동시 처리 제한기
+
+    async with limiter: 블록 안에서 처리 중인 요청은 최대 max_concurrency개.
+    """
+
+    def __init__(self, max_concurrency: int = 32, queue_timeout: float = 30.0):
+        self.max_concurrency = max(1, max_concurrency)
+        self.queue_timeout = queue_timeout
+        self._semaphore: Optional[asyncio.Semaphore] = None
+        self.active = 0
+        self.waiting = 0
+        self.peak_active = 0
+        self.completed = 0
+        self.rejected = 0
+        self.total_wait_seconds = 0.0
+
+    def _get_semaphore(self) -> asyncio.Semaphore:
+        # 이벤트 루프 안에서 처음 사용할 때 생성
+        if self._semaphore is None:
+            self._semaphore = asyncio.Semaphore(self.max_concurrency)
+        return self._semaphore
+
+    async def __aenter__(self):
+        semaphore = self._get_semaphore()
+        started = time.monotonic()
+        self.waiting += 1
+        try:
+            await asyncio.wait_for(semaphore.acquire(), timeout=self.queue_timeout)
+        except asyncio.TimeoutError:
+            self.rejected += 1
+            raise ChatOverloaded(f"동시 처리 한도({self.max_concurrency}) 초과")
+        finally:
+            self.waiting -= 1
+        self.total_wait_seconds += time.monotonic() - started
+        self.active += 1
+        self.peak_active = max(self.peak_active, self.active)
+        return self
+
+    async def __aexit__(self, exc_type, exc, tb):
+        self.active -= 1
+        self.completed += 1
+        self._semaphore.release()
+        return False
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            'max_concurrency': self.max_concurrency,
+            'active': self.active,
+            'waiting': self.waiting,
+            'peak_active': self.peak_active,
+            'completed': self.completed,
+            'rejected': self.rejected,
+            'avg_wait_seconds': round(self.total_wait_seconds / self.completed, 4) if self.completed else 0.0
+        }
@@ -0,0 +1,140 @@
+# 프롬프트 RAG 첨부 패킹 - 글자 수 대신 모델별 토큰 수로 예산을 잡고, 큰 후보 풀에서 MMR로 겹치지 않는 문서를 고른다
+# 같은 1500자라도 한국어 설명과 영어 아이템 ID는 토큰 수가 몇 배 차이 나고, 상위 결과끼리 거의 같은 내용인 경우가 많다.
+
+import os
+import math
+import re
+from typing import List, Dict, Any, Optional, Sequence
+
+from doc_consolidation import shingles, jaccard
+
+# 프롬프트에 붙일 RAG 문서 전체 / 문서 하나의 최대 토큰 수
+RAG_MAX_TOKENS = int(os.getenv('RAG_MAX_TOKENS', '600'))
+RAG_SNIPPET_MAX_TOKENS = int(os.getenv('RAG_SNIPPET_MAX_TOKENS', '160'))
+# MMR 후보 풀 = top_k × 이 배수, 관련도 비중 (1이면 관련도 순서 그대로, 낮을수록 다양성 우선)
+RAG_MMR_POOL = int(os.getenv('RAG_MMR_POOL', '3'))
+RAG_MMR_LAMBDA = float(os.getenv('RAG_MMR_LAMBDA', '0.7'))
+# 남은 예산이 이보다 적으면 잘린 조각을 붙이지 않음
+MIN_SNIPPET_TOKENS = 12
+TRUNCATION_MARK = ' …'
+
+# 모델별 글자당 토큰 수 추정치 (서버에서 쓸 수 있는 토크나이저가 없으므로 글자 종류별 비율로 셈, 약간 넉넉하게)
+#   hangul: 한글 음절, alnum: 영문/숫자 (아이템 ID 포함), symbol: 구두점/기호, other: 그 밖의 문자
+TOKEN_RATES = {
+    'gemini': {'hangul': 0.7, 'alnum': 0.25, 'symbol': 1.0, 'other': 1.0},
+    'openai': {'hangul': 0.9, 'alnum': 0.25, 'symbol': 1.0, 'other': 1.0},
+    'claude': {'hangul': 1.1, 'alnum': 0.28, 'symbol': 1.0, 'other': 1.2},
+}
+# 알 수 없는 모델은 가장 보수적인 비율
+_FALLBACK_RATES = {kind: max(rates[kind] for rates in TOKEN_RATES.values()) for kind in TOKEN_RATES['claude']}
+
+_HANGUL_RE = re.compile(r'[가-힣ㄱ-ㅎㅏ-ㅣ]')
+_ALNUM_RE = re.compile(r'[A-Za-z0-9]')
+_SPACE_RE = re.compile(r'\s')
+_SYMBOL_RE = re.compile(r'[!-/:-@\[-`{-~]')
+
+
+def count_tokens(text: str, provider: str = 'gemini') -> int:
+    """provider(gemini | openai | claude) 기준 토큰 수 추정"""
+    if not text:
+        return 0
+    rates = TOKEN_RATES.get(provider, _FALLBACK_RATES)
+    hangul = len(_HANGUL_RE.findall(text))
+    alnum = len(_ALNUM_RE.findall(text))
+    symbol = len(_SYMBOL_RE.findall(text))
+    other = len(text) - hangul - alnum - symbol - len(_SPACE_RE.findall(text))
+    return int(math.ceil(hangul * rates['hangul'] + alnum * rates['alnum']
+                         + symbol * rates['symbol'] + other * rates['other']))
+
+
+def truncate_to_tokens(text: str, max_tokens: int, provider: str = 'gemini') -> str:
+    """max_tokens 이하가 되도록 뒤를 자름 (잘렸으면 … 표시, 가장 긴 앞부분을 이분 탐색)"""
+    if count_tokens(text, provider) <= max_tokens:
+        return text
+    budget = max_tokens - count_tokens(TRUNCATION_MARK, provider)
+    lo, hi = 0, len(text)
+    while lo < hi:
+        mid = (lo + hi + 1) // 2
+        if count_tokens(text[:mid], provider) <= budget:
+            lo = mid
+        else:
+            hi = mid - 1
+    return text[:lo].rstrip() + TRUNCATION_MARK if lo else ''
+
+
+def mmr_order(texts: Sequence[str], scores: Sequence[float], limit: int,
+              mmr_lambda: float = RAG_MMR_LAMBDA) -> List[int]:
+    """maximal marginal relevance 순서 → 후보 번호 목록 (최대 limit개)
+
+    관련도는 후보 풀의 최고 점수로 나눠 0~1로 맞추고 (점수 차이의 비율은 유지),
+    이미 고른 문서와의 유사도는 단어 shingle Jaccard로 잰다.
+    """
+    if not texts or limit <= 0:
+        return []
+    high = max(scores)
+    relevance = [max(0.0, s) / high if high > 0 else 1.0 for s in scores]
+    signatures = [shingles(t) for t in texts]
+    remaining = list(range(len(texts)))
+    chosen: List[int] = []
+    while remaining and len(chosen) < limit:
+        best = max(remaining, key=lambda i: (
+            mmr_lambda * relevance[i]
+            - (1 - mmr_lambda) * max((jaccard(signatures[i], signatures[j]) for j in chosen), default=0.0),
+            -i))
+        chosen.append(best)
+        remaining.remove(best)
+    return chosen
+
+
+class ContextPacker:
+    """한 번의 질문에 붙일 RAG 조각을 모델 토큰 예산 안에서 모음
+
+    add()는 조각을 문서당/남은 예산에 맞춰 자른 뒤 사용량에 더하고, 예산이 바닥나면 None을 돌려준다.
+    select()는 후보 풀을 MMR 순서로 정렬해 돌려준다 (순서대로 add하다 None이 나오면 멈추면 됨).
+    """
+
+    def __init__(self, provider: str, max_tokens: int = RAG_MAX_TOKENS,
+                 snippet_max_tokens: int = RAG_SNIPPET_MAX_TOKENS, mmr_lambda: float = RAG_MMR_LAMBDA):
+        self.provider = provider
+        self.max_tokens = max_tokens
+        self.snippet_max_tokens = snippet_max_tokens
+        self.mmr_lambda = mmr_lambda
+        self.used_tokens = 0
+        self.used_chars = 0
+        self.snippets = 0
+
+    @property
+    def remaining(self) -> int:
+        return max(0, self.max_tokens - self.used_tokens)
+
+    def count(self, text: str) -> int:
+        return count_tokens(text, self.provider)
+
+    def add(self, text: str, max_tokens: Optional[int] = None) -> Optional[str]:
+        """조각 하나를 예산에 맞춰 잘라 추가 → 추가된 텍스트 (남은 예산이 부족하면 None)"""
+        limit = min(max_tokens or self.snippet_max_tokens, self.remaining)
+        if limit < MIN_SNIPPET_TOKENS:
+            return None
+        text = truncate_to_tokens(text, limit, self.provider)
+        if not text:
+            return None
+        self.used_tokens += self.count(text)
+        self.used_chars += len(text)
+        self.snippets += 1
+        return text
+
+    def select(self, candidates: Sequence[Dict[str, Any]], limit: int, text_key: str = 'text',
+               score_key: str = 'score') -> List[Dict[str, Any]]:
+        """후보 풀 → MMR 순서의 후보 최대 limit개"""
+        texts = [c.get(text_key, '') or '' for c in candidates]
+        scores = [float(c.get(score_key, 0.0) or 0.0) for c in candidates]
+        return [candidates[i] for i in mmr_order(texts, scores, limit, self.mmr_lambda)]
+
+    def summary(self) -> Dict[str, Any]:
+        return {
+            'provider': self.provider,
+            'max_tokens': self.max_tokens,
+            'snippet_max_tokens': self.snippet_max_tokens,
+            'used_tokens': self.used_tokens,
+            'snippets': self.snippets,
+        }
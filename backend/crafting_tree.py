@@ -0,0 +1,265 @@
+# 제작 트리 해석기 - 아이템을 레시피 DB 기준으로 끝까지 펼쳐 전체 제작 단계와 원재료 목록을 만든다
+# 예: "디지털 마이너 만들려면 원재료가 뭐가 필요해?" → 트리 + 원재료 합계를 RAG 컨텍스트에 첨부
+
+import os
+import re
+import math
+import time
+import threading
+import weakref
+from typing import List, Dict, Any, Optional, Callable, Tuple, NamedTuple, FrozenSet
+
+from recipe_store import RecipeStore, normalize_item, display_name
+
+CRAFTING_TREE_MAX_DEPTH = int(os.getenv('CRAFTING_TREE_MAX_DEPTH', '10'))
+CRAFTING_TREE_MAX_NODES = int(os.getenv('CRAFTING_TREE_MAX_NODES', '300'))
+
+# 펼칠 때 우선 사용할 레시피 타입 (제작대 → 화로 → 나머지 기계)
+_RECIPE_PRIORITY = ('crafting_shaped', 'crafting_shapeless', 'smelting', 'blasting')
+
+# "X 만들려면 뭐가 필요해?" / "raw materials for X" 같은 제작 트리 질문에서 아이템 이름을 뽑는 패턴
+_TREE_QUERY_PATTERNS = [
+    re.compile(r"(?:raw materials?|full (?:crafting )?(?:chain|tree)|crafting (?:chain|tree)|"
+               r"everything|all materials?)\s+(?:do i need |needed |required )?(?:for|to (?:make|craft|build))\s+"
+               r"(?:an? |the )?(.+?)[\s?.!]*$", re.I),
+    re.compile(r"^(.+?)\s*(?:을|를)?\s*(?:만들려면|만드려면|제작하려면)\s*(?:원재료|재료|뭐|무엇)"),
+    re.compile(r"^(.+?)\s*(?:의)?\s*(?:원재료|제작 트리|제작 체인|전체 재료)"),
+]
+
+
+def _type_name(value: Optional[str]) -> str:
+    return (value or '').split(':', 1)[-1]
+
+
+def parse_tree_query(message: str) -> Optional[str]:
+    """제작 트리 질문이면 아이템 이름을, 아니면 None 반환"""
+    text = (message or '').strip()
+    for pattern in _TREE_QUERY_PATTERNS:
+        match = pattern.search(text)
+        if match and match.group(1).strip():
+            return match.group(1).strip()
+    return None
+
+
+class _Subtree(NamedTuple):
+    """펼친 하위 트리와 재사용 판단에 필요한 정보"""
+    node: Dict[str, Any]
+    raw: Dict[str, int]        # 하위 트리의 원재료 합계
+    items: FrozenSet[str]      # 하위 트리에 나온 아이템 (재사용 위치의 경로와 겹치면 재사용 불가)
+    height: int
+    nodes: int
+    blocked: FrozenSet[str]    # 하위 트리 바깥 경로에 있어서 레시피 선택에 영향을 준 아이템
+    truncated: bool            # 깊이/노드 상한으로 잘린 노드가 있음
+    cyclic: bool               # 순환 때문에 원재료로 남은 노드가 있음
+
+    @property
+    def reusable(self) -> bool:
+        """경로와 무관하게 같은 결과가 나오는 하위 트리인지"""
+        return not self.blocked and not self.truncated
+
+
+class CraftingTreeResolver:
+    """레시피 DB 하나에 대한 제작 트리 해석기
+
+    아이템별 레시피 후보(태그를 실제 아이템으로 바꾼 입력 목록)는 한 번만 계산해 메모이즈하고,
+    펼친 하위 트리는 (아이템, 수량) 단위로 메모이즈해 다른 트리에서도 재사용한다.
+    현재 경로에 이미 있는 아이템이 다시 나오면 순환으로 보고 다른 레시피를 시도하며
+    (예: 철 주괴 ← 철 블록 ← 철 주괴 대신 철 주괴 ← 원철 제련), 모두 순환이면 원재료로 취급한다.
+    tag_resolver: "#forge:ingots/steel" → 후보 아이템 ID 목록 (없거나 빈 목록이면 레시피 DB 이름 기반 추정)
+    """
+
+    def __init__(self, store: RecipeStore, tag_resolver: Optional[Callable[[str], List[str]]] = None,
+                 max_depth: int = CRAFTING_TREE_MAX_DEPTH, max_nodes: int = CRAFTING_TREE_MAX_NODES,
+                 max_subtrees: int = 4096):
+        self.store = store
+        self.tag_resolver = tag_resolver
+        self.max_depth = max_depth
+        self.max_nodes = max_nodes
+        self.max_subtrees = max_subtrees
+        self._plans: Dict[str, List[Dict[str, Any]]] = {}
+        self._subtrees: Dict[Tuple[str, int], _Subtree] = {}
+
+    def _guess_tag_items(self, tag: str) -> List[str]:
+        """태그 정의 없이 이름으로 추정 ("#forge:ingots/steel" → 레시피가 있는 "*:ingot_steel"/"*:steel_ingot")"""
+        parts = _type_name(tag.lstrip('#')).split('/')
+        if len(parts) < 2:
+            return []
+        kind = parts[0][:-1] if parts[0].endswith('s') else parts[0]
+        return self.store.item_ids(f"{kind}_{parts[-1]}")
+
+    def _resolve_ingredient(self, ingredient: str) -> str:
+        if ingredient.startswith('#'):
+            candidates = (self.tag_resolver(ingredient) if self.tag_resolver else []) or \
+                self._guess_tag_items(ingredient)
+            # 레시피가 있는 후보를 우선 (없으면 태그 그대로 원재료로 남김)
+            for item_id in candidates:
+                if item_id in self.store.recipes:
+                    return item_id
+            return candidates[0] if candidates else ingredient
+        return ingredient
+
+    def _plan(self, item_id: str) -> List[Dict[str, Any]]:
+        """아이템의 레시피 후보 [{recipe_type, result_count, inputs: [(아이템, 수량)]}] (메모이즈)"""
+        plans = self._plans.get(item_id)
+        if plans is not None:
+            return plans
+        entries = sorted(self.store.recipes.get(item_id, []),
+                         key=lambda e: next((i for i, t in enumerate(_RECIPE_PRIORITY)
+                                             if _type_name(e.get('recipe_type')) == t),
+                                            len(_RECIPE_PRIORITY)))
+        plans = []
+        for entry in entries:
+            inputs = [(self._resolve_ingredient(normalize_item(m['item'])), m['count'])
+                      for m in entry.get('materials', []) if m.get('item')]
+            if inputs:
+                plans.append({
+                    'recipe_type': entry.get('recipe_type'),
+                    'result_count': max(1, int(entry.get('result_count') or 1)),
+                    'inputs': inputs
+                })
+        self._plans[item_id] = plans
+        return plans
+
+    def resolve(self, item: str, quantity: int = 1) -> Optional[Dict[str, Any]]:
+        """아이템 제작 트리 + 원재료 합계 (레시피 DB에 없는 아이템이면 None)
+
+        반환: {item, quantity, tree, raw_materials: [{item, count}], nodes, truncated, cycles, memo_hits}
+        tree 노드: {item, count, crafts, recipe_type, children} / 원재료 노드는 raw=True
+        """
+        item_ids = self.store.item_ids(item)
+        if not item_ids:
+            return None
+        quantity = max(1, int(quantity))
+
+        state = {'nodes': 0, 'truncated': False, 'cycles': 0, 'memo_hits': 0}
+        subtree = self._expand(item_ids[0], quantity, 0, (), state)
+        return {
+            'item': item_ids[0],
+            'quantity': quantity,
+            'tree': subtree.node,
+            'raw_materials': [{'item': k, 'count': v} for k, v in subtree.raw.items()],
+            'nodes': state['nodes'],
+            'truncated': state['truncated'],
+            'cycles': state['cycles'],
+            'memo_hits': state['memo_hits']
+        }
+
+    def _expand(self, item_id: str, count: int, depth: int, path: Tuple[str, ...],
+                state: Dict[str, Any]) -> _Subtree:
+        key = (item_id, count)
+        memo = self._subtrees.get(key)
+        if (memo is not None and memo.items.isdisjoint(path) and depth + memo.height < self.max_depth
+                and state['nodes'] + memo.nodes <= self.max_nodes):
+            state['nodes'] += memo.nodes
+            state['memo_hits'] += 1
+            return memo
+
+        state['nodes'] += 1
+        node: Dict[str, Any] = {'item': item_id, 'count': count}
+        if depth >= self.max_depth or state['nodes'] > self.max_nodes:
+            state['truncated'] = True
+            node['truncated'] = True
+            return self._leaf(node, frozenset(), truncated=True, cyclic=False)
+
+        path = path + (item_id,)
+        blocked = set()
+        fallback = None
+        for plan in self._plan(item_id):
+            on_path = {ingredient for ingredient, _ in plan['inputs'] if ingredient in path}
+            if on_path:
+                blocked |= on_path
+                continue
+            # 하위 트리에서 순환이 나오면 다음 레시피를 시도 (모두 순환이면 첫 번째 결과 사용)
+            snapshot = (state['nodes'], state['cycles'], state['truncated'])
+            subtree = self._craft(node, plan, count, depth, path, state)
+            blocked |= subtree.blocked
+            if not subtree.cyclic:
+                return self._remember(key, subtree._replace(blocked=frozenset(blocked - {item_id})))
+            if fallback is None:
+                fallback = (subtree, (state['nodes'], state['cycles'], state['truncated']))
+            state['nodes'], state['cycles'], state['truncated'] = snapshot
+            node = {'item': item_id, 'count': count}
+
+        blocked.discard(item_id)
+        if fallback is not None:
+            subtree, (state['nodes'], state['cycles'], state['truncated']) = fallback
+            return self._remember(key, subtree._replace(blocked=frozenset(blocked)))
+        if blocked:
+            state['cycles'] += 1
+            node['cycle'] = True
+        return self._remember(key, self._leaf(node, frozenset(blocked), truncated=False, cyclic=bool(blocked)))
+
+    @staticmethod
+    def _leaf(node: Dict[str, Any], blocked: FrozenSet[str], truncated: bool, cyclic: bool) -> _Subtree:
+        node['raw'] = True
+        return _Subtree(node, {node['item']: node['count']}, frozenset((node['item'],)), 0, 1,
+                        blocked, truncated, cyclic)
+
+    def _craft(self, node: Dict[str, Any], plan: Dict[str, Any], count: int, depth: int,
+               path: Tuple[str, ...], state: Dict[str, Any]) -> _Subtree:
+        crafts = math.ceil(count / plan['result_count'])
+        children = [self._expand(ingredient, per_craft * crafts, depth + 1, path, state)
+                    for ingredient, per_craft in plan['inputs']]
+        node['crafts'] = crafts
+        node['recipe_type'] = plan['recipe_type']
+        node['children'] = [child.node for child in children]
+
+        raw: Dict[str, int] = {}
+        for child in children:
+            for raw_item, raw_count in child.raw.items():
+                raw[raw_item] = raw.get(raw_item, 0) + raw_count
+        return _Subtree(node, raw, frozenset((node['item'],)).union(*(child.items for child in children)),
+                        1 + max(child.height for child in children),
+                        1 + sum(child.nodes for child in children),
+                        frozenset().union(*(child.blocked for child in children)),
+                        any(child.truncated for child in children),
+                        any(child.cyclic for child in children))
+
+    def _remember(self, key: Tuple[str, int], subtree: _Subtree) -> _Subtree:
+        """경로와 무관하게 같은 결과가 나오는 하위 트리만 메모 (가득 차면 비움)"""
+        if subtree.reusable:
+            if len(self._subtrees) >= self.max_subtrees:
+                self._subtrees.clear()
+            self._subtrees[key] = subtree
+        return subtree
+
+def format_tree(result: Dict[str, Any], max_lines: int = 20) -> str:
+    """RAG 컨텍스트용 요약 (원재료 합계 + 들여쓴 제작 단계, 최대 max_lines줄)"""
+    raw = ', '.join(f"{display_name(m['item'])} x{m['count']}" for m in result['raw_materials'])
+    lines = [f"{display_name(result['item'])} x{result['quantity']} 원재료: {raw}"]
+
+    def walk(node: Dict[str, Any], depth: int) -> None:
+        if len(lines) >= max_lines or node.get('raw'):
+            return
+        inputs = ', '.join(f"{display_name(c['item'])} x{c['count']}" for c in node['children'])
+        lines.append(f"{'  ' * depth}- {display_name(node['item'])} x{node['count']} "
+                     f"[{_type_name(node.get('recipe_type'))}] ← {inputs}")
+        for child in node['children']:
+            walk(child, depth + 1)
+
+    walk(result['tree'], 0)
+    return '\n'.join(lines)
+
+
+# 레시피 DB 객체별 해석기 (레시피 DB가 다시 로드되면 메모도 함께 버려짐)
+_resolvers: "weakref.WeakKeyDictionary[RecipeStore, CraftingTreeResolver]" = weakref.WeakKeyDictionary()
+_resolvers_lock = threading.Lock()
+
+
+def get_resolver(store: RecipeStore) -> CraftingTreeResolver:
+    with _resolvers_lock:
+        resolver = _resolvers.get(store)
+        if resolver is None:
+            resolver = _resolvers[store] = CraftingTreeResolver(store, tag_resolver=store.tags.items)
+        return resolver
+
+
+def resolve_crafting_tree(store: Optional[RecipeStore], item: str, quantity: int = 1) -> Optional[Dict[str, Any]]:
+    """레시피 DB 기준 제작 트리 (레시피 DB가 없거나 아이템이 없으면 None), 소요 시간(ms) 포함"""
+    if store is None:
+        return None
+    started = time.perf_counter()
+    result = get_resolver(store).resolve(item, quantity)
+    if result is not None:
+        result = dict(result, elapsed_ms=round((time.perf_counter() - started) * 1000, 3))
+    return result
@@ -0,0 +1,211 @@
+# 임베딩 전 문서 정리 - 같은 결과 아이템의 레시피 문서를 하나로 묶고 완전/유사 중복을 접는다
+# 파서는 레시피 파일마다 문서 하나를 만들기 때문에 "Recipe type=... result=unknown" 같은 거의 같은 문서가
+# 수천 개 생기고, 검색 결과 상위가 같은 내용으로 채워진다. 임베딩/업로드 수도 그만큼 줄어든다.
+
+import os
+import re
+import json
+import zlib
+import shutil
+import hashlib
+import tempfile
+from typing import List, Dict, Any, Optional, Iterable, Iterator, Tuple, Set
+import logging
+
+logger = logging.getLogger(__name__)
+
+# 같은 묶음 안에서 이 값 이상 겹치면 유사 중복으로 보고 접음 (단어 shingle Jaccard, 1 초과면 끔)
+NEAR_DUP_THRESHOLD = float(os.getenv('RAG_NEAR_DUP_THRESHOLD', '0.9'))
+# 묶음 문서 본문 최대 길이 (넘는 레시피는 개수만 표시 - 정확한 레시피는 레시피 DB가 답함)
+GROUP_MAX_CHARS = int(os.getenv('RAG_GROUP_MAX_CHARS', '2000'))
+# 레시피 문서를 묶음 키 해시로 나눠 내보낼 임시 파일 수 (메모리에는 한 번에 파일 하나 분량만 올라감)
+SPILL_BUCKETS = int(os.getenv('RAG_CONSOLIDATE_BUCKETS', '64'))
+SHINGLE_SIZE = 3
+
+GROUP_DOC_TYPE = 'recipe_group'
+
+_SPACE_RE = re.compile(r'\s+')
+_WORD_RE = re.compile(r'[\w:.\-]+')
+
+
+def normalize_text(text: str) -> str:
+    """비교용 정규화: 소문자, 연속 공백 하나로"""
+    return _SPACE_RE.sub(' ', (text or '').lower()).strip()
+
+
+def content_hash(text: str) -> str:
+    return hashlib.sha1(normalize_text(text).encode('utf-8')).hexdigest()
+
+
+def shingles(text: str, size: int = SHINGLE_SIZE) -> Set[int]:
+    """단어 size-gram 집합 (crc32로 정수화, 단어가 size개 미만이면 단어 집합)"""
+    words = _WORD_RE.findall(normalize_text(text))
+    if len(words) < size:
+        return {zlib.crc32(w.encode('utf-8')) for w in words}
+    return {zlib.crc32(' '.join(words[i:i + size]).encode('utf-8')) for i in range(len(words) - size + 1)}
+
+
+def jaccard(a: Set[int], b: Set[int]) -> float:
+    if not a and not b:
+        return 1.0
+    return len(a & b) / float(len(a | b))
+
+
+def group_key(doc: Dict[str, Any]) -> Optional[str]:
+    """묶음 키: 결과 아이템별 "item:<id>", 결과를 못 읽은 레시피는 "unknown:<레시피 타입>" (타입 ID가 곧 모드)
+    레시피가 아닌 문서(모드 jar, kubejs 스크립트)는 None (묶지 않음)
+    같은 본문은 항상 같은 키가 되므로 완전 중복도 묶음 안에서만 찾으면 된다.
+    """
+    if doc.get('type') != 'recipe':
+        return None
+    result_id = doc.get('result_id') or 'unknown'
+    if result_id != 'unknown':
+        return f"item:{result_id}"
+    return f"unknown:{doc.get('recipe_type', '')}"
+
+
+def _strip_ns(item_id: str) -> str:
+    return item_id.split(':', 1)[1] if ':' in item_id else item_id
+
+
+def _group_doc(key: str, members: List[Dict[str, Any]], collapsed: int, max_chars: int) -> Dict[str, Any]:
+    """묶음 하나 → 문서 하나 (source는 묶음 키라 매니페스트의 source 단위 증분 구축이 그대로 동작)"""
+    first = members[0]
+    if key.startswith('item:'):
+        header = f"Recipes for {_strip_ns(first['result_id'])} ({first['result_id']}): {len(members)} recipes"
+    else:
+        header = f"Recipes type={first.get('recipe_type', '')} result=unknown: {len(members)} files"
+    lines = [header]
+    length = len(header)
+    for shown, doc in enumerate(members):
+        if length + len(doc['text']) + 1 > max_chars:
+            lines.append(f"... and {len(members) - shown} more")
+            break
+        lines.append(doc['text'])
+        length += len(doc['text']) + 1
+    group = {
+        'type': GROUP_DOC_TYPE,
+        'group': key,
+        'source': key,
+        'sources': sorted(d['source'] for d in members),
+        'count': len(members),
+        'collapsed': collapsed,
+        'text': '\n'.join(lines),
+    }
+    if key.startswith('item:'):
+        group['result_id'] = first['result_id']
+    return group
+
+
+class DocConsolidator:
+    """스캔 문서 스트림 정리
+
+    - 레시피가 아닌 문서는 받는 즉시 그대로 내보냄 (본문에 파일 경로가 들어가 중복될 일이 없음)
+    - 레시피 문서는 group_key 해시에 따라 buckets개의 임시 JSON Lines 파일로 내보냈다가, 스트림이 끝나면
+      파일을 하나씩 읽어 묶음별로 처리함. 묶음 안에서 정규화한 본문이 같은 문서(완전 중복)와
+      shingle Jaccard가 threshold 이상인 문서(유사 중복)를 접고, 둘 이상 남으면 묶음 문서 하나로 내보냄
+    메모리에는 임시 파일 하나(전체 레시피 문서의 약 1/buckets)만 올라간다. 디스크는 레시피 문서 크기만큼 쓴다.
+    stats에 입력/출력 수와 접은 수를 남긴다.
+    """
+
+    def __init__(self, threshold: float = NEAR_DUP_THRESHOLD, max_chars: int = GROUP_MAX_CHARS,
+                 buckets: int = SPILL_BUCKETS, spill_dir: Optional[str] = None):
+        self.threshold = threshold
+        self.max_chars = max_chars
+        self.buckets = max(1, buckets)
+        self.spill_dir = spill_dir
+        self.stats = {'input': 0, 'output': 0, 'exact_duplicates': 0, 'near_duplicates': 0, 'groups': 0}
+
+    def consolidate(self, docs: Iterable[Dict[str, Any]]) -> Iterator[Dict[str, Any]]:
+        if self.spill_dir:
+            os.makedirs(self.spill_dir, exist_ok=True)
+        work_dir = tempfile.mkdtemp(prefix='consolidate_', dir=self.spill_dir)
+        files: Dict[int, Any] = {}
+        try:
+            for doc in docs:
+                self.stats['input'] += 1
+                key = group_key(doc) if doc.get('text') else None
+                if key is None:
+                    self.stats['output'] += 1
+                    yield doc
+                    continue
+                bucket = zlib.crc32(key.encode('utf-8')) % self.buckets
+                if bucket not in files:
+                    files[bucket] = open(os.path.join(work_dir, f"{bucket}.jsonl"), 'w', encoding='utf-8')
+                files[bucket].write(json.dumps([key, doc], ensure_ascii=False) + '\n')
+
+            for bucket in sorted(files):
+                files[bucket].close()
+                yield from self._consolidate_bucket(os.path.join(work_dir, f"{bucket}.jsonl"))
+        finally:
+            for f in files.values():
+                f.close()
+            shutil.rmtree(work_dir, ignore_errors=True)
+
+    def _consolidate_bucket(self, path: str) -> Iterator[Dict[str, Any]]:
+        """임시 파일 하나의 레시피를 묶음별로 정리해 내보냄"""
+        groups: Dict[str, List[Dict[str, Any]]] = {}
+        with open(path, 'r', encoding='utf-8') as f:
+            for line in f:
+                key, doc = json.loads(line)
+                groups.setdefault(key, []).append(doc)
+
+        for key in sorted(groups):
+            members, exact = self._collapse_exact_duplicates(groups.pop(key))
+            members, collapsed = self._collapse_near_duplicates(members)
+            self.stats['exact_duplicates'] += exact
+            self.stats['near_duplicates'] += collapsed
+            self.stats['output'] += 1
+            if len(members) == 1 and not collapsed:
+                # 혼자인 레시피는 묶지 않고 파서가 만든 문서 그대로 (source는 파일 경로)
+                yield members[0]
+                continue
+            self.stats['groups'] += 1
+            yield _group_doc(key, members, collapsed, self.max_chars)
+
+    @staticmethod
+    def _collapse_exact_duplicates(members: List[Dict[str, Any]]) -> Tuple[List[Dict[str, Any]], int]:
+        """정규화한 본문이 같은 문서는 처음 것만 남김 → (남은 문서, 접은 수)"""
+        seen: Set[str] = set()
+        kept = []
+        for doc in members:
+            digest = content_hash(doc['text'])
+            if digest not in seen:
+                seen.add(digest)
+                kept.append(doc)
+        return kept, len(members) - len(kept)
+
+    def _collapse_near_duplicates(self, members: List[Dict[str, Any]]) -> Tuple[List[Dict[str, Any]], int]:
+        """묶음 안의 유사 중복 제거 → (남은 문서, 접은 수). 이미 남긴 문서와만 비교 (묶음 크기 제곱 이하)"""
+        if self.threshold > 1 or len(members) < 2:
+            return members, 0
+        kept: List[Tuple[Dict[str, Any], Set[int]]] = []
+        for doc in members:
+            sig = shingles(doc['text'])
+            if any(jaccard(sig, other) >= self.threshold for _, other in kept):
+                continue
+            kept.append((doc, sig))
+        return [doc for doc, _ in kept], len(members) - len(kept)
+
+    @property
+    def reduction(self) -> float:
+        """줄어든 비율 (0~1)"""
+        if not self.stats['input']:
+            return 0.0
+        return 1.0 - self.stats['output'] / float(self.stats['input'])
+
+    def summary(self) -> Dict[str, Any]:
+        return dict(self.stats, reduction=round(self.reduction, 4))
+
+
+def consolidate_docs(docs: Iterable[Dict[str, Any]], threshold: float = NEAR_DUP_THRESHOLD,
+                     max_chars: int = GROUP_MAX_CHARS,
+                     spill_dir: Optional[str] = None) -> Tuple[List[Dict[str, Any]], Dict[str, Any]]:
+    """문서 목록 정리 → (정리된 문서, 통계)"""
+    consolidator = DocConsolidator(threshold, max_chars, spill_dir=spill_dir)
+    result = list(consolidator.consolidate(docs))
+    summary = consolidator.summary()
+    logger.info(f"문서 정리: {summary['input']}개 → {summary['output']}개 "
+                f"(완전 중복 {summary['exact_duplicates']}, 유사 중복 {summary['near_duplicates']}, "
+                f"묶음 {summary['groups']})")
+    return result, summary
@@ -0,0 +1,147 @@
+# 로컬 RAG 디스크 형식 - 벡터는 float32 .npy를 mmap으로, 문서는 오프셋 색인된 바이너리 파일로 저장
+# 시작 시 전체 JSON을 파싱하거나 FAISS 인덱스를 통째로 읽지 않고, 검색 결과로 나간 문서만 디코딩한다
+
+import os
+import json
+import mmap
+import shutil
+from typing import Dict, Any, Optional, Iterable, Iterator, Tuple
+import logging
+
+import numpy as np
+
+from bm25_index import BM25Index
+from vector_index import select_top_k
+
+logger = logging.getLogger(__name__)
+
+FLAT_INDEX_VERSION = 1
+
+
+class DocStore:
+    """읽기 전용 문서 목록 (docs.bin + doc_offsets.npy)
+
+    docs.bin에 문서마다 UTF-8 JSON을 이어 붙이고, i번째 문서는 offsets[i]:offsets[i+1] 구간이다.
+    두 파일 모두 mmap으로 열어 두고 인덱싱할 때만 해당 구간을 디코딩하므로, 열기는 문서 수와 무관하게 즉시 끝난다.
+    """
+
+    def __init__(self, offsets: np.ndarray, data):
+        self.offsets = offsets
+        self._data = data
+
+    def __len__(self) -> int:
+        return int(self.offsets.shape[0]) - 1
+
+    def __getitem__(self, i: int) -> Dict[str, Any]:
+        n = len(self)
+        if i < 0:
+            i += n
+        if not 0 <= i < n:
+            raise IndexError(i)
+        return json.loads(self._data[int(self.offsets[i]):int(self.offsets[i + 1])])
+
+    def __iter__(self) -> Iterator[Dict[str, Any]]:
+        for i in range(len(self)):
+            yield self[i]
+
+    @staticmethod
+    def write(directory: str, docs: Iterable[Dict[str, Any]]) -> int:
+        """문서를 directory/docs.bin, doc_offsets.npy로 저장 → 문서 수"""
+        offsets = [0]
+        with open(os.path.join(directory, 'docs.bin'), 'wb') as f:
+            for doc in docs:
+                raw = json.dumps(doc, ensure_ascii=False).encode('utf-8')
+                f.write(raw)
+                offsets.append(offsets[-1] + len(raw))
+        np.save(os.path.join(directory, 'doc_offsets.npy'), np.asarray(offsets, dtype=np.int64))
+        return len(offsets) - 1
+
+    @classmethod
+    def open(cls, directory: str) -> "DocStore":
+        offsets = np.load(os.path.join(directory, 'doc_offsets.npy'), mmap_mode='r')
+        with open(os.path.join(directory, 'docs.bin'), 'rb') as f:
+            # 빈 파일은 mmap할 수 없음 (문서 0개)
+            data = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) if os.fstat(f.fileno()).st_size else b''
+        return cls(offsets, data)
+
+
+class MmapFlatIndex:
+    """mmap한 정규화 벡터 위의 전수 내적 검색 (faiss.IndexFlatIP와 같은 search/reconstruct 사용법)
+
+    벡터 페이지는 첫 검색 때 OS 페이지 캐시로 올라오며 파이썬 힙에 복사하지 않는다.
+    """
+
+    def __init__(self, vectors: np.ndarray):
+        self.vectors = vectors
+
+    @property
+    def ntotal(self) -> int:
+        return int(self.vectors.shape[0])
+
+    @property
+    def d(self) -> int:
+        return int(self.vectors.shape[1])
+
+    def search(self, queries: np.ndarray, k: int) -> Tuple[np.ndarray, np.ndarray]:
+        """(점수, 문서 번호) - 각각 (질의 수, k), 결과가 모자라면 faiss처럼 -1로 채움"""
+        queries = np.asarray(queries, dtype=np.float32).reshape(-1, self.d)
+        D = np.full((queries.shape[0], k), -np.inf, dtype=np.float32)
+        I = np.full((queries.shape[0], k), -1, dtype=np.int64)
+        for row, q in enumerate(queries):
+            positions, scores = select_top_k(self.vectors @ q, k, -np.inf)
+            D[row, :len(positions)] = scores
+            I[row, :len(positions)] = positions
+        return D, I
+
+    def reconstruct(self, i: int) -> np.ndarray:
+        return np.array(self.vectors[i], dtype=np.float32)
+
+    def reconstruct_n(self, start: int, n: int) -> np.ndarray:
+        return np.array(self.vectors[start:start + n], dtype=np.float32)
+
+
+def save_flat_index(index_dir: str, vectors: np.ndarray, docs: Iterable[Dict[str, Any]],
+                    lexical: Optional[BM25Index] = None) -> None:
+    """벡터/문서/BM25 역색인을 디렉토리에 저장 (임시 디렉토리 작성 후 교체, meta.json은 마지막에 기록)
+    교체 전 디렉토리를 mmap 중인 프로세스는 지워진 이전 파일을 계속 읽을 수 있다.
+    """
+    tmp_dir = index_dir + '.tmp'
+    if os.path.isdir(tmp_dir):
+        shutil.rmtree(tmp_dir)
+    os.makedirs(tmp_dir)
+    vectors = np.ascontiguousarray(vectors, dtype=np.float32)
+    np.save(os.path.join(tmp_dir, 'vectors.npy'), vectors)
+    count = DocStore.write(tmp_dir, docs)
+    if lexical is not None:
+        lexical.save(tmp_dir)
+    with open(os.path.join(tmp_dir, 'meta.json'), 'w', encoding='utf-8') as f:
+        json.dump({'version': FLAT_INDEX_VERSION, 'count': count,
+                   'dim': int(vectors.shape[1]) if vectors.ndim == 2 else 0}, f)
+
+    if os.path.isdir(index_dir):
+        shutil.rmtree(index_dir)
+    os.replace(tmp_dir, index_dir)
+
+
+def load_flat_index(index_dir: str) -> Optional[Tuple[MmapFlatIndex, DocStore, Optional[BM25Index]]]:
+    """저장된 인덱스를 mmap으로 열기 → (벡터 인덱스, 문서, BM25 역색인 또는 None), 없거나 손상되었으면 None"""
+    meta_path = os.path.join(index_dir, 'meta.json')
+    if not os.path.isfile(meta_path):
+        return None
+    try:
+        with open(meta_path, 'r', encoding='utf-8') as f:
+            meta = json.load(f)
+        if meta.get('version') != FLAT_INDEX_VERSION:
+            return None
+        vectors = np.load(os.path.join(index_dir, 'vectors.npy'), mmap_mode='r')
+        docs = DocStore.open(index_dir)
+        if vectors.shape[0] != len(docs) or len(docs) != meta.get('count'):
+            logger.warning(f"로컬 RAG 인덱스 손상 (벡터 {vectors.shape[0]}개, 문서 {len(docs)}개): {index_dir}")
+            return None
+        lexical = BM25Index.load(index_dir, mmap=True)
+        if lexical is not None and lexical.num_docs != len(docs):
+            lexical = None
+        return MmapFlatIndex(vectors), docs, lexical
+    except Exception as e:
+        logger.warning(f"로컬 RAG 인덱스 로드 실패 {index_dir}: {e}")
+        return None
@@ -0,0 +1,148 @@
+# 쿼리 임베딩 캐시 - 반복되는 채팅 질문의 임베딩 재계산/원격 호출 방지
+# GCP RAG(Vertex 임베딩)와 로컬 RAG(SentenceTransformer)가 함께 사용
+
+import os
+import re
+import atexit
+import threading
+from collections import OrderedDict
+from typing import Callable, Dict, Any, Optional
+import logging
+
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+_WHITESPACE_RE = re.compile(r'\s+')
+_TRAILING_PUNCT_RE = re.compile(r'[\s?!.~,]+$')
+
+
+def normalize_query(text: str) -> str:
+    """캐시 키용 질문 정규화 (대소문자, 공백, 끝 문장부호 차이 무시)"""
+    text = _WHITESPACE_RE.sub(' ', (text or '').strip().lower())
+    return _TRAILING_PUNCT_RE.sub('', text)
+
+
+class EmbeddingCache:
+    """(임베딩 모델, 정규화된 질문) → 임베딩 벡터 LRU 캐시
+
+    persist_path가 주어지면 .npz 파일로 저장/복원하여 재시작 후에도 재사용한다.
+    """
+
+    def __init__(self, max_entries: int = 2048, persist_path: Optional[str] = None,
+                 save_every: int = 50):
+        self.max_entries = max_entries
+        self.persist_path = persist_path
+        self.save_every = save_every
+        self._entries: "OrderedDict[tuple[str, str], np.ndarray]" = OrderedDict()
+        self._lock = threading.Lock()
+        # 저장은 항목 잠금 밖에서 파일을 쓰므로 별도 잠금으로 한 번에 하나만 (같은 임시 파일에 겹쳐 쓰지 않음)
+        self._save_lock = threading.Lock()
+        self._unsaved = 0
+        self.hits = 0
+        self.misses = 0
+
+        if self.persist_path:
+            self.load()
+            atexit.register(self.save)
+
+    def get(self, namespace: str, text: str) -> Optional[np.ndarray]:
+        key = (namespace, normalize_query(text))
+        with self._lock:
+            vector = self._entries.get(key)
+            if vector is None:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return vector
+
+    def peek(self, namespace: str, text: str) -> Optional[np.ndarray]:
+        """통계/LRU 순서에 영향 없이 조회 (이미 계산된 임베딩 재사용용)"""
+        with self._lock:
+            return self._entries.get((namespace, normalize_query(text)))
+
+    def put(self, namespace: str, text: str, vector) -> np.ndarray:
+        key = (namespace, normalize_query(text))
+        vector = np.asarray(vector, dtype=np.float32).reshape(-1)
+        with self._lock:
+            self._entries[key] = vector
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+            self._unsaved += 1
+            should_save = self.persist_path and self._unsaved >= self.save_every
+        if should_save:
+            self.save()
+        return vector
+
+    def get_or_compute(self, namespace: str, text: str, compute: Callable[[str], Any]) -> np.ndarray:
+        """캐시에 있으면 반환, 없으면 compute(text)로 계산 후 저장"""
+        vector = self.get(namespace, text)
+        if vector is None:
+            vector = self.put(namespace, text, compute(text))
+        return vector
+
+    def save(self) -> bool:
+        """디스크에 저장 (persist_path 미설정 시 무시)"""
+        if not self.persist_path:
+            return False
+        with self._save_lock:
+            return self._save()
+
+    def _save(self) -> bool:
+        with self._lock:
+            grouped: Dict[str, list] = {}
+            for (namespace, key), vector in self._entries.items():
+                grouped.setdefault(namespace, []).append((key, vector))
+            self._unsaved = 0
+        try:
+            arrays = {'namespaces': np.array(list(grouped.keys()), dtype=str)}
+            for i, items in enumerate(grouped.values()):
+                arrays[f'keys_{i}'] = np.array([k for k, _ in items], dtype=str)
+                arrays[f'vectors_{i}'] = np.vstack([v for _, v in items])
+            os.makedirs(os.path.dirname(self.persist_path) or '.', exist_ok=True)
+            tmp_path = self.persist_path + '.tmp.npz'
+            np.savez(tmp_path, **arrays)
+            os.replace(tmp_path, self.persist_path)
+            return True
+        except Exception as e:
+            logger.warning(f"쿼리 임베딩 캐시 저장 실패: {e}")
+            return False
+
+    def load(self) -> bool:
+        """디스크에서 복원"""
+        if not self.persist_path or not os.path.isfile(self.persist_path):
+            return False
+        try:
+            with np.load(self.persist_path, allow_pickle=False) as data:
+                with self._lock:
+                    for i, namespace in enumerate(data['namespaces'].tolist()):
+                        for key, vector in zip(data[f'keys_{i}'].tolist(), data[f'vectors_{i}']):
+                            self._entries[(namespace, key)] = vector
+                    while len(self._entries) > self.max_entries:
+                        self._entries.popitem(last=False)
+            logger.info(f"쿼리 임베딩 캐시 복원: {len(self._entries)}개")
+            return True
+        except Exception as e:
+            logger.warning(f"쿼리 임베딩 캐시 로드 실패: {e}")
+            return False
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            total = self.hits + self.misses
+            return {
+                'entries': len(self._entries),
+                'max_entries': self.max_entries,
+                'hits': self.hits,
+                'misses': self.misses,
+                'hit_rate': self.hits / total if total else 0.0,
+                'persistent': bool(self.persist_path)
+            }
+
+
+# 전역 인스턴스 (GCP RAG와 로컬 RAG가 공유)
+query_embedding_cache = EmbeddingCache(
+    max_entries=int(os.getenv('QUERY_EMBEDDING_CACHE_SIZE', '2048')),
+    persist_path=os.getenv('QUERY_EMBEDDING_CACHE_PATH') or None
+)
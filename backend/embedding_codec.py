@@ -0,0 +1,122 @@
+# 임베딩 양자화 저장 - float32 대신 float16(절반) 또는 int8+행별 스케일(약 1/4)로 보관
+# Firestore에는 float 배열(문서당 768개 double) 대신 바이트 하나로, 로컬 인덱스에는 압축된 행렬 그대로 둔다
+
+import os
+from typing import Optional, Tuple
+
+import numpy as np
+
+EMBEDDING_DTYPES = ('float32', 'float16', 'int8')
+# 점수 계산 시 한 번에 float32로 펼칠 행 수 (전체 행렬의 float32 사본을 만들지 않음)
+DOT_BLOCK_ROWS = 8192
+_INT8_MAX = 127.0
+
+
+def embedding_dtype(env: str = 'GCP_RAG_EMBEDDING_DTYPE', default: str = 'float16') -> str:
+    """저장 형식 환경변수 (float32 | float16 | int8)
+    GCP_RAG_EMBEDDING_DTYPE: Firestore 원본 (기본 float16 - 재구축의 기준이므로 거의 무손실로)
+    GCP_RAG_INDEX_DTYPE: 로컬 검색 인덱스 (기본 int8 - 메모리 1/4, float16보다 점수 계산도 빠름)
+    """
+    dtype = os.getenv(env, default).lower()
+    return dtype if dtype in EMBEDDING_DTYPES else default
+
+
+def index_dtype() -> str:
+    return embedding_dtype('GCP_RAG_INDEX_DTYPE', 'int8')
+
+
+def quantize(vectors: np.ndarray, dtype: str) -> Tuple[np.ndarray, Optional[np.ndarray]]:
+    """(N, dim) float32 → (코드 행렬, 행별 스케일 또는 None)
+    int8은 행마다 최대 절댓값을 127로 맞추는 대칭 양자화 (값 = 코드 × 스케일).
+    """
+    vectors = np.asarray(vectors, dtype=np.float32)
+    if dtype == 'float32':
+        return np.ascontiguousarray(vectors), None
+    if dtype == 'float16':
+        return vectors.astype(np.float16), None
+    if dtype == 'int8':
+        scales = np.abs(vectors).max(axis=1) / _INT8_MAX if vectors.size else np.zeros(len(vectors), np.float32)
+        scales = scales.astype(np.float32)
+        safe = np.where(scales > 0, scales, 1.0)[:, None]
+        codes = np.clip(np.rint(vectors / safe), -_INT8_MAX, _INT8_MAX).astype(np.int8)
+        return codes, scales
+    raise ValueError(f"지원하지 않는 임베딩 형식: {dtype}")
+
+
+def pack_embedding(vector, dtype: str) -> bytes:
+    """임베딩 하나 → Firestore 바이트 필드 (int8은 앞 4바이트에 float32 스케일)"""
+    codes, scales = quantize(np.asarray(vector, dtype=np.float32).reshape(1, -1), dtype)
+    if scales is None:
+        return codes.tobytes()
+    return scales.tobytes() + codes.tobytes()
+
+
+def unpack_embedding(blob: bytes, dtype: str) -> Tuple[np.ndarray, float]:
+    """pack_embedding의 역 → (코드 벡터, 스케일). 코드는 blob을 복사하지 않는 frombuffer 뷰"""
+    if dtype == 'int8':
+        scale = float(np.frombuffer(blob, dtype=np.float32, count=1)[0])
+        return np.frombuffer(blob, dtype=np.int8, offset=4), scale
+    return np.frombuffer(blob, dtype=np.dtype(dtype)), 1.0
+
+
+class QuantizedVectors:
+    """양자화된 (N, dim) 임베딩 행렬
+
+    codes: float32/float16/int8 행렬, scales: int8일 때의 행별 스케일.
+    점수 계산은 DOT_BLOCK_ROWS행씩 float32로 펼쳐 내적하므로 추가 메모리는 블록 하나 분량이다.
+    """
+
+    def __init__(self, codes: np.ndarray, scales: Optional[np.ndarray] = None):
+        self.codes = codes
+        self.scales = scales
+
+    @classmethod
+    def from_float(cls, vectors: np.ndarray, dtype: str = 'float32') -> "QuantizedVectors":
+        return cls(*quantize(vectors, dtype))
+
+    @property
+    def dtype(self) -> str:
+        return self.codes.dtype.name
+
+    @property
+    def shape(self) -> Tuple[int, int]:
+        return self.codes.shape
+
+    @property
+    def nbytes(self) -> int:
+        return int(self.codes.nbytes + (self.scales.nbytes if self.scales is not None else 0))
+
+    def __len__(self) -> int:
+        return int(self.codes.shape[0])
+
+    def __getitem__(self, rows) -> np.ndarray:
+        """행 선택 → float32 (복원된 값)"""
+        values = self.codes[rows].astype(np.float32)
+        if self.scales is not None:
+            values *= self.scales[rows][..., None]
+        return values
+
+    def dot(self, q: np.ndarray, rows: Optional[np.ndarray] = None) -> np.ndarray:
+        """행(rows가 있으면 그 행들)과 float32 쿼리 벡터의 내적"""
+        codes = self.codes if rows is None else self.codes[rows]
+        if codes.dtype == np.float32:
+            scores = codes @ q
+        else:
+            scores = np.empty(codes.shape[0], dtype=np.float32)
+            for start in range(0, codes.shape[0], DOT_BLOCK_ROWS):
+                block = codes[start:start + DOT_BLOCK_ROWS]
+                scores[start:start + DOT_BLOCK_ROWS] = block.astype(np.float32) @ q
+        if self.scales is not None:
+            scores *= self.scales if rows is None else self.scales[rows]
+        return scores
+
+
+def recall_at_k(vectors: np.ndarray, queries: np.ndarray, dtype: str, top_k: int = 10) -> float:
+    """float32 전수 검색 top_k 대비 양자화 저장 전수 검색 top_k의 재현율 (0~1)"""
+    exact = np.argsort(-(queries @ vectors.T), axis=1)[:, :top_k]
+    quantized = QuantizedVectors.from_float(vectors, dtype)
+    hits = 0
+    for q, expected in zip(queries, exact):
+        found = np.argsort(-quantized.dot(q))[:top_k]
+        hits += len(set(found.tolist()) & set(expected.tolist()))
+    return hits / float(exact.size) if exact.size else 1.0
@@ -0,0 +1,148 @@
+# 임베딩 요청 스케줄러 - 동시 요청 수 제한, 토큰 버킷 속도 제한, 배치별 재시도, 순서 보장
+
+import os
+import time
+import random
+import threading
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, Iterable, Iterator, List, Sequence, Tuple, Any, Dict, Optional
+import logging
+
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+
+class EmbeddingError(Exception):
+    """재시도 후에도 임베딩 배치가 실패한 경우"""
+
+    def __init__(self, batch_no: int, cause: Exception):
+        super().__init__(f"임베딩 배치 {batch_no} 실패: {cause}")
+        self.batch_no = batch_no
+        self.cause = cause
+
+
+class TokenBucket:
+    """초당 rate개 토큰이 채워지는 버킷 (최대 capacity개까지 몰아서 사용 가능)"""
+
+    def __init__(self, rate: float, capacity: float, clock: Callable[[], float] = time.monotonic,
+                 sleep: Callable[[float], None] = time.sleep):
+        self.rate = rate
+        self.capacity = capacity
+        self._tokens = capacity
+        self._clock = clock
+        self._sleep = sleep
+        self._updated = clock()
+        self._lock = threading.Lock()
+
+    def acquire(self, tokens: float = 1.0) -> float:
+        """토큰을 얻을 때까지 대기, 대기한 시간(초) 반환"""
+        if self.rate <= 0:
+            return 0.0
+        waited = 0.0
+        while True:
+            with self._lock:
+                now = self._clock()
+                self._tokens = min(self.capacity, self._tokens + (now - self._updated) * self.rate)
+                self._updated = now
+                if self._tokens >= tokens:
+                    self._tokens -= tokens
+                    return waited
+                wait = (tokens - self._tokens) / self.rate
+            self._sleep(wait)
+            waited += wait
+
+
+class EmbeddingScheduler:
+    """텍스트 배치를 여러 스레드로 동시에 임베딩하고 입력 순서대로 돌려주는 스케줄러
+
+    embed_fn(texts) -> 벡터 목록. 배치가 실패하면 지수 백오프로 재시도하고,
+    max_retries번 모두 실패하면 EmbeddingError를 발생시킨다.
+    """
+
+    def __init__(self, embed_fn: Callable[[List[str]], Sequence[Sequence[float]]],
+                 max_workers: int = 4, requests_per_second: float = 10.0,
+                 max_retries: int = 4, base_delay: float = 1.0, max_delay: float = 30.0,
+                 sleep: Callable[[float], None] = time.sleep):
+        self.embed_fn = embed_fn
+        self.max_workers = max(1, max_workers)
+        self.max_retries = max_retries
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+        self._sleep = sleep
+        self._bucket = TokenBucket(requests_per_second, capacity=max(1.0, float(self.max_workers)), sleep=sleep)
+        self._stats_lock = threading.Lock()
+        self.requests = 0
+        self.retries = 0
+        self.failures = 0
+        self.throttled_seconds = 0.0
+
+    def embed_batches(self, batches: Iterable[List[Any]],
+                      text_of: Optional[Callable[[Any], str]] = None) -> Iterator[Tuple[List[Any], np.ndarray]]:
+        """batches를 순서대로 (배치, float32 벡터 행렬)로 반환
+
+        동시에 처리 중인 배치는 max_workers * 2개로 제한되므로 batches가 제너레이터면
+        입력도 필요한 만큼만 읽는다. 소비를 중단하면 아직 시작하지 않은 배치는 취소된다.
+        """
+        text_of = text_of or (lambda item: item)
+        in_flight = deque()
+        with ThreadPoolExecutor(max_workers=self.max_workers, thread_name_prefix='embedding') as executor:
+            try:
+                for batch_no, batch in enumerate(batches, 1):
+                    texts = [text_of(item) for item in batch]
+                    in_flight.append((batch, executor.submit(self._embed_with_retry, batch_no, texts)))
+                    if len(in_flight) >= self.max_workers * 2:
+                        batch, future = in_flight.popleft()
+                        yield batch, future.result()
+                while in_flight:
+                    batch, future = in_flight.popleft()
+                    yield batch, future.result()
+            finally:
+                for _, future in in_flight:
+                    future.cancel()
+
+    def _embed_with_retry(self, batch_no: int, texts: List[str]) -> np.ndarray:
+        for attempt in range(self.max_retries + 1):
+            waited = self._bucket.acquire()
+            with self._stats_lock:
+                self.requests += 1
+                self.throttled_seconds += waited
+            try:
+                vectors = np.asarray(self.embed_fn(texts), dtype=np.float32)
+                if len(vectors) != len(texts):
+                    raise ValueError(f"임베딩 수({len(vectors)})와 텍스트 수({len(texts)}) 불일치")
+                return vectors
+            except Exception as e:
+                if attempt >= self.max_retries:
+                    with self._stats_lock:
+                        self.failures += 1
+                    raise EmbeddingError(batch_no, e) from e
+                # 동시에 실패한 배치들이 같은 시각에 재시도하지 않도록 지터 적용
+                delay = min(self.max_delay, self.base_delay * (2 ** attempt)) * (0.5 + random.random() / 2)
+                with self._stats_lock:
+                    self.retries += 1
+                logger.warning(f"⚠️ 임베딩 배치 {batch_no} 실패 ({attempt + 1}/{self.max_retries + 1}), "
+                               f"{delay:.1f}초 후 재시도: {e}")
+                self._sleep(delay)
+
+    def stats(self) -> Dict[str, Any]:
+        with self._stats_lock:
+            return {
+                'max_workers': self.max_workers,
+                'requests_per_second': self._bucket.rate,
+                'requests': self.requests,
+                'retries': self.retries,
+                'failures': self.failures,
+                'throttled_seconds': round(self.throttled_seconds, 3)
+            }
+
+
+def scheduler_from_env(embed_fn: Callable[[List[str]], Sequence[Sequence[float]]]) -> EmbeddingScheduler:
+    """환경변수 설정으로 스케줄러 생성"""
+    return EmbeddingScheduler(
+        embed_fn,
+        max_workers=int(os.getenv('GCP_EMBED_CONCURRENCY', '4')),
+        requests_per_second=float(os.getenv('GCP_EMBED_RPS', '10')),
+        max_retries=int(os.getenv('GCP_EMBED_MAX_RETRIES', '4'))
+    )
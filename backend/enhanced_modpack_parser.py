@@ -7,7 +7,8 @@
 import os
 import json
 import re
-from typing import List, Dict, Any, Tuple, Set
+import glob
+from typing import List, Dict, Any, Tuple, Set, Iterator, Optional
 from pathlib import Path
 import logging
 
@@ -53,8 +54,24 @@ class EnhancedModpackParser:
         if not os.path.exists(modpack_path):
             return {'docs': [], 'stats': {}, 'error': 'Path not found'}
         
-        docs = []
-        stats = {
+        stats: Dict[str, Any] = {}
+        docs = list(self.iter_enhanced_docs(modpack_path, stats))
+        
+        print(f"✅ 스캔 완료: {len(docs)}개 문서, {stats}")
+        
+        return {
+            'docs': docs,
+            'stats': stats,
+            'modpack_analysis': self._analyze_modpack_type(stats, len(docs))
+        }
+    
+    def iter_enhanced_docs(self, modpack_path: str, stats: Optional[Dict[str, Any]] = None) -> Iterator[Dict[str, Any]]:
+        """문서를 하나씩 반환하는 스트리밍 스캔 (전체 문서 목록을 메모리에 만들지 않음)
+        stats가 주어지면 스캔하면서 통계를 채운다.
+        """
+        if stats is None:
+            stats = {}
+        stats.update({
             'recipes': 0,
             'mods': 0, 
             'kubejs': 0,
@@ -63,95 +80,74 @@ class EnhancedModpackParser:
             'lang_files': 0,
             'mod_categories': {},
             'recipe_types': {}
-        }
+        })
+        
+        if not os.path.exists(modpack_path):
+            return
         
         # 1. 모드 분석 (향상된 버전)
-        mod_docs, mod_stats = self._analyze_mods_enhanced(modpack_path)
-        docs.extend(mod_docs)
-        stats.update(mod_stats)
+        yield from self._iter_mods_enhanced(modpack_path, stats)
         
         # 2. 레시피 분석 (확장된 지원)
-        recipe_docs, recipe_stats = self._analyze_recipes_enhanced(modpack_path)
-        docs.extend(recipe_docs)
-        stats['recipes'] = recipe_stats['count']
-        stats['recipe_types'] = recipe_stats['types']
+        yield from self._iter_recipes_enhanced(modpack_path, stats)
         
         # 3. KubeJS 스크립트 분석
-        kubejs_docs, kubejs_count = self._analyze_kubejs_enhanced(modpack_path)
-        docs.extend(kubejs_docs)
-        stats['kubejs'] = kubejs_count
+        yield from self._iter_kubejs_enhanced(modpack_path, stats)
         
         # 4. 설정 파일 분석
-        config_docs, config_count = self._analyze_configs(modpack_path)
-        docs.extend(config_docs)
-        stats['configs'] = config_count
+        yield from self._iter_configs(modpack_path, stats)
         
         # 5. 퀘스트 분석 (FTB Quests, HQM 등)
-        quest_docs, quest_count = self._analyze_quests(modpack_path)
-        docs.extend(quest_docs)
-        stats['quests'] = quest_count
+        yield from self._iter_quests(modpack_path, stats)
         
         # 6. 언어 파일 분석 (다국어 지원)
-        lang_docs, lang_count = self._analyze_lang_files(modpack_path)
-        docs.extend(lang_docs)
-        stats['lang_files'] = lang_count
-        
-        print(f"✅ 스캔 완료: {len(docs)}개 문서, {stats}")
-        
-        return {
-            'docs': docs,
-            'stats': stats,
-            'modpack_analysis': self._analyze_modpack_type(stats, docs)
-        }
+        yield from self._iter_lang_files(modpack_path, stats)
     
-    def _analyze_mods_enhanced(self, modpack_path: str) -> Tuple[List[Dict], Dict]:
+    def _iter_mods_enhanced(self, modpack_path: str, stats: Dict[str, Any]) -> Iterator[Dict]:
         """향상된 모드 분석"""
         mods_dir = os.path.join(modpack_path, 'mods')
         if not os.path.isdir(mods_dir):
-            return [], {'mods': 0, 'mod_categories': {}}
+            return
         
-        docs = []
         mod_categories = {cat: 0 for cat in self.mod_categories}
+        stats['mod_categories'] = mod_categories
         
         try:
             jar_files = [f for f in os.listdir(mods_dir) if f.lower().endswith('.jar')]
+        except Exception as e:
+            logger.error(f"모드 분석 실패: {e}")
+            return
+        
+        for jar_file in jar_files:
+            # 모드명에서 정보 추출
+            mod_name = self._extract_mod_name(jar_file)
+            mod_category = self._categorize_mod(mod_name)
             
-            for jar_file in jar_files:
-                # 모드명에서 정보 추출
-                mod_name = self._extract_mod_name(jar_file)
-                mod_category = self._categorize_mod(mod_name)
-                
-                if mod_category:
-                    mod_categories[mod_category] += 1
-                
-                # 향상된 텍스트 정보
-                text = f"Mod: {mod_name} (category: {mod_category or 'general'})"
-                if self._is_major_mod(mod_name):
-                    text += " [MAJOR MOD]"
-                
-                docs.append({
-                    'type': 'mod',
-                    'mod_name': mod_name,
-                    'category': mod_category,
-                    'is_major': self._is_major_mod(mod_name),
-                    'source': os.path.join(mods_dir, jar_file),
-                    'text': text
-                })
+            if mod_category:
+                mod_categories[mod_category] += 1
             
-            return docs, {'mods': len(jar_files), 'mod_categories': mod_categories}
+            # 향상된 텍스트 정보
+            text = f"Mod: {mod_name} (category: {mod_category or 'general'})"
+            if self._is_major_mod(mod_name):
+                text += " [MAJOR MOD]"
             
-        except Exception as e:
-            logger.error(f"모드 분석 실패: {e}")
-            return [], {'mods': 0, 'mod_categories': {}}
+            stats['mods'] += 1
+            yield {
+                'type': 'mod',
+                'mod_name': mod_name,
+                'category': mod_category,
+                'is_major': self._is_major_mod(mod_name),
+                'source': os.path.join(mods_dir, jar_file),
+                'text': text
+            }
     
-    def _analyze_recipes_enhanced(self, modpack_path: str) -> Tuple[List[Dict], Dict]:
+    def _iter_recipes_enhanced(self, modpack_path: str, stats: Dict[str, Any]) -> Iterator[Dict]:
         """확장된 레시피 분석"""
         data_dir = os.path.join(modpack_path, 'data')
         if not os.path.isdir(data_dir):
-            return [], {'count': 0, 'types': {}}
+            return
         
-        docs = []
-        recipe_types = {}
+        recipe_types = stats['recipe_types']
         
         for root, _, files in os.walk(data_dir):
             for file_name in files:
@@ -168,14 +164,13 @@ class EnhancedModpackParser:
                     
                     # 향상된 레시피 파싱
                     recipe_doc = self._parse_recipe_enhanced(data, file_path, recipe_type)
-                    if recipe_doc:
-                        docs.append(recipe_doc)
-                        
                 except Exception as e:
                     logger.debug(f"레시피 파일 파싱 실패 {file_path}: {e}")
                     continue
-        
-        return docs, {'count': len(docs), 'types': recipe_types}
+                
+                if recipe_doc:
+                    stats['recipes'] += 1
+                    yield recipe_doc
     
     def _parse_recipe_enhanced(self, recipe_data: Dict, file_path: str, recipe_type: str) -> Dict:
         """향상된 레시피 파싱"""
@@ -262,13 +257,11 @@ class EnhancedModpackParser:
         
         return ingredients[:5]  # 최대 5개 재료만
     
-    def _analyze_kubejs_enhanced(self, modpack_path: str) -> Tuple[List[Dict], int]:
+    def _iter_kubejs_enhanced(self, modpack_path: str, stats: Dict[str, Any]) -> Iterator[Dict]:
         """향상된 KubeJS 분석"""
         kubejs_dir = os.path.join(modpack_path, 'kubejs')
         if not os.path.isdir(kubejs_dir):
-            return [], 0
-        
-        docs = []
+            return
         
         for root, _, files in os.walk(kubejs_dir):
             for file_name in files:
@@ -279,36 +272,34 @@ class EnhancedModpackParser:
                 try:
                     with open(file_path, 'r', encoding='utf-8', errors='ignore') as f:
                         content = f.read(3000)  # 더 많은 내용 읽기
-                    
-                    # 스크립트 타입 분석
-                    script_type = self._analyze_kubejs_type(content, file_path)
-                    
-                    # 내용 요약
-                    summary = self._summarize_kubejs_content(content)
-                    
-                    relative_path = os.path.relpath(file_path, kubejs_dir)
-                    text = f"KubeJS {script_type}: {relative_path} | {summary}"
-                    
-                    docs.append({
-                        'type': 'kubejs',
-                        'script_type': script_type,
-                        'summary': summary,
-                        'source': file_path,
-                        'text': text
-                    })
-                    
                 except Exception as e:
                     logger.debug(f"KubeJS 파일 읽기 실패 {file_path}: {e}")
-        
-        return docs, len(docs)
+                    continue
+                
+                # 스크립트 타입 분석
+                script_type = self._analyze_kubejs_type(content, file_path)
+                
+                # 내용 요약
+                summary = self._summarize_kubejs_content(content)
+                
+                relative_path = os.path.relpath(file_path, kubejs_dir)
+                text = f"KubeJS {script_type}: {relative_path} | {summary}"
+                
+                stats['kubejs'] += 1
+                yield {
+                    'type': 'kubejs',
+                    'script_type': script_type,
+                    'summary': summary,
+                    'source': file_path,
+                    'text': text
+                }
     
-    def _analyze_configs(self, modpack_path: str) -> Tuple[List[Dict], int]:
+    def _iter_configs(self, modpack_path: str, stats: Dict[str, Any]) -> Iterator[Dict]:
         """설정 파일 분석"""
         config_dir = os.path.join(modpack_path, 'config')
         if not os.path.isdir(config_dir):
-            return [], 0
+            return
         
-        docs = []
         important_configs = {
             'thermal.toml', 'mekanism.toml', 'create.toml', 
             'appliedenergistics2.toml', 'botania.toml'
@@ -323,25 +314,24 @@ class EnhancedModpackParser:
                 try:
                     with open(file_path, 'r', encoding='utf-8', errors='ignore') as f:
                         content = f.read(1000)
-                    
-                    mod_name = file_name.replace('.toml', '')
-                    text = f"Config: {mod_name} | {content[:200].replace('\n', ' ')}"
-                    
-                    docs.append({
-                        'type': 'config',
-                        'mod_name': mod_name,
-                        'source': file_path,
-                        'text': text
-                    })
-                    
                 except Exception as e:
                     logger.debug(f"설정 파일 읽기 실패 {file_path}: {e}")
-        
-        return docs, len(docs)
+                    continue
+                
+                mod_name = file_name.replace('.toml', '')
+                preview = content[:200].replace('\n', ' ')
+                text = f"Config: {mod_name} | {preview}"
+                
+                stats['configs'] += 1
+                yield {
+                    'type': 'config',
+                    'mod_name': mod_name,
+                    'source': file_path,
+                    'text': text
+                }
     
-    def _analyze_quests(self, modpack_path: str) -> Tuple[List[Dict], int]:
+    def _iter_quests(self, modpack_path: str, stats: Dict[str, Any]) -> Iterator[Dict]:
         """퀘스트 시스템 분석"""
-        docs = []
         quest_dirs = ['ftbquests', 'config/ftbquests', 'questbook', 'config/hqm']
         
         for quest_dir_name in quest_dirs:
@@ -358,28 +348,25 @@ class EnhancedModpackParser:
                     try:
                         with open(file_path, 'r', encoding='utf-8', errors='ignore') as f:
                             content = f.read(2000)
-                        
-                        # 퀘스트 정보 추출
-                        quest_info = self._extract_quest_info(content)
-                        
-                        text = f"Quest: {quest_info.get('title', file_name)} | {quest_info.get('description', '')[:100]}"
-                        
-                        docs.append({
-                            'type': 'quest',
-                            'quest_info': quest_info,
-                            'source': file_path,
-                            'text': text
-                        })
-                        
                     except Exception as e:
                         logger.debug(f"퀘스트 파일 읽기 실패 {file_path}: {e}")
-        
-        return docs, len(docs)
+                        continue
+                    
+                    # 퀘스트 정보 추출
+                    quest_info = self._extract_quest_info(content)
+                    
+                    text = f"Quest: {quest_info.get('title', file_name)} | {quest_info.get('description', '')[:100]}"
+                    
+                    stats['quests'] += 1
+                    yield {
+                        'type': 'quest',
+                        'quest_info': quest_info,
+                        'source': file_path,
+                        'text': text
+                    }
     
-    def _analyze_lang_files(self, modpack_path: str) -> Tuple[List[Dict], int]:
+    def _iter_lang_files(self, modpack_path: str, stats: Dict[str, Any]) -> Iterator[Dict]:
         """언어 파일 분석 (국제화 지원)"""
-        docs = []
-        
         # 언어 파일 위치들
         lang_locations = [
             'assets/*/lang/*.json',
@@ -387,42 +374,40 @@ class EnhancedModpackParser:
         ]
         
         for location_pattern in lang_locations:
-            import glob
             pattern = os.path.join(modpack_path, location_pattern)
             
-            for file_path in glob.glob(pattern, recursive=True):
+            for file_path in glob.iglob(pattern, recursive=True):
                 if 'ko_kr.json' not in file_path and 'en_us.json' not in file_path:
                     continue
                 
                 try:
                     with open(file_path, 'r', encoding='utf-8') as f:
                         lang_data = json.load(f)
-                    
-                    lang_code = 'ko_kr' if 'ko_kr' in file_path else 'en_us'
-                    mod_id = self._extract_mod_from_path(file_path)
-                    
-                    # 중요한 번역 항목들만 추출
-                    important_keys = [k for k in lang_data.keys() 
-                                    if any(term in k.lower() for term in ['item.', 'block.', 'gui.'])]
-                    
-                    if important_keys:
-                        sample_translations = {k: lang_data[k] for k in important_keys[:10]}
-                        text = f"Lang ({lang_code}): {mod_id} | {len(lang_data)} translations"
-                        
-                        docs.append({
-                            'type': 'lang',
-                            'lang_code': lang_code,
-                            'mod_id': mod_id,
-                            'translation_count': len(lang_data),
-                            'sample_translations': sample_translations,
-                            'source': file_path,
-                            'text': text
-                        })
-                
                 except Exception as e:
                     logger.debug(f"언어 파일 읽기 실패 {file_path}: {e}")
-        
-        return docs, len(docs)
+                    continue
+                
+                lang_code = 'ko_kr' if 'ko_kr' in file_path else 'en_us'
+                mod_id = self._extract_mod_from_path(file_path)
+                
+                # 중요한 번역 항목들만 추출
+                important_keys = [k for k in lang_data.keys() 
+                                if any(term in k.lower() for term in ['item.', 'block.', 'gui.'])]
+                
+                if important_keys:
+                    sample_translations = {k: lang_data[k] for k in important_keys[:10]}
+                    text = f"Lang ({lang_code}): {mod_id} | {len(lang_data)} translations"
+                    
+                    stats['lang_files'] += 1
+                    yield {
+                        'type': 'lang',
+                        'lang_code': lang_code,
+                        'mod_id': mod_id,
+                        'translation_count': len(lang_data),
+                        'sample_translations': sample_translations,
+                        'source': file_path,
+                        'text': text
+                    }
     
     def _extract_mod_name(self, jar_filename: str) -> str:
         """JAR 파일명에서 모드명 추출"""
@@ -498,7 +483,7 @@ class EnhancedModpackParser:
                 return parts[i + 1]
         return 'unknown'
     
-    def _analyze_modpack_type(self, stats: Dict, docs: List[Dict]) -> Dict[str, Any]:
+    def _analyze_modpack_type(self, stats: Dict, total_docs: int) -> Dict[str, Any]:
         """모드팩 타입 분석"""
         analysis = {
             'modpack_type': 'unknown',
@@ -523,7 +508,6 @@ class EnhancedModpackParser:
             analysis['magic_heavy'] = True
         
         # 복잡도 결정
-        total_docs = len(docs)
         if total_docs > 1000:
             analysis['complexity'] = 'high'
         elif total_docs < 200:
@@ -2,12 +2,21 @@
 # 모드팩 데이터를 GCP에 저장하고 벡터 검색을 수행
 
 import os
+import re
 import json
 import hashlib
-from typing import List, Dict, Any, Optional, Tuple
-from datetime import datetime
+import itertools
+import shutil
+import threading
+import time
+from collections import defaultdict
+from concurrent.futures import ThreadPoolExecutor, FIRST_COMPLETED, wait
+from typing import List, Dict, Any, Optional, Tuple, Callable, Iterable
+from datetime import datetime, timedelta
 import logging
 
+import numpy as np
+
 # GCP 라이브러리
 try:
     from google.cloud import firestore
@@ -19,10 +28,54 @@ except ImportError:
     print("⚠️ GCP 라이브러리가 설치되지 않음. pip install google-cloud-firestore google-cloud-aiplatform vertexai 필요")
 
 # 기존 모듈
-from modpack_parser import scan_modpack
+from modpack_parser import iter_modpack_docs
+from index_manifest import IndexManifest
+from recipe_store import RecipeStore, recipe_stores
+from tag_index import TagIndex
+from alias_index import AliasIndex
+from doc_consolidation import DocConsolidator
+from embedding_cache import query_embedding_cache
+from embedding_codec import embedding_dtype, pack_embedding, unpack_embedding
+from embedding_scheduler import EmbeddingError, scheduler_from_env
+from job_queue import JobCancelled
+from vector_index import (ModpackVectorIndex, VectorIndexCache, VectorSpill, DEFAULT_INDEX_DIR,
+                          BUILD_BLOCK_ROWS, generation_of)
 
 logger = logging.getLogger(__name__)
 
+EMBEDDING_MODEL_NAME = "textembedding-gecko@003"
+FIRESTORE_BATCH_LIMIT = 500  # Firestore 배치 하나의 최대 쓰기 수
+BULK_WRITE_MAX_ATTEMPTS = 5  # BulkWriter 문서별 재시도 한도
+# 컬렉션 삭제 시 동시에 커밋할 배치 수
+DELETE_WORKERS = int(os.getenv('GCP_RAG_DELETE_WORKERS', '8'))
+# 이보다 최근에 만든 세대 컬렉션은 고아로 보지 않음 (다른 프로세스에서 구축 중일 수 있음)
+ORPHAN_MIN_AGE_HOURS = float(os.getenv('GCP_RAG_ORPHAN_MIN_AGE_HOURS', '24'))
+
+_GENERATION_SUFFIX_RE = re.compile(r'__(\d{8}T\d{12})$')
+
+
+def collection_created_at(collection_name: str) -> Optional[datetime]:
+    """세대별 컬렉션 이름의 생성 시각 ("modpack_x_1_0__20250101T120000000000" → datetime, 세대 없으면 None)"""
+    match = _GENERATION_SUFFIX_RE.search(collection_name)
+    return datetime.strptime(match.group(1), '%Y%m%dT%H%M%S%f') if match else None
+
+
+def find_orphan_collections(collection_names: Iterable[str], referenced: Iterable[str],
+                            now: datetime, min_age_hours: float = ORPHAN_MIN_AGE_HOURS) -> List[str]:
+    """어느 모드팩 메타데이터도 가리키지 않는 modpack_* 문서 컬렉션
+    세대 표시가 있는 컬렉션은 min_age_hours보다 오래된 것만 (구축 중인 새 세대 보호).
+    """
+    referenced = set(referenced)
+    orphans = []
+    for name in collection_names:
+        if not name.startswith('modpack_') or name == 'modpack_metadata' or name in referenced:
+            continue
+        created_at = collection_created_at(name)
+        if created_at is not None and now - created_at < timedelta(hours=min_age_hours):
+            continue
+        orphans.append(name)
+    return sorted(orphans)
+
 class GCPRAGSystem:
     """GCP 기반 RAG 시스템"""
     
@@ -31,6 +84,19 @@ class GCPRAGSystem:
         self.location = location
         self.enabled = False
         
+        # 모드팩별 로컬 ANN 인덱스: (이름, 버전, 세대) 키의 메모리 예산 LRU 캐시
+        self.index_dir = os.getenv('GCP_RAG_INDEX_DIR', DEFAULT_INDEX_DIR)
+        self._index_cache = VectorIndexCache(
+            max_bytes=int(os.getenv('GCP_RAG_INDEX_CACHE_MB', '512')) * 1024 * 1024
+        )
+        self._build_locks: Dict[str, threading.Lock] = defaultdict(threading.Lock)
+        # 이 프로세스에서 쓰는 중인 새 세대 컬렉션 (고아 정리 대상에서 제외)
+        self._staging_collections = set()
+        
+        # modpack_metadata 조회 결과(세대, 현재 컬렉션) 캐시 (Firestore 읽기 횟수 제한)
+        self.metadata_ttl = float(os.getenv('GCP_RAG_METADATA_TTL', '30'))
+        self._generations: Dict[Tuple[str, str], Tuple[float, str, str]] = {}
+        
         if not GCP_AVAILABLE:
             logger.warning("GCP 라이브러리 불가능 - RAG 시스템 비활성화")
             return
@@ -45,7 +111,8 @@ class GCPRAGSystem:
             
             # Vertex AI 초기화
             aiplatform.init(project=self.project_id, location=self.location)
-            self.embedding_model = TextEmbeddingModel.from_pretrained("textembedding-gecko@003")
+            self.embedding_model = TextEmbeddingModel.from_pretrained(EMBEDDING_MODEL_NAME)
+            self.embedding_scheduler = scheduler_from_env(self._embed_texts)
             
             self.enabled = True
             logger.info(f"✅ GCP RAG 시스템 초기화 완료 - Project: {self.project_id}")
@@ -58,11 +125,25 @@ class GCPRAGSystem:
         """RAG 시스템이 활성화되어 있는지 확인"""
         return self.enabled
     
+    def _embed_texts(self, texts: List[str]) -> List[List[float]]:
+        """Vertex AI 임베딩 요청 (스케줄러 작업 단위)"""
+        return [emb.values for emb in self.embedding_model.get_embeddings(texts)]
+    
+    def get_embedding_stats(self) -> Dict[str, Any]:
+        """임베딩 스케줄러 통계"""
+        scheduler = getattr(self, 'embedding_scheduler', None)
+        return scheduler.stats() if scheduler else {}
+    
     def _generate_doc_id(self, modpack_name: str, modpack_version: str, doc_source: str) -> str:
         """문서 고유 ID 생성"""
         content = f"{modpack_name}:{modpack_version}:{doc_source}"
         return hashlib.md5(content.encode()).hexdigest()
     
+    def _collection_name(self, modpack_name: str, modpack_version: str, generation: str = "") -> str:
+        """모드팩 문서 컬렉션 이름 (generation이 있으면 전체 재구축마다 새로 만드는 세대별 컬렉션)"""
+        base = f"modpack_{modpack_name}_{modpack_version}".replace('.', '_').replace('-', '_')
+        return f"{base}__{generation}" if generation else base
+    
     def _chunk_text(self, text: str, max_chars: int = 1000) -> List[str]:
         """텍스트를 적절한 크기로 분할"""
         if len(text) <= max_chars:
@@ -88,152 +169,280 @@ class GCPRAGSystem:
         
         return chunks
 
-    def build_modpack_index(self, modpack_name: str, modpack_version: str, modpack_path: str) -> Dict[str, Any]:
-        """모드팩 데이터를 분석하고 GCP에 인덱스 구축"""
+    def build_modpack_index(self, modpack_name: str, modpack_version: str, modpack_path: str,
+                            incremental: bool = True,
+                            progress: Optional[Callable[[str, int], None]] = None) -> Dict[str, Any]:
+        """모드팩 데이터를 분석하고 GCP에 인덱스 구축
+
+        스캔 → 청킹 → 임베딩 배치 → Firestore 배치 저장을 스트리밍으로 처리한다.
+        메모리 사용량: 스캔 캐시는 매니페스트 옆 파일에 두고(파일당 메타데이터만 메모리), 임베딩은 배치마다
+        디스크 임시 파일로 내보낸다. 모드팩 크기에 비례해 남는 것은 결과 로컬 인덱스 자체
+        (양자화 벡터 N×dim(int8 기본 1바이트) + 검색 결과용 문서 정보 + BM25 역색인)와 k-means 학습 샘플
+        (최대 KMEANS_MAX_TRAIN행 float32)다. 레시피 묶기(doc_consolidation)는 디스크로 내보낸 뒤 나눠서 처리한다.
+        incremental=True이면 매니페스트와 비교해 바뀐 파일의 문서만 다시 임베딩/업로드하고
+        삭제된 파일의 문서는 Firestore에서 지운다. (매니페스트나 로컬 인덱스가 없으면 전체 구축)
+        progress(stage, count)는 단계('scan', 'embed', 'write')별 누적 처리 수를 받는다.
+        """
         if not self.enabled:
             return {"success": False, "error": "GCP RAG 시스템 비활성화"}
         
+        staging_collection = None
+        spill = None
+        writer = None
         try:
             logger.info(f"📦 모드팩 인덱스 구축 시작: {modpack_name} v{modpack_version}")
-            
-            # 1. 모드팩 데이터 스캔
-            scan_result = scan_modpack(modpack_path)
-            docs = scan_result.get('docs', [])
-            stats = scan_result.get('stats', {})
-            
-            if not docs:
+            report = progress or (lambda stage, count: None)
+            
+            # 1. 모드팩 데이터 스캔 (바뀌지 않은 파일은 매니페스트의 파싱 결과 재사용)
+            manifest_path = self._manifest_path(modpack_name, modpack_version)
+            manifest = IndexManifest.load(manifest_path) if incremental else IndexManifest()
+            stats: Dict[str, Any] = {}
+            tags = TagIndex()
+            aliases = AliasIndex()
+            doc_stream = iter_modpack_docs(modpack_path, manifest=manifest, stats=stats, tags=tags, aliases=aliases)
+            first_doc = next(doc_stream, None)
+            if first_doc is None:
                 return {"success": False, "error": "분석할 문서가 없음"}
+            doc_stream = itertools.chain([first_doc], doc_stream)
             
-            # 2. 컬렉션 이름 생성
-            collection_name = f"modpack_{modpack_name}_{modpack_version}".replace('.', '_').replace('-', '_')
-            collection_ref = self.db.collection(collection_name)
+            # 스캔 중 레시피 문서로 레시피 DB도 함께 구성 (/recipe 조회용, 태그/별칭 색인은 스캔 끝에 채워짐)
+            recipe_store = RecipeStore(tags=tags, aliases=aliases)
             
-            # 3. 기존 데이터 삭제 (재구축 시)
-            try:
-                existing_docs = collection_ref.limit(100).stream()
-                batch = self.db.batch()
-                delete_count = 0
-                for doc in existing_docs:
-                    batch.delete(doc.reference)
-                    delete_count += 1
-                if delete_count > 0:
-                    batch.commit()
-                    logger.info(f"🗑️ 기존 문서 {delete_count}개 삭제")
-            except Exception as e:
-                logger.warning(f"기존 데이터 삭제 실패 (무시): {e}")
+            def collect_recipes(docs):
+                for doc in docs:
+                    recipe_store.add(doc)
+                    yield doc
+            
+            doc_stream = collect_recipes(doc_stream)
+            # 레시피 DB에 넣은 뒤 임베딩할 문서만 정리 (같은 결과 아이템 묶기, 완전/유사 중복 접기)
+            consolidator = DocConsolidator(spill_dir=os.path.join(self.index_dir, '_tmp'))
+            doc_stream = consolidator.consolidate(doc_stream)
+            
+            # 2. 기존 벡터를 재사용하려면 현재 로컬 인덱스가 필요 (없으면 전체 구축)
+            previous_index = None
+            if incremental and manifest.indexed:
+                previous_index = self._get_local_index(modpack_name, modpack_version)
+            
+            # 3. 쓰기 대상 컬렉션: 증분은 현재 컬렉션에 덧쓰고, 전체 재구축은 새 세대 컬렉션에 쓴 뒤
+            #    메타데이터 포인터를 바꿔 한 번에 전환 (구축 중 검색은 이전 세대를 그대로 읽음)
+            _, active_collection = self._read_pointer(modpack_name, modpack_version)
+            if previous_index is None:
+                manifest.indexed = {}
+                collection_name = self._collection_name(modpack_name, modpack_version,
+                                                        generation_of(datetime.utcnow()))
+                staging_collection = collection_name
+                self._staging_collections.add(collection_name)
+            else:
+                collection_name = active_collection or self._collection_name(modpack_name, modpack_version)
+            collection_ref = self.db.collection(collection_name)
             
-            # 4. 문서별 벡터화 및 저장
-            batch = self.db.batch()
+            # 4. 바뀐 source의 청크만 임베딩 배치 단위로 스트리밍 처리
+            changes = {'added': [], 'modified': [], 'removed': []}
+            seen_sources = set()
+            stale_ids = set()
+            indexed_updates = []
+            counters = {'scan': 0}
+            
+            def changed_chunks():
+                """바뀐 source의 청크를 (doc_id, 청크 정보)로 하나씩 반환"""
+                for source, group in itertools.groupby(doc_stream, key=lambda d: d.get('source', 'unknown')):
+                    source_docs = [d for d in group if d.get('text')]
+                    counters['scan'] += len(source_docs)
+                    report('scan', counters['scan'])
+                    if not source_docs:
+                        continue
+                    seen_sources.add(source)
+                    if previous_index is not None and manifest.is_indexed(source, source_docs):
+                        continue
+                    
+                    if source in manifest.indexed:
+                        changes['modified'].append(source)
+                        stale_ids.update(manifest.indexed_doc_ids(source))
+                    else:
+                        changes['added'].append(source)
+                    
+                    doc_ids = []
+                    for doc in source_docs:
+                        # 텍스트 청킹
+                        for i, chunk in enumerate(self._chunk_text(doc['text'], max_chars=800)):
+                            doc_id = self._generate_doc_id(modpack_name, modpack_version, f"{source}_{i}")
+                            doc_ids.append(doc_id)
+                            yield doc_id, {
+                                'doc_type': doc.get('type', 'unknown'),
+                                'doc_source': source,
+                                'text': chunk,
+                                'chunk_index': i
+                            }
+                    indexed_updates.append((source, source_docs, doc_ids))
+            
+            # 5. 임베딩 배치를 동시에 요청(속도 제한/재시도) → 순서대로 Firestore 배치 저장
+            batch_size = 100  # Vertex AI 배치 크기 제한
             processed_count = 0
-            embedding_texts = []
-            doc_metadata = []
-            
-            for doc in docs:
-                doc_text = doc.get('text', '')
-                if not doc_text:
-                    continue
-                
-                # 텍스트 청킹
-                chunks = self._chunk_text(doc_text, max_chars=800)
+            new_ids = set()
+            # 새 임베딩은 배치마다 디스크 임시 파일로 내보내고 로컬 인덱스 구축 때 memmap으로 읽음
+            spill = VectorSpill(os.path.join(self.index_dir, '_tmp'))
+            new_index_docs = []
+            
+            chunk_stream = changed_chunks()
+            writer, write_errors = self._bulk_writer()
+            storage_dtype = embedding_dtype()
+            chunk_batches = iter(lambda: list(itertools.islice(chunk_stream, batch_size)), [])
+            embedded_batches = self.embedding_scheduler.embed_batches(chunk_batches, text_of=lambda item: item[1]['text'])
+            while True:
+                try:
+                    batch_items, vectors = next(embedded_batches)
+                except StopIteration:
+                    break
+                except EmbeddingError as e:
+                    logger.error(f"❌ {e}")
+                    return {"success": False, "error": str(e)}
+                batch_no = processed_count // batch_size + 1
+                report('embed', processed_count + len(batch_items))
                 
-                for i, chunk in enumerate(chunks):
-                    doc_id = self._generate_doc_id(modpack_name, modpack_version, 
-                                                 f"{doc.get('source', 'unknown')}_{i}")
-                    
-                    embedding_texts.append(chunk)
-                    doc_metadata.append({
-                        'doc_id': doc_id,
+                # BulkWriter가 배치로 묶어 병렬 전송 (속도 제한/재시도 포함)
+                created_at = datetime.utcnow()
+                for (doc_id, chunk), vector in zip(batch_items, vectors):
+                    writer.set(collection_ref.document(doc_id), {
                         'modpack_name': modpack_name,
                         'modpack_version': modpack_version,
-                        'doc_type': doc.get('type', 'unknown'),
-                        'doc_source': doc.get('source', 'unknown'),
-                        'text': chunk,
-                        'chunk_index': i,
-                        'created_at': datetime.utcnow(),
-                        'original_doc': doc
+                        'doc_type': chunk['doc_type'],
+                        'doc_source': chunk['doc_source'],
+                        'text': chunk['text'],
+                        'chunk_index': chunk['chunk_index'],
+                        # float 배열 대신 양자화한 바이트 하나 (문서 크기/읽기량 절감)
+                        'embedding_blob': pack_embedding(vector, storage_dtype),
+                        'embedding_dtype': storage_dtype,
+                        'created_at': created_at,
+                        'text_length': len(chunk['text'])
                     })
-            
-            # 5. 임베딩 생성 (배치 처리)
-            logger.info(f"🔄 임베딩 생성 중... ({len(embedding_texts)}개 텍스트)")
-            
-            # Vertex AI의 배치 크기 제한 고려
-            batch_size = 100
-            all_embeddings = []
-            
-            for i in range(0, len(embedding_texts), batch_size):
-                batch_texts = embedding_texts[i:i + batch_size]
-                try:
-                    embeddings_response = self.embedding_model.get_embeddings(batch_texts)
-                    batch_embeddings = [emb.values for emb in embeddings_response]
-                    all_embeddings.extend(batch_embeddings)
-                    logger.info(f"✅ 배치 {i//batch_size + 1} 완료")
-                except Exception as e:
-                    logger.error(f"❌ 임베딩 생성 실패 (배치 {i//batch_size + 1}): {e}")
-                    continue
-            
-            if len(all_embeddings) != len(doc_metadata):
-                return {"success": False, "error": f"임베딩 수({len(all_embeddings)})와 문서 수({len(doc_metadata)}) 불일치"}
-            
-            # 6. Firestore에 저장
-            logger.info(f"💾 Firestore에 저장 중...")
-            batch = self.db.batch()
-            
-            for metadata, embedding in zip(doc_metadata, all_embeddings):
-                doc_ref = collection_ref.document(metadata['doc_id'])
-                
-                # Firestore 데이터 준비
-                firestore_data = {
-                    'modpack_name': metadata['modpack_name'],
-                    'modpack_version': metadata['modpack_version'],
-                    'doc_type': metadata['doc_type'],
-                    'doc_source': metadata['doc_source'],
-                    'text': metadata['text'],
-                    'chunk_index': metadata['chunk_index'],
-                    'embedding': embedding,
-                    'created_at': metadata['created_at'],
-                    'text_length': len(metadata['text'])
-                }
-                
-                batch.set(doc_ref, firestore_data)
-                processed_count += 1
+                    new_ids.add(doc_id)
+                    new_index_docs.append(self._index_doc_record(doc_id, chunk))
+                spill.append(vectors)
+                processed_count += len(batch_items)
+                report('write', processed_count)
+                logger.info(f"📝 배치 {batch_no} 완료 ({processed_count}개 문서 저장 요청)")
+            
+            # stats['incremental']: 스캔에서 재사용/다시 파싱/삭제된 파일 수 (결과와 메타데이터에 남김)
+            stats['consolidation'] = consolidator.summary()
+            recipe_stores.put(modpack_name, modpack_version, recipe_store)
+            if previous_index is not None:
+                changes['removed'] = manifest.removed_sources(seen_sources)
+                for source in changes['removed']:
+                    stale_ids.update(manifest.indexed_doc_ids(source))
+                logger.info(f"🔁 증분 구축: 추가 {len(changes['added'])}, 변경 {len(changes['modified'])}, "
+                            f"삭제 {len(changes['removed'])}개 파일")
                 
-                # Firestore 배치 제한 (500개)
-                if processed_count % 400 == 0:
-                    batch.commit()
-                    batch = self.db.batch()
-                    logger.info(f"📝 {processed_count}개 문서 저장 완료")
-            
-            # 남은 문서들 저장
-            if processed_count % 400 != 0:
-                batch.commit()
+                if not processed_count and not changes['removed']:
+                    manifest.save(manifest_path)
+                    logger.info(f"✅ 변경 사항 없음: {modpack_name} v{modpack_version}")
+                    return {
+                        "success": True,
+                        "modpack_name": modpack_name,
+                        "modpack_version": modpack_version,
+                        "collection_name": collection_name,
+                        "document_count": previous_index.size,
+                        "uploaded_count": 0,
+                        "stats": stats,
+                        "incremental": True,
+                        "changes": {key: len(value) for key, value in changes.items()}
+                    }
+            elif not processed_count:
+                return {"success": False, "error": "분석할 문서가 없음"}
             
-            # 7. 메타데이터 컬렉션에 모드팩 정보 저장
+            # 변경/삭제된 파일에서 더 이상 만들어지지 않는 청크 삭제
+            removed_ids = stale_ids - new_ids
+            for doc_id in sorted(removed_ids):
+                writer.delete(collection_ref.document(doc_id))
+            
+            # 모든 쓰기가 끝날 때까지 대기 (실패가 남아 있으면 포인터를 바꾸지 않음)
+            writer.close()
+            writer = None
+            if write_errors:
+                raise RuntimeError(f"Firestore 쓰기 {len(write_errors)}건 실패: {write_errors[0]}")
+            if removed_ids:
+                logger.info(f"🗑️ 오래된 문서 {len(removed_ids)}개 삭제")
+            
+            # 6. 로컬 ANN 인덱스 구성 (증분이면 바뀌지 않은 문서의 벡터를 블록 단위로 같은 임시 파일에 이어 씀)
+            index_docs = new_index_docs
+            if previous_index is not None:
+                replaced = stale_ids | new_ids
+                keep = [i for i, doc in enumerate(previous_index.docs) if doc['doc_id'] not in replaced]
+                index_docs = new_index_docs + [previous_index.docs[i] for i in keep]
+                for start in range(0, len(keep), BUILD_BLOCK_ROWS):
+                    spill.append(previous_index.vectors[np.asarray(keep[start:start + BUILD_BLOCK_ROWS], dtype=np.int64)])
+            document_count = len(index_docs)
+            
+            # 7. 메타데이터 컬렉션에 모드팩 정보 저장 (전체 재구축이면 이 한 번의 문서 쓰기로 새 세대로 전환)
+            built_at = datetime.utcnow()
             metadata_ref = self.db.collection('modpack_metadata').document(f"{modpack_name}_{modpack_version}")
-            metadata_ref.set({
+            metadata = {
                 'modpack_name': modpack_name,
                 'modpack_version': modpack_version,
                 'modpack_path': modpack_path,
                 'collection_name': collection_name,
-                'document_count': processed_count,
+                'document_count': document_count,
                 'stats': stats,
-                'created_at': datetime.utcnow(),
-                'last_updated': datetime.utcnow()
-            })
+                'last_updated': built_at
+            }
+            if previous_index is None:
+                metadata['created_at'] = built_at
+            metadata_ref.set(metadata, merge=previous_index is not None)
+            # 포인터가 새 세대를 가리키므로 더 이상 정리 대상이 아님 (이름을 비우기 전에 표시 해제)
+            self._staging_collections.discard(collection_name)
+            staging_collection = None
+            if active_collection and active_collection != collection_name:
+                # 다른 프로세스가 메타데이터 캐시(TTL)로 이전 세대를 읽는 동안은 남겨 둠
+                self._retire_collection(active_collection, delay=self.metadata_ttl)
+            
+            # 매니페스트 갱신 (Firestore 반영이 끝난 뒤 저장해야 실패 시 다음 구축에서 다시 시도)
+            for source, source_docs, doc_ids in indexed_updates:
+                manifest.set_indexed(source, source_docs, doc_ids)
+            for source in changes['removed']:
+                manifest.drop_indexed(source)
+            manifest.save(manifest_path)
+            
+            # 8. 로컬 ANN 인덱스 저장 (검색은 로컬 인덱스로 수행)
+            try:
+                generation = generation_of(built_at)
+                self._generations[(modpack_name, modpack_version)] = (time.time(), generation, collection_name)
+                self._store_local_index(
+                    modpack_name, modpack_version,
+                    ModpackVectorIndex.build(spill.array(), index_docs, generation=generation)
+                )
+            except Exception as e:
+                # Firestore에는 저장되었으므로 첫 검색 시 다시 구축됨
+                logger.warning(f"로컬 인덱스 구축 실패 (검색 시 재구축): {e}")
             
-            logger.info(f"🎉 모드팩 인덱스 구축 완료: {processed_count}개 문서")
+            logger.info(f"🎉 모드팩 인덱스 구축 완료: {processed_count}개 문서 업로드, 총 {document_count}개")
             
             return {
                 "success": True,
                 "modpack_name": modpack_name,
                 "modpack_version": modpack_version,
                 "collection_name": collection_name,
-                "document_count": processed_count,
-                "stats": stats
+                "document_count": document_count,
+                "uploaded_count": processed_count,
+                "stats": stats,
+                "incremental": previous_index is not None,
+                "changes": {key: len(value) for key, value in changes.items()}
             }
             
+        except JobCancelled:
+            logger.info(f"⏹️ 모드팩 인덱스 구축 취소: {modpack_name} v{modpack_version}")
+            raise
         except Exception as e:
             logger.error(f"❌ 모드팩 인덱스 구축 실패: {e}")
             return {"success": False, "error": str(e)}
+        finally:
+            # 중간에 끝나도 BulkWriter의 전송 스레드를 정리 (이미 보낸 쓰기는 다음 구축이 덮어씀)
+            if writer is not None:
+                writer.close()
+            if spill is not None:
+                spill.close()
+            # 포인터를 바꾸기 전에 실패한 새 세대 컬렉션은 바로 정리
+            if staging_collection:
+                self._retire_collection(staging_collection, delay=0)
+                self._staging_collections.discard(staging_collection)
 
     def search_documents(self, query: str, modpack_name: str, modpack_version: str, 
                         top_k: int = 5, min_score: float = 0.7) -> List[Dict[str, Any]]:
@@ -242,45 +451,25 @@ class GCPRAGSystem:
             return []
         
         try:
-            # 1. 쿼리 임베딩 생성
-            query_embedding = self.embedding_model.get_embeddings([query])[0].values
-            
-            # 2. 컬렉션 참조
-            collection_name = f"modpack_{modpack_name}_{modpack_version}".replace('.', '_').replace('-', '_')
-            collection_ref = self.db.collection(collection_name)
+            # 1. 쿼리 임베딩 생성 (반복 질문은 캐시 사용)
+            query_embedding = query_embedding_cache.get_or_compute(
+                EMBEDDING_MODEL_NAME, query,
+                lambda text: self.embedding_model.get_embeddings([text])[0].values
+            )
             
-            # 3. 모든 문서 조회 (Firestore는 벡터 검색 미지원이므로 브루트포스)
-            docs = list(collection_ref.stream())
+            # 2. 로컬 ANN 인덱스 조회 (캐시 → 디스크 → Firestore 재구축)
+            index = self._get_local_index(modpack_name, modpack_version)
             
-            if not docs:
+            if index is None or index.size == 0:
                 logger.warning(f"모드팩 데이터 없음: {modpack_name} v{modpack_version}")
                 return []
             
-            # 4. 유사도 계산
+            # 3. 근사 최근접 이웃 검색 + BM25 (같은 쿼리 임베딩으로 RRF 결합, 추가 임베딩 호출 없음)
             results = []
-            for doc in docs:
-                doc_data = doc.to_dict()
-                doc_embedding = doc_data.get('embedding', [])
-                
-                if not doc_embedding:
-                    continue
-                
-                # 코사인 유사도 계산
-                similarity = self._cosine_similarity(query_embedding, doc_embedding)
-                
-                if similarity >= min_score:
-                    results.append({
-                        'doc_id': doc.id,
-                        'text': doc_data.get('text', ''),
-                        'doc_type': doc_data.get('doc_type', 'unknown'),
-                        'doc_source': doc_data.get('doc_source', 'unknown'),
-                        'similarity': similarity,
-                        'text_length': doc_data.get('text_length', 0)
-                    })
-            
-            # 5. 유사도 기준 정렬 및 상위 K개 선택
-            results.sort(key=lambda x: x['similarity'], reverse=True)
-            results = results[:top_k]
+            for doc, similarity in index.hybrid_search(query, query_embedding, top_k=top_k, min_score=min_score):
+                result = dict(doc)
+                result['similarity'] = similarity
+                results.append(result)
             
             logger.info(f"🔍 검색 완료: {len(results)}개 문서 (쿼리: {query[:50]}...)")
             return results
@@ -289,19 +478,212 @@ class GCPRAGSystem:
             logger.error(f"❌ 문서 검색 실패: {e}")
             return []
     
-    def _cosine_similarity(self, vec_a: List[float], vec_b: List[float]) -> float:
-        """코사인 유사도 계산"""
-        if len(vec_a) != len(vec_b):
-            return 0.0
+    def _index_doc_record(self, doc_id: str, doc_data: Dict[str, Any]) -> Dict[str, Any]:
+        """로컬 인덱스에 보관할 검색 결과용 문서 정보"""
+        text = doc_data.get('text', '')
+        return {
+            'doc_id': doc_id,
+            'text': text,
+            'doc_type': doc_data.get('doc_type', 'unknown'),
+            'doc_source': doc_data.get('doc_source', 'unknown'),
+            'text_length': doc_data.get('text_length', len(text))
+        }
+    
+    def _index_path(self, modpack_name: str, modpack_version: str) -> str:
+        return os.path.join(self.index_dir, self._collection_name(modpack_name, modpack_version))
+    
+    def _manifest_path(self, modpack_name: str, modpack_version: str) -> str:
+        """증분 인덱싱 매니페스트 경로 (인덱스 디렉토리 교체와 무관하게 유지)"""
+        return os.path.join(self.index_dir, '_manifests',
+                            f"{self._collection_name(modpack_name, modpack_version)}.json")
+    
+    def _read_pointer(self, modpack_name: str, modpack_version: str) -> Tuple[str, str]:
+        """modpack_metadata에서 (인덱스 세대, 현재 문서 컬렉션 이름) 조회 - 메타데이터가 없으면 ("", "")"""
+        snapshot = self.db.collection('modpack_metadata').document(f"{modpack_name}_{modpack_version}").get()
+        if not snapshot.exists:
+            return "", ""
+        data = snapshot.to_dict() or {}
+        return generation_of(data.get('last_updated')), data.get('collection_name') or \
+            self._collection_name(modpack_name, modpack_version)
+    
+    def _current_pointer(self, modpack_name: str, modpack_version: str) -> Tuple[str, str]:
+        """(인덱스 세대, 현재 문서 컬렉션 이름) - TTL 동안 재사용"""
+        key = (modpack_name, modpack_version)
+        cached = self._generations.get(key)
+        if cached and time.time() - cached[0] < self.metadata_ttl:
+            return cached[1], cached[2]
+        
+        try:
+            generation, collection_name = self._read_pointer(modpack_name, modpack_version)
+        except Exception as e:
+            logger.warning(f"모드팩 메타데이터 조회 실패 (이전 세대 유지): {e}")
+            if cached:
+                return cached[1], cached[2]
+            generation, collection_name = "", ""
+        
+        self._generations[key] = (time.time(), generation, collection_name)
+        return generation, collection_name
+    
+    def _current_generation(self, modpack_name: str, modpack_version: str) -> str:
+        """modpack_metadata.last_updated 기준 현재 인덱스 세대 (TTL 동안 재사용)"""
+        return self._current_pointer(modpack_name, modpack_version)[0]
+    
+    def _bulk_writer(self):
+        """Firestore BulkWriter와 재시도 후에도 실패한 쓰기 목록
+        BulkWriter는 쓰기를 배치로 묶어 여러 요청을 동시에 보내고, 500/50/5 규칙으로 속도를 올린다.
+        """
+        errors: List[str] = []
+        writer = self.db.bulk_writer()
+        
+        def on_error(failure, _writer) -> bool:
+            if failure.attempts < BULK_WRITE_MAX_ATTEMPTS:
+                return True
+            errors.append(f"{failure.operation.reference.path}: {failure.message}")
+            return False
+        
+        writer.on_write_error(on_error)
+        return writer, errors
+    
+    def _delete_collection(self, collection_name: str, page_size: int = FIRESTORE_BATCH_LIMIT,
+                           workers: int = DELETE_WORKERS,
+                           progress: Optional[Callable[[str, int], None]] = None) -> int:
+        """컬렉션 문서 삭제 → 삭제한 문서 수
+        문서 ID 순으로 page_size개씩(필드 없이 참조만) 읽으며 페이지마다 배치 하나를 만들고,
+        최대 workers개 배치를 동시에 커밋한다. 메모리에는 진행 중인 페이지들만 올라가며,
+        중간에 멈춰도 남은 문서만 다시 읽으므로 같은 호출을 반복하면 이어서 삭제된다.
+        progress('delete', 누적 삭제 수)는 커밋이 끝날 때마다 호출된다.
+        """
+        page_size = max(1, min(page_size, FIRESTORE_BATCH_LIMIT))
+        query = self.db.collection(collection_name).select([]).order_by('__name__').limit(page_size)
+        deleted = 0
+        
+        def commit(refs) -> int:
+            batch = self.db.batch()
+            for ref in refs:
+                batch.delete(ref)
+            batch.commit()
+            return len(refs)
+        
+        def collect(done) -> None:
+            nonlocal deleted
+            for future in done:
+                deleted += future.result()
+            if progress:
+                progress('delete', deleted)
+        
+        with ThreadPoolExecutor(max_workers=max(1, workers)) as executor:
+            pending = set()
+            try:
+                last = None
+                while True:
+                    page = list((query.start_after(last) if last is not None else query).stream())
+                    if not page:
+                        break
+                    last = page[-1]
+                    pending.add(executor.submit(commit, [doc.reference for doc in page]))
+                    if len(pending) >= workers:
+                        done, pending = wait(pending, return_when=FIRST_COMPLETED)
+                        collect(done)
+                done, pending = wait(pending)
+                collect(done)
+            finally:
+                # 취소/오류 시 아직 시작하지 않은 배치는 버림 (다음 호출이 다시 읽음)
+                for future in pending:
+                    future.cancel()
+        return deleted
+    
+    def _retire_collection(self, collection_name: str, delay: float) -> None:
+        """더 이상 가리키지 않는 세대 컬렉션을 delay초 뒤 백그라운드에서 삭제"""
+        def retire():
+            try:
+                deleted = self._delete_collection(collection_name)
+                logger.info(f"🗑️ 이전 세대 컬렉션 {collection_name} 삭제 완료 ({deleted}개 문서)")
+            except Exception as e:
+                logger.warning(f"이전 세대 컬렉션 삭제 실패 {collection_name}: {e}")
+        
+        timer = threading.Timer(delay, retire)
+        timer.daemon = True
+        timer.start()
+    
+    def _store_local_index(self, modpack_name: str, modpack_version: str, index: ModpackVectorIndex) -> None:
+        """로컬 인덱스를 디스크에 저장하고 메모리 캐시에 등록"""
+        try:
+            index.save(self._index_path(modpack_name, modpack_version))
+        except Exception as e:
+            logger.warning(f"로컬 인덱스 저장 실패 (메모리에만 유지): {e}")
+        self._index_cache.put((modpack_name, modpack_version, index.generation), index)
+        logger.info(f"🧭 로컬 인덱스 준비 완료: {modpack_name} v{modpack_version} "
+                    f"({index.size}개 벡터, {index.nlist}개 리스트, {index.nbytes // 1024}KB)")
+    
+    def _get_local_index(self, modpack_name: str, modpack_version: str) -> Optional[ModpackVectorIndex]:
+        """캐시 → 디스크 → Firestore 순으로 현재 세대의 로컬 인덱스 확보"""
+        generation = self._current_generation(modpack_name, modpack_version)
+        cache_key = (modpack_name, modpack_version, generation)
+        index = self._index_cache.get(cache_key)
+        if index is not None:
+            return index
         
-        dot_product = sum(a * b for a, b in zip(vec_a, vec_b))
-        magnitude_a = sum(a * a for a in vec_a) ** 0.5
-        magnitude_b = sum(b * b for b in vec_b) ** 0.5
+        # 같은 모드팩을 여러 요청이 동시에 로드/재구축하지 않도록 직렬화
+        with self._build_locks[self._collection_name(modpack_name, modpack_version)]:
+            index = self._index_cache.get(cache_key)
+            if index is not None:
+                return index
+            
+            index = ModpackVectorIndex.load(self._index_path(modpack_name, modpack_version))
+            if index is not None and (not generation or index.generation == generation):
+                self._index_cache.put(cache_key, index)
+                return index
+            
+            return self._rebuild_local_index(modpack_name, modpack_version, generation)
+    
+    def _rebuild_local_index(self, modpack_name: str, modpack_version: str,
+                             generation: str) -> Optional[ModpackVectorIndex]:
+        """Firestore(원본 저장소)에서 임베딩을 읽어 로컬 인덱스 재구축 (메타데이터가 가리키는 현재 세대 컬렉션)"""
+        collection_name = self._current_pointer(modpack_name, modpack_version)[1] or \
+            self._collection_name(modpack_name, modpack_version)
+        logger.info(f"🔄 Firestore에서 로컬 인덱스 재구축: {collection_name}")
+        spill = VectorSpill(os.path.join(self.index_dir, '_tmp'))
+        try:
+            return self._rebuild_from_collection(modpack_name, modpack_version, generation, collection_name, spill)
+        finally:
+            spill.close()
+    
+    def _rebuild_from_collection(self, modpack_name: str, modpack_version: str, generation: str,
+                                 collection_name: str, spill: VectorSpill) -> Optional[ModpackVectorIndex]:
+        index_docs = []
+        for doc in self.db.collection(collection_name).stream():
+            doc_data = doc.to_dict()
+            blob = doc_data.get('embedding_blob')
+            if blob:
+                # 바이트를 복사 없이 NumPy 뷰로 읽음 (int8은 스케일을 곱해 복원)
+                codes, scale = unpack_embedding(blob, doc_data.get('embedding_dtype', 'float32'))
+                embedding = codes.astype(np.float32) * scale
+            else:
+                # 이전 형식: float 배열 필드
+                embedding = np.asarray(doc_data.get('embedding', []), dtype=np.float32)
+            if not embedding.size:
+                continue
+            spill.append(embedding.reshape(1, -1))
+            index_docs.append(self._index_doc_record(doc.id, doc_data))
         
-        if magnitude_a == 0 or magnitude_b == 0:
-            return 0.0
+        if not index_docs:
+            return None
         
-        return dot_product / (magnitude_a * magnitude_b)
+        index = ModpackVectorIndex.build(spill.array(), index_docs, generation=generation)
+        self._store_local_index(modpack_name, modpack_version, index)
+        return index
+    
+    def _drop_local_index(self, modpack_name: str, modpack_version: str) -> None:
+        """메모리와 디스크의 로컬 인덱스 제거"""
+        self._index_cache.invalidate(modpack_name, modpack_version)
+        self._generations.pop((modpack_name, modpack_version), None)
+        index_path = self._index_path(modpack_name, modpack_version)
+        if os.path.isdir(index_path):
+            shutil.rmtree(index_path, ignore_errors=True)
+    
+    def get_cache_stats(self) -> Dict[str, Any]:
+        """로컬 인덱스 캐시 통계"""
+        return self._index_cache.stats()
     
     def get_modpack_list(self) -> List[Dict[str, Any]]:
         """등록된 모드팩 목록 조회"""
@@ -320,7 +702,8 @@ class GCPRAGSystem:
                     'document_count': data.get('document_count', 0),
                     'created_at': data.get('created_at'),
                     'last_updated': data.get('last_updated'),
-                    'stats': data.get('stats', {})
+                    'stats': data.get('stats', {}),
+                    'deleting': data.get('deleting', False)
                 })
             
             return modpacks
@@ -328,33 +711,117 @@ class GCPRAGSystem:
             logger.error(f"모드팩 목록 조회 실패: {e}")
             return []
     
-    def delete_modpack_index(self, modpack_name: str, modpack_version: str) -> bool:
-        """모드팩 인덱스 삭제"""
+    def delete_modpack_index(self, modpack_name: str, modpack_version: str,
+                             progress: Optional[Callable[[str, int], None]] = None) -> Dict[str, Any]:
+        """모드팩 인덱스 삭제 (현재/이전 세대 문서 컬렉션, 메타데이터, 로컬 파일)
+        메타데이터에 deleting 표시를 먼저 남기고 컬렉션을 모두 지운 뒤 마지막에 메타데이터를 지우므로,
+        중간에 멈추면 같은 요청을 다시 보내거나 sweep_orphan_collections가 이어서 삭제한다.
+        """
         if not self.enabled:
-            return False
+            return {"success": False, "error": "GCP RAG 시스템 비활성화"}
         
         try:
-            # 1. 문서 컬렉션 삭제
-            collection_name = f"modpack_{modpack_name}_{modpack_version}".replace('.', '_').replace('-', '_')
-            collection_ref = self.db.collection(collection_name)
-            
-            # 배치 삭제
-            docs = list(collection_ref.stream())
-            if docs:
-                batch = self.db.batch()
-                for doc in docs:
-                    batch.delete(doc.reference)
-                batch.commit()
-                logger.info(f"🗑️ 컬렉션 {collection_name} 삭제 완료 ({len(docs)}개 문서)")
-            
-            # 2. 메타데이터 삭제
+            # 1. 삭제 중 표시 (검색/목록에서 구분, 재시도 시 이어서 삭제)
             metadata_ref = self.db.collection('modpack_metadata').document(f"{modpack_name}_{modpack_version}")
+            if metadata_ref.get().exists:
+                metadata_ref.set({'deleting': True, 'deleting_since': datetime.utcnow()}, merge=True)
+            
+            # 2. 이 모드팩의 모든 세대 문서 컬렉션 삭제 (정리되지 못한 이전 세대 포함)
+            base = self._collection_name(modpack_name, modpack_version)
+            collections = sorted(c.id for c in self.db.collections() if c.id == base or c.id.startswith(f"{base}__"))
+            deleted = 0
+            for collection_name in collections:
+                count = self._delete_collection(
+                    collection_name,
+                    progress=(lambda stage, n: progress(stage, deleted + n)) if progress else None
+                )
+                deleted += count
+                logger.info(f"🗑️ 컬렉션 {collection_name} 삭제 완료 ({count}개 문서)")
+            
+            # 3. 메타데이터 삭제 (모든 문서가 지워진 뒤)
             metadata_ref.delete()
             
-            return True
+            # 4. 로컬 인덱스, 매니페스트, 레시피 DB 삭제 (다음 구축은 전체 구축)
+            self._drop_local_index(modpack_name, modpack_version)
+            manifest_path = self._manifest_path(modpack_name, modpack_version)
+            if os.path.isfile(manifest_path):
+                os.remove(manifest_path)
+            recipe_stores.remove(modpack_name, modpack_version)
+            
+            return {"success": True, "collections": collections, "deleted_count": deleted}
+        except JobCancelled:
+            raise
         except Exception as e:
-            logger.error(f"모드팩 인덱스 삭제 실패: {e}")
-            return False
+            logger.error(f"모드팩 인덱스 삭제 실패 (다시 요청하면 이어서 삭제): {e}")
+            return {"success": False, "error": str(e)}
+    
+    def sweep_orphan_collections(self, min_age_hours: float = ORPHAN_MIN_AGE_HOURS, dry_run: bool = False,
+                                 progress: Optional[Callable[[str, int], None]] = None,
+                                 resume: Optional[Callable[[str, str], Dict[str, Any]]] = None) -> Dict[str, Any]:
+        """메타데이터가 가리키지 않는 modpack_* 컬렉션 정리
+        - 삭제 도중 멈춘 모드팩(deleting 표시)은 delete_modpack_index로 마저 삭제
+        - 이전 세대 삭제가 끝나지 못했거나 메타데이터 없이 남은 컬렉션 삭제
+        dry_run=True면 대상 목록만 돌려준다.
+        resume(name, version)이 주어지면 멈춘 삭제를 직접 하지 않고 넘겨서 맡기고 그 반환값을 resume_jobs에 담는다
+        (앱은 모드팩별 작업 키로 삭제 작업을 등록해 같은 모드팩의 구축과 겹치지 않게 함).
+        """
+        if not self.enabled:
+            return {"success": False, "error": "GCP RAG 시스템 비활성화"}
+        
+        try:
+            referenced = set()
+            interrupted = []
+            for doc in self.db.collection('modpack_metadata').stream():
+                data = doc.to_dict() or {}
+                name, version = data.get('modpack_name'), data.get('modpack_version')
+                if data.get('deleting'):
+                    interrupted.append((name, version))
+                    continue
+                if data.get('collection_name'):
+                    referenced.add(data['collection_name'])
+                # collection_name이 없는 이전 메타데이터는 세대 없는 컬렉션이 현재 세대 (_read_pointer와 같은 규칙)
+                # 메타데이터가 남아 있는 동안 세대 없는 컬렉션은 고아로 보지 않음
+                if name and version:
+                    referenced.add(self._collection_name(name, version))
+            referenced |= self._staging_collections
+            
+            orphans = find_orphan_collections((c.id for c in self.db.collections()), referenced,
+                                              datetime.utcnow(), min_age_hours)
+            # 삭제 중이던 모드팩의 컬렉션은 delete_modpack_index가 지움
+            resumed_bases = [self._collection_name(name, version) for name, version in interrupted]
+            orphans = [name for name in orphans
+                       if not any(name == base or name.startswith(f"{base}__") for base in resumed_bases)]
+            result = {
+                "success": True,
+                "dry_run": dry_run,
+                "orphans": orphans,
+                "resumed": [f"{name}_{version}" for name, version in interrupted],
+                "deleted_count": 0
+            }
+            if dry_run:
+                return result
+            
+            if resume is not None:
+                result['resume_jobs'] = [resume(name, version) for name, version in interrupted]
+                interrupted = []
+            for name, version in interrupted:
+                resumed = self.delete_modpack_index(name, version, progress=progress)
+                if not resumed.get('success'):
+                    return dict(result, success=False, error=resumed.get('error'))
+                result['deleted_count'] += resumed['deleted_count']
+            for collection_name in orphans:
+                offset = result['deleted_count']
+                result['deleted_count'] += self._delete_collection(
+                    collection_name,
+                    progress=(lambda stage, n: progress(stage, offset + n)) if progress else None
+                )
+                logger.info(f"🧹 고아 컬렉션 {collection_name} 삭제")
+            return result
+        except JobCancelled:
+            raise
+        except Exception as e:
+            logger.error(f"고아 컬렉션 정리 실패: {e}")
+            return {"success": False, "error": str(e)}
 
 
 # 전역 인스턴스
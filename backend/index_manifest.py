@@ -0,0 +1,264 @@
+# 증분 인덱싱 매니페스트 - 파일 크기/수정시각/해시로 바뀐 파일만 다시 파싱·임베딩·업로드
+
+import os
+import json
+import uuid
+import weakref
+import hashlib
+import tempfile
+from typing import List, Dict, Any, Optional, Iterable
+import logging
+
+logger = logging.getLogger(__name__)
+
+# 2: 레시피 문서에 구조화 필드(재료, 키 맵 등) 추가 → 이전 스캔 캐시는 다시 파싱
+# 3: 파싱 결과를 매니페스트 JSON 대신 옆의 문서 캐시 파일에 저장 (매니페스트에는 위치만)
+MANIFEST_VERSION = 3
+# 문서 캐시 파일에서 살아 있는 구간이 이 비율 미만이면 저장 시 새 파일로 압축
+DOC_CACHE_MIN_LIVE_RATIO = 0.5
+# 인덱스(임베딩)에 실제로 들어가는 문서 필드 - 이 필드가 바뀔 때만 다시 임베딩
+INDEXED_FIELDS = ('type', 'text')
+
+
+def content_hash(path: str) -> str:
+    """파일 내용 해시"""
+    digest = hashlib.sha1()
+    with open(path, 'rb') as f:
+        for block in iter(lambda: f.read(1 << 16), b''):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+def docs_hash(docs: Iterable[Dict[str, Any]]) -> str:
+    """문서 목록 해시 (인덱스 재구축 필요 여부 판단용, INDEXED_FIELDS만 반영)"""
+    digest = hashlib.sha1()
+    for doc in docs:
+        indexed = {field: doc.get(field) for field in INDEXED_FIELDS}
+        digest.update(json.dumps(indexed, sort_keys=True, ensure_ascii=False).encode('utf-8'))
+    return digest.hexdigest()
+
+
+def _remove_file(path: str) -> None:
+    try:
+        os.remove(path)
+    except OSError:
+        pass
+
+
+class IndexManifest:
+    """모드팩 하나의 증분 인덱싱 상태
+
+    - files: 파일 경로 → {size, mtime_ns, hash, docs_at}  (스캔 결과 캐시)
+    - indexed: 문서 source → {docs_hash, doc_ids}         (인덱스에 올라간 문서 ID)
+
+    파싱 결과는 메모리나 매니페스트 JSON에 두지 않고 문서 캐시 파일(파일별 JSON 구간을 이어 붙인 것)에
+    추가 기록하며, files 항목에는 그 구간의 [오프셋, 길이]만 남긴다. 재사용할 때 해당 구간만 읽으므로
+    메모리에는 파일 수에 비례하는 메타데이터만 올라간다.
+    캐시 파일은 추가 기록만 하므로 이미 저장된 매니페스트가 가리키는 구간은 바뀌지 않고,
+    압축할 때는 새 이름의 파일을 쓴 뒤 매니페스트를 교체한다.
+    """
+
+    def __init__(self, files: Optional[Dict[str, Dict[str, Any]]] = None,
+                 indexed: Optional[Dict[str, Dict[str, Any]]] = None,
+                 cache_path: Optional[str] = None):
+        self.files = files or {}
+        self.indexed = indexed or {}
+        self._seen = set()
+        self.reused = 0
+        self.parsed = 0
+        self._cache_path = cache_path
+        self._cache_size = os.path.getsize(cache_path) if cache_path and os.path.isfile(cache_path) else 0
+        self._writer = None
+        self._reader = None
+        self._temp_finalizer = None
+
+    # ----- 문서 캐시 파일 -----
+
+    def _append_docs(self, docs: List[Dict[str, Any]]) -> List[int]:
+        """문서 목록을 캐시 파일 끝에 기록 → [오프셋, 길이]"""
+        if self._cache_path is None:
+            # 아직 저장 위치가 없는 매니페스트는 임시 파일에 쓰고 save() 때 옮김
+            fd, self._cache_path = tempfile.mkstemp(prefix='manifest_', suffix='.docs')
+            os.close(fd)
+            self._temp_finalizer = weakref.finalize(self, _remove_file, self._cache_path)
+        if self._writer is None:
+            self._writer = open(self._cache_path, 'ab')
+        raw = json.dumps(docs, ensure_ascii=False).encode('utf-8')
+        offset = self._cache_size
+        self._writer.write(raw)
+        self._cache_size += len(raw)
+        return [offset, len(raw)]
+
+    def _read_raw(self, docs_at: List[int]) -> bytes:
+        if self._writer is not None:
+            self._writer.flush()
+        if self._reader is None:
+            self._reader = open(self._cache_path, 'rb')
+        self._reader.seek(docs_at[0])
+        raw = self._reader.read(docs_at[1])
+        if len(raw) != docs_at[1]:
+            raise OSError(f"문서 캐시 구간 손상: {docs_at}")
+        return raw
+
+    def _read_docs(self, entry: Dict[str, Any]) -> Optional[List[Dict[str, Any]]]:
+        """캐시 파일에서 파일 하나의 파싱 결과 읽기 (읽을 수 없으면 None → 다시 파싱)"""
+        if self._cache_path is None or 'docs_at' not in entry:
+            return None
+        try:
+            return json.loads(self._read_raw(entry['docs_at']))
+        except (OSError, ValueError) as e:
+            logger.debug(f"문서 캐시 읽기 실패 (다시 파싱): {e}")
+            return None
+
+    def _close_cache(self) -> None:
+        for handle in (self._writer, self._reader):
+            if handle is not None:
+                handle.close()
+        self._writer = self._reader = None
+
+    def _compact_cache(self, target_dir: str, base_name: str) -> str:
+        """살아 있는 구간만 새 캐시 파일로 복사 → 새 파일 경로 (files 항목의 위치도 갱신)"""
+        new_path = os.path.join(target_dir, f"{base_name}.docs.{uuid.uuid4().hex[:8]}")
+        new_size = 0
+        with open(new_path, 'wb') as out:
+            for entry in self.files.values():
+                if 'docs_at' not in entry or self._cache_path is None:
+                    continue
+                raw = self._read_raw(entry['docs_at'])
+                out.write(raw)
+                entry['docs_at'] = [new_size, len(raw)]
+                new_size += len(raw)
+        self._close_cache()
+        self._cache_path, self._cache_size = new_path, new_size
+        return new_path
+
+    # ----- 스캔 캐시 -----
+
+    def begin_scan(self) -> None:
+        """스캔 시작 시 방문 기록/통계 초기화"""
+        self._seen = set()
+        self.reused = 0
+        self.parsed = 0
+
+    def lookup(self, path: str) -> Optional[List[Dict[str, Any]]]:
+        """파일이 바뀌지 않았으면 이전 파싱 결과 반환, 바뀌었으면 None"""
+        self._seen.add(path)
+        entry = self.files.get(path)
+        if entry is None:
+            return None
+        try:
+            stat = os.stat(path)
+        except OSError:
+            return None
+
+        if stat.st_size != entry['size']:
+            return None
+        # 수정시각만 바뀐 경우(복사/압축 해제 등) 내용 해시로 재확인
+        if stat.st_mtime_ns != entry['mtime_ns']:
+            if content_hash(path) != entry['hash']:
+                return None
+            entry['mtime_ns'] = stat.st_mtime_ns
+        docs = self._read_docs(entry)
+        if docs is not None:
+            self.reused += 1
+        return docs
+
+    def record(self, path: str, docs: List[Dict[str, Any]]) -> None:
+        """새로 파싱한 파일 결과 기록"""
+        try:
+            stat = os.stat(path)
+            self.files[path] = {
+                'size': stat.st_size,
+                'mtime_ns': stat.st_mtime_ns,
+                'hash': content_hash(path),
+                'docs_at': self._append_docs(docs)
+            }
+            self.parsed += 1
+        except OSError as e:
+            logger.debug(f"매니페스트 기록 실패 {path}: {e}")
+
+    def prune_files(self, root_dir: str) -> List[str]:
+        """root_dir 아래에서 이번 스캔에 없던(삭제된) 파일 항목 제거, 제거된 경로 반환"""
+        prefix = os.path.join(root_dir, '')
+        removed = [p for p in self.files if p.startswith(prefix) and p not in self._seen]
+        for p in removed:
+            del self.files[p]
+        return removed
+
+    # ----- 인덱스 상태 -----
+
+    def is_indexed(self, source: str, docs: List[Dict[str, Any]]) -> bool:
+        """source의 현재 문서가 인덱스에 올라간 문서와 같은지 확인"""
+        entry = self.indexed.get(source)
+        return entry is not None and entry['docs_hash'] == docs_hash(docs)
+
+    def removed_sources(self, seen_sources: Iterable[str]) -> List[str]:
+        """인덱스에는 있지만 이번 스캔에서 나오지 않은(삭제된) source 목록"""
+        seen = set(seen_sources)
+        return [s for s in self.indexed if s not in seen]
+
+    def set_indexed(self, source: str, docs: List[Dict[str, Any]], doc_ids: List[str]) -> None:
+        self.indexed[source] = {'docs_hash': docs_hash(docs), 'doc_ids': doc_ids}
+
+    def drop_indexed(self, source: str) -> List[str]:
+        entry = self.indexed.pop(source, None)
+        return entry['doc_ids'] if entry else []
+
+    def indexed_doc_ids(self, source: str) -> List[str]:
+        entry = self.indexed.get(source)
+        return list(entry['doc_ids']) if entry else []
+
+    # ----- 저장/로드 -----
+
+    def save(self, path: str) -> bool:
+        """매니페스트 JSON 저장 (문서 캐시 파일은 같은 디렉토리의 <이름>.docs.<id>)
+        캐시가 다른 위치(임시 파일)에 있거나 지워진 구간이 많으면 새 캐시 파일로 압축한 뒤 매니페스트를 교체한다.
+        """
+        try:
+            directory = os.path.dirname(path) or '.'
+            os.makedirs(directory, exist_ok=True)
+            previous_cache = self._cache_path
+            if self._writer is not None:
+                self._writer.flush()
+            live = sum(entry['docs_at'][1] for entry in self.files.values() if 'docs_at' in entry)
+            if previous_cache is not None and (
+                    os.path.dirname(os.path.abspath(previous_cache)) != os.path.abspath(directory)
+                    or not os.path.basename(previous_cache).startswith(os.path.basename(path) + '.docs.')
+                    or live < self._cache_size * DOC_CACHE_MIN_LIVE_RATIO):
+                self._compact_cache(directory, os.path.basename(path))
+            tmp_path = path + '.tmp'
+            with open(tmp_path, 'w', encoding='utf-8') as f:
+                json.dump({
+                    'version': MANIFEST_VERSION,
+                    'files': self.files,
+                    'indexed': self.indexed,
+                    'docs_file': os.path.basename(self._cache_path) if self._cache_path else None
+                }, f, ensure_ascii=False)
+            os.replace(tmp_path, path)
+            if previous_cache is not None and previous_cache != self._cache_path:
+                # 압축 전 캐시는 새 매니페스트가 자리 잡은 뒤에 삭제
+                _remove_file(previous_cache)
+                if self._temp_finalizer is not None:
+                    self._temp_finalizer.detach()
+                    self._temp_finalizer = None
+            return True
+        except Exception as e:
+            logger.warning(f"매니페스트 저장 실패 {path}: {e}")
+            return False
+
+    @classmethod
+    def load(cls, path: str) -> "IndexManifest":
+        """저장된 매니페스트 로드 (없거나 형식이 다르면 빈 매니페스트)"""
+        if not path or not os.path.isfile(path):
+            return cls()
+        try:
+            with open(path, 'r', encoding='utf-8') as f:
+                data = json.load(f)
+            if data.get('version') != MANIFEST_VERSION:
+                return cls()
+            docs_file = data.get('docs_file')
+            cache_path = os.path.join(os.path.dirname(path), docs_file) if docs_file else None
+            return cls(files=data.get('files', {}), indexed=data.get('indexed', {}), cache_path=cache_path)
+        except Exception as e:
+            logger.warning(f"매니페스트 로드 실패 (전체 재구축): {e}")
+            return cls()
@@ -0,0 +1,177 @@
+# 프로세스 내 백그라운드 작업 큐 - 모드팩 인덱스 구축 같은 긴 작업을 요청 스레드 밖에서 실행
+# 작업 ID로 상태/진행률 조회, 취소, 같은 키의 작업 중복 실행 방지(single-flight)
+
+import os
+import time
+import uuid
+import threading
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, Dict, Any, Optional, List, Tuple
+import logging
+
+logger = logging.getLogger(__name__)
+
+QUEUED = 'queued'
+RUNNING = 'running'
+SUCCEEDED = 'succeeded'
+FAILED = 'failed'
+CANCELLED = 'cancelled'
+FINISHED_STATES = (SUCCEEDED, FAILED, CANCELLED)
+
+
+class JobCancelled(Exception):
+    """작업 취소 요청 시 진행률 보고 지점에서 발생"""
+
+
+class Job:
+    """백그라운드 작업 하나의 상태"""
+
+    def __init__(self, kind: str, key: str, params: Optional[Dict[str, Any]] = None):
+        self.id = uuid.uuid4().hex
+        self.kind = kind
+        self.key = key
+        self.params = params or {}
+        self.status = QUEUED
+        self.progress: Dict[str, Any] = {}
+        self.result: Optional[Dict[str, Any]] = None
+        self.error: Optional[str] = None
+        self.created_at = time.time()
+        self.started_at: Optional[float] = None
+        self.finished_at: Optional[float] = None
+        self._cancel_event = threading.Event()
+        self._done_event = threading.Event()
+        self._future = None
+
+    @property
+    def cancel_requested(self) -> bool:
+        return self._cancel_event.is_set()
+
+    @property
+    def finished(self) -> bool:
+        return self.status in FINISHED_STATES
+
+    def report(self, stage: str, count: int) -> None:
+        """진행률 기록 (작업 함수의 progress 콜백). 취소 요청이 있으면 JobCancelled 발생"""
+        self.progress[stage] = count
+        if self._cancel_event.is_set():
+            raise JobCancelled(f"작업 {self.id} 취소됨")
+
+    def wait(self, timeout: Optional[float] = None) -> bool:
+        """작업이 끝날 때까지 대기, 시간 내에 끝났으면 True"""
+        return self._done_event.wait(timeout)
+
+    def to_dict(self) -> Dict[str, Any]:
+        now = time.time()
+        return {
+            'job_id': self.id,
+            'kind': self.kind,
+            'key': self.key,
+            'params': self.params,
+            'status': self.status,
+            'progress': dict(self.progress),
+            'result': self.result,
+            'error': self.error,
+            'cancel_requested': self.cancel_requested,
+            'created_at': self.created_at,
+            'started_at': self.started_at,
+            'finished_at': self.finished_at,
+            'elapsed_seconds': round((self.finished_at or now) - (self.started_at or now), 3)
+        }
+
+
+class JobManager:
+    """스레드 풀 기반 작업 관리자
+
+    submit(kind, key, fn)은 같은 key의 작업이 대기/실행 중이면 새로 만들지 않고 그 작업을 반환한다.
+    fn(job)은 결과 dict를 반환하며, 결과에 success=False가 있으면 실패로 기록한다.
+    """
+
+    def __init__(self, max_workers: int = 2, max_finished: int = 200):
+        self.max_finished = max_finished
+        self._executor = ThreadPoolExecutor(max_workers=max(1, max_workers), thread_name_prefix='job')
+        self._jobs: "OrderedDict[str, Job]" = OrderedDict()
+        self._active: Dict[str, Job] = {}
+        self._lock = threading.Lock()
+
+    def submit(self, kind: str, key: str, fn: Callable[[Job], Dict[str, Any]],
+               params: Optional[Dict[str, Any]] = None) -> Tuple[Job, bool]:
+        """작업 등록. (작업, 새로 만들었는지 여부) 반환"""
+        with self._lock:
+            active = self._active.get(key)
+            if active is not None:
+                return active, False
+            job = Job(kind, key, params)
+            self._jobs[job.id] = job
+            self._active[key] = job
+            self._trim_finished()
+            job._future = self._executor.submit(self._run, job, fn)
+        logger.info(f"📥 작업 등록: {kind} {key} ({job.id})")
+        return job, True
+
+    def _run(self, job: Job, fn: Callable[[Job], Dict[str, Any]]) -> None:
+        if job.cancel_requested:
+            self._finish(job, CANCELLED)
+            return
+        job.status = RUNNING
+        job.started_at = time.time()
+        try:
+            result = fn(job)
+            job.result = result
+            if job.cancel_requested:
+                self._finish(job, CANCELLED)
+            elif isinstance(result, dict) and result.get('success') is False:
+                job.error = result.get('error')
+                self._finish(job, FAILED)
+            else:
+                self._finish(job, SUCCEEDED)
+        except JobCancelled:
+            self._finish(job, CANCELLED)
+        except Exception as e:
+            logger.error(f"❌ 작업 실패 {job.kind} {job.key}: {e}")
+            job.error = str(e)
+            self._finish(job, FAILED)
+
+    def _finish(self, job: Job, status: str) -> None:
+        with self._lock:
+            job.status = status
+            job.finished_at = time.time()
+            if self._active.get(job.key) is job:
+                del self._active[job.key]
+        job._done_event.set()
+        logger.info(f"📤 작업 종료: {job.kind} {job.key} ({job.id}) → {status}")
+
+    def _trim_finished(self) -> None:
+        """완료된 작업 기록은 최근 max_finished개만 유지"""
+        finished = [job_id for job_id, job in self._jobs.items() if job.finished]
+        for job_id in finished[:max(0, len(finished) - self.max_finished)]:
+            del self._jobs[job_id]
+
+    def get(self, job_id: str) -> Optional[Job]:
+        with self._lock:
+            return self._jobs.get(job_id)
+
+    def list(self) -> List[Job]:
+        with self._lock:
+            return list(self._jobs.values())
+
+    def cancel(self, job_id: str) -> Optional[Job]:
+        """취소 요청. 대기 중이면 바로 취소, 실행 중이면 다음 진행률 보고 시점에 중단"""
+        job = self.get(job_id)
+        if job is None or job.finished:
+            return job
+        job._cancel_event.set()
+        if job._future is not None and job._future.cancel():
+            self._finish(job, CANCELLED)
+        return job
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            counts: Dict[str, int] = {}
+            for job in self._jobs.values():
+                counts[job.status] = counts.get(job.status, 0) + 1
+            return {'jobs': len(self._jobs), 'active': len(self._active), 'by_status': counts}
+
+
+# 전역 인스턴스
+job_manager = JobManager(max_workers=int(os.getenv('JOB_WORKERS', '2')))
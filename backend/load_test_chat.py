@@ -0,0 +1,97 @@
+#!/usr/bin/env python3
+"""
+/chat 부하 테스트 - 동시 사용자 수를 늘려 가며 초당 처리 요청 수와 지연 시간 측정
+
+Flask(python app.py)와 ASGI(uvicorn asgi_app:application) 서빙 모드를 같은 조건으로 비교할 때 사용한다.
+응답 캐시에 걸리지 않도록 요청마다 질문을 조금씩 바꾸고 bypass_cache=true로 보낸다.
+
+사용법:
+    python load_test_chat.py                                   # http://localhost:5000, 동시 10/30/60명
+    python load_test_chat.py --url http://서버:5000 --users 30  # 동시 사용자 수 지정
+    python load_test_chat.py --requests 200 --timeout 120       # 단계별 요청 수, 요청 타임아웃
+"""
+
+import time
+import argparse
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, List
+
+import requests
+
+
+def percentile(values: List[float], ratio: float) -> float:
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(len(ordered) * ratio))]
+
+
+def run_stage(url: str, users: int, total_requests: int, timeout: float, message: str, modpack: str) -> Dict:
+    """동시 사용자 users명이 총 total_requests개 요청을 보내는 한 단계 실행"""
+    latencies: List[float] = []
+    statuses: Dict[str, int] = {}
+    lock = threading.Lock()
+    session_local = threading.local()
+
+    def send(i: int) -> None:
+        session = getattr(session_local, 'session', None)
+        if session is None:
+            session = session_local.session = requests.Session()
+        payload = {
+            'message': f"{message} ({i})",
+            'player_uuid': f"load-test-{i % users}",
+            'modpack_name': modpack,
+            'modpack_version': '1.0.0',
+            'bypass_cache': True
+        }
+        started = time.perf_counter()
+        try:
+            status = str(session.post(f"{url}/chat", json=payload, timeout=timeout).status_code)
+        except requests.RequestException as e:
+            status = type(e).__name__
+        elapsed = time.perf_counter() - started
+        with lock:
+            latencies.append(elapsed)
+            statuses[status] = statuses.get(status, 0) + 1
+
+    started = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=users) as executor:
+        list(executor.map(send, range(total_requests)))
+    wall = time.perf_counter() - started
+
+    return {
+        'users': users,
+        'requests': total_requests,
+        'seconds': wall,
+        'rps': statuses.get('200', 0) / wall if wall else 0.0,
+        'p50': percentile(latencies, 0.50),
+        'p95': percentile(latencies, 0.95),
+        'statuses': statuses
+    }
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="/chat 부하 테스트")
+    parser.add_argument('--url', default='http://localhost:5000', help="백엔드 주소")
+    parser.add_argument('--users', type=int, nargs='+', default=[10, 30, 60], help="단계별 동시 사용자 수")
+    parser.add_argument('--requests', type=int, default=0, help="단계별 요청 수 (기본: 동시 사용자 수 x 3)")
+    parser.add_argument('--timeout', type=float, default=120.0, help="요청 타임아웃(초)")
+    parser.add_argument('--message', default="철 곡괭이 제작법 알려줘", help="질문 (요청마다 번호가 붙음)")
+    parser.add_argument('--modpack', default="Unknown Modpack", help="모드팩 이름")
+    args = parser.parse_args()
+
+    print(f"🎯 대상: {args.url}/chat")
+    print("-" * 72)
+    print(f"{'동시':<6} {'요청':<6} {'소요(초)':<10} {'성공/초':<10} {'p50(초)':<10} {'p95(초)':<10} {'상태'}")
+    print("-" * 72)
+    for users in args.users:
+        total = args.requests or users * 3
+        result = run_stage(args.url, users, total, args.timeout, args.message, args.modpack)
+        print(f"{result['users']:<6} {result['requests']:<6} {result['seconds']:<10.2f} {result['rps']:<10.2f} "
+              f"{result['p50']:<10.2f} {result['p95']:<10.2f} {result['statuses']}")
+    print("-" * 72)
+
+
+if __name__ == '__main__':
+    main()
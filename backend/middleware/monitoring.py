@@ -27,6 +27,11 @@ class MetricsCollector:
             'active_users': set()
         }
         self.start_time = time.time()
+        self.stats_providers = {}
+        
+    def register_stats_provider(self, name, provider):
+        """캐시 등 외부 컴포넌트 통계 제공 함수 등록 (/metrics에 포함)"""
+        self.stats_providers[name] = provider
         
     def record_api_call(self, endpoint, method):
         """API 호출 기록"""
@@ -103,9 +108,21 @@ class MetricsCollector:
             'active_users_count': len(self.metrics['active_users']),
             'current_memory_usage': latest_memory['percent'] if latest_memory else None,
             'current_cpu_usage': latest_cpu['percent'] if latest_cpu else None,
+            'caches': self._collect_provider_stats(),
             'timestamp': datetime.now().isoformat()
         }
     
+    def _collect_provider_stats(self):
+        """등록된 통계 제공 함수 호출 (실패해도 메트릭 조회는 계속)"""
+        stats = {}
+        for name, provider in self.stats_providers.items():
+            try:
+                stats[name] = provider()
+            except Exception as e:
+                logger.error(f"통계 수집 실패 ({name}): {e}")
+                stats[name] = None
+        return stats
+    
     def get_performance_report(self):
         """성능 보고서 생성"""
         summary = self.get_metrics_summary()
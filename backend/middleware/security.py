@@ -35,17 +35,27 @@ class SecurityMiddleware:
     
     def before_request(self):
         """요청 전 처리"""
-        # IP 차단 확인
-        if self._is_blocked_ip(request.remote_addr):
-            return jsonify({"error": "Access denied"}), 403
-        
-        # Rate Limiting 확인
-        if not self._check_rate_limit(request.remote_addr):
-            return jsonify({"error": "Rate limit exceeded"}), 429
+        rejected = self.check_request(request.remote_addr)
+        if rejected:
+            body, status = rejected
+            return jsonify(body), status
         
         # 요청 시작 시간 기록
         g.request_start_time = time.time()
     
+    def check_request(self, ip):
+        """IP 차단/Rate Limiting 확인 (Flask, ASGI 공용)
+        통과하면 None, 거부하면 (오류 본문, 상태 코드)
+        """
+        # IP 차단 확인
+        if self._is_blocked_ip(ip):
+            return {"error": "Access denied"}, 403
+        
+        # Rate Limiting 확인
+        if not self._check_rate_limit(ip):
+            return {"error": "Rate limit exceeded"}, 429
+        return None
+    
     def after_request(self, response):
         """요청 후 처리"""
         # CORS 헤더 설정
@@ -6,6 +6,7 @@ GCP VM의 모든 모드팩을 스캔하고 사용자가 수동으로 선택하
 
 import os
 import json
+import time
 import requests
 from typing import List, Dict, Any, Optional
 from pathlib import Path
@@ -227,34 +228,69 @@ def build_modpack_index(modpack: Dict[str, Any]) -> bool:
         payload = {
             "modpack_name": modpack['name'],
             "modpack_version": modpack['version'],
-            "modpack_path": modpack['path']
+            "modpack_path": modpack['path'],
+            "async": True
         }
         
-        print("🚀 GCP RAG 인덱스 구축 중... (시간이 걸릴 수 있습니다)")
-        response = requests.post(f"{BASE_URL}/gcp-rag/build", json=payload, timeout=600)
+        print("🚀 GCP RAG 인덱스 구축 작업 등록 중...")
+        response = requests.post(f"{BASE_URL}/gcp-rag/build", json=payload, timeout=30)
         
-        if response.status_code == 200:
-            data = response.json()
-            if data.get('success'):
-                print(f"✅ 인덱스 구축 성공!")
-                print(f"📊 처리된 문서 수: {data.get('document_count')}")
-                print(f"📈 통계: {data.get('stats')}")
-                return True
-            else:
-                print(f"❌ 인덱스 구축 실패: {data.get('error')}")
-                return False
-        else:
+        if response.status_code not in (200, 202):
             print(f"❌ 서버 오류: {response.status_code}")
             print(f"응답: {response.text}")
             return False
+        
+        data = response.json()
+        job_id = data.get('job_id')
+        if not job_id:
+            print(f"❌ 인덱스 구축 실패: {data.get('error')}")
+            return False
+        if data.get('deduplicated'):
+            print("ℹ️ 같은 모드팩의 구축 작업이 이미 진행 중이어서 해당 작업을 따라갑니다.")
+        print(f"🆔 작업 ID: {job_id} (Ctrl+C로 작업 취소)")
+        
+        job = wait_for_job(job_id)
+        if job is None:
+            return False
+        
+        result = job.get('result') or {}
+        if job.get('status') == 'succeeded':
+            print(f"\n✅ 인덱스 구축 성공!")
+            print(f"📊 처리된 문서 수: {result.get('document_count')}")
+            print(f"📈 통계: {result.get('stats')}")
+            return True
+        else:
+            print(f"\n❌ 인덱스 구축 {job.get('status')}: {job.get('error') or result.get('error')}")
+            return False
             
-    except requests.exceptions.Timeout:
-        print("❌ 요청 시간 초과 (10분). 모드팩이 너무 클 수 있습니다.")
-        return False
     except Exception as e:
         print(f"❌ 오류 발생: {e}")
         return False
 
+def wait_for_job(job_id: str, poll_interval: float = 2.0) -> Optional[Dict[str, Any]]:
+    """작업이 끝날 때까지 진행률을 표시하며 대기 (Ctrl+C 시 작업 취소 요청)"""
+    try:
+        while True:
+            response = requests.get(f"{BASE_URL}/jobs/{job_id}", timeout=10)
+            if response.status_code != 200:
+                print(f"\n❌ 작업 조회 실패: {response.status_code}")
+                return None
+            job = response.json().get('job', {})
+            progress = job.get('progress', {})
+            print(f"\r⏳ {job.get('status')} | 스캔 {progress.get('scan', 0)} | "
+                  f"임베딩 {progress.get('embed', 0)} | 저장 {progress.get('write', 0)} "
+                  f"| {job.get('elapsed_seconds', 0):.0f}초", end='', flush=True)
+            if job.get('status') in ('succeeded', 'failed', 'cancelled'):
+                return job
+            time.sleep(poll_interval)
+    except KeyboardInterrupt:
+        print("\n🛑 작업 취소 요청 중...")
+        try:
+            requests.post(f"{BASE_URL}/jobs/{job_id}/cancel", timeout=10)
+        except Exception as e:
+            print(f"❌ 취소 요청 실패: {e}")
+        return None
+
 def list_indexed_modpacks() -> List[Dict[str, Any]]:
     """이미 인덱싱된 모드팩 목록 조회"""
     try:
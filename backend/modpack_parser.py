@@ -1,6 +1,18 @@
 import os
 import json
-from typing import List, Dict, Any, Tuple
+import multiprocessing
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from typing import List, Dict, Any, Tuple, Callable, Optional, Iterator
+
+from index_manifest import IndexManifest
+from tag_index import TagIndex, build_tag_index, is_tag_file
+from alias_index import AliasIndex, build_alias_index
+
+# 파일 수가 이보다 적으면 프로세스 풀 기동 비용이 더 커서 직렬 스캔
+PARALLEL_MIN_FILES = 2000
+# 한 번에 파싱해 메모리에 올리는 파일 수 (스트리밍 스캔 단위)
+STREAM_SHARD_SIZE = 256
 
 
 def _strip_ns(identifier: str) -> str:
@@ -64,119 +76,340 @@ def _parse_shaped_recipe(recipe_json: Dict[str, Any]) -> Tuple[List[List[str]],
     return grid, symbol_to_label, result_id, result_count
 
 
-def _collect_recipe_docs(recipes_root: str) -> Tuple[List[Dict[str, Any]], int]:
+def _ingredient_id(spec: Any) -> Optional[str]:
+    """재료 스펙(dict/list/str)을 아이템 ID 또는 '#태그'로 변환 (대체 재료 목록이면 첫 번째)"""
+    if isinstance(spec, list):
+        for candidate in spec:
+            item = _ingredient_id(candidate)
+            if item:
+                return item
+        return None
+    if isinstance(spec, str):
+        return spec or None
+    if isinstance(spec, dict):
+        if spec.get('item') or spec.get('id'):
+            return spec.get('item') or spec.get('id')
+        if spec.get('tag'):
+            return '#' + spec['tag']
+        if spec.get('fluid'):
+            return spec['fluid']
+        # 기계 레시피: {"ingredient": {...}, "amount": 2}
+        if 'ingredient' in spec:
+            return _ingredient_id(spec['ingredient'])
+    return None
+
+
+def _ingredient_count(spec: Any) -> int:
+    if isinstance(spec, dict):
+        count = spec.get('count', spec.get('amount', 1))
+        if isinstance(count, int) and count > 0:
+            return count
+    return 1
+
+
+def _recipe_materials(recipe_json: Dict[str, Any]) -> List[Dict[str, Any]]:
+    """레시피 재료 목록 [{item, count}] - 같은 재료는 합산, 처음 나온 순서 유지
+    shaped는 패턴에 나온 횟수, shapeless/기계/대장장이 레시피는 입력 필드에서 집계한다.
+    """
+    counts: Dict[str, int] = {}
+
+    def add(spec: Any, times: int = 1) -> None:
+        item = _ingredient_id(spec)
+        if item:
+            counts[item] = counts.get(item, 0) + _ingredient_count(spec) * times
+
+    key = recipe_json.get('key')
+    if isinstance(recipe_json.get('pattern'), list) and isinstance(key, dict):
+        for row in recipe_json['pattern']:
+            for sym in str(row):
+                if sym != ' ' and sym in key:
+                    add(key[sym])
+    else:
+        for field in ('ingredients', 'ingredient', 'input', 'inputs', 'template', 'base', 'addition'):
+            value = recipe_json.get(field)
+            if isinstance(value, list):
+                for spec in value:
+                    add(spec)
+            elif value is not None:
+                add(value)
+    return [{'item': item, 'count': count} for item, count in counts.items()]
+
+
+def _materials_grid(materials: List[Dict[str, Any]]) -> List[List[Optional[str]]]:
+    """shapeless 레시피 재료를 3x3 격자에 순서대로 배치 (표시용 라벨)"""
+    labels: List[str] = []
+    for material in materials:
+        label = _strip_ns(material['item'].lstrip('#')).replace("_", " ")[:10]
+        labels.extend([label] * material['count'])
+    labels = (labels + [None] * 9)[:9]
+    return [labels[0:3], labels[3:6], labels[6:9]]
+
+
+def _list_files(root_dir: str, extensions: Tuple[str, ...]) -> List[str]:
+    """root_dir 아래 확장자가 맞는 파일 경로를 정렬된 순서로 반환 (병렬/직렬 결과 순서 고정)"""
+    paths: List[str] = []
+    for root, dirs, files in os.walk(root_dir):
+        dirs.sort()
+        for fn in sorted(files):
+            if fn.endswith(extensions):
+                paths.append(os.path.join(root, fn))
+    return paths
+
+
+def _resolve_workers(workers: Optional[int]) -> int:
+    """워커 수 결정: None이면 MODPACK_SCAN_WORKERS 환경변수 (기본 1 = 직렬), 0이면 CPU 수"""
+    if workers is None:
+        workers = int(os.getenv('MODPACK_SCAN_WORKERS', '1'))
+    if workers <= 0:
+        workers = os.cpu_count() or 1
+    return workers
+
+
+def _parse_shard(args: Tuple[Callable[..., Optional[Dict[str, Any]]], List[str], Tuple]) -> List[Dict[str, Any]]:
+    """프로세스 풀 작업 단위: 파일 묶음 하나를 파싱"""
+    parse_fn, paths, extra = args
     docs: List[Dict[str, Any]] = []
-    count = 0
-    for root, _, files in os.walk(recipes_root):
-        for fn in files:
-            if not fn.endswith('.json'):
-                continue
-            fpath = os.path.join(root, fn)
-            try:
-                with open(fpath, 'r', encoding='utf-8') as f:
-                    data = json.load(f)
-                rtype = data.get("type", "")
-                # Shaped crafting recipes (common types)
-                if 'crafting_shaped' in rtype or 'minecraft:crafting_shaped' in rtype:
-                    grid, keymap, result_id, result_count = _parse_shaped_recipe(data)
-                    text = f"Shaped recipe for {_strip_ns(result_id)} x{result_count}: keys={keymap}"
-                    docs.append({
-                        'type': 'recipe',
-                        'subtype': 'crafting_shaped',
-                        'result_id': result_id,
-                        'result_count': result_count,
-                        'grid': grid,
-                        'source': fpath,
-                        'text': text
-                    })
-                    count += 1
-                else:
-                    # Other recipe types -> store brief text for search context
-                    result = data.get('result')
-                    rid = None
-                    if isinstance(result, dict):
-                        rid = result.get('item') or result.get('id')
-                    elif isinstance(result, str):
-                        rid = result
-                    text = f"Recipe type={rtype} result={_strip_ns(rid) if rid else 'unknown'}"
-                    docs.append({
-                        'type': 'recipe',
-                        'subtype': 'other',
-                        'result_id': rid or 'unknown',
-                        'source': fpath,
-                        'text': text
-                    })
-                    count += 1
-            except Exception:
-                # Ignore malformed recipe files
-                continue
-    return docs, count
-
-
-def _collect_mod_list(mods_dir: str) -> Tuple[List[Dict[str, Any]], int]:
+    for fpath in paths:
+        doc = parse_fn(fpath, *extra)
+        if doc is not None:
+            docs.append(doc)
+    return docs
+
+
+def _split_cached(shard: List[str], manifest: Optional[IndexManifest]) -> Tuple[Dict[str, List[Dict[str, Any]]], List[str]]:
+    """샤드를 매니페스트에서 재사용 가능한 파일과 파싱이 필요한 파일로 분리"""
+    if manifest is None:
+        return {}, shard
+    cached: Dict[str, List[Dict[str, Any]]] = {}
+    pending: List[str] = []
+    for fpath in shard:
+        file_docs = manifest.lookup(fpath)
+        if file_docs is None:
+            pending.append(fpath)
+        else:
+            cached[fpath] = file_docs
+    return cached, pending
+
+
+def _merge_shard(shard: List[str], cached: Dict[str, List[Dict[str, Any]]], pending: List[str],
+                 parsed_docs: List[Dict[str, Any]], manifest: Optional[IndexManifest]) -> List[Dict[str, Any]]:
+    """재사용 결과와 파싱 결과를 원래 파일 순서로 합치고 매니페스트에 기록"""
+    if manifest is None:
+        return parsed_docs
+    parsed = {doc['source']: doc for doc in parsed_docs}
+    for fpath in pending:
+        # 파싱 실패 파일도 빈 결과로 기록해 다음 스캔에서 다시 읽지 않음
+        cached[fpath] = [parsed[fpath]] if fpath in parsed else []
+        manifest.record(fpath, cached[fpath])
     docs: List[Dict[str, Any]] = []
-    count = 0
+    for fpath in shard:
+        docs.extend(cached[fpath])
+    return docs
+
+
+def _iter_files(paths: List[str], parse_fn: Callable[..., Optional[Dict[str, Any]]],
+                workers: int, extra: Tuple = (),
+                manifest: Optional[IndexManifest] = None) -> Iterator[Dict[str, Any]]:
+    """파일 목록을 샤드 단위로 파싱하며 문서를 순서대로 하나씩 반환.
+    파일이 많고 workers > 1이면 프로세스 풀에 샤드를 분배하되, 동시에 처리 중인 샤드 수를
+    제한해 메모리 사용량이 모드팩 크기와 무관하게 유지된다. 결과 순서는 직렬 스캔과 같다.
+    manifest가 주어지면 바뀌지 않은 파일은 이전 파싱 결과를 재사용하고 나머지만 파싱한다.
+    """
+    parallel = workers > 1 and len(paths) >= PARALLEL_MIN_FILES
+    if parallel:
+        shard_size = max(1, min(STREAM_SHARD_SIZE * 4, len(paths) // (workers * 4)))
+    else:
+        shard_size = STREAM_SHARD_SIZE
+    shards = (paths[i:i + shard_size] for i in range(0, len(paths), shard_size))
+
+    if not parallel:
+        for shard in shards:
+            cached, pending = _split_cached(shard, manifest)
+            parsed_docs = _parse_shard((parse_fn, pending, extra))
+            yield from _merge_shard(shard, cached, pending, parsed_docs, manifest)
+        return
+
+    in_flight = deque()
+    # 스캔은 Flask/작업 큐 스레드에서 돌고 gRPC(Firestore/Vertex) 스레드가 살아 있으므로 fork 대신 spawn
+    with ProcessPoolExecutor(max_workers=workers, mp_context=multiprocessing.get_context('spawn')) as executor:
+        for shard in shards:
+            cached, pending = _split_cached(shard, manifest)
+            in_flight.append((shard, cached, pending, executor.submit(_parse_shard, (parse_fn, pending, extra))))
+            if len(in_flight) >= workers * 2:
+                shard, cached, pending, future = in_flight.popleft()
+                yield from _merge_shard(shard, cached, pending, future.result(), manifest)
+        while in_flight:
+            shard, cached, pending, future = in_flight.popleft()
+            yield from _merge_shard(shard, cached, pending, future.result(), manifest)
+
+
+def _parse_recipe_file(fpath: str) -> Optional[Dict[str, Any]]:
+    """레시피 JSON 파일 하나를 문서로 변환 (잘못된 파일은 None)"""
+    try:
+        with open(fpath, 'r', encoding='utf-8') as f:
+            data = json.load(f)
+        rtype = data.get("type", "")
+        # Shaped crafting recipes (common types)
+        if 'crafting_shaped' in rtype or 'minecraft:crafting_shaped' in rtype:
+            grid, keymap, result_id, result_count = _parse_shaped_recipe(data)
+            text = f"Shaped recipe for {_strip_ns(result_id)} x{result_count}: keys={keymap}"
+            return {
+                'type': 'recipe',
+                'subtype': 'crafting_shaped',
+                'recipe_type': rtype,
+                'result_id': result_id,
+                'result_count': result_count,
+                'grid': grid,
+                'key': {sym: _ingredient_id(spec) for sym, spec in data.get('key', {}).items()},
+                'materials': _recipe_materials(data),
+                'source': fpath,
+                'text': text
+            }
+        # Other recipe types -> store brief text for search context
+        result = data.get('result')
+        rid = None
+        count = 1
+        if isinstance(result, dict):
+            rid = result.get('item') or result.get('id')
+            count = _ingredient_count(result)
+        elif isinstance(result, str):
+            rid = result
+        text = f"Recipe type={rtype} result={_strip_ns(rid) if rid else 'unknown'}"
+        materials = _recipe_materials(data)
+        doc = {
+            'type': 'recipe',
+            'subtype': 'other',
+            'recipe_type': rtype,
+            'result_id': rid or 'unknown',
+            'result_count': count,
+            'materials': materials,
+            'source': fpath,
+            'text': text
+        }
+        if 'crafting_shapeless' in rtype:
+            doc['grid'] = _materials_grid(materials)
+        return doc
+    except Exception:
+        # Ignore malformed recipe files
+        return None
+
+
+def _iter_mod_list(mods_dir: str) -> Iterator[Dict[str, Any]]:
     if not os.path.isdir(mods_dir):
-        return docs, count
+        return
     try:
-        for fn in sorted(os.listdir(mods_dir)):
-            if fn.lower().endswith('.jar'):
-                text = f"Installed mod jar: {fn}"
-                docs.append({'type': 'mod', 'source': os.path.join(mods_dir, fn), 'text': text})
-                count += 1
+        names = sorted(os.listdir(mods_dir))
     except Exception:
-        pass
-    return docs, count
+        return
+    for fn in names:
+        if fn.lower().endswith('.jar'):
+            text = f"Installed mod jar: {fn}"
+            yield {'type': 'mod', 'source': os.path.join(mods_dir, fn), 'text': text}
 
 
-def _collect_kubejs(kubejs_dir: str) -> Tuple[List[Dict[str, Any]], int]:
-    docs: List[Dict[str, Any]] = []
-    count = 0
+def _parse_kubejs_file(fpath: str, kubejs_dir: str) -> Optional[Dict[str, Any]]:
+    try:
+        with open(fpath, 'r', encoding='utf-8', errors='ignore') as f:
+            content = f.read(2000)
+        content_clean = content[:300].replace('\n', ' ')
+        text = f"kubejs script: {os.path.relpath(fpath, kubejs_dir)} => {content_clean}"
+        return {'type': 'kubejs', 'source': fpath, 'text': text}
+    except Exception:
+        return None
+
+
+def _iter_kubejs(kubejs_dir: str, workers: int = 1,
+                 manifest: Optional[IndexManifest] = None) -> Iterator[Dict[str, Any]]:
     if not os.path.isdir(kubejs_dir):
-        return docs, count
-    for root, _, files in os.walk(kubejs_dir):
-        for fn in files:
-            if not fn.endswith(('.js', '.txt', '.md')):
-                continue
-            fpath = os.path.join(root, fn)
-            try:
-                with open(fpath, 'r', encoding='utf-8', errors='ignore') as f:
-                    content = f.read(2000)
-                content_clean = content[:300].replace('\n', ' ')
-                text = f"kubejs script: {os.path.relpath(fpath, kubejs_dir)} => {content_clean}"
-                docs.append({'type': 'kubejs', 'source': fpath, 'text': text})
-                count += 1
-            except Exception:
-                continue
-    return docs, count
-
-
-def scan_modpack(modpack_path: str) -> Dict[str, Any]:
-    """Scan a modpack directory and return docs suitable for RAG.
-    Returns { 'docs': [...], 'stats': {...} }
+        return
+    paths = _list_files(kubejs_dir, ('.js', '.txt', '.md'))
+    yield from _iter_files(paths, _parse_kubejs_file, workers, extra=(kubejs_dir,), manifest=manifest)
+
+
+def iter_modpack_docs(modpack_path: str, workers: Optional[int] = None,
+                      manifest: Optional[IndexManifest] = None,
+                      stats: Optional[Dict[str, Any]] = None,
+                      tags: Optional[TagIndex] = None,
+                      aliases: Optional[AliasIndex] = None) -> Iterator[Dict[str, Any]]:
+    """Yield RAG docs of a modpack one by one (recipes, mods, kubejs in order).
+
+    Only one shard of files is held in memory at a time, so callers can
+    stream docs into chunking/embedding without materializing the pack.
+    stats: optional dict updated in place with per-kind counts (and the
+    manifest 'incremental' counts once the generator is exhausted).
+    tags: optional TagIndex filled from data/*/tags/items (then kubejs/data,
+    which overrides) after the recipes; tag files are never parsed as recipes.
+    aliases: optional AliasIndex filled from assets/*/lang/{ko_kr,en_us}.json
+    (then resourcepacks and kubejs/assets, which override).
     """
-    docs: List[Dict[str, Any]] = []
-    stats = {'recipes': 0, 'mods': 0, 'kubejs': 0}
+    workers = _resolve_workers(workers)
+    if stats is None:
+        stats = {}
+    stats.update({'recipes': 0, 'mods': 0, 'kubejs': 0})
 
     if not modpack_path or not os.path.isdir(modpack_path):
-        return {'docs': [], 'stats': stats}
+        return
+
+    if manifest is not None:
+        manifest.begin_scan()
 
-    # recipes under data/**/recipes
+    # recipes under data/**/recipes (tag files are handled by the tag index)
     data_dir = os.path.join(modpack_path, 'data')
     if os.path.isdir(data_dir):
-        rdocs, rcount = _collect_recipe_docs(data_dir)
-        docs.extend(rdocs)
-        stats['recipes'] = rcount
+        paths = [p for p in _list_files(data_dir, ('.json',)) if not is_tag_file(p, data_dir)]
+        for doc in _iter_files(paths, _parse_recipe_file, workers, manifest=manifest):
+            stats['recipes'] += 1
+            yield doc
+
+    # item tags -> precomputed tag closure
+    if tags is not None:
+        build_tag_index([data_dir, os.path.join(modpack_path, 'kubejs', 'data')], tags)
+        stats['tags'] = len(tags)
+
+    # item display names (ko_kr/en_us) -> alias index for query rewriting
+    if aliases is not None:
+        build_alias_index([modpack_path], aliases)
+        stats['aliases'] = len(aliases)
 
     # mods list
-    mdocs, mcount = _collect_mod_list(os.path.join(modpack_path, 'mods'))
-    docs.extend(mdocs)
-    stats['mods'] = mcount
+    for doc in _iter_mod_list(os.path.join(modpack_path, 'mods')):
+        stats['mods'] += 1
+        yield doc
 
     # kubejs scripts
-    kdocs, kcount = _collect_kubejs(os.path.join(modpack_path, 'kubejs'))
-    docs.extend(kdocs)
-    stats['kubejs'] = kcount
+    for doc in _iter_kubejs(os.path.join(modpack_path, 'kubejs'), workers, manifest):
+        stats['kubejs'] += 1
+        yield doc
+
+    if manifest is not None:
+        removed = manifest.prune_files(modpack_path)
+        stats['incremental'] = {
+            'reused': manifest.reused,
+            'parsed': manifest.parsed,
+            'removed': len(removed)
+        }
+
 
-    return {'docs': docs, 'stats': stats}
+def scan_modpack(modpack_path: str, workers: Optional[int] = None,
+                 manifest: Optional[IndexManifest] = None) -> Dict[str, Any]:
+    """Scan a modpack directory and return docs suitable for RAG.
+    Returns { 'docs': [...], 'stats': {...} }
 
+    workers: number of processes for parsing large file sets
+    (None -> MODPACK_SCAN_WORKERS env, default 1 = serial; 0 -> CPU count;
+    more than 1 uses a spawn-based process pool).
+    manifest: reuse docs of unchanged files (size/mtime/hash) and only parse
+    changed ones; the manifest is updated in place and the result gets an
+    'incremental' entry with reused/parsed/removed counts.
+    The result's 'tags' entry is the modpack's item TagIndex and 'aliases'
+    its item display-name AliasIndex.
+    Use iter_modpack_docs to stream docs without building the full list.
+    """
+    stats: Dict[str, Any] = {}
+    tags = TagIndex()
+    aliases = AliasIndex()
+    docs = list(iter_modpack_docs(modpack_path, workers, manifest, stats, tags, aliases))
+    result = {'docs': docs, 'stats': stats, 'tags': tags, 'aliases': aliases}
+    if 'incremental' in stats:
+        result['incremental'] = stats.pop('incremental')
+    return result
@@ -22,8 +22,8 @@ from gcp_rag_system import gcp_rag
 from modpack_parser import scan_modpack
 
 
-def build_single_modpack(name: str, version: str, path: str) -> bool:
-    """단일 모드팩 RAG 인덱스 구축"""
+def build_single_modpack(name: str, version: str, path: str, incremental: bool = True) -> bool:
+    """단일 모드팩 RAG 인덱스 구축 (기본은 바뀐 파일만 반영하는 증분 구축)"""
     print(f"\n🔨 RAG 인덱스 구축 시작: {name} v{version}")
     print(f"📁 경로: {path}")
     
@@ -39,11 +39,13 @@ def build_single_modpack(name: str, version: str, path: str) -> bool:
         return False
     
     try:
-        result = gcp_rag.build_modpack_index(name, version, path)
+        result = gcp_rag.build_modpack_index(name, version, path, incremental=incremental)
         
         if result.get('success'):
             print(f"✅ 인덱스 구축 성공!")
             print(f"   📄 문서 수: {result.get('document_count', 0)}")
+            if result.get('incremental'):
+                print(f"   🔁 증분 구축: {result.get('changes', {})}")
             print(f"   📊 통계: {result.get('stats', {})}")
             return True
         else:
@@ -166,6 +168,7 @@ def main():
     build_parser.add_argument('name', help='모드팩 이름')
     build_parser.add_argument('version', help='모드팩 버전')
     build_parser.add_argument('path', help='모드팩 디렉토리 경로')
+    build_parser.add_argument('--full', action='store_true', help='매니페스트를 무시하고 전체 재구축')
     
     # list 명령어
     subparsers.add_parser('list', help='등록된 모드팩 목록 표시')
@@ -189,7 +192,7 @@ def main():
     print("=" * 50)
     
     if args.command == 'build':
-        success = build_single_modpack(args.name, args.version, args.path)
+        success = build_single_modpack(args.name, args.version, args.path, incremental=not args.full)
         sys.exit(0 if success else 1)
         
     elif args.command == 'list':
@@ -0,0 +1,322 @@
+# 모드팩 레시피 DB - 결과 아이템 → 레시피(격자, 키 맵, 재료, 수량, 타입) 색인
+# 스캔 결과의 레시피 문서로 구축해 디스크에 저장하고, /recipe/<item>은 LLM 호출 없이 여기서 먼저 찾는다
+# 재료 → 레시피 역색인도 함께 저장해 "X로 뭘 만들 수 있어?"를 벡터 검색 없이 바로 답한다
+
+import os
+import re
+import json
+import threading
+from collections import OrderedDict
+from typing import List, Dict, Any, Optional, Iterable
+import logging
+
+from tag_index import TagIndex
+from alias_index import AliasIndex
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_RECIPE_DIR = os.path.join(os.path.expanduser('~'), 'minecraft-ai-backend', 'rag', 'recipes')
+RECIPE_STORE_VERSION = 4  # 2: 재료 역색인(uses) 추가, 3: 아이템 태그 색인(tags) 추가, 4: 이름 별칭(aliases) 추가
+
+# "X로 뭘 만들 수 있어?" / "uses of X" 같은 사용처 질문에서 재료 이름을 뽑는 패턴
+_USES_QUERY_PATTERNS = [
+    re.compile(r"(?:what can (?:i|you|we) (?:make|craft|build) (?:with|from|using)|"
+               r"uses? (?:of|for)|recipes? (?:using|with)|what uses)\s+(?:an? |the )?(.+?)[\s?.!]*$", re.I),
+    re.compile(r"^(.+?)\s*(?:으로|로|를|을|이|가)?\s*(?:뭘|무엇을|뭐|무엇|어떤 것|어떤 걸)\s*(?:을\s*)?(?:만들|제작)"),
+    re.compile(r"^(.+?)\s*(?:의|은|는)?\s*(?:사용처|용도|쓰임새|쓰임|쓰는 곳)"),
+]
+
+# 레시피 항목에 남기는 문서 필드
+RECIPE_FIELDS = ('recipe_type', 'result_id', 'result_count', 'grid', 'key', 'materials', 'source')
+
+
+def normalize_item(name: str) -> str:
+    """아이템 이름/ID 정규화: 소문자, 공백·하이픈 → 밑줄 ("Iron Pickaxe" → "iron_pickaxe")"""
+    return re.sub(r'[\s\-]+', '_', (name or '').strip().lower())
+
+
+def _bare_name(item_id: str) -> str:
+    return item_id.split(':', 1)[-1]
+
+
+def display_name(item_id: str) -> str:
+    """표시용 이름 ("minecraft:iron_ingot" → "iron ingot", "#forge:ingots/tin" → "#ingots/tin")"""
+    prefix = '#' if item_id.startswith('#') else ''
+    return prefix + _bare_name(item_id.lstrip('#')).replace('_', ' ')
+
+
+def _token_key(name: str) -> str:
+    """단어 순서를 무시한 이름 키 ("osmium ingot"과 "ingot_osmium"을 같은 키로)"""
+    return '_'.join(sorted(t for t in re.split(r'[_/\s\-]+', name) if t))
+
+
+def parse_uses_query(message: str) -> Optional[str]:
+    """사용처 질문이면 재료 이름을, 아니면 None 반환
+    ("what can I make with osmium ingot?" → "osmium ingot", "오스뮴 주괴로 뭘 만들 수 있어?" → "오스뮴 주괴")
+    """
+    text = (message or '').strip()
+    for pattern in _USES_QUERY_PATTERNS:
+        match = pattern.search(text)
+        if match and match.group(1).strip():
+            return match.group(1).strip()
+    return None
+
+
+def describe_recipe(entry: Dict[str, Any]) -> str:
+    """레시피 항목 한 줄 설명 (예: "iron pickaxe x1 [crafting_shaped] 재료: iron ingot x3, stick x2")"""
+    recipe_type = _bare_name(entry.get('recipe_type') or 'unknown')
+    materials = ', '.join(f"{display_name(m['item'])} x{m['count']}" for m in entry.get('materials', []))
+    text = f"{display_name(entry.get('result_id', 'unknown'))} x{entry.get('result_count', 1)} [{recipe_type}]"
+    return f"{text} 재료: {materials}" if materials else text
+
+
+class RecipeStore:
+    """모드팩 하나의 레시피 색인
+
+    recipes: 결과 아이템 ID → 레시피 목록. 네임스페이스 없는 이름("iron_pickaxe")으로도
+    찾을 수 있도록 이름 → ID 목록 색인을 함께 둔다.
+    uses: 재료(아이템 ID 또는 "#태그") → 그 재료를 쓰는 레시피 [결과 아이템 ID, recipes 내 위치] 목록
+    tags: 모드팩 아이템 태그 색인 (태그 재료를 실제 아이템으로 펼칠 때 사용)
+    aliases: 언어 파일의 아이템 이름 색인 (한국어/영어 표시 이름으로도 찾을 수 있게)
+    """
+
+    def __init__(self, recipes: Optional[Dict[str, List[Dict[str, Any]]]] = None,
+                 uses: Optional[Dict[str, List[List[Any]]]] = None,
+                 tags: Optional[TagIndex] = None,
+                 aliases: Optional[AliasIndex] = None):
+        self.recipes: Dict[str, List[Dict[str, Any]]] = {}
+        self.uses: Dict[str, List[List[Any]]] = {}
+        self.tags = tags if tags is not None else TagIndex()
+        self.aliases = aliases if aliases is not None else AliasIndex()
+        self._by_name: Dict[str, List[str]] = {}
+        self._by_token: Dict[str, List[str]] = {}
+        self._uses_by_name: Dict[str, List[str]] = {}
+        for item_id, entries in (recipes or {}).items():
+            for entry in entries:
+                # 저장된 역색인이 있으면 다시 만들지 않음
+                self._add_entry(item_id, entry, index_uses=uses is None)
+        for ingredient, refs in (uses or {}).items():
+            self.uses[ingredient] = refs
+            self._index_use_name(ingredient)
+
+    @property
+    def size(self) -> int:
+        return sum(len(entries) for entries in self.recipes.values())
+
+    def _add_entry(self, item_id: str, entry: Dict[str, Any], index_uses: bool = True) -> None:
+        if item_id not in self.recipes:
+            self.recipes[item_id] = []
+            self._by_name.setdefault(_bare_name(item_id), []).append(item_id)
+            self._by_token.setdefault(_token_key(_bare_name(item_id)), []).append(item_id)
+        self.recipes[item_id].append(entry)
+        if index_uses:
+            ref = [item_id, len(self.recipes[item_id]) - 1]
+            for material in entry.get('materials', []):
+                ingredient = normalize_item(material.get('item') or '')
+                if not ingredient:
+                    continue
+                if ingredient not in self.uses:
+                    self.uses[ingredient] = []
+                    self._index_use_name(ingredient)
+                self.uses[ingredient].append(ref)
+
+    def _index_use_name(self, ingredient: str) -> None:
+        """재료 이름 색인: 네임스페이스 없는 이름과 단어 순서 무시 키로 모두 등록"""
+        bare = _bare_name(ingredient.lstrip('#'))
+        for name in {bare, _token_key(bare)}:
+            self._uses_by_name.setdefault(name, []).append(ingredient)
+
+    def add(self, doc: Dict[str, Any]) -> bool:
+        """레시피 문서 하나 추가 (결과 아이템이 없는 문서는 무시)"""
+        if doc.get('type') != 'recipe':
+            return False
+        item_id = normalize_item(doc.get('result_id') or '')
+        if not item_id or item_id == 'unknown':
+            return False
+        self._add_entry(item_id, {field: doc[field] for field in RECIPE_FIELDS if field in doc})
+        return True
+
+    @classmethod
+    def from_docs(cls, docs: Iterable[Dict[str, Any]], tags: Optional[TagIndex] = None,
+                  aliases: Optional[AliasIndex] = None) -> "RecipeStore":
+        store = cls(tags=tags, aliases=aliases)
+        for doc in docs:
+            store.add(doc)
+        return store
+
+    def item_ids(self, item: str) -> List[str]:
+        """레시피가 있는 결과 아이템 ID 검색 (ID, 이름, 단어 순서가 다른 이름, 표시 이름 순으로 시도)"""
+        key = normalize_item(item)
+        if ':' in key:
+            return [key] if key in self.recipes else []
+        return list(self._by_name.get(key) or self._by_token.get(_token_key(key)) or
+                    [item_id for item_id in self.aliases.resolve(item) if item_id in self.recipes])
+
+    def lookup(self, item: str) -> List[Dict[str, Any]]:
+        """아이템 ID("minecraft:iron_pickaxe"), 이름("iron pickaxe") 또는 표시 이름("철 곡괭이")으로 레시피 검색"""
+        key = normalize_item(item)
+        if ':' in key:
+            return list(self.recipes.get(key, []))
+        found: List[Dict[str, Any]] = []
+        for item_id in self._by_name.get(key) or self.aliases.resolve(item):
+            # 별칭은 레시피가 없는 원재료(광석 등)도 가리킴
+            found.extend(self.recipes.get(item_id, []))
+        return found
+
+    def uses_of(self, item: str, limit: Optional[int] = None) -> List[Dict[str, Any]]:
+        """재료로 쓰는 레시피 검색 (역색인 조회)
+        "mekanism:ingot_osmium", "#forge:ingots/osmium", "ingot_osmium", "osmium ingot", "오스뮴 주괴" 모두 가능.
+        아이템은 그 아이템이 속한 태그를 재료로 쓰는 레시피까지 포함한다.
+        각 항목은 레시피 필드에 'ingredient'(일치한 재료)와 'ingredient_count'(필요 수량)를 더한 것.
+        """
+        key = normalize_item(item)
+        if key in self.uses:
+            ingredients = [key]
+        elif ':' in key:
+            # "#" 없이 쓴 태그 ID이거나, 직접 재료로는 안 쓰이고 태그로만 쓰이는 아이템
+            ingredients = [f"#{key}"] if f"#{key}" in self.uses else [key]
+        else:
+            name = key.lstrip('#')
+            ingredients = self._uses_by_name.get(name) or self._uses_by_name.get(_token_key(name)) or \
+                self.aliases.resolve(item) or self.item_ids(name)
+        # 아이템이 속한 태그도 재료로 조회 ("mekanism:ingot_osmium" → "#forge:ingots/osmium")
+        ingredients = list(dict.fromkeys(
+            ingredients + [f"#{tag}" for ingredient in ingredients if not ingredient.startswith('#')
+                           for tag in self.tags.tags_of(ingredient)]))
+
+        found: List[Dict[str, Any]] = []
+        seen = set()
+        for ingredient in ingredients:
+            for item_id, index in self.uses.get(ingredient, []):
+                if (item_id, index) in seen:
+                    continue
+                seen.add((item_id, index))
+                entry = self.recipes[item_id][index]
+                count = next((m['count'] for m in entry.get('materials', [])
+                              if normalize_item(m.get('item') or '') == ingredient), 1)
+                found.append(dict(entry, ingredient=ingredient, ingredient_count=count))
+                if limit is not None and len(found) >= limit:
+                    return found
+        return found
+
+    def save(self, path: str) -> None:
+        """원자적으로 저장 (임시 파일에 쓴 뒤 교체)"""
+        os.makedirs(os.path.dirname(path) or '.', exist_ok=True)
+        tmp_path = path + '.tmp'
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump({'version': RECIPE_STORE_VERSION, 'recipes': self.recipes, 'uses': self.uses,
+                       'tags': self.tags.to_dict(), 'aliases': self.aliases.to_dict()}, f, ensure_ascii=False)
+        os.replace(tmp_path, path)
+
+    @classmethod
+    def load(cls, path: str) -> Optional["RecipeStore"]:
+        """저장된 레시피 DB 로드 (없거나 버전이 다르면 None)"""
+        try:
+            with open(path, 'r', encoding='utf-8') as f:
+                data = json.load(f)
+        except (OSError, ValueError):
+            return None
+        if data.get('version') != RECIPE_STORE_VERSION:
+            return None
+        return cls(data.get('recipes', {}), data.get('uses'), TagIndex.from_dict(data.get('tags')),
+                   AliasIndex.from_dict(data.get('aliases')))
+
+
+def recipe_store_path(modpack_name: str, modpack_version: str, base_dir: Optional[str] = None) -> str:
+    safe = re.sub(r'[^0-9A-Za-z._-]+', '_', f"{modpack_name}_{modpack_version}")
+    return os.path.join(base_dir or os.getenv('RECIPE_STORE_DIR', DEFAULT_RECIPE_DIR), f"{safe}.json")
+
+
+class RecipeStoreRegistry:
+    """모드팩별 레시피 DB를 디스크에서 읽어 메모리에 보관 (파일이 바뀌면 다시 로드, LRU)"""
+
+    def __init__(self, base_dir: Optional[str] = None, max_stores: int = 8):
+        self.base_dir = base_dir
+        self.max_stores = max_stores
+        self._stores: "OrderedDict[tuple[str, str], tuple[float, RecipeStore]]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.uses_hits = 0
+        self.uses_misses = 0
+
+    def path(self, modpack_name: str, modpack_version: str) -> str:
+        return recipe_store_path(modpack_name, modpack_version, self.base_dir)
+
+    def get(self, modpack_name: str, modpack_version: str) -> Optional[RecipeStore]:
+        path = self.path(modpack_name, modpack_version)
+        try:
+            mtime = os.path.getmtime(path)
+        except OSError:
+            return None
+        key = (modpack_name, modpack_version)
+        with self._lock:
+            cached = self._stores.get(key)
+            if cached is not None and cached[0] == mtime:
+                self._stores.move_to_end(key)
+                return cached[1]
+        store = RecipeStore.load(path)
+        if store is None:
+            return None
+        with self._lock:
+            self._stores[key] = (mtime, store)
+            self._stores.move_to_end(key)
+            while len(self._stores) > self.max_stores:
+                self._stores.popitem(last=False)
+        return store
+
+    def put(self, modpack_name: str, modpack_version: str, store: RecipeStore) -> None:
+        """레시피 DB 저장 후 메모리 캐시 갱신"""
+        path = self.path(modpack_name, modpack_version)
+        store.save(path)
+        with self._lock:
+            self._stores[(modpack_name, modpack_version)] = (os.path.getmtime(path), store)
+            self._stores.move_to_end((modpack_name, modpack_version))
+        logger.info(f"📒 레시피 DB 저장: {modpack_name} v{modpack_version} ({store.size}개)")
+
+    def lookup(self, modpack_name: str, modpack_version: str, item: str) -> List[Dict[str, Any]]:
+        store = self.get(modpack_name, modpack_version)
+        found = store.lookup(item) if store is not None else []
+        with self._lock:
+            if found:
+                self.hits += 1
+            else:
+                self.misses += 1
+        return found
+
+    def uses(self, modpack_name: str, modpack_version: str, item: str,
+             limit: Optional[int] = None) -> List[Dict[str, Any]]:
+        """재료 역색인 조회 (레시피 DB가 없으면 빈 목록)"""
+        store = self.get(modpack_name, modpack_version)
+        found = store.uses_of(item, limit) if store is not None else []
+        with self._lock:
+            if found:
+                self.uses_hits += 1
+            else:
+                self.uses_misses += 1
+        return found
+
+    def remove(self, modpack_name: str, modpack_version: str) -> None:
+        with self._lock:
+            self._stores.pop((modpack_name, modpack_version), None)
+        try:
+            os.remove(self.path(modpack_name, modpack_version))
+        except OSError:
+            pass
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            total = self.hits + self.misses
+            return {
+                'loaded_stores': len(self._stores),
+                'recipes_loaded': sum(store.size for _, store in self._stores.values()),
+                'hits': self.hits,
+                'misses': self.misses,
+                'hit_rate': round(self.hits / total, 4) if total else 0.0,
+                'uses_hits': self.uses_hits,
+                'uses_misses': self.uses_misses
+            }
+
+
+# 전역 인스턴스
+recipe_stores = RecipeStoreRegistry()
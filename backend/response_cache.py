@@ -0,0 +1,154 @@
+# /chat 응답 캐시 - 같은 모드팩/모델에 대한 동일(또는 의미상 같은) 질문의 LLM 재호출 방지
+
+import os
+import time
+import threading
+from collections import OrderedDict
+from typing import Dict, Any, Optional, Tuple, Iterable
+import logging
+
+import numpy as np
+
+from embedding_cache import normalize_query
+
+logger = logging.getLogger(__name__)
+
+
+class ResponseCache:
+    """(모드팩, 버전, 모델, 정규화된 질문) → 응답 캐시
+
+    - 정확 일치: 정규화된 질문 문자열로 조회
+    - 의미 일치: 질문 임베딩이 주어지면 같은 모드팩/모델 항목 중
+      코사인 유사도가 semantic_threshold 이상이고 질문에서 찾은 아이템 ID가 같은 응답 재사용 (기본 0 = 비활성)
+      "철 주괴 만드는 법"과 "금 주괴 만드는 법"처럼 아이템만 다른 질문은 임베딩이 거의 같아서
+      유사도만으로는 구분되지 않는다.
+    """
+
+    def __init__(self, ttl_seconds: float = 3600, max_entries: int = 1000,
+                 semantic_threshold: float = 0.0):
+        self.ttl_seconds = ttl_seconds
+        self.max_entries = max_entries
+        self.semantic_threshold = semantic_threshold
+        self._entries: "OrderedDict[Tuple[str, str, str, str], Dict[str, Any]]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.semantic_hits = 0
+        self.misses = 0
+
+    def _key(self, modpack_name: str, modpack_version: str, model: str, question: str) -> Tuple[str, str, str, str]:
+        return (modpack_name, modpack_version, model or '', normalize_query(question))
+
+    def _is_expired(self, entry: Dict[str, Any], now: float) -> bool:
+        return now - entry['stored_at'] > self.ttl_seconds
+
+    def get(self, modpack_name: str, modpack_version: str, model: str, question: str) -> Optional[Dict[str, Any]]:
+        """정확 일치 조회 (RAG 검색 전에 사용)"""
+        key = self._key(modpack_name, modpack_version, model, question)
+        now = time.time()
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None or self._is_expired(entry, now):
+                if entry is not None:
+                    del self._entries[key]
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return entry
+
+    def get_similar(self, modpack_name: str, modpack_version: str, model: str,
+                    namespace: str, embedding, items: Iterable[str] = ()) -> Optional[Dict[str, Any]]:
+        """의미 일치 조회 (RAG 검색 후, LLM 호출 전에 사용 - 임베딩은 이미 계산되어 있음)
+        items: 질문에서 찾은 아이템 ID (저장할 때와 같은 집합이어야 적중)
+        """
+        if self.semantic_threshold <= 0 or embedding is None:
+            return None
+        items = frozenset(items)
+        query = np.asarray(embedding, dtype=np.float32).reshape(-1)
+        query_norm = np.linalg.norm(query)
+        if query_norm == 0:
+            return None
+        query = query / query_norm
+
+        now = time.time()
+        best_key, best_score = None, self.semantic_threshold
+        with self._lock:
+            for key, entry in self._entries.items():
+                if key[:3] != (modpack_name, modpack_version, model or ''):
+                    continue
+                vector = entry.get('embedding')
+                if vector is None or entry.get('namespace') != namespace or vector.shape != query.shape:
+                    continue
+                if entry.get('items', frozenset()) != items:
+                    continue
+                if self._is_expired(entry, now):
+                    continue
+                score = float(vector @ query)
+                if score >= best_score:
+                    best_key, best_score = key, score
+            if best_key is None:
+                return None
+            self._entries.move_to_end(best_key)
+            self.semantic_hits += 1
+            return self._entries[best_key]
+
+    def record_miss(self) -> None:
+        with self._lock:
+            self.misses += 1
+
+    def put(self, modpack_name: str, modpack_version: str, model: str, question: str,
+            payload: Dict[str, Any], namespace: Optional[str] = None, embedding=None,
+            items: Iterable[str] = ()) -> None:
+        key = self._key(modpack_name, modpack_version, model, question)
+        vector = None
+        if embedding is not None:
+            vector = np.asarray(embedding, dtype=np.float32).reshape(-1)
+            norm = np.linalg.norm(vector)
+            vector = vector / norm if norm else None
+        with self._lock:
+            self._entries[key] = {
+                'payload': payload,
+                'stored_at': time.time(),
+                'namespace': namespace,
+                'embedding': vector,
+                'items': frozenset(items)
+            }
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def invalidate(self, modpack_name: Optional[str] = None, modpack_version: Optional[str] = None) -> int:
+        """모드팩 인덱스가 바뀌었을 때 해당 모드팩 응답 제거 (인자 없으면 전체)"""
+        with self._lock:
+            if modpack_name is None:
+                removed = len(self._entries)
+                self._entries.clear()
+            else:
+                keys = [k for k in self._entries
+                        if k[0] == modpack_name and (modpack_version is None or k[1] == modpack_version)]
+                for k in keys:
+                    del self._entries[k]
+                removed = len(keys)
+        if removed:
+            logger.info(f"🧹 응답 캐시 무효화: {modpack_name or '전체'} {modpack_version or ''} ({removed}개)")
+        return removed
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            total = self.hits + self.semantic_hits + self.misses
+            return {
+                'entries': len(self._entries),
+                'max_entries': self.max_entries,
+                'ttl_seconds': self.ttl_seconds,
+                'hits': self.hits,
+                'semantic_hits': self.semantic_hits,
+                'misses': self.misses,
+                'hit_rate': (self.hits + self.semantic_hits) / total if total else 0.0
+            }
+
+
+# 전역 인스턴스
+response_cache = ResponseCache(
+    ttl_seconds=float(os.getenv('RESPONSE_CACHE_TTL', '3600')),
+    max_entries=int(os.getenv('RESPONSE_CACHE_SIZE', '1000')),
+    semantic_threshold=float(os.getenv('RESPONSE_CACHE_SEMANTIC_THRESHOLD', '0'))
+)
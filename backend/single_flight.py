@@ -0,0 +1,97 @@
+# 요청 합치기(single-flight) - 같은 키의 요청이 동시에 들어오면 업스트림 호출은 한 번만 하고 결과를 공유
+# 예: 새 아이템이 추가된 직후 여러 플레이어가 같은 /recipe/<item>을 거의 동시에 요청하는 경우
+
+import asyncio
+import threading
+from typing import Any, Callable, Awaitable, Dict, Hashable, Optional, Tuple
+
+
+class _Call:
+    """진행 중인 업스트림 호출 하나"""
+
+    def __init__(self):
+        self.done = threading.Event()
+        self.result: Any = None
+        self.error: Optional[BaseException] = None
+
+
+class SingleFlight:
+    """키별로 진행 중인 호출을 하나만 유지하는 요청 합치기
+
+    do(key, fn): 같은 key의 호출이 진행 중이면 그 결과를 기다려 공유하고,
+    없으면 fn()을 직접 실행한다. (결과, 다른 요청의 결과를 공유했는지 여부)를 반환한다.
+    fn이 예외를 던지면 기다리던 요청에도 같은 예외가 전달된다. 결과는 보관하지 않는다(캐시 아님).
+    """
+
+    def __init__(self):
+        self._calls: Dict[Hashable, _Call] = {}
+        self._async_calls: Dict[Hashable, asyncio.Future] = {}
+        self._lock = threading.Lock()
+        self.executed = 0
+        self.coalesced = 0
+
+    def do(self, key: Hashable, fn: Callable[[], Any]) -> Tuple[Any, bool]:
+        with self._lock:
+            call = self._calls.get(key)
+            if call is not None:
+                self.coalesced += 1
+                leader = False
+            else:
+                call = self._calls[key] = _Call()
+                self.executed += 1
+                leader = True
+
+        if not leader:
+            call.done.wait()
+            if call.error is not None:
+                raise call.error
+            return call.result, True
+
+        try:
+            call.result = fn()
+        except BaseException as e:
+            call.error = e
+            raise
+        finally:
+            with self._lock:
+                del self._calls[key]
+            call.done.set()
+        return call.result, False
+
+    async def do_async(self, key: Hashable, fn: Callable[[], Awaitable[Any]]) -> Tuple[Any, bool]:
+        """do()의 asyncio 버전 (같은 이벤트 루프 안의 코루틴끼리 합침)"""
+        future = self._async_calls.get(key)
+        if future is not None:
+            with self._lock:
+                self.coalesced += 1
+            return await asyncio.shield(future), True
+
+        future = asyncio.get_running_loop().create_future()
+        self._async_calls[key] = future
+        with self._lock:
+            self.executed += 1
+        try:
+            result = await fn()
+        except asyncio.CancelledError:
+            future.cancel()
+            raise
+        except BaseException as e:
+            future.set_exception(e)
+            # 기다리는 요청이 없어도 "exception was never retrieved" 경고가 나지 않도록 확인 처리
+            future.exception()
+            raise
+        else:
+            future.set_result(result)
+            return result, False
+        finally:
+            del self._async_calls[key]
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            total = self.executed + self.coalesced
+            return {
+                'executed': self.executed,
+                'coalesced': self.coalesced,
+                'in_flight': len(self._calls) + len(self._async_calls),
+                'saved_ratio': round(self.coalesced / total, 4) if total else 0.0
+            }
@@ -0,0 +1,163 @@
+# 아이템 태그 색인 - data/<ns>/tags/items/**.json을 합쳐 태그 → 실제 아이템 목록(중첩 #태그까지 펼친 결과)을 미리 계산
+# 레시피 재료 "#forge:ingots/steel"을 레시피 DB 조회와 제작 트리에서 바로 실제 아이템으로 바꾸는 데 사용
+
+import os
+import json
+from typing import List, Dict, Any, Optional, Iterable, Tuple
+import logging
+
+logger = logging.getLogger(__name__)
+
+# 아이템 태그 폴더 이름 (1.21부터 items → item)
+ITEM_TAG_DIRS = ('items', 'item')
+
+
+def tag_id_from_path(fpath: str, data_dir: str) -> Optional[str]:
+    """data/<ns>/tags/items/<경로>.json → "<ns>:<경로>" (아이템 태그 파일이 아니면 None)"""
+    rel = os.path.relpath(fpath, data_dir).replace(os.sep, '/')
+    parts = rel.split('/')
+    if len(parts) < 4 or parts[1] != 'tags' or parts[2] not in ITEM_TAG_DIRS or not rel.endswith('.json'):
+        return None
+    return f"{parts[0]}:{'/'.join(parts[3:])[:-len('.json')]}"
+
+
+def is_tag_file(fpath: str, data_dir: str) -> bool:
+    """data 아래 태그 파일인지 (아이템 외 블록/유체 태그 포함 - 레시피로 파싱하지 않음)"""
+    parts = os.path.relpath(fpath, data_dir).replace(os.sep, '/').split('/')
+    return len(parts) >= 3 and parts[1] == 'tags'
+
+
+def _entry_id(entry: Any) -> Optional[str]:
+    """태그 값 하나의 ID ("minecraft:iron_ingot", "#forge:ingots/iron", {"id": ..., "required": false})"""
+    if isinstance(entry, str):
+        return entry.strip().lower() or None
+    if isinstance(entry, dict) and isinstance(entry.get('id'), str):
+        return entry['id'].strip().lower() or None
+    return None
+
+
+def _strip_hash(tag: str) -> str:
+    return tag[1:] if tag.startswith('#') else tag
+
+
+class TagIndex:
+    """태그 → 아이템 닫힘(closure) 색인
+
+    add_definition()으로 태그 파일을 읽은 순서대로 합치고(replace=true면 이전 값 대체,
+    Forge "remove" 항목은 마지막에 제외), build()에서 중첩 태그를 모두 펼쳐 둔다.
+    이후 items()는 딕셔너리 조회 한 번이다.
+    """
+
+    def __init__(self, closure: Optional[Dict[str, Tuple[str, ...]]] = None):
+        self._definitions: Dict[str, Dict[str, List[str]]] = {}
+        self._closure: Dict[str, Tuple[str, ...]] = dict(closure or {})
+        self._item_tags: Optional[Dict[str, List[str]]] = None
+
+    def __len__(self) -> int:
+        return len(self._closure)
+
+    def __eq__(self, other: object) -> bool:
+        return isinstance(other, TagIndex) and self._closure == other._closure
+
+    def add_definition(self, tag: str, data: Dict[str, Any]) -> None:
+        """태그 파일 하나 합치기 (나중에 읽은 파일이 우선)"""
+        tag = _strip_hash(tag.lower())
+        values = [v for v in (_entry_id(e) for e in data.get('values', [])) if v]
+        removes = [v for v in (_entry_id(e) for e in data.get('remove', [])) if v]
+        current = self._definitions.get(tag)
+        if current is None or data.get('replace', False):
+            self._definitions[tag] = {'values': values, 'remove': removes}
+        else:
+            current['values'].extend(values)
+            current['remove'].extend(removes)
+
+    def add_file(self, fpath: str, data_dir: str) -> bool:
+        """data 아래 아이템 태그 파일 하나 읽기 (아이템 태그가 아니거나 잘못된 파일이면 False)"""
+        tag = tag_id_from_path(fpath, data_dir)
+        if tag is None:
+            return False
+        try:
+            with open(fpath, 'r', encoding='utf-8') as f:
+                data = json.load(f)
+        except (OSError, ValueError):
+            return False
+        if not isinstance(data, dict):
+            return False
+        self.add_definition(tag, data)
+        return True
+
+    def build(self) -> "TagIndex":
+        """모든 태그의 닫힘 계산 (순환 참조는 한 번만 펼침, 정의 없는 태그 참조는 무시)"""
+        closure: Dict[str, Tuple[str, ...]] = {}
+        visiting = set()
+
+        def expand(tag: str) -> Tuple[str, ...]:
+            if tag in closure:
+                return closure[tag]
+            definition = self._definitions.get(tag)
+            if definition is None or tag in visiting:
+                return ()
+            visiting.add(tag)
+            items: Dict[str, None] = {}
+            for value in definition['values']:
+                if value.startswith('#'):
+                    items.update(dict.fromkeys(expand(value[1:])))
+                else:
+                    items[value] = None
+            for value in definition['remove']:
+                for item in (expand(value[1:]) if value.startswith('#') else (value,)):
+                    items.pop(item, None)
+            visiting.discard(tag)
+            closure[tag] = tuple(items)
+            return closure[tag]
+
+        for tag in self._definitions:
+            expand(tag)
+        self._closure = closure
+        self._item_tags = None
+        return self
+
+    def items(self, tag: str) -> List[str]:
+        """태그에 속한 실제 아이템 ID 목록 ("#forge:ingots/steel" 또는 "forge:ingots/steel")"""
+        return list(self._closure.get(_strip_hash(tag.lower()), ()))
+
+    def tags_of(self, item_id: str) -> List[str]:
+        """아이템이 속한 태그 목록 (첫 호출 때 역색인 구성)"""
+        if self._item_tags is None:
+            item_tags: Dict[str, List[str]] = {}
+            for tag, items in self._closure.items():
+                for item in items:
+                    item_tags.setdefault(item, []).append(tag)
+            self._item_tags = item_tags
+        return list(self._item_tags.get(item_id, []))
+
+    def to_dict(self) -> Dict[str, Any]:
+        """저장용 압축 형식: 아이템 ID는 한 번만 저장하고 태그는 번호 목록으로"""
+        item_ids: Dict[str, int] = {}
+        tags = {tag: [item_ids.setdefault(item, len(item_ids)) for item in items]
+                for tag, items in self._closure.items()}
+        return {'items': list(item_ids), 'tags': tags}
+
+    @classmethod
+    def from_dict(cls, data: Optional[Dict[str, Any]]) -> "TagIndex":
+        if not data:
+            return cls()
+        item_ids = data.get('items', [])
+        return cls({tag: tuple(item_ids[i] for i in indices) for tag, indices in data.get('tags', {}).items()})
+
+
+def build_tag_index(data_dirs: Iterable[str], index: Optional[TagIndex] = None) -> TagIndex:
+    """여러 data 폴더(앞쪽이 낮은 우선순위)의 아이템 태그 파일로 색인 구축 (index가 주어지면 그 안에 채움)"""
+    index = index if index is not None else TagIndex()
+    files = 0
+    for data_dir in data_dirs:
+        if not os.path.isdir(data_dir):
+            continue
+        for root, dirs, names in os.walk(data_dir):
+            dirs.sort()
+            for fn in sorted(names):
+                if fn.endswith('.json') and index.add_file(os.path.join(root, fn), data_dir):
+                    files += 1
+    index.build()
+    logger.info(f"🏷️ 아이템 태그 색인: 파일 {files}개 → 태그 {len(index)}개")
+    return index
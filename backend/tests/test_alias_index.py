@@ -0,0 +1,114 @@
+"""
+아이템 이름 별칭 색인 테스트
+"""
+import json
+import pytest
+from modpack_parser import scan_modpack
+from recipe_store import RecipeStore
+from crafting_tree import get_resolver
+from alias_index import AliasIndex, item_id_from_key
+
+
+def write_json(path, data):
+    path.parent.mkdir(parents=True, exist_ok=True)
+    path.write_text(json.dumps(data, ensure_ascii=False), encoding='utf-8')
+
+
+class TestAliasIndex:
+    """아이템 이름 별칭 색인 테스트 클래스"""
+
+    @pytest.fixture
+    def modpack_dir(self, tmp_path):
+        """모드 언어 파일, 리소스팩 한국어 번역, 오스뮴 주괴 레시피가 있는 모드팩"""
+        write_json(tmp_path / 'assets' / 'mekanism' / 'lang' / 'en_us.json', {
+            "item.mekanism.ingot_osmium": "Osmium Ingot",
+            "block.mekanism.digital_miner": "Digital Miner",
+            "item.mekanism.dust_osmium": "Osmium Dust",
+            "item.mekanism.jetpack.mode": "Jetpack Mode",
+            "gui.mekanism.energy": "Energy"
+        })
+        write_json(tmp_path / 'assets' / 'mekanism' / 'lang' / 'ko_kr.json', {
+            "item.mekanism.ingot_osmium": "오스뮴 주괴",
+            "block.mekanism.digital_miner": "디지털 채굴기"
+        })
+        # 리소스팩 번역이 모드 번역을 덮어씀
+        write_json(tmp_path / 'resourcepacks' / 'ko' / 'assets' / 'mekanism' / 'lang' / 'ko_kr.json', {
+            "block.mekanism.digital_miner": "디지털 광부"
+        })
+        write_json(tmp_path / 'data' / 'mekanism' / 'recipes' / 'osmium_block.json', {
+            "type": "minecraft:crafting_shaped",
+            "pattern": ["III", "III", "III"],
+            "key": {"I": {"item": "mekanism:ingot_osmium"}},
+            "result": {"item": "mekanism:block_osmium"}
+        })
+        write_json(tmp_path / 'data' / 'mekanism' / 'recipes' / 'osmium_ingot.json', {
+            "type": "minecraft:smelting",
+            "ingredient": {"item": "mekanism:dust_osmium"},
+            "result": "mekanism:ingot_osmium"
+        })
+        return str(tmp_path)
+
+    @pytest.fixture
+    def aliases(self, modpack_dir):
+        return scan_modpack(modpack_dir, workers=1)['aliases']
+
+    def test_both_directions(self, aliases):
+        """이름(한국어/영어, 공백 무시) → ID, ID → 언어별 이름, 하위 번역 키는 제외
+        덮어쓴 번역은 표시 이름만 바뀌고 이전 이름도 별칭으로 남음"""
+        assert aliases.resolve('오스뮴주괴') == ['mekanism:ingot_osmium']
+        assert aliases.resolve('osmium  ingot') == ['mekanism:ingot_osmium']
+        assert aliases.resolve('디지털 광부') == ['mekanism:digital_miner']
+        assert aliases.resolve('디지털 채굴기') == ['mekanism:digital_miner']
+        assert aliases.display_name('mekanism:digital_miner') == '디지털 광부'
+        assert aliases.display_name('mekanism:dust_osmium') == 'Osmium Dust'
+        assert 'mekanism:jetpack' not in aliases.names
+
+    def test_rewrite_korean_query(self, aliases):
+        """한국어 이름(조사 포함)을 아이템 ID와 영어 이름으로 확장"""
+        rewritten = aliases.rewrite('디지털 광부를 만들려면 오스뮴주괴가 몇 개 필요해?')
+
+        assert rewritten.startswith('디지털 광부를 만들려면')
+        assert 'mekanism:digital_miner Digital Miner' in rewritten
+        assert 'mekanism:ingot_osmium Osmium Ingot' in rewritten
+        assert aliases.rewrite('다이아몬드 곡괭이') == '다이아몬드 곡괭이'
+
+    def test_english_match_respects_word_boundaries(self):
+        """영문 이름은 다른 단어 속에서 일치하지 않고, 이미 적힌 영어 이름은 다시 붙이지 않음"""
+        aliases = AliasIndex({'minecraft:stone': {'en_us': 'Stone'},
+                              'minecraft:redstone': {'en_us': 'Redstone', 'ko_kr': '레드스톤 가루'}})
+
+        assert [ids for _, ids in aliases.find('redstone torch')] == [['minecraft:redstone']]
+        assert aliases.find('stones') == []
+        assert aliases.rewrite('Stone recipe') == 'Stone recipe (minecraft:stone)'
+
+    def test_store_resolves_display_names(self, modpack_dir, tmp_path):
+        """레시피 DB에 저장되고, 레시피/사용처/제작 트리 조회가 한국어 이름을 받음"""
+        scan = scan_modpack(modpack_dir, workers=1)
+        path = str(tmp_path / 'store.json')
+        RecipeStore.from_docs(scan['docs'], scan['tags'], scan['aliases']).save(path)
+        store = RecipeStore.load(path)
+
+        assert store.aliases == scan['aliases']
+        assert [r['result_id'] for r in store.lookup('오스뮴 주괴')] == ['mekanism:ingot_osmium']
+        assert [u['result_id'] for u in store.uses_of('오스뮴 주괴')] == ['mekanism:block_osmium']
+        tree = get_resolver(store).resolve('오스뮴 주괴', 2)
+        assert tree['item'] == 'mekanism:ingot_osmium'
+
+    def test_alias_without_recipe(self, modpack_dir):
+        """별칭은 있지만 레시피가 없는 원재료는 빈 결과 (LLM 폴백), 예외 없음"""
+        scan = scan_modpack(modpack_dir, workers=1)
+        store = RecipeStore.from_docs(scan['docs'], scan['tags'], scan['aliases'])
+
+        assert store.aliases.resolve('Osmium Dust') == ['mekanism:dust_osmium']
+        assert store.lookup('Osmium Dust') == []
+        assert store.item_ids('Osmium Dust') == []
+
+    @pytest.mark.parametrize("key,expected", [
+        ("item.mekanism.ingot_osmium", "mekanism:ingot_osmium"),
+        ("block.minecraft.stone", "minecraft:stone"),
+        ("item.minecraft.potion.effect.water", None),
+        ("container.mekanism.factory", None),
+    ])
+    def test_item_id_from_key(self, key, expected):
+        """번역 키 → 아이템 ID"""
+        assert item_id_from_key(key) == expected
@@ -110,6 +110,38 @@ class TestAppIntegration:
                 assert data['response'] == 'OpenAI 응답'
                 assert data['model'] == 'openai'
     
+    @patch('backend.app.current_model', 'gemini')
+    @patch('backend.app.gemini_client')
+    def test_chat_stream_endpoint(self, mock_gemini_client, client):
+        """스트리밍 채팅: meta → token → done 순서의 SSE 이벤트 테스트"""
+        chunks = [Mock(text="철광석은 "), Mock(text="용광로에서 "), Mock(text="제련합니다")]
+        mock_gemini_client.models.generate_content_stream.return_value = iter(chunks)
+        
+        request_data = {
+            'message': '철광석 제련 방법',
+            'player_uuid': 'test-user-123',
+            'modpack_name': 'TestModpack',
+            'modpack_version': '1.0.0',
+            'bypass_cache': True
+        }
+        
+        response = client.post('/chat/stream',
+                             data=json.dumps(request_data),
+                             content_type='application/json')
+        
+        assert response.status_code == 200
+        assert response.mimetype == 'text/event-stream'
+        events = []
+        for block in response.get_data(as_text=True).strip().split('\n\n'):
+            event_line, data_line = block.split('\n')
+            events.append((event_line[len('event: '):], json.loads(data_line[len('data: '):])))
+        
+        assert events[0][0] == 'meta' and 'rag' in events[0][1]
+        assert [data['text'] for name, data in events if name == 'token'] == ["철광석은 ", "용광로에서 ", "제련합니다"]
+        assert events[-1][0] == 'done'
+        assert events[-1][1]['response'] == "철광석은 용광로에서 제련합니다"
+        assert events[-1][1]['cached'] == False
+    
     def test_chat_endpoint_missing_data(self, client):
         """채팅 엔드포인트 누락된 데이터 테스트"""
         # 필수 필드 누락
@@ -197,6 +229,99 @@ class TestAppIntegration:
                         assert 'recipe' in data
                         assert '제작법을 찾을 수 없습니다' in data['recipe']['recipe']
     
+    def test_recipe_uses_endpoint(self, client, tmp_path):
+        """레시피 DB 재료 역색인으로 사용처 조회 (LLM 호출 없음)"""
+        from backend.recipe_store import RecipeStore, RecipeStoreRegistry
+        registry = RecipeStoreRegistry(base_dir=str(tmp_path))
+        registry.put('test_pack', '1.0', RecipeStore.from_docs([{
+            'type': 'recipe', 'recipe_type': 'minecraft:crafting_shapeless',
+            'result_id': 'minecraft:iron_block', 'result_count': 1,
+            'materials': [{'item': 'minecraft:iron_ingot', 'count': 9}]
+        }]))
+
+        with patch('backend.app.recipe_stores', registry):
+            response = client.get('/recipe/uses/iron_ingot?modpack_name=test_pack&modpack_version=1.0')
+
+        assert response.status_code == 200
+        data = json.loads(response.data)
+        assert data['success'] == True
+        assert data['count'] == 1
+        assert data['uses'][0]['item_id'] == 'minecraft:iron_block'
+        assert data['uses'][0]['ingredient_count'] == 9
+
+    def test_gcp_delete_rejected_while_building(self, client):
+        """같은 모드팩의 GCP 구축이 진행 중이면 삭제는 409 (구축/삭제가 같은 작업 키를 씀)"""
+        import threading
+        release = threading.Event()
+
+        def slow_build(*args, **kwargs):
+            release.wait(5)
+            return {'success': True}
+
+        with patch('backend.app.gcp_rag') as mock_gcp:
+            mock_gcp.is_enabled.return_value = True
+            mock_gcp.build_modpack_index.side_effect = slow_build
+            body = {'modpack_name': 'race_pack', 'modpack_version': '1.0', 'modpack_path': '/tmp/race_pack'}
+            build = client.post('/gcp-rag/build', data=json.dumps(dict(body, **{'async': True})),
+                                content_type='application/json')
+            delete = client.delete('/gcp-rag/delete', data=json.dumps(body), content_type='application/json')
+            release.set()
+
+        assert build.status_code == 202
+        assert delete.status_code == 409
+        data = json.loads(delete.data)
+        assert data['success'] == False
+        assert data['job_id'] == json.loads(build.data)['job_id']
+        mock_gcp.delete_modpack_index.assert_not_called()
+
+    def test_gcp_sweep_skips_pack_being_built(self, client):
+        """정리가 이어서 삭제할 모드팩이 구축 중이면 삭제 작업을 시작하지 않고 미룸"""
+        import threading
+        release = threading.Event()
+
+        def slow_build(*args, **kwargs):
+            release.wait(5)
+            return {'success': True}
+
+        def sweep(min_age_hours, dry_run, progress, resume):
+            return {'success': True, 'resume_jobs': [resume('sweep_pack', '1.0')]}
+
+        with patch('backend.app.gcp_rag') as mock_gcp:
+            mock_gcp.is_enabled.return_value = True
+            mock_gcp.build_modpack_index.side_effect = slow_build
+            mock_gcp.sweep_orphan_collections.side_effect = sweep
+            build = client.post('/gcp-rag/build', data=json.dumps({
+                'modpack_name': 'sweep_pack', 'modpack_version': '1.0', 'modpack_path': '/tmp/sweep_pack',
+                'async': True}), content_type='application/json')
+            response = client.post('/gcp-rag/sweep', data=json.dumps({}), content_type='application/json')
+            release.set()
+
+        resumed = json.loads(response.data)['resume_jobs'][0]
+        assert resumed['skipped'] is True
+        assert resumed['job_id'] == json.loads(build.data)['job_id']
+        mock_gcp.delete_modpack_index.assert_not_called()
+
+    def test_rag_config_cached_by_mtime(self, tmp_path):
+        """rag_config.json은 수정 시각이 바뀔 때만 다시 읽음 (레시피 조회마다 파싱하지 않음)"""
+        import os
+        from backend.app import get_target_modpack
+        config_path = tmp_path / 'rag_config.json'
+        config_path.write_text(json.dumps({'rag_mode': 'manual',
+                                           'current_modpack': {'name': 'cfg_pack', 'version': '2.0'}}))
+
+        with patch('backend.app.__file__', str(tmp_path / 'app.py')), \
+                patch.dict('backend.app._rag_config_cache', clear=True), \
+                patch('json.load', wraps=json.load) as load:
+            first = get_target_modpack({}, verbose=False)
+            second = get_target_modpack({}, verbose=False)
+            config_path.write_text(json.dumps({'rag_mode': 'auto'}))
+            os.utime(config_path, (1, 1))
+            third = get_target_modpack({'modpack_name': 'req_pack'}, verbose=False)
+
+        assert first == second == ('cfg_pack', '2.0')
+        assert third == ('req_pack', '1.0.0')
+        assert load.call_count == 2
+
     def test_error_handling(self, client):
         """오류 처리 테스트"""
         # 잘못된 JSON 데이터로 요청
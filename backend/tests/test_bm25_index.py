@@ -0,0 +1,93 @@
+"""
+BM25 역색인과 하이브리드 검색 테스트
+"""
+import os
+import pytest
+import numpy as np
+from bm25_index import BM25Index, tokenize, rrf_fuse
+from vector_index import ModpackVectorIndex
+
+
+class TestBM25Index:
+    """BM25 역색인 테스트 클래스"""
+
+    @pytest.fixture
+    def texts(self):
+        return [
+            "Shaped recipe for machine_frame x1: keys={'I': 'thermal:invar_ingot'}",
+            "Recipe type=thermal:smelter result=thermal:machine_frame",
+            "Installed mod jar: thermal_expansion-1.21.1-11.0.2.jar",
+            "kubejs script: frames.js => 기계 프레임 레시피 변경",
+        ]
+
+    def test_tokenize_item_ids(self):
+        """아이템 ID는 전체/네임스페이스 뺀 이름/부분 단어로, 한글은 2글자 조각도 포함"""
+        tokens = tokenize("How do I craft thermal:machine_frame? 기계프레임은")
+
+        assert {'thermal:machine_frame', 'machine_frame', 'thermal', 'machine', 'frame'} <= set(tokens)
+        assert {'기계프레임은', '프레', '임은'} <= set(tokens)
+        assert 'how' not in tokens and 'do' not in tokens
+
+    def test_exact_id_ranks_first(self, texts):
+        """정확한 아이템 ID가 들어간 문서가 1위, 겹치는 단어가 없으면 빈 결과"""
+        index = BM25Index.build(texts)
+
+        assert index.search("thermal:machine_frame recipe", top_k=2)[0][0] == 1
+        assert index.search("기계 프레임", top_k=1)[0][0] == 3
+        assert index.search("diamond pickaxe") == []
+
+    def test_save_and_load_roundtrip(self, texts, tmp_path):
+        """저장 후 다시 읽어도 같은 점수"""
+        index = BM25Index.build(texts)
+        index.save(str(tmp_path))
+        loaded = BM25Index.load(str(tmp_path))
+
+        np.testing.assert_allclose(loaded.scores("thermal invar"), index.scores("thermal invar"))
+        assert BM25Index.load(str(tmp_path / 'missing')) is None
+
+    def test_rrf_fuse(self):
+        """두 순위 모두에서 상위인 문서가 먼저"""
+        fused = rrf_fuse([[1, 2, 3], [3, 1]], k=60)
+
+        assert [doc_id for doc_id, _ in fused] == [1, 3, 2]
+
+
+class TestHybridSearch:
+    """벡터 인덱스 하이브리드 검색 테스트 클래스"""
+
+    @pytest.fixture
+    def index(self):
+        """임베딩은 무작위, 문서 하나만 검색어의 아이템 ID를 포함"""
+        rng = np.random.default_rng(0)
+        embeddings = rng.normal(size=(300, 16)).astype(np.float32)
+        docs = [{'doc_id': f"doc_{i}", 'text': f"Recipe type=create:mixing result=create:item_{i}"}
+                for i in range(len(embeddings))]
+        return ModpackVectorIndex.build(embeddings, docs, dtype='float32'), embeddings
+
+    def test_exact_name_hit_is_fused_in(self, index):
+        """벡터로는 멀지만 아이템 ID가 일치하는 문서를 상위에 포함, 유사도는 실제 코사인 값"""
+        index, embeddings = index
+
+        dense = index.search(embeddings[7], top_k=3)
+        hybrid = index.hybrid_search("create:item_42 레시피", embeddings[7], top_k=3)
+
+        assert 'doc_42' not in [doc['doc_id'] for doc, _ in dense]
+        assert {doc['doc_id'] for doc, _ in hybrid[:2]} == {'doc_7', 'doc_42'}
+        similarity = dict((doc['doc_id'], score) for doc, score in hybrid)['doc_42']
+        expected = embeddings[42] @ embeddings[7] / (np.linalg.norm(embeddings[42]) * np.linalg.norm(embeddings[7]))
+        assert similarity == pytest.approx(float(expected), abs=1e-5)
+
+    def test_lexical_index_persists_and_rebuilds(self, index, tmp_path):
+        """저장한 BM25 역색인을 로드하고, 역색인 없이 저장된 이전 인덱스는 문서로 다시 구축"""
+        index, embeddings = index
+        index_dir = str(tmp_path / 'idx')
+        index.save(index_dir)
+        for name in os.listdir(index_dir):
+            if name.startswith('bm25_'):
+                os.remove(os.path.join(index_dir, name))
+
+        loaded = ModpackVectorIndex.load(index_dir)
+
+        assert loaded.lexical is not None and loaded.lexical.num_docs == index.size
+        assert loaded.hybrid_search("create:item_42", embeddings[7], top_k=3) == \
+            index.hybrid_search("create:item_42", embeddings[7], top_k=3)
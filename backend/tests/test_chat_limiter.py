@@ -0,0 +1,43 @@
+"""
+채팅 동시 처리 제한기 테스트
+"""
+import asyncio
+import pytest
+from chat_limiter import ChatConcurrencyLimiter, ChatOverloaded
+
+
+class TestChatConcurrencyLimiter:
+    """채팅 동시 처리 제한기 테스트 클래스"""
+
+    def test_limits_active_requests(self):
+        """동시에 처리 중인 요청 수는 max_concurrency를 넘지 않음"""
+        limiter = ChatConcurrencyLimiter(max_concurrency=3, queue_timeout=5)
+
+        async def request():
+            async with limiter:
+                await asyncio.sleep(0.01)
+
+        async def run():
+            await asyncio.gather(*(request() for _ in range(10)))
+
+        asyncio.run(run())
+
+        stats = limiter.stats()
+        assert stats['peak_active'] == 3
+        assert stats['completed'] == 10
+        assert stats['active'] == 0 and stats['waiting'] == 0
+
+    def test_rejects_after_queue_timeout(self):
+        """대기 시간 안에 자리가 나지 않으면 ChatOverloaded"""
+        limiter = ChatConcurrencyLimiter(max_concurrency=1, queue_timeout=0.05)
+
+        async def run():
+            async with limiter:
+                with pytest.raises(ChatOverloaded):
+                    async with limiter:
+                        pass
+
+        asyncio.run(run())
+
+        assert limiter.stats()['rejected'] == 1
+        assert limiter.stats()['completed'] == 1
@@ -0,0 +1,71 @@
+"""
+토큰 기준 RAG 첨부 패킹(MMR 선택) 테스트
+"""
+import pytest
+from context_packer import ContextPacker, count_tokens, truncate_to_tokens, mmr_order, TRUNCATION_MARK
+
+
+class TestContextPacker:
+    """토큰 예산 패킹 테스트 클래스"""
+
+    @pytest.mark.parametrize("provider", ["gemini", "openai", "claude", "unknown-model"])
+    def test_korean_costs_more_tokens_per_char(self, provider):
+        """같은 글자 수라도 한국어가 영어 아이템 ID보다 토큰이 많음"""
+        korean = "디지털 광부를 만들려면 강철 케이스가 필요합니다"
+        english = "mekanism:digital_miner steel_casing"[:len(korean)]
+
+        assert count_tokens(korean, provider) > count_tokens(english, provider) > 0
+        assert count_tokens('', provider) == 0
+
+    def test_unknown_provider_is_conservative(self):
+        text = "철 주괴 9개 → minecraft:iron_block"
+
+        assert count_tokens(text, 'unknown') >= max(count_tokens(text, p) for p in ('gemini', 'openai', 'claude'))
+
+    @pytest.mark.parametrize("max_tokens", [5, 20, 60])
+    def test_truncate_fits_budget(self, max_tokens):
+        """잘린 텍스트는 예산 이하이고 … 표시가 붙음"""
+        text = "강철 주괴는 제련소에서 농축 철과 석탄으로 만듭니다. " * 10
+
+        cut = truncate_to_tokens(text, max_tokens, 'claude')
+
+        assert count_tokens(cut, 'claude') <= max_tokens
+        assert cut.endswith(TRUNCATION_MARK) and text.startswith(cut[:-len(TRUNCATION_MARK)])
+        assert truncate_to_tokens("짧은 문장", 100) == "짧은 문장"
+
+    def test_mmr_skips_redundant_hits(self):
+        """관련도가 조금 낮아도 내용이 다른 문서가 거의 같은 상위 문서보다 먼저 뽑힘"""
+        texts = [
+            "Shaped recipe for steel_casing x1: keys={'A': 'mekanism:ingot_steel', 'B': 'minecraft:glass'}",
+            "Shaped recipe for steel_casing x1: keys={'A': 'mekanism:ingot_steel', 'B': 'minecraft:glass_pane'}",
+            "Recipe type=mekanism:enriching result=enriched_iron",
+        ]
+        scores = [0.92, 0.91, 0.80]
+
+        assert mmr_order(texts, scores, 2, mmr_lambda=0.5) == [0, 2]
+        assert mmr_order(texts, scores, 3, mmr_lambda=1.0) == [0, 1, 2]
+        assert mmr_order([], [], 3) == []
+
+    def test_packer_stops_at_budget(self):
+        """문서당/전체 토큰 예산을 넘지 않고, 남은 예산이 부족하면 None"""
+        packer = ContextPacker('gemini', max_tokens=100, snippet_max_tokens=40)
+        candidates = [{'text': f"문서 {i}: " + "아이템 설명 " * 30, 'score': 1.0 - i / 10} for i in range(10)]
+
+        added = []
+        for c in packer.select(candidates, limit=10):
+            line = packer.add(c['text'])
+            if line is None:
+                break
+            added.append(line)
+
+        assert 2 <= len(added) < 10
+        assert all(count_tokens(line, 'gemini') <= 40 for line in added)
+        assert packer.used_tokens == sum(count_tokens(line, 'gemini') for line in added) <= 100
+        assert packer.summary()['snippets'] == len(added)
+
+    def test_select_uses_score_key(self):
+        """GCP 결과(similarity)처럼 다른 점수 키도 사용"""
+        packer = ContextPacker('openai', mmr_lambda=1.0)
+        results = [{'text': 'a b c', 'similarity': 0.7}, {'text': 'd e f', 'similarity': 0.9}]
+
+        assert packer.select(results, 1, score_key='similarity') == [results[1]]
@@ -0,0 +1,79 @@
+"""
+제작 트리 해석기 테스트
+"""
+import pytest
+from recipe_store import RecipeStore
+from crafting_tree import CraftingTreeResolver, format_tree, parse_tree_query
+
+
+def recipe(result, materials, recipe_type='minecraft:crafting_shaped', count=1):
+    return {
+        'type': 'recipe',
+        'recipe_type': recipe_type,
+        'result_id': result,
+        'result_count': count,
+        'materials': [{'item': item, 'count': n} for item, n in materials]
+    }
+
+
+class TestCraftingTreeResolver:
+    """제작 트리 해석기 테스트 클래스"""
+
+    @pytest.fixture
+    def store(self):
+        """철 주괴 ↔ 철 블록 순환과 태그 재료가 있는 레시피 DB"""
+        return RecipeStore.from_docs([
+            recipe('minecraft:iron_pickaxe', [('#forge:ingots/iron', 3), ('minecraft:stick', 2)]),
+            recipe('minecraft:stick', [('#minecraft:planks', 2)], count=4),
+            recipe('minecraft:oak_planks', [('minecraft:oak_log', 1)], 'minecraft:crafting_shapeless', 4),
+            recipe('minecraft:iron_ingot', [('minecraft:iron_block', 1)], 'minecraft:crafting_shapeless', 9),
+            recipe('minecraft:iron_ingot', [('minecraft:raw_iron', 1)], 'minecraft:smelting'),
+            recipe('minecraft:iron_block', [('minecraft:iron_ingot', 9)]),
+            recipe('minecraft:iron_bars', [('minecraft:iron_ingot', 6)], count=16),
+        ])
+
+    @pytest.fixture
+    def resolver(self, store):
+        tags = {'#minecraft:planks': ['minecraft:oak_planks']}
+        return CraftingTreeResolver(store, tag_resolver=lambda tag: tags.get(tag, []))
+
+    def test_raw_material_bill(self, resolver):
+        """태그는 실제 아이템으로 바꾸고, 결과 수량 단위로 올림해서 원재료 합산"""
+        result = resolver.resolve('iron pickaxe', quantity=2)
+
+        assert result['item'] == 'minecraft:iron_pickaxe'
+        assert result['raw_materials'] == [{'item': 'minecraft:raw_iron', 'count': 6},
+                                           {'item': 'minecraft:oak_log', 'count': 1}]
+        stick = result['tree']['children'][1]
+        assert (stick['item'], stick['count'], stick['crafts']) == ('minecraft:stick', 4, 1)
+        assert not result['truncated']
+
+    def test_cycle_falls_back_to_other_recipe(self, resolver):
+        """철 블록 → 철 주괴 → 철 블록 순환 대신 제련 레시피 선택"""
+        result = resolver.resolve('minecraft:iron_block')
+
+        ingot = result['tree']['children'][0]
+        assert ingot['recipe_type'] == 'minecraft:smelting'
+        assert result['raw_materials'] == [{'item': 'minecraft:raw_iron', 'count': 9}]
+        assert result['cycles'] == 0
+
+    def test_subtree_memoization_and_caps(self, store, resolver):
+        """같은 하위 트리는 재사용하고, 깊이 상한을 넘으면 잘라서 원재료로 취급"""
+        resolver.resolve('iron_pickaxe', quantity=2)
+        again = resolver.resolve('iron_bars', quantity=16)
+        assert again['memo_hits'] >= 1
+
+        shallow = CraftingTreeResolver(store, max_depth=1).resolve('iron_pickaxe')
+        assert shallow['truncated']
+        assert {'item': 'minecraft:stick', 'count': 2} in shallow['raw_materials']
+        assert 'stick x2' in format_tree(shallow)
+
+    @pytest.mark.parametrize("message,expected", [
+        ("What raw materials do I need for a digital miner?", "digital miner"),
+        ("디지털 마이너 만들려면 원재료 뭐가 필요해?", "디지털 마이너"),
+        ("철 곡괭이 제작 트리 보여줘", "철 곡괭이"),
+        ("철 곡괭이는 어떻게 만들어?", None),
+    ])
+    def test_parse_tree_query(self, message, expected):
+        """제작 트리 질문에서 아이템 이름 추출"""
+        assert parse_tree_query(message) == expected
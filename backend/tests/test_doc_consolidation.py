@@ -0,0 +1,103 @@
+"""
+임베딩 전 문서 정리(아이템별 묶기, 완전/유사 중복 접기) 테스트
+"""
+import pytest
+from doc_consolidation import DocConsolidator, consolidate_docs, group_key, shingles, jaccard
+
+
+def recipe(path, result_id, text, rtype='minecraft:crafting_shaped'):
+    return {'type': 'recipe', 'recipe_type': rtype, 'result_id': result_id, 'source': path, 'text': text,
+            'materials': ['minecraft:iron_ingot']}
+
+
+class TestDocConsolidation:
+    """문서 정리 테스트 클래스"""
+
+    @pytest.fixture
+    def docs(self):
+        return [
+            {'type': 'mod', 'source': 'mods/mekanism.jar', 'text': 'Installed mod jar: mekanism.jar'},
+            recipe('data/mekanism/recipes/steel_a.json', 'mekanism:ingot_steel',
+                   "Shaped recipe for ingot_steel x1: keys={'A': 'mekanism:enriched_iron', 'B': 'minecraft:coal'}"),
+            recipe('data/thermal/recipes/steel_b.json', 'mekanism:ingot_steel',
+                   "Shaped recipe for ingot_steel x1: keys={'A': 'mekanism:enriched_iron', 'B': 'minecraft:charcoal'}"),
+            recipe('data/create/recipes/steel_c.json', 'mekanism:ingot_steel',
+                   "Recipe type=create:mixing result=ingot_steel", rtype='create:mixing'),
+            # 다른 모드의 완전히 같은 레시피 (대소문자/공백만 다름)
+            recipe('data/extra/recipes/steel_d.json', 'mekanism:ingot_steel',
+                   "recipe type=create:mixing  result=ingot_steel", rtype='create:mixing'),
+            recipe('data/mekanism/recipes/miner.json', 'mekanism:digital_miner',
+                   "Shaped recipe for digital_miner x1: keys={'A': 'mekanism:steel_casing'}"),
+        ] + [
+            recipe(f"data/ae2/recipes/unknown_{i}.json", 'unknown', 'Recipe type=ae2:inscriber result=unknown',
+                   rtype='ae2:inscriber')
+            for i in range(20)
+        ]
+
+    def test_groups_by_result_item(self, docs):
+        """같은 결과 아이템은 묶음 문서 하나, 혼자인 레시피와 레시피 아닌 문서는 그대로"""
+        result, stats = consolidate_docs(docs, threshold=1.1)
+
+        by_source = {d['source']: d for d in result}
+        steel = by_source['item:mekanism:ingot_steel']
+        assert steel['type'] == 'recipe_group' and steel['count'] == 3
+        assert steel['text'].startswith('Recipes for ingot_steel (mekanism:ingot_steel): 3 recipes')
+        assert 'minecraft:charcoal' in steel['text'] and 'data/thermal/recipes/steel_b.json' in steel['sources']
+        # 혼자인 레시피는 파서가 만든 필드(materials 등)를 그대로 유지
+        assert by_source['data/mekanism/recipes/miner.json'] == docs[5]
+        assert by_source['mods/mekanism.jar'] == docs[0]
+        # 결과를 못 읽은 레시피 20개 → 완전 중복 19개를 접고 한 개만 남음
+        assert by_source['data/ae2/recipes/unknown_0.json']['text'] == 'Recipe type=ae2:inscriber result=unknown'
+        assert stats['exact_duplicates'] == 20 and stats['groups'] == 1
+        assert (stats['input'], stats['output']) == (len(docs), 4)
+
+    def test_near_duplicates_collapse_within_group(self, docs):
+        """shingle Jaccard가 기준 이상인 레시피만 접힘"""
+        strict, strict_stats = consolidate_docs(docs, threshold=0.6)
+        loose, loose_stats = consolidate_docs(docs, threshold=1.1)
+
+        steel = next(d for d in strict if d['source'] == 'item:mekanism:ingot_steel')
+        assert strict_stats['near_duplicates'] == 1 and steel['collapsed'] == 1 and steel['count'] == 2
+        assert 'minecraft:charcoal' not in steel['text']
+        assert loose_stats['near_duplicates'] == 0
+
+    def test_group_text_is_capped(self):
+        """본문이 max_chars를 넘으면 나머지 레시피는 개수만 표시"""
+        docs = [recipe(f"data/a/recipes/{i}.json", 'a:gear', f"Recipe type=a:press_{i} result=gear")
+                for i in range(50)]
+
+        result, _ = consolidate_docs(docs, threshold=1.1, max_chars=200)
+
+        assert len(result) == 1 and len(result[0]['text']) <= 220
+        assert result[0]['text'].endswith('more') and result[0]['count'] == 50
+
+    @pytest.mark.parametrize("buckets", [1, 3, 64])
+    def test_stream_keeps_source_runs_contiguous(self, docs, buckets, tmp_path):
+        """나눠 내보내는 파일 수와 무관하게 같은 결과, 같은 source 문서는 연속 (GCP 구축의 source별 groupby 전제)
+        처리가 끝나면 임시 파일은 남지 않음"""
+        consolidator = DocConsolidator(threshold=1.1, buckets=buckets, spill_dir=str(tmp_path))
+
+        result = list(consolidator.consolidate(iter(docs)))
+        sources = [d['source'] for d in result]
+
+        assert sources[0] == 'mods/mekanism.jar'
+        assert len(sources) == len(set(sources))
+        assert sorted(sources) == sorted(d['source'] for d in consolidate_docs(docs, threshold=1.1)[0])
+        assert consolidator.summary()['reduction'] == pytest.approx(1 - 4 / len(docs), abs=1e-4)
+        assert list(tmp_path.iterdir()) == []
+
+    @pytest.mark.parametrize("doc,expected", [
+        (recipe('data/x/recipes/a.json', 'x:a', 't'), 'item:x:a'),
+        (recipe('kubejs/data/ae2/recipes/a.json', 'unknown', 't', rtype='ae2:inscriber'), 'unknown:ae2:inscriber'),
+        ({'type': 'kubejs', 'source': 'kubejs/server_scripts/a.js', 'text': 't'}, None),
+    ])
+    def test_group_key(self, doc, expected):
+        assert group_key(doc) == expected
+
+    def test_shingle_similarity(self):
+        """같은 문장은 1, 단어 하나 바뀌면 일부만 겹침"""
+        a = shingles("Shaped recipe for gear x1: keys={'A': 'iron'}")
+        b = shingles("Shaped recipe for gear x1: keys={'A': 'gold'}")
+
+        assert jaccard(a, a) == 1.0
+        assert 0 < jaccard(a, b) < 1
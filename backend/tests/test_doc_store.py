@@ -0,0 +1,73 @@
+"""
+로컬 RAG 디스크 형식(mmap 벡터 + 오프셋 문서 저장소) 테스트
+"""
+import os
+import json
+import pytest
+import numpy as np
+from bm25_index import BM25Index
+from doc_store import MmapFlatIndex, save_flat_index, load_flat_index
+
+
+class TestDocStore:
+    """mmap 로컬 RAG 인덱스 테스트 클래스"""
+
+    @pytest.fixture
+    def corpus(self):
+        rng = np.random.default_rng(0)
+        vectors = rng.normal(size=(50, 8)).astype(np.float32)
+        vectors /= np.linalg.norm(vectors, axis=1, keepdims=True)
+        docs = [{'text': f"문서 {i} create:item_{i}", 'source': f"kubejs/{i}.js"} for i in range(len(vectors))]
+        return vectors, docs
+
+    def test_roundtrip_is_lazy(self, corpus, tmp_path):
+        """벡터/오프셋은 mmap으로 열리고, 문서는 인덱싱할 때만 디코딩"""
+        vectors, docs = corpus
+        index_dir = str(tmp_path / 'local_index')
+        save_flat_index(index_dir, vectors, docs, BM25Index.build(d['text'] for d in docs))
+
+        index, store, lexical = load_flat_index(index_dir)
+
+        assert isinstance(index.vectors, np.memmap) and isinstance(store.offsets, np.memmap)
+        assert isinstance(lexical.doc_ids, np.memmap)
+        assert len(store) == len(docs) and store[7] == docs[7] and store[-1] == docs[-1]
+        assert list(store) == docs
+        with pytest.raises(IndexError):
+            store[len(docs)]
+        assert lexical.search("create:item_3", top_k=1)[0][0] == 3
+
+    def test_search_matches_brute_force(self, corpus, tmp_path):
+        """faiss IndexFlatIP와 같은 (점수, 번호) 형태, 결과가 모자라면 -1로 채움"""
+        vectors, docs = corpus
+        index = MmapFlatIndex(vectors)
+
+        D, I = index.search(vectors[[4]], 3)
+        expected = np.argsort(-(vectors @ vectors[4]))[:3]
+        assert I.shape == (1, 3) and list(I[0]) == list(expected)
+        assert D[0, 0] == pytest.approx(1.0, abs=1e-5)
+        np.testing.assert_array_equal(index.reconstruct(9), vectors[9])
+
+        _, I = MmapFlatIndex(vectors[:2]).search(vectors[[0]], 4)
+        assert list(I[0][2:]) == [-1, -1]
+
+    def test_rejects_inconsistent_files(self, corpus, tmp_path):
+        """문서 수와 벡터 수가 다르거나 meta.json이 없으면 None"""
+        vectors, docs = corpus
+        index_dir = str(tmp_path / 'local_index')
+        save_flat_index(index_dir, vectors, docs[:-1])
+        assert load_flat_index(index_dir) is None
+
+        save_flat_index(index_dir, vectors, docs)
+        assert load_flat_index(index_dir)[2] is None  # BM25 역색인 없이 저장
+        os.remove(os.path.join(index_dir, 'meta.json'))
+        assert load_flat_index(index_dir) is None
+
+    def test_empty_store(self, tmp_path):
+        """문서 0개도 저장/로드 가능"""
+        save_flat_index(str(tmp_path / 'empty'), np.zeros((0, 8), dtype=np.float32), [])
+
+        index, store, _ = load_flat_index(str(tmp_path / 'empty'))
+
+        assert index.ntotal == 0 and len(store) == 0
+        with open(tmp_path / 'empty' / 'meta.json', encoding='utf-8') as f:
+            assert json.load(f)['dim'] == 8
@@ -0,0 +1,82 @@
+"""
+쿼리 임베딩 캐시 테스트
+"""
+import pytest
+import numpy as np
+from unittest.mock import Mock
+from embedding_cache import EmbeddingCache, normalize_query
+
+
+class TestEmbeddingCache:
+    """쿼리 임베딩 캐시 테스트 클래스"""
+
+    @pytest.mark.parametrize("text,expected", [
+        ("How do I make a Steel Ingot?", "how do i make a steel ingot"),
+        ("  how do i   make a steel ingot ?! ", "how do i make a steel ingot"),
+        ("강철 주괴 만드는 법~", "강철 주괴 만드는 법"),
+    ])
+    def test_normalize_query(self, text, expected):
+        """대소문자/공백/끝 문장부호 정규화"""
+        assert normalize_query(text) == expected
+
+    def test_repeated_question_uses_cache(self):
+        """정규화 후 같은 질문은 임베딩 함수를 한 번만 호출"""
+        # Given
+        cache = EmbeddingCache(max_entries=10)
+        compute = Mock(return_value=[0.1, 0.2, 0.3])
+
+        # When
+        first = cache.get_or_compute('model', 'How do I make a steel ingot?', compute)
+        second = cache.get_or_compute('model', 'how do i make a steel ingot', compute)
+
+        # Then
+        compute.assert_called_once()
+        assert np.array_equal(first, second)
+        assert cache.stats()['hits'] == 1
+        assert cache.stats()['misses'] == 1
+
+    def test_namespaces_are_separate(self):
+        """임베딩 모델이 다르면 다른 항목"""
+        cache = EmbeddingCache(max_entries=10)
+        cache.put('gecko', 'query', [1.0, 0.0])
+
+        assert cache.get('minilm', 'query') is None
+
+    def test_lru_eviction(self):
+        """최대 개수를 넘으면 가장 오래 사용되지 않은 항목 제거"""
+        cache = EmbeddingCache(max_entries=2)
+        cache.put('m', 'a', [1.0])
+        cache.put('m', 'b', [2.0])
+        cache.get('m', 'a')
+
+        cache.put('m', 'c', [3.0])
+
+        assert cache.get('m', 'b') is None
+        assert cache.get('m', 'a') is not None
+
+    def test_persistence_roundtrip(self, tmp_path):
+        """디스크 저장 후 새 인스턴스에서 복원"""
+        path = str(tmp_path / 'query_embeddings.npz')
+        cache = EmbeddingCache(max_entries=10, persist_path=path)
+        cache.put('gecko', '강철 주괴', [0.5, 0.25])
+        cache.put('minilm', 'steel ingot', [1.0, 2.0, 3.0])
+        assert cache.save()
+
+        restored = EmbeddingCache(max_entries=10, persist_path=path)
+
+        assert np.allclose(restored.get('gecko', '강철 주괴'), [0.5, 0.25])
+        assert np.allclose(restored.get('minilm', 'steel ingot'), [1.0, 2.0, 3.0])
+
+    def test_concurrent_saves_do_not_collide(self, tmp_path):
+        """여러 스레드가 동시에 저장해도 모두 성공하고 파일이 온전함"""
+        from concurrent.futures import ThreadPoolExecutor
+        path = str(tmp_path / 'query_embeddings.npz')
+        cache = EmbeddingCache(max_entries=500, persist_path=path)
+        for i in range(200):
+            cache.put('gecko', f"question {i}", np.random.rand(64))
+
+        with ThreadPoolExecutor(max_workers=8) as executor:
+            results = list(executor.map(lambda _: cache.save(), range(16)))
+
+        assert all(results)
+        assert EmbeddingCache(max_entries=500, persist_path=path).stats()['entries'] == 200
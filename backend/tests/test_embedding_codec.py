@@ -0,0 +1,67 @@
+"""
+임베딩 양자화 저장 테스트
+"""
+import pytest
+import numpy as np
+from embedding_codec import QuantizedVectors, pack_embedding, unpack_embedding, recall_at_k
+from vector_index import ModpackVectorIndex
+
+
+def normalized(rows, dim, seed=0):
+    vectors = np.random.default_rng(seed).normal(size=(rows, dim)).astype(np.float32)
+    return vectors / np.linalg.norm(vectors, axis=1, keepdims=True)
+
+
+class TestEmbeddingCodec:
+    """임베딩 양자화 테스트 클래스"""
+
+    @pytest.mark.parametrize("dtype,size,tolerance", [
+        ("float32", 768 * 4, 0.0),
+        ("float16", 768 * 2, 1e-3),
+        ("int8", 768 + 4, 1e-2),
+    ])
+    def test_pack_roundtrip(self, dtype, size, tolerance):
+        """Firestore 바이트 크기(float 배열 대비 1/2 ~ 1/8)와 복원 오차"""
+        vector = normalized(1, 768)[0]
+
+        blob = pack_embedding(vector, dtype)
+        codes, scale = unpack_embedding(blob, dtype)
+
+        assert len(blob) == size
+        assert codes.base is not None  # frombuffer 뷰 (복사 없음)
+        np.testing.assert_allclose(codes.astype(np.float32) * scale, vector, atol=tolerance)
+
+    @pytest.mark.parametrize("dtype,min_recall", [("float16", 0.99), ("int8", 0.95)])
+    def test_recall_against_float32(self, dtype, min_recall):
+        """float32 전수 검색 대비 top-10 재현율"""
+        vectors = normalized(5000, 256)
+        queries = normalized(50, 256, seed=1)
+
+        assert recall_at_k(vectors, queries, dtype, top_k=10) >= min_recall
+
+    def test_blockwise_dot_matches_dense(self, monkeypatch):
+        """블록 단위 내적 = 복원 행렬 전체 내적 (행 선택 포함)"""
+        monkeypatch.setattr('embedding_codec.DOT_BLOCK_ROWS', 7)
+        vectors = normalized(50, 16)
+        quantized = QuantizedVectors.from_float(vectors, 'int8')
+        q = vectors[3]
+        rows = np.array([3, 10, 49])
+
+        np.testing.assert_allclose(quantized.dot(q), quantized[:] @ q, rtol=1e-5, atol=1e-6)
+        np.testing.assert_allclose(quantized.dot(q, rows), quantized[rows] @ q, rtol=1e-5, atol=1e-6)
+
+    @pytest.mark.parametrize("dtype", ["float16", "int8"])
+    def test_index_roundtrip_keeps_dtype(self, dtype, tmp_path):
+        """양자화한 로컬 인덱스는 메모리가 줄고, 저장/로드 후에도 같은 형식과 결과"""
+        vectors = normalized(2000, 64)
+        docs = [{'doc_id': f"doc_{i}", 'text': ''} for i in range(len(vectors))]
+        full = ModpackVectorIndex.build(vectors, docs, dtype='float32')
+        index = ModpackVectorIndex.build(vectors, docs, dtype=dtype)
+        index.save(str(tmp_path / 'idx'))
+
+        loaded = ModpackVectorIndex.load(str(tmp_path / 'idx'))
+
+        assert index.vectors.nbytes <= full.vectors.nbytes // 2
+        assert loaded.vectors.dtype == dtype
+        assert loaded.search(vectors[11], top_k=1)[0][0]['doc_id'] == 'doc_11'
+        assert loaded.search(vectors[11], top_k=5) == index.search(vectors[11], top_k=5)
@@ -0,0 +1,100 @@
+"""
+임베딩 스케줄러 테스트 (로컬 가짜 임베딩 모델 사용)
+"""
+import time
+import random
+import threading
+import pytest
+from embedding_scheduler import EmbeddingScheduler, EmbeddingError, TokenBucket
+
+
+class FakeEmbeddingModel:
+    """지연/일시적 실패를 흉내 내는 가짜 임베딩 모델"""
+
+    def __init__(self, failures=None, delay=0.0):
+        self.failures = dict(failures or {})
+        self.delay = delay
+        self.calls = []
+        self.active = 0
+        self.max_active = 0
+        self._lock = threading.Lock()
+
+    def __call__(self, texts):
+        with self._lock:
+            self.calls.append(texts[0])
+            self.active += 1
+            self.max_active = max(self.max_active, self.active)
+            remaining = self.failures.get(texts[0], 0)
+            if remaining:
+                self.failures[texts[0]] = remaining - 1
+        try:
+            time.sleep(random.uniform(0, self.delay))
+            if remaining:
+                raise RuntimeError("429 Resource exhausted")
+            return [[float(len(t)), 1.0] for t in texts]
+        finally:
+            with self._lock:
+                self.active -= 1
+
+
+class TestEmbeddingScheduler:
+    """임베딩 스케줄러 테스트 클래스"""
+
+    @staticmethod
+    def make_batches(count):
+        return [[f"batch{i}-{j}" * (i + 1) for j in range(3)] for i in range(count)]
+
+    def test_results_keep_input_order(self):
+        """응답 순서가 뒤섞여도 입력 순서대로 반환"""
+        model = FakeEmbeddingModel(delay=0.01)
+        scheduler = EmbeddingScheduler(model, max_workers=4, requests_per_second=0, sleep=lambda s: None)
+        batches = self.make_batches(12)
+
+        results = list(scheduler.embed_batches(iter(batches)))
+
+        assert [batch for batch, _ in results] == batches
+        assert [vectors[0][0] for _, vectors in results] == [float(len(b[0])) for b in batches]
+        assert 1 < model.max_active <= 4
+
+    def test_transient_failure_is_retried(self):
+        """일시적 실패는 백오프 후 재시도되어 전체 구축이 실패하지 않음"""
+        batches = self.make_batches(5)
+        model = FakeEmbeddingModel(failures={batches[2][0]: 2})
+        delays = []
+        scheduler = EmbeddingScheduler(model, max_workers=2, requests_per_second=0,
+                                       max_retries=3, base_delay=1.0, sleep=delays.append)
+
+        results = list(scheduler.embed_batches(batches))
+
+        assert len(results) == 5
+        assert scheduler.stats()['retries'] == 2
+        assert 0.5 <= delays[0] <= 1.0 and 1.0 <= delays[1] <= 2.0
+
+    def test_persistent_failure_raises(self):
+        """재시도 횟수를 넘기면 해당 배치 번호와 함께 EmbeddingError"""
+        batches = self.make_batches(3)
+        model = FakeEmbeddingModel(failures={batches[1][0]: 10})
+        scheduler = EmbeddingScheduler(model, max_workers=2, requests_per_second=0,
+                                       max_retries=2, sleep=lambda s: None)
+
+        with pytest.raises(EmbeddingError) as exc_info:
+            list(scheduler.embed_batches(batches))
+
+        assert exc_info.value.batch_no == 2
+        assert scheduler.stats()['failures'] == 1
+
+    def test_token_bucket_limits_rate(self):
+        """버킷이 비면 rate에 맞춰 대기"""
+        now = [0.0]
+        waits = []
+
+        def fake_sleep(seconds):
+            waits.append(seconds)
+            now[0] += seconds
+
+        bucket = TokenBucket(rate=2.0, capacity=2, clock=lambda: now[0], sleep=fake_sleep)
+
+        total_wait = sum(bucket.acquire() for _ in range(6))
+
+        assert waits == [0.5, 0.5, 0.5, 0.5]
+        assert total_wait == pytest.approx(2.0)
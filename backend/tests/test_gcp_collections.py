@@ -0,0 +1,127 @@
+"""
+GCP 세대별 컬렉션 이름, 고아 컬렉션 판별, 구축/삭제 흐름 테스트
+"""
+import json
+from datetime import datetime
+from unittest.mock import MagicMock
+import pytest
+from job_queue import JobCancelled
+from vector_index import generation_of
+from gcp_rag_system import GCPRAGSystem, collection_created_at, find_orphan_collections
+
+
+class TestGenerationCollections:
+    """세대별 컬렉션 테스트 클래스"""
+
+    @pytest.fixture
+    def now(self):
+        return datetime(2025, 3, 1, 12, 0, 0)
+
+    def test_generation_suffix_roundtrip(self, now):
+        """컬렉션 이름의 세대 표시 → 생성 시각, 세대 없는 이전 이름은 None"""
+        system = GCPRAGSystem()
+        name = system._collection_name('All The Mods', '1.2-beta', generation_of(now))
+
+        assert name == 'modpack_All The Mods_1_2_beta__20250301T120000000000'
+        assert collection_created_at(name) == now
+        assert collection_created_at(system._collection_name('atm', '1.0')) is None
+
+    def test_find_orphans(self, now):
+        """가리키는 컬렉션, 최근 세대, modpack_ 이외 컬렉션은 제외"""
+        names = [
+            'modpack_metadata',
+            'modpack_atm_1_0',                          # 이전 방식 이름, 가리키는 메타데이터 없음
+            'modpack_atm_1_0__20250301T100000000000',   # 현재 세대
+            'modpack_atm_1_0__20250220T100000000000',   # 이전 세대 (삭제 안 끝남)
+            'modpack_atm_1_0__20250301T110000000000',   # 1시간 전 시작한 구축
+            'users',
+        ]
+
+        orphans = find_orphan_collections(names, {'modpack_atm_1_0__20250301T100000000000'}, now, min_age_hours=24)
+
+        assert orphans == ['modpack_atm_1_0', 'modpack_atm_1_0__20250220T100000000000']
+        assert find_orphan_collections(names, set(), now, min_age_hours=0)[-1] == \
+            'modpack_atm_1_0__20250301T110000000000'
+
+
+class TestBuildAndDelete:
+    """구축/삭제 흐름과 작업 취소 테스트 클래스 (Firestore는 MagicMock)"""
+
+    @pytest.fixture
+    def system(self, tmp_path):
+        system = GCPRAGSystem()
+        system.enabled = True
+        system.index_dir = str(tmp_path / 'index')
+        system.db = MagicMock()
+        system.db.collection.return_value.document.return_value.get.return_value.exists = False
+        system.embedding_scheduler = MagicMock()
+        system.embedding_scheduler.embed_batches.side_effect = \
+            lambda batches, text_of: ((items, [[1.0, 0.0]] * len(items)) for items in batches)
+        return system
+
+    @pytest.fixture
+    def modpack_dir(self, tmp_path):
+        path = tmp_path / 'pack' / 'data' / 'x' / 'recipes' / 'gear.json'
+        path.parent.mkdir(parents=True)
+        path.write_text(json.dumps({'type': 'minecraft:smelting', 'ingredient': {'item': 'x:ore'},
+                                    'result': 'x:gear'}), encoding='utf-8')
+        return str(tmp_path / 'pack')
+
+    @staticmethod
+    def cancel_at(stage):
+        def report(current, count):
+            if current == stage:
+                raise JobCancelled('cancelled')
+        return report
+
+    @pytest.mark.parametrize("stage", ["scan", "write"])
+    def test_build_cancel_propagates(self, system, modpack_dir, stage):
+        """취소는 실패 결과로 바뀌지 않고 그대로 올라가며, BulkWriter는 닫히고 새 세대 표시도 지워짐"""
+        with pytest.raises(JobCancelled):
+            system.build_modpack_index('pack', '1.0', modpack_dir, incremental=False,
+                                       progress=self.cancel_at(stage))
+
+        system.db.bulk_writer.return_value.close.assert_called_once()
+        assert system._staging_collections == set()
+
+    def test_build_releases_staging_collection(self, system, modpack_dir):
+        """전체 재구축이 끝나면 새 세대는 고아 정리 보호 목록에서 빠지고, 스캔 증분 통계는 결과에 남음"""
+        result = system.build_modpack_index('pack', '1.0', modpack_dir, incremental=False)
+
+        assert result['success'] is True
+        assert system._staging_collections == set()
+        assert result['stats']['incremental'] == {'reused': 0, 'parsed': 1, 'removed': 0}
+
+    def test_sweep_keeps_legacy_collection(self, system):
+        """collection_name이 없는 이전 메타데이터의 세대 없는 컬렉션은 현재 세대이므로 고아가 아님"""
+        legacy = system._collection_name('pack', '1.0')
+        system.db.collection.return_value.stream.return_value = [
+            MagicMock(to_dict=MagicMock(return_value={'modpack_name': 'pack', 'modpack_version': '1.0'}))
+        ]
+        system.db.collections.return_value = [MagicMock(id=legacy), MagicMock(id=f"{legacy}__20200101T000000000000")]
+
+        result = system.sweep_orphan_collections(min_age_hours=0, dry_run=True)
+
+        assert result['orphans'] == [f"{legacy}__20200101T000000000000"]
+
+    def test_sweep_hands_interrupted_delete_to_resume(self, system):
+        """resume이 주어지면 삭제 도중 멈춘 모드팩을 직접 지우지 않고 넘김"""
+        system.db.collection.return_value.stream.return_value = [MagicMock(to_dict=MagicMock(
+            return_value={'modpack_name': 'pack', 'modpack_version': '1.0', 'deleting': True}))]
+        system.db.collections.return_value = [MagicMock(id=system._collection_name('pack', '1.0'))]
+        resume = MagicMock(return_value={'job_id': 'j1'})
+
+        result = system.sweep_orphan_collections(min_age_hours=0, resume=resume)
+
+        resume.assert_called_once_with('pack', '1.0')
+        assert result['resume_jobs'] == [{'job_id': 'j1'}] and result['orphans'] == []
+        system.db.collection.return_value.document.return_value.delete.assert_not_called()
+
+    def test_delete_cancel_propagates(self, system):
+        system.db.collections.return_value = [MagicMock(id=system._collection_name('pack', '1.0'))]
+        page = [MagicMock()]
+        system.db.collection.return_value.select.return_value.order_by.return_value.limit.return_value \
+            .stream.return_value = page
+
+        with pytest.raises(JobCancelled):
+            system.delete_modpack_index('pack', '1.0', progress=self.cancel_at('delete'))
@@ -0,0 +1,127 @@
+"""
+증분 인덱싱 매니페스트 테스트
+"""
+import os
+import json
+import pytest
+from index_manifest import IndexManifest
+from modpack_parser import scan_modpack
+
+
+class TestIncrementalScan:
+    """매니페스트 기반 증분 스캔 테스트 클래스"""
+
+    @pytest.fixture
+    def modpack_dir(self, tmp_path):
+        """레시피 3개와 KubeJS 스크립트 1개가 있는 모드팩"""
+        recipes = tmp_path / 'data' / 'create' / 'recipes'
+        recipes.mkdir(parents=True)
+        for i in range(3):
+            (recipes / f"r{i}.json").write_text(json.dumps({
+                "type": "create:mixing", "result": f"create:item_{i}"
+            }), encoding='utf-8')
+        (tmp_path / 'kubejs').mkdir()
+        (tmp_path / 'kubejs' / 'main.js').write_text("console.log('v1')")
+        return tmp_path
+
+    def test_unchanged_files_are_reused(self, modpack_dir):
+        """두 번째 스캔은 파일을 다시 파싱하지 않고 같은 결과 반환"""
+        manifest = IndexManifest()
+        first = scan_modpack(str(modpack_dir), workers=1, manifest=manifest)
+
+        second = scan_modpack(str(modpack_dir), workers=1, manifest=manifest)
+
+        assert first['incremental'] == {'reused': 0, 'parsed': 4, 'removed': 0}
+        assert second['incremental'] == {'reused': 4, 'parsed': 0, 'removed': 0}
+        assert second['docs'] == first['docs']
+
+    def test_changed_and_removed_files(self, modpack_dir):
+        """바뀐 파일만 다시 파싱하고 삭제된 파일은 매니페스트에서 제거"""
+        manifest = IndexManifest()
+        scan_modpack(str(modpack_dir), workers=1, manifest=manifest)
+        script = modpack_dir / 'kubejs' / 'main.js'
+        script.write_text("console.log('version 2')")
+        os.remove(modpack_dir / 'data' / 'create' / 'recipes' / 'r0.json')
+
+        result = scan_modpack(str(modpack_dir), workers=1, manifest=manifest)
+
+        assert result['incremental'] == {'reused': 2, 'parsed': 1, 'removed': 1}
+        assert 'version 2' in result['docs'][-1]['text']
+        assert len(manifest.files) == 3
+
+    def test_touched_file_with_same_content_is_reused(self, modpack_dir):
+        """수정시각만 바뀌고 내용이 같으면 해시로 확인 후 재사용"""
+        manifest = IndexManifest()
+        scan_modpack(str(modpack_dir), workers=1, manifest=manifest)
+        script = modpack_dir / 'kubejs' / 'main.js'
+        stat = script.stat()
+        os.utime(script, ns=(stat.st_atime_ns, stat.st_mtime_ns + 10**9))
+
+        result = scan_modpack(str(modpack_dir), workers=1, manifest=manifest)
+
+        assert result['incremental']['parsed'] == 0
+
+    def test_docs_live_in_cache_file(self, modpack_dir, tmp_path):
+        """매니페스트 JSON에는 파싱 결과 위치만 있고, 다시 로드해도 캐시 파일에서 재사용"""
+        path = str(tmp_path / 'manifests' / 'pack.json')
+        manifest = IndexManifest()
+        first = scan_modpack(str(modpack_dir), workers=1, manifest=manifest)
+        manifest.save(path)
+
+        with open(path, encoding='utf-8') as f:
+            saved = json.load(f)
+        loaded = IndexManifest.load(path)
+        second = scan_modpack(str(modpack_dir), workers=1, manifest=loaded)
+
+        assert all(set(entry) == {'size', 'mtime_ns', 'hash', 'docs_at'} for entry in saved['files'].values())
+        assert os.path.isfile(tmp_path / 'manifests' / saved['docs_file'])
+        assert second['incremental']['reused'] == 4 and second['docs'] == first['docs']
+
+    def test_cache_file_is_compacted(self, modpack_dir, tmp_path):
+        """자주 바뀐 파일의 이전 결과가 쌓이면 저장 시 새 캐시 파일로 압축하고 이전 파일은 삭제"""
+        path = str(tmp_path / 'pack.json')
+        manifest = IndexManifest()
+        scan_modpack(str(modpack_dir), workers=1, manifest=manifest)
+        manifest.save(path)
+        with open(path, encoding='utf-8') as f:
+            first_cache = json.load(f)['docs_file']
+        script = modpack_dir / 'kubejs' / 'main.js'
+        for i in range(5):
+            script.write_text(f"console.log('{'x' * 200 * (i + 1)}')")
+            scan_modpack(str(modpack_dir), workers=1, manifest=manifest)
+        manifest.save(path)
+
+        with open(path, encoding='utf-8') as f:
+            docs_file = json.load(f)['docs_file']
+        result = scan_modpack(str(modpack_dir), workers=1, manifest=IndexManifest.load(path))
+
+        assert docs_file != first_cache and not os.path.exists(tmp_path / first_cache)
+        assert result['incremental']['reused'] == 4
+        assert 'x' * 200 in result['docs'][-1]['text']
+
+
+class TestIndexManifest:
+    """매니페스트 인덱스 상태 테스트 클래스"""
+
+    def test_indexed_state(self):
+        """바뀐 source와 삭제된 source 구분"""
+        manifest = IndexManifest()
+        manifest.set_indexed('a.json', [{'text': 'A'}], ['id_a'])
+        manifest.set_indexed('b.json', [{'text': 'B'}], ['id_b'])
+
+        assert manifest.is_indexed('a.json', [{'text': 'A'}])
+        assert not manifest.is_indexed('b.json', [{'text': 'B2'}])
+        assert not manifest.is_indexed('c.json', [{'text': 'C'}])
+        assert manifest.removed_sources(['a.json', 'c.json']) == ['b.json']
+
+    def test_save_and_load(self, tmp_path):
+        """저장 후 로드하면 같은 상태, 없는 파일이면 빈 매니페스트"""
+        path = str(tmp_path / 'manifests' / 'pack.json')
+        manifest = IndexManifest()
+        manifest.set_indexed('a.json', [{'text': 'A'}], ['id_a'])
+        manifest.save(path)
+
+        loaded = IndexManifest.load(path)
+
+        assert loaded.indexed_doc_ids('a.json') == ['id_a']
+        assert IndexManifest.load(str(tmp_path / 'missing.json')).indexed == {}
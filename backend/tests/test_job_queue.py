@@ -0,0 +1,98 @@
+"""
+백그라운드 작업 큐 테스트
+"""
+import threading
+import pytest
+from job_queue import JobManager, JobCancelled, SUCCEEDED, FAILED, CANCELLED
+
+
+class TestJobManager:
+    """작업 관리자 테스트 클래스"""
+
+    @pytest.fixture
+    def manager(self):
+        return JobManager(max_workers=2)
+
+    def test_job_result_and_progress(self, manager):
+        """작업 결과와 진행률 기록"""
+        def work(job):
+            job.report('scan', 10)
+            job.report('embed', 5)
+            return {'success': True, 'document_count': 10}
+
+        job, created = manager.submit('build', 'pack:1.0', work)
+
+        assert created
+        assert job.wait(5)
+        assert job.status == SUCCEEDED
+        assert job.to_dict()['progress'] == {'scan': 10, 'embed': 5}
+        assert manager.get(job.id) is job
+
+    def test_failure_result_marks_failed(self, manager):
+        """success=False 결과나 예외는 실패로 기록"""
+        failed, _ = manager.submit('build', 'a', lambda job: {'success': False, 'error': '문서 없음'})
+        raised, _ = manager.submit('build', 'b', lambda job: 1 / 0)
+
+        failed.wait(5)
+        raised.wait(5)
+
+        assert (failed.status, failed.error) == (FAILED, '문서 없음')
+        assert raised.status == FAILED and 'division' in raised.error
+
+    def test_single_flight_per_key(self, manager):
+        """같은 키의 작업이 실행 중이면 새 작업 대신 기존 작업 반환"""
+        release = threading.Event()
+        first, created_first = manager.submit('build', 'pack:1.0', lambda job: release.wait(5) and {'success': True})
+
+        second, created_second = manager.submit('build', 'pack:1.0', lambda job: {'success': True})
+        other, created_other = manager.submit('build', 'pack:2.0', lambda job: {'success': True})
+        release.set()
+        first.wait(5)
+        third, created_third = manager.submit('build', 'pack:1.0', lambda job: {'success': True})
+
+        assert second is first and not created_second
+        assert created_first and created_other and created_third
+        assert third is not first
+
+    def test_cancel_running_job(self, manager):
+        """실행 중인 작업은 다음 진행률 보고 시점에 취소"""
+        started = threading.Event()
+        release = threading.Event()
+
+        def work(job):
+            started.set()
+            release.wait(5)
+            job.report('embed', 100)
+            return {'success': True}
+
+        job, _ = manager.submit('build', 'pack:1.0', work)
+        started.wait(5)
+        manager.cancel(job.id)
+        release.set()
+
+        assert job.wait(5)
+        assert job.status == CANCELLED
+
+    def test_cancel_queued_job(self):
+        """대기 중인 작업은 실행되지 않고 바로 취소"""
+        manager = JobManager(max_workers=1)
+        release = threading.Event()
+        ran = []
+        manager.submit('build', 'a', lambda job: release.wait(5) and {'success': True})
+        queued, _ = manager.submit('build', 'b', lambda job: ran.append(True))
+
+        manager.cancel(queued.id)
+        release.set()
+
+        assert queued.wait(5)
+        assert queued.status == CANCELLED
+        assert ran == []
+
+    def test_report_raises_after_cancel(self, manager):
+        """취소 요청 후 report는 JobCancelled 발생"""
+        job, _ = manager.submit('build', 'a', lambda job: {'success': True})
+        job.wait(5)
+        job._cancel_event.set()
+
+        with pytest.raises(JobCancelled):
+            job.report('scan', 1)
@@ -0,0 +1,87 @@
+"""
+모드팩 파서 테스트
+"""
+import os
+import json
+import pytest
+import modpack_parser
+from modpack_parser import scan_modpack
+
+
+class TestScanModpack:
+    """모드팩 스캔 테스트 클래스"""
+
+    @pytest.fixture
+    def modpack_dir(self, tmp_path):
+        """레시피/모드/KubeJS가 있는 작은 모드팩"""
+        recipes = tmp_path / 'data' / 'thermal' / 'recipes'
+        recipes.mkdir(parents=True)
+        for i in range(30):
+            recipe = {
+                "type": "minecraft:crafting_shaped",
+                "pattern": ["II", "II"],
+                "key": {"I": {"item": "thermal:steel_ingot"}},
+                "result": {"item": f"thermal:block_{i}", "count": 1}
+            }
+            (recipes / f"block_{i}.json").write_text(json.dumps(recipe), encoding='utf-8')
+        (recipes / 'smelt.json').write_text(json.dumps({
+            "type": "minecraft:smelting", "result": "thermal:steel_ingot"
+        }), encoding='utf-8')
+        (recipes / 'broken.json').write_text('{not json', encoding='utf-8')
+
+        (tmp_path / 'mods').mkdir()
+        (tmp_path / 'mods' / 'thermal-1.0.jar').write_bytes(b'')
+        (tmp_path / 'kubejs' / 'server_scripts').mkdir(parents=True)
+        (tmp_path / 'kubejs' / 'server_scripts' / 'recipes.js').write_text("onEvent('recipes', e => {})")
+        return str(tmp_path)
+
+    def test_serial_scan(self, modpack_dir):
+        """직렬 스캔 결과와 통계"""
+        result = scan_modpack(modpack_dir, workers=1)
+
+        assert result['stats'] == {'recipes': 31, 'mods': 1, 'kubejs': 1, 'tags': 0, 'aliases': 0}
+        shaped = [d for d in result['docs'] if d.get('subtype') == 'crafting_shaped']
+        assert shaped[0]['grid'][0][:2] == ['steel ingo', 'steel ingo']
+
+    def test_parallel_scan_matches_serial(self, modpack_dir, monkeypatch):
+        """병렬 스캔은 직렬 스캔과 같은 문서를 같은 순서로 반환"""
+        serial = scan_modpack(modpack_dir, workers=1)
+        monkeypatch.setattr(modpack_parser, 'PARALLEL_MIN_FILES', 1)
+
+        parallel = scan_modpack(modpack_dir, workers=3)
+
+        assert parallel == serial
+
+    @pytest.mark.parametrize("env,expected", [(None, 1), ('4', 4), ('0', os.cpu_count() or 1)])
+    def test_workers_default_to_serial(self, monkeypatch, env, expected):
+        """환경변수가 없으면 직렬 스캔 (병렬 스캔은 MODPACK_SCAN_WORKERS로 켬)"""
+        if env is None:
+            monkeypatch.delenv('MODPACK_SCAN_WORKERS', raising=False)
+        else:
+            monkeypatch.setenv('MODPACK_SCAN_WORKERS', env)
+
+        assert modpack_parser._resolve_workers(None) == expected
+
+    def test_missing_path(self):
+        """존재하지 않는 경로는 빈 결과"""
+        result = scan_modpack('/nonexistent/modpack', workers=1)
+
+        assert result['docs'] == []
+
+    def test_iter_modpack_docs_streams(self, modpack_dir, monkeypatch):
+        """스트리밍 스캔은 첫 샤드만 파싱한 상태에서 문서를 반환하고 끝나면 통계를 채움"""
+        monkeypatch.setattr(modpack_parser, 'STREAM_SHARD_SIZE', 4)
+        parsed = []
+        original = modpack_parser._parse_recipe_file
+        monkeypatch.setattr(modpack_parser, '_parse_recipe_file',
+                            lambda fpath: parsed.append(fpath) or original(fpath))
+        stats = {}
+
+        stream = modpack_parser.iter_modpack_docs(modpack_dir, workers=1, stats=stats)
+        first = next(stream)
+
+        assert first['type'] == 'recipe'
+        assert len(parsed) == 4
+        docs = [first] + list(stream)
+        assert docs == scan_modpack(modpack_dir, workers=1)['docs']
+        assert stats == {'recipes': 31, 'mods': 1, 'kubejs': 1}
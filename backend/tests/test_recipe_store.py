@@ -0,0 +1,109 @@
+"""
+레시피 DB 테스트
+"""
+import json
+import pytest
+from modpack_parser import scan_modpack
+from recipe_store import RecipeStore, RecipeStoreRegistry, describe_recipe, parse_uses_query
+
+
+class TestRecipeStore:
+    """레시피 DB 테스트 클래스"""
+
+    @pytest.fixture
+    def modpack_dir(self, tmp_path):
+        """shaped/shapeless/기계 레시피가 있는 작은 모드팩"""
+        recipes = tmp_path / 'data' / 'mekanism' / 'recipes'
+        recipes.mkdir(parents=True)
+        (recipes / 'steel_pickaxe.json').write_text(json.dumps({
+            "type": "minecraft:crafting_shaped",
+            "pattern": ["III", " S ", " S "],
+            "key": {"I": {"tag": "forge:ingots/steel"}, "S": {"item": "minecraft:stick"}},
+            "result": {"item": "mekanism:steel_pickaxe"}
+        }), encoding='utf-8')
+        (recipes / 'bronze_dust.json').write_text(json.dumps({
+            "type": "minecraft:crafting_shapeless",
+            "ingredients": [{"item": "mekanism:dust_copper"}] * 3 + [{"item": "mekanism:dust_tin"}],
+            "result": {"item": "mekanism:dust_bronze", "count": 4}
+        }), encoding='utf-8')
+        (recipes / 'osmium_dust.json').write_text(json.dumps({
+            "type": "mekanism:crushing",
+            "input": {"ingredient": {"tag": "forge:ores/osmium"}, "amount": 1},
+            "output": {"item": "mekanism:dust_osmium", "count": 2},
+            "result": "mekanism:dust_osmium"
+        }), encoding='utf-8')
+        return str(tmp_path)
+
+    @pytest.fixture
+    def store(self, modpack_dir):
+        return RecipeStore.from_docs(scan_modpack(modpack_dir, workers=1)['docs'])
+
+    def test_shaped_recipe_has_grid_and_materials(self, store):
+        """shaped 레시피는 격자, 키 맵, 패턴 기준 재료 수량을 가짐"""
+        recipe, = store.lookup('mekanism:steel_pickaxe')
+
+        assert recipe['grid'][0] == ['ingots/ste', 'ingots/ste', 'ingots/ste']
+        assert recipe['key'] == {'I': '#forge:ingots/steel', 'S': 'minecraft:stick'}
+        assert recipe['materials'] == [{'item': '#forge:ingots/steel', 'count': 3},
+                                       {'item': 'minecraft:stick', 'count': 2}]
+
+    @pytest.mark.parametrize("query", ["mekanism:dust_bronze", "dust_bronze", "Dust Bronze", "dust-bronze"])
+    def test_lookup_by_id_or_name(self, store, query):
+        """ID, 네임스페이스 없는 이름, 공백/대소문자가 다른 이름으로 검색"""
+        recipe, = store.lookup(query)
+
+        assert recipe['result_count'] == 4
+        assert recipe['materials'] == [{'item': 'mekanism:dust_copper', 'count': 3},
+                                       {'item': 'mekanism:dust_tin', 'count': 1}]
+        assert recipe['grid'][0] == ['dust coppe'] * 3
+
+    def test_machine_recipe_and_description(self, store):
+        """기계 레시피는 중첩된 입력에서 재료를 추출하고 한 줄 설명 생성"""
+        recipe, = store.lookup('dust_osmium')
+
+        assert describe_recipe(recipe) == "dust osmium x1 [crushing] 재료: #ores/osmium x1"
+        assert store.lookup('unknown_item') == []
+
+    def test_registry_persists_and_reloads(self, store, tmp_path):
+        """저장한 레시피 DB는 새 레지스트리에서도 조회되고, 조회 통계가 기록됨"""
+        RecipeStoreRegistry(base_dir=str(tmp_path / 'db')).put('Pack', '1.0', store)
+        registry = RecipeStoreRegistry(base_dir=str(tmp_path / 'db'))
+
+        found = registry.lookup('Pack', '1.0', 'steel_pickaxe')
+        missing = registry.lookup('Other', '1.0', 'steel_pickaxe')
+
+        assert found == store.lookup('steel_pickaxe')
+        assert missing == []
+        assert registry.stats()['hits'] == 1 and registry.stats()['misses'] == 1
+
+    @pytest.mark.parametrize("query", ["mekanism:dust_copper", "dust_copper", "copper dust"])
+    def test_uses_of_item(self, store, query):
+        """재료 역색인: ID, 이름, 단어 순서가 다른 이름으로 사용 레시피 검색"""
+        use, = store.uses_of(query)
+
+        assert use['result_id'] == 'mekanism:dust_bronze'
+        assert use['ingredient'] == 'mekanism:dust_copper'
+        assert use['ingredient_count'] == 3
+
+    def test_uses_of_tag_survives_reload(self, store, tmp_path):
+        """태그 재료도 색인되고, 저장 후 다시 읽어도 같은 결과"""
+        path = str(tmp_path / 'store.json')
+        store.save(path)
+        loaded = RecipeStore.load(path)
+
+        for query in ("#forge:ingots/steel", "forge:ingots/steel", "ingots/steel"):
+            use, = loaded.uses_of(query)
+            assert use['result_id'] == 'mekanism:steel_pickaxe'
+        assert loaded.uses_of('minecraft:stick') == store.uses_of('minecraft:stick')
+        assert loaded.uses_of('mekanism:dust_bronze') == []
+
+    @pytest.mark.parametrize("message,expected", [
+        ("What can I make with osmium ingot?", "osmium ingot"),
+        ("uses of the mekanism:ingot_osmium", "mekanism:ingot_osmium"),
+        ("오스뮴 주괴로 뭘 만들 수 있어?", "오스뮴 주괴"),
+        ("구리 가루 용도 알려줘", "구리 가루"),
+        ("철 곡괭이 만드는 법", None),
+    ])
+    def test_parse_uses_query(self, message, expected):
+        """사용처 질문에서 재료 이름 추출, 일반 질문은 None"""
+        assert parse_uses_query(message) == expected
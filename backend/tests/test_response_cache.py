@@ -0,0 +1,86 @@
+"""
+/chat 응답 캐시 테스트
+"""
+import pytest
+from unittest.mock import patch
+from response_cache import ResponseCache
+
+
+class TestResponseCache:
+    """응답 캐시 테스트 클래스"""
+
+    @pytest.fixture
+    def cache(self):
+        """TTL 60초, 의미 일치 임계값 0.95인 캐시"""
+        return ResponseCache(ttl_seconds=60, max_entries=10, semantic_threshold=0.95)
+
+    def test_exact_hit_after_normalization(self, cache):
+        """정규화 후 같은 질문이면 정확 일치"""
+        cache.put('enigmatica', '1.0', 'gemini', 'How do I make a Steel Ingot?', {'response': 'A'})
+
+        entry = cache.get('enigmatica', '1.0', 'gemini', 'how do i make a steel ingot')
+
+        assert entry['payload'] == {'response': 'A'}
+
+    @pytest.mark.parametrize("modpack,version,model", [
+        ('other', '1.0', 'gemini'),
+        ('enigmatica', '2.0', 'gemini'),
+        ('enigmatica', '1.0', 'openai'),
+    ])
+    def test_key_includes_modpack_and_model(self, cache, modpack, version, model):
+        """모드팩/버전/모델이 다르면 캐시 미적중"""
+        cache.put('enigmatica', '1.0', 'gemini', 'steel ingot', {'response': 'A'})
+
+        assert cache.get(modpack, version, model, 'steel ingot') is None
+
+    def test_expired_entry_is_dropped(self, cache):
+        """TTL이 지난 항목은 반환하지 않음"""
+        with patch('response_cache.time.time', return_value=1000.0):
+            cache.put('pack', '1.0', 'gemini', 'q', {'response': 'A'})
+        with patch('response_cache.time.time', return_value=1061.0):
+            assert cache.get('pack', '1.0', 'gemini', 'q') is None
+        assert cache.stats()['entries'] == 0
+
+    def test_semantic_hit(self, cache):
+        """임베딩이 충분히 비슷하면 의미 일치로 재사용"""
+        cache.put('pack', '1.0', 'gemini', '강철 주괴 만드는 법', {'response': 'A'},
+                  namespace='gecko', embedding=[1.0, 0.0, 0.1])
+
+        similar = cache.get_similar('pack', '1.0', 'gemini', 'gecko', [1.0, 0.0, 0.12])
+        different = cache.get_similar('pack', '1.0', 'gemini', 'gecko', [0.0, 1.0, 0.0])
+        other_namespace = cache.get_similar('pack', '1.0', 'gemini', 'minilm', [1.0, 0.0, 0.1])
+
+        assert similar['payload'] == {'response': 'A'}
+        assert different is None
+        assert other_namespace is None
+        assert cache.stats()['semantic_hits'] == 1
+
+    def test_semantic_miss_for_different_item(self, cache):
+        """아이템만 다른 질문은 임베딩이 거의 같아도 재사용하지 않음"""
+        cache.put('pack', '1.0', 'gemini', 'how to craft iron ingot', {'response': 'iron'},
+                  namespace='gecko', embedding=[1.0, 0.0, 0.1], items=['minecraft:iron_ingot'])
+
+        gold = cache.get_similar('pack', '1.0', 'gemini', 'gecko', [1.0, 0.0, 0.1], items=['minecraft:gold_ingot'])
+        no_items = cache.get_similar('pack', '1.0', 'gemini', 'gecko', [1.0, 0.0, 0.1])
+        iron = cache.get_similar('pack', '1.0', 'gemini', 'gecko', [1.0, 0.0, 0.11], items=['minecraft:iron_ingot'])
+
+        assert gold is None and no_items is None
+        assert iron['payload'] == {'response': 'iron'}
+
+    def test_semantic_disabled_by_default(self):
+        """기본값은 정확 일치만 사용"""
+        cache = ResponseCache()
+        cache.put('pack', '1.0', 'gemini', 'q', {'response': 'A'}, namespace='gecko', embedding=[1.0, 0.0])
+
+        assert cache.get_similar('pack', '1.0', 'gemini', 'gecko', [1.0, 0.0]) is None
+
+    def test_invalidate_modpack_only(self, cache):
+        """모드팩 인덱스 재구축 시 해당 모드팩 응답만 제거"""
+        cache.put('pack', '1.0', 'gemini', 'q1', {'response': 'A'})
+        cache.put('pack', '1.0', 'openai', 'q1', {'response': 'B'})
+        cache.put('other', '1.0', 'gemini', 'q1', {'response': 'C'})
+
+        removed = cache.invalidate('pack', '1.0')
+
+        assert removed == 2
+        assert cache.get('other', '1.0', 'gemini', 'q1') is not None
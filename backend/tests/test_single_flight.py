@@ -0,0 +1,69 @@
+"""
+요청 합치기(single-flight) 테스트
+"""
+import time
+import asyncio
+import threading
+import pytest
+from single_flight import SingleFlight
+
+
+class TestSingleFlight:
+    """요청 합치기 테스트 클래스"""
+
+    def test_concurrent_calls_share_one_result(self):
+        """같은 키의 동시 요청은 업스트림 호출 한 번의 결과를 공유"""
+        flight = SingleFlight()
+        release = threading.Event()
+        calls = []
+        results = []
+
+        def upstream():
+            calls.append(1)
+            release.wait(5)
+            return "다이아몬드 곡괭이 제작법"
+
+        threads = [threading.Thread(target=lambda: results.append(flight.do(('gemini', 'diamond_pickaxe'), upstream)))
+                   for _ in range(5)]
+        for thread in threads:
+            thread.start()
+        while flight.stats()['coalesced'] < 4:
+            time.sleep(0.001)
+        release.set()
+        for thread in threads:
+            thread.join(5)
+
+        assert len(calls) == 1
+        assert sorted(shared for _, shared in results) == [False, True, True, True, True]
+        assert {result for result, _ in results} == {"다이아몬드 곡괭이 제작법"}
+        assert flight.stats() == {'executed': 1, 'coalesced': 4, 'in_flight': 0, 'saved_ratio': 0.8}
+
+    def test_sequential_calls_are_not_cached(self):
+        """끝난 호출의 결과는 보관하지 않고, 예외는 그대로 전달"""
+        flight = SingleFlight()
+
+        first, _ = flight.do('key', lambda: 1)
+        second, shared = flight.do('key', lambda: 2)
+        with pytest.raises(ZeroDivisionError):
+            flight.do('key', lambda: 1 / 0)
+
+        assert (first, second, shared) == (1, 2, False)
+        assert flight.stats()['executed'] == 3
+
+    def test_async_calls_share_one_result(self):
+        """asyncio 버전도 같은 키의 동시 요청을 합침"""
+        flight = SingleFlight()
+        calls = []
+
+        async def upstream():
+            calls.append(1)
+            await asyncio.sleep(0.01)
+            return "응답"
+
+        async def run():
+            return await asyncio.gather(*(flight.do_async('question', upstream) for _ in range(3)))
+
+        results = asyncio.run(run())
+
+        assert len(calls) == 1
+        assert results == [("응답", False), ("응답", True), ("응답", True)]
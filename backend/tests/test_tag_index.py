@@ -0,0 +1,92 @@
+"""
+아이템 태그 색인 테스트
+"""
+import json
+import pytest
+from modpack_parser import scan_modpack
+from recipe_store import RecipeStore
+from crafting_tree import get_resolver
+from tag_index import TagIndex, tag_id_from_path
+
+
+def write_json(path, data):
+    path.parent.mkdir(parents=True, exist_ok=True)
+    path.write_text(json.dumps(data), encoding='utf-8')
+
+
+class TestTagIndex:
+    """아이템 태그 색인 테스트 클래스"""
+
+    @pytest.fixture
+    def modpack_dir(self, tmp_path):
+        """중첩 태그, kubejs 덮어쓰기(replace), 태그 재료 레시피가 있는 모드팩"""
+        data = tmp_path / 'data'
+        write_json(data / 'forge' / 'tags' / 'items' / 'ingots' / 'steel.json',
+                   {"replace": False, "values": ["mekanism:ingot_steel", "#forge:ingots/alloy_steel"]})
+        write_json(data / 'forge' / 'tags' / 'items' / 'ingots' / 'alloy_steel.json',
+                   {"values": ["othermod:steel", {"id": "missing:steel", "required": False}]})
+        write_json(data / 'forge' / 'tags' / 'items' / 'ingots.json',
+                   {"values": ["#forge:ingots/steel", "minecraft:iron_ingot"]})
+        write_json(data / 'minecraft' / 'tags' / 'blocks' / 'mineable.json', {"values": ["minecraft:stone"]})
+        write_json(data / 'mekanism' / 'recipes' / 'steel_pickaxe.json', {
+            "type": "minecraft:crafting_shaped",
+            "pattern": ["III", " S ", " S "],
+            "key": {"I": {"tag": "forge:ingots/steel"}, "S": {"item": "minecraft:stick"}},
+            "result": {"item": "mekanism:steel_pickaxe"}
+        })
+        write_json(data / 'mekanism' / 'recipes' / 'steel_ingot.json', {
+            "type": "minecraft:smelting",
+            "ingredient": {"item": "mekanism:dust_steel"},
+            "result": "mekanism:ingot_steel"
+        })
+        # kubejs/data는 모드팩 data보다 우선 - replace=true면 기존 값 대체
+        write_json(tmp_path / 'kubejs' / 'data' / 'forge' / 'tags' / 'items' / 'ingots' / 'alloy_steel.json',
+                   {"replace": True, "values": ["kubejs:steel"]})
+        return str(tmp_path)
+
+    @pytest.fixture
+    def scan(self, modpack_dir):
+        return scan_modpack(modpack_dir, workers=1)
+
+    def test_closure_expands_nested_tags_and_replace(self, scan):
+        """중첩 #태그를 끝까지 펼치고, 나중 data 폴더의 replace가 이전 정의를 대체"""
+        tags = scan['tags']
+
+        assert tags.items('#forge:ingots/steel') == ['mekanism:ingot_steel', 'kubejs:steel']
+        assert tags.items('forge:ingots') == ['mekanism:ingot_steel', 'kubejs:steel', 'minecraft:iron_ingot']
+        assert sorted(tags.tags_of('kubejs:steel')) == ['forge:ingots', 'forge:ingots/alloy_steel', 'forge:ingots/steel']
+        assert tags.items('minecraft:mineable') == []
+
+    def test_tag_files_are_not_recipe_docs(self, scan):
+        """태그 파일은 레시피 문서로 만들지 않음"""
+        assert scan['stats']['recipes'] == 2
+        assert scan['stats']['tags'] == 3
+        assert all(doc['result_id'] != 'unknown' for doc in scan['docs'])
+
+    def test_remove_and_cycles(self):
+        """Forge remove 항목 제외, 서로 참조하는 태그도 무한 루프 없이 펼침"""
+        index = TagIndex()
+        index.add_definition('a:x', {"values": ["#a:y", "a:one", "a:two"], "remove": ["a:two"]})
+        index.add_definition('a:y', {"values": ["#a:x", "a:three"]})
+        index.build()
+
+        assert index.items('a:x') == ['a:three', 'a:one']
+
+    def test_store_roundtrip_and_tag_expansion(self, scan, tmp_path):
+        """레시피 DB에 압축 저장되고, 사용처 조회/제작 트리에서 태그를 실제 아이템으로 펼침"""
+        path = str(tmp_path / 'store.json')
+        RecipeStore.from_docs(scan['docs'], scan['tags']).save(path)
+        store = RecipeStore.load(path)
+
+        assert store.tags.items('forge:ingots/steel') == scan['tags'].items('forge:ingots/steel')
+        use, = store.uses_of('mekanism:ingot_steel')
+        assert (use['result_id'], use['ingredient']) == ('mekanism:steel_pickaxe', '#forge:ingots/steel')
+
+        tree = get_resolver(store).resolve('steel_pickaxe')
+        assert {'item': 'mekanism:dust_steel', 'count': 3} in tree['raw_materials']
+
+    def test_tag_id_from_path(self, tmp_path):
+        """폴더 구조 → 태그 ID (1.21 이후의 단수형 item 폴더 포함)"""
+        data = tmp_path / 'data'
+        assert tag_id_from_path(str(data / 'c' / 'tags' / 'item' / 'gems' / 'ruby.json'), str(data)) == 'c:gems/ruby'
+        assert tag_id_from_path(str(data / 'c' / 'recipes' / 'ruby.json'), str(data)) is None
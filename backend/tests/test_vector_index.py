@@ -0,0 +1,182 @@
+"""
+로컬 벡터 인덱스 테스트
+"""
+import os
+import pytest
+import numpy as np
+from datetime import datetime, timezone
+from vector_index import ModpackVectorIndex, VectorIndexCache, VectorSpill, select_top_k, generation_of
+
+
+class TestModpackVectorIndex:
+    """모드팩 IVF 인덱스 테스트 클래스"""
+
+    @pytest.fixture
+    def sample_data(self):
+        """무작위 임베딩과 문서 메타데이터"""
+        rng = np.random.default_rng(0)
+        embeddings = rng.normal(size=(2000, 32)).astype(np.float32)
+        docs = [{'doc_id': f"doc_{i}", 'text': f"text {i}"} for i in range(len(embeddings))]
+        return embeddings, docs
+
+    def test_exact_match_ranks_first(self, sample_data):
+        """저장된 벡터로 검색하면 해당 문서가 1위"""
+        # Given
+        embeddings, docs = sample_data
+        index = ModpackVectorIndex.build(embeddings, docs, dtype='float32')
+
+        # When
+        results = index.search(embeddings[123], top_k=3, nprobe=4)
+
+        # Then
+        assert index.nlist > 1
+        assert results[0][0]['doc_id'] == 'doc_123'
+        assert results[0][1] == pytest.approx(1.0, abs=1e-5)
+
+    def test_min_score_filters_results(self, sample_data):
+        """min_score 미만 결과는 제외"""
+        embeddings, docs = sample_data
+        index = ModpackVectorIndex.build(embeddings, docs)
+
+        results = index.search(embeddings[5], top_k=10, min_score=0.99)
+
+        assert [doc['doc_id'] for doc, _ in results] == ['doc_5']
+
+    def test_small_index_uses_single_list(self):
+        """작은 인덱스는 리스트 1개로 전수 비교"""
+        embeddings = np.eye(4, dtype=np.float32)
+        docs = [{'doc_id': str(i)} for i in range(4)]
+
+        index = ModpackVectorIndex.build(embeddings, docs)
+        results = index.search([0, 0, 1, 0], top_k=1)
+
+        assert index.nlist == 1
+        assert results[0][0]['doc_id'] == '2'
+
+    def test_dimension_mismatch_returns_empty(self, sample_data):
+        """차원이 다른 쿼리는 빈 결과"""
+        embeddings, docs = sample_data
+        index = ModpackVectorIndex.build(embeddings[:10], docs[:10])
+
+        assert index.search(np.ones(8), top_k=3) == []
+
+    def test_save_and_load_roundtrip(self, sample_data, tmp_path):
+        """디스크 저장 후 로드하면 동일한 검색 결과"""
+        embeddings, docs = sample_data
+        index = ModpackVectorIndex.build(embeddings, docs, generation='gen-1')
+        index_dir = str(tmp_path / 'modpack_test_1_0')
+
+        index.save(index_dir)
+        loaded = ModpackVectorIndex.load(index_dir)
+
+        assert loaded is not None
+        assert loaded.generation == 'gen-1'
+        assert loaded.size == index.size
+        assert loaded.search(embeddings[7], top_k=1)[0][0]['doc_id'] == 'doc_7'
+
+    def test_build_from_spill_matches_in_memory(self, sample_data, tmp_path, monkeypatch):
+        """배치별로 디스크에 내보낸 임베딩(memmap)으로 블록 단위 구축해도 메모리 행렬로 구축한 것과 같음"""
+        monkeypatch.setattr('vector_index.BUILD_BLOCK_ROWS', 300)
+        embeddings, docs = sample_data
+        spill = VectorSpill(str(tmp_path / 'spill'))
+        for start in range(0, len(embeddings), 128):
+            spill.append(embeddings[start:start + 128])
+
+        from_spill = ModpackVectorIndex.build(spill.array(), docs, dtype='int8')
+        in_memory = ModpackVectorIndex.build(embeddings, docs, dtype='int8')
+        spill.close()
+
+        assert len(spill) == len(embeddings) and not os.path.exists(spill.path)
+        np.testing.assert_array_equal(from_spill.vectors.codes, in_memory.vectors.codes)
+        np.testing.assert_array_equal(from_spill.list_ids, in_memory.list_ids)
+        assert from_spill.search(embeddings[77], top_k=5) == in_memory.search(embeddings[77], top_k=5)
+
+    def test_load_missing_returns_none(self, tmp_path):
+        """저장된 인덱스가 없으면 None"""
+        assert ModpackVectorIndex.load(str(tmp_path / 'missing')) is None
+
+
+class TestSelectTopK:
+    """argpartition 기반 상위 K 선택 테스트 클래스"""
+
+    @pytest.mark.parametrize("top_k,min_score,expected", [
+        (2, -1.0, [3, 1]),
+        (10, 0.5, [3, 1]),
+        (3, 0.95, []),
+    ])
+    def test_select_top_k(self, top_k, min_score, expected):
+        """점수 내림차순, min_score 필터 적용"""
+        scores = np.array([0.1, 0.8, 0.3, 0.9, 0.2], dtype=np.float32)
+
+        positions, top_scores = select_top_k(scores, top_k, min_score)
+
+        assert positions.tolist() == expected
+        assert top_scores.tolist() == sorted(top_scores.tolist(), reverse=True)
+
+
+class TestVectorIndexCache:
+    """인덱스 LRU 캐시 테스트 클래스"""
+
+    @pytest.fixture
+    def make_index(self):
+        """문서 n개짜리 작은 인덱스 생성기"""
+        def _make(n=10, generation=''):
+            embeddings = np.random.default_rng(n).normal(size=(n, 16)).astype(np.float32)
+            return ModpackVectorIndex.build(embeddings, [{'text': ''} for _ in range(n)], generation=generation)
+        return _make
+
+    def test_hit_and_miss_counters(self, make_index):
+        """조회 결과에 따라 hit/miss 집계"""
+        cache = VectorIndexCache(max_bytes=10 * 1024 * 1024)
+        cache.put(('pack', '1.0', 'g1'), make_index())
+
+        assert cache.get(('pack', '1.0', 'g1')) is not None
+        assert cache.get(('pack', '1.0', 'g2')) is None
+        assert cache.stats()['hits'] == 1
+        assert cache.stats()['misses'] == 1
+
+    def test_new_generation_replaces_old(self, make_index):
+        """같은 모드팩의 새 세대가 들어오면 이전 세대 제거"""
+        cache = VectorIndexCache(max_bytes=10 * 1024 * 1024)
+        cache.put(('pack', '1.0', 'g1'), make_index(generation='g1'))
+        cache.put(('pack', '1.0', 'g2'), make_index(generation='g2'))
+
+        assert cache.get(('pack', '1.0', 'g1')) is None
+        assert cache.stats()['entries'] == 1
+
+    def test_evicts_least_recently_used_over_budget(self, make_index):
+        """예산 초과 시 가장 오래 사용되지 않은 모드팩부터 축출"""
+        first, second, third = make_index(100), make_index(100), make_index(100)
+        cache = VectorIndexCache(max_bytes=first.nbytes * 2 + 1)
+        cache.put(('a', '1', ''), first)
+        cache.put(('b', '1', ''), second)
+        cache.get(('a', '1', ''))
+
+        cache.put(('c', '1', ''), third)
+
+        assert cache.get(('b', '1', '')) is None
+        assert cache.get(('a', '1', '')) is first
+        assert cache.stats()['evictions'] == 1
+
+    def test_byte_total_tracks_entries(self, make_index):
+        """넣기/같은 키 다시 넣기/축출/무효화 후에도 누적 크기는 남은 항목 크기의 합"""
+        first, second, third = make_index(100), make_index(100), make_index(100)
+        cache = VectorIndexCache(max_bytes=first.nbytes * 2 + 1)
+        cache.put(('a', '1', ''), first)
+        cache.put(('a', '1', ''), first)
+        cache.put(('b', '1', ''), second)
+        assert cache.stats()['bytes'] == first.nbytes + second.nbytes
+
+        cache.put(('c', '1', ''), third)
+        assert cache.stats()['bytes'] == second.nbytes + third.nbytes
+
+        cache.invalidate('b', '1')
+        assert cache.stats()['bytes'] == third.nbytes
+
+    def test_generation_ignores_timezone(self):
+        """타임존 유무와 관계없이 같은 시각은 같은 세대"""
+        naive = datetime(2024, 1, 1, 12, 0, 0, 123)
+        aware = naive.replace(tzinfo=timezone.utc)
+
+        assert generation_of(naive) == generation_of(aware)
+        assert generation_of(None) == ''
@@ -0,0 +1,419 @@
+# 로컬 벡터 인덱스 - 모드팩별 근사 최근접 이웃(ANN) 검색
+# Firestore는 원본 저장소로만 사용하고, 검색은 로컬 float32 행렬 위의 IVF 인덱스로 수행
+
+import os
+import json
+import tempfile
+import threading
+from collections import OrderedDict
+from datetime import datetime
+from typing import List, Dict, Any, Optional, Tuple
+import logging
+
+import numpy as np
+
+from bm25_index import BM25Index, rrf_fuse, hybrid_enabled, HYBRID_CANDIDATES, LEXICAL_MIN_RATIO
+from embedding_codec import QuantizedVectors, index_dtype, quantize
+
+logger = logging.getLogger(__name__)
+
+# 로컬 인덱스 저장 위치 (기존 로컬 RAG와 같은 런타임 디렉토리 사용)
+DEFAULT_INDEX_DIR = os.path.join(os.path.expanduser('~'), 'minecraft-ai-backend', 'rag', 'gcp_index')
+
+# 이 개수 미만이면 클러스터링 없이 리스트 1개(=전수 비교)로 충분
+IVF_MIN_VECTORS = 1000
+KMEANS_ITERATIONS = 10
+KMEANS_MAX_TRAIN_PER_LIST = 256
+# k-means 학습 샘플 상한 (float32 768차원 기준 약 100MB)
+KMEANS_MAX_TRAIN = 32768
+# 구축 시 한 번에 float32로 정규화/양자화할 행 수
+BUILD_BLOCK_ROWS = 8192
+
+
+def generation_of(timestamp: Optional[datetime]) -> str:
+    """모드팩 메타데이터 last_updated → 인덱스 세대 문자열 (타임존 표기와 무관하게 비교 가능)"""
+    if timestamp is None:
+        return ""
+    return timestamp.strftime('%Y%m%dT%H%M%S%f')
+
+
+def _normalize_rows(vectors: np.ndarray) -> np.ndarray:
+    """행 단위 L2 정규화 (코사인 유사도 = 내적)"""
+    norms = np.linalg.norm(vectors, axis=1, keepdims=True)
+    norms[norms == 0] = 1.0
+    return (vectors / norms).astype(np.float32, copy=False)
+
+
+def _train_centroids(vectors: np.ndarray, nlist: int, seed: int = 42) -> np.ndarray:
+    """구면 k-means로 IVF 중심점 학습 (vectors는 정규화 전 행렬이나 memmap이어도 됨, 샘플만 메모리로 읽음)"""
+    rng = np.random.default_rng(seed)
+    n = vectors.shape[0]
+
+    # 학습 샘플 수 제한 (대형 모드팩에서도 빌드 시간/메모리 일정하게)
+    train_size = min(n, nlist * KMEANS_MAX_TRAIN_PER_LIST, KMEANS_MAX_TRAIN)
+    sample = vectors[rng.choice(n, size=train_size, replace=False)] if train_size < n else vectors[:]
+    train = _normalize_rows(np.asarray(sample, dtype=np.float32))
+
+    centroids = train[rng.choice(train.shape[0], size=nlist, replace=False)].copy()
+    for _ in range(KMEANS_ITERATIONS):
+        assign = np.argmax(train @ centroids.T, axis=1)
+        for c in range(nlist):
+            members = train[assign == c]
+            if len(members):
+                centroids[c] = members.sum(axis=0)
+            else:
+                # 빈 클러스터는 임의 샘플로 재시작
+                centroids[c] = train[rng.integers(train.shape[0])]
+        centroids = _normalize_rows(centroids)
+    return centroids
+
+
+def select_top_k(scores: np.ndarray, top_k: int, min_score: float = -1.0) -> Tuple[np.ndarray, np.ndarray]:
+    """점수 배열에서 min_score 이상인 상위 top_k개의 (위치, 점수)를 내림차순으로 반환
+
+    전체 정렬 대신 argpartition으로 O(N) 선택 후 top_k개만 정렬
+    """
+    candidates = np.flatnonzero(scores >= min_score)
+    if candidates.size == 0 or top_k <= 0:
+        return np.empty(0, dtype=np.int64), np.empty(0, dtype=np.float32)
+
+    if candidates.size > top_k:
+        part = np.argpartition(-scores[candidates], top_k - 1)[:top_k]
+        candidates = candidates[part]
+
+    order = np.argsort(-scores[candidates], kind='stable')
+    positions = candidates[order]
+    return positions, scores[positions]
+
+
+class ModpackVectorIndex:
+    """모드팩 하나에 대한 IVF(inverted file) 벡터 인덱스
+
+    - vectors: 정규화된 (N, dim) 임베딩 (float32/float16/int8로 양자화된 QuantizedVectors)
+    - centroids: (nlist, dim) 클러스터 중심
+    - list_offsets / list_ids: 클러스터별 문서 번호 (CSR 형태)
+    - docs: 검색 결과로 돌려줄 문서 메타데이터 (vectors와 같은 순서)
+    - lexical: 문서 텍스트의 BM25 역색인 (하이브리드 검색용, 같은 문서 번호 사용)
+    """
+
+    def __init__(self, vectors: QuantizedVectors, docs: List[Dict[str, Any]],
+                 centroids: np.ndarray, list_offsets: np.ndarray, list_ids: np.ndarray,
+                 generation: str = "", lexical: Optional[BM25Index] = None):
+        self.vectors = vectors
+        self.docs = docs
+        self.centroids = centroids
+        self.list_offsets = list_offsets
+        self.list_ids = list_ids
+        self.generation = generation
+        self.lexical = lexical
+        # 문서 텍스트 크기는 만들 때 한 번만 셈 (캐시 예산 계산마다 전체 문서를 돌지 않음)
+        self._doc_bytes = sum(len(d.get('text', '')) + 200 for d in docs)
+
+    @property
+    def size(self) -> int:
+        return int(self.vectors.shape[0])
+
+    @property
+    def nlist(self) -> int:
+        return int(self.centroids.shape[0])
+
+    @property
+    def nbytes(self) -> int:
+        """행렬/리스트가 차지하는 메모리 (문서 텍스트는 만들 때 센 추정치)"""
+        array_bytes = (self.vectors.nbytes + self.centroids.nbytes +
+                       self.list_offsets.nbytes + self.list_ids.nbytes)
+        lexical_bytes = self.lexical.nbytes if self.lexical is not None else 0
+        return int(array_bytes + self._doc_bytes + lexical_bytes)
+
+    @classmethod
+    def build(cls, embeddings, docs: List[Dict[str, Any]], generation: str = "",
+              nlist: Optional[int] = None, dtype: Optional[str] = None) -> "ModpackVectorIndex":
+        """임베딩 목록과 문서 메타데이터로 인덱스 구축
+        클러스터링은 float32로 하고, 보관하는 벡터는 dtype(기본 GCP_RAG_INDEX_DTYPE)으로 양자화한다.
+        embeddings가 memmap(VectorSpill)이면 BUILD_BLOCK_ROWS행씩 읽어 정규화/배정/양자화하므로
+        float32 전체 사본 없이 결과 인덱스 + 학습 샘플 + 블록 하나 분량의 메모리만 쓴다.
+        """
+        vectors = embeddings if isinstance(embeddings, np.ndarray) else np.asarray(embeddings, dtype=np.float32)
+        if vectors.ndim != 2 or vectors.shape[0] != len(docs):
+            raise ValueError(f"임베딩 형태({vectors.shape})와 문서 수({len(docs)}) 불일치")
+        n = vectors.shape[0]
+        dtype = dtype or index_dtype()
+
+        if nlist is None:
+            nlist = 1 if n < IVF_MIN_VECTORS else int(np.sqrt(n))
+        nlist = max(1, min(nlist, n))
+
+        def blocks():
+            for start in range(0, n, BUILD_BLOCK_ROWS):
+                yield start, _normalize_rows(np.array(vectors[start:start + BUILD_BLOCK_ROWS], dtype=np.float32))
+
+        if nlist == 1:
+            total = np.zeros(vectors.shape[1], dtype=np.float64)
+            for _, block in blocks():
+                total += block.sum(axis=0)
+            centroids = _normalize_rows((total / max(n, 1)).astype(np.float32)[None, :])
+        else:
+            centroids = _train_centroids(vectors, nlist)
+
+        assign = np.zeros(n, dtype=np.int64)
+        codes, scales = quantize(np.zeros((0, vectors.shape[1]), dtype=np.float32), dtype)
+        codes = np.empty((n, vectors.shape[1]), dtype=codes.dtype)
+        scales = np.empty(n, dtype=np.float32) if scales is not None else None
+        for start, block in blocks():
+            end = start + block.shape[0]
+            if nlist > 1:
+                assign[start:end] = np.argmax(block @ centroids.T, axis=1)
+            block_codes, block_scales = quantize(block, dtype)
+            codes[start:end] = block_codes
+            if scales is not None:
+                scales[start:end] = block_scales
+
+        order = np.argsort(assign, kind='stable')
+        counts = np.bincount(assign, minlength=nlist)
+        list_offsets = np.concatenate([[0], np.cumsum(counts)]).astype(np.int64)
+
+        lexical = BM25Index.build(d.get('text', '') for d in docs)
+        return cls(QuantizedVectors(codes, scales), docs, centroids,
+                   list_offsets, order.astype(np.int64), generation, lexical)
+
+    def search(self, query_embedding, top_k: int = 5, min_score: float = 0.0,
+               nprobe: Optional[int] = None) -> List[Tuple[Dict[str, Any], float]]:
+        """쿼리 벡터와 가장 유사한 문서 top_k개 반환 [(doc, similarity), ...]"""
+        q = self._query_vector(query_embedding)
+        if q is None:
+            return []
+        doc_ids, top_scores = self._dense_search(q, top_k, min_score, nprobe)
+        return [(self.docs[int(i)], float(score)) for i, score in zip(doc_ids, top_scores)]
+
+    def hybrid_search(self, query_text: str, query_embedding, top_k: int = 5, min_score: float = 0.0,
+                      nprobe: Optional[int] = None) -> List[Tuple[Dict[str, Any], float]]:
+        """벡터 검색 + BM25를 RRF로 합친 top_k개 [(doc, similarity), ...]
+        벡터 후보에만 min_score를 적용하고, BM25로만 찾은 문서(정확한 이름 일치)는 점수와 무관하게 합친다.
+        similarity는 항상 실제 코사인 유사도. BM25 역색인이 없거나 꺼져 있으면 search()와 같다.
+        """
+        if self.lexical is None or not query_text or not hybrid_enabled():
+            return self.search(query_embedding, top_k, min_score, nprobe)
+        q = self._query_vector(query_embedding)
+        if q is None:
+            return []
+
+        candidates = max(top_k, top_k * HYBRID_CANDIDATES)
+        dense_ids, _ = self._dense_search(q, candidates, min_score, nprobe)
+        lexical = self.lexical.search(query_text, candidates, min_ratio=LEXICAL_MIN_RATIO)
+        fused = rrf_fuse([[int(i) for i in dense_ids], [i for i, _ in lexical]], top_k=top_k)
+        if not fused:
+            return []
+        doc_ids = np.asarray([i for i, _ in fused], dtype=np.int64)
+        similarities = self.vectors.dot(q, doc_ids)
+        return [(self.docs[int(i)], float(score)) for i, score in zip(doc_ids, similarities)]
+
+    def _query_vector(self, query_embedding) -> Optional[np.ndarray]:
+        if self.size == 0:
+            return None
+        q = np.asarray(query_embedding, dtype=np.float32).reshape(-1)
+        q_norm = np.linalg.norm(q)
+        if q.shape[0] != self.vectors.shape[1] or q_norm == 0:
+            return None
+        return q / q_norm
+
+    def _dense_search(self, q: np.ndarray, top_k: int, min_score: float,
+                      nprobe: Optional[int]) -> Tuple[np.ndarray, np.ndarray]:
+        """정규화된 쿼리 벡터로 IVF 검색 → (문서 번호, 유사도)"""
+        if nprobe is None:
+            nprobe = int(os.getenv('GCP_RAG_IVF_NPROBE', '8'))
+        nprobe = max(1, min(nprobe, self.nlist))
+
+        if nprobe >= self.nlist:
+            # 전체 조사: 행렬-벡터 곱 (후보 복사 없음)
+            scores = self.vectors.dot(q)
+            positions, top_scores = select_top_k(scores, top_k, min_score)
+            doc_ids = positions
+        else:
+            # 1. 가까운 클러스터 nprobe개 선택
+            probe = np.argpartition(-(self.centroids @ q), nprobe - 1)[:nprobe]
+
+            # 2. 선택된 클러스터의 후보 문서만 점수 계산
+            candidates = np.concatenate([
+                self.list_ids[self.list_offsets[c]:self.list_offsets[c + 1]] for c in probe
+            ])
+            if candidates.size == 0:
+                return np.zeros(0, dtype=np.int64), np.zeros(0, dtype=np.float32)
+            scores = self.vectors.dot(q, candidates)
+            positions, top_scores = select_top_k(scores, top_k, min_score)
+            doc_ids = candidates[positions]
+
+        return doc_ids, top_scores
+
+    def save(self, index_dir: str) -> None:
+        """인덱스를 디렉토리에 저장 (임시 디렉토리 작성 후 교체)"""
+        tmp_dir = index_dir + '.tmp'
+        os.makedirs(tmp_dir, exist_ok=True)
+        np.save(os.path.join(tmp_dir, 'vectors.npy'), self.vectors.codes)
+        if self.vectors.scales is not None:
+            np.save(os.path.join(tmp_dir, 'vector_scales.npy'), self.vectors.scales)
+        np.save(os.path.join(tmp_dir, 'centroids.npy'), self.centroids)
+        np.save(os.path.join(tmp_dir, 'list_offsets.npy'), self.list_offsets)
+        np.save(os.path.join(tmp_dir, 'list_ids.npy'), self.list_ids)
+        with open(os.path.join(tmp_dir, 'docs.json'), 'w', encoding='utf-8') as f:
+            json.dump(self.docs, f, ensure_ascii=False)
+        if self.lexical is not None:
+            self.lexical.save(tmp_dir)
+        with open(os.path.join(tmp_dir, 'meta.json'), 'w', encoding='utf-8') as f:
+            json.dump({
+                'generation': self.generation,
+                'count': self.size,
+                'dim': int(self.vectors.shape[1]),
+                'dtype': self.vectors.dtype,
+                'nlist': self.nlist
+            }, f)
+
+        if os.path.isdir(index_dir):
+            import shutil
+            shutil.rmtree(index_dir)
+        os.replace(tmp_dir, index_dir)
+
+    @classmethod
+    def load(cls, index_dir: str) -> Optional["ModpackVectorIndex"]:
+        """저장된 인덱스 로드 (없거나 손상되었으면 None)"""
+        meta_path = os.path.join(index_dir, 'meta.json')
+        if not os.path.isfile(meta_path):
+            return None
+        try:
+            with open(meta_path, 'r', encoding='utf-8') as f:
+                meta = json.load(f)
+            with open(os.path.join(index_dir, 'docs.json'), 'r', encoding='utf-8') as f:
+                docs = json.load(f)
+            scales_path = os.path.join(index_dir, 'vector_scales.npy')
+            index = cls(
+                vectors=QuantizedVectors(np.load(os.path.join(index_dir, 'vectors.npy')),
+                                         np.load(scales_path) if os.path.isfile(scales_path) else None),
+                docs=docs,
+                centroids=np.load(os.path.join(index_dir, 'centroids.npy')),
+                list_offsets=np.load(os.path.join(index_dir, 'list_offsets.npy')),
+                list_ids=np.load(os.path.join(index_dir, 'list_ids.npy')),
+                generation=meta.get('generation', ''),
+                lexical=BM25Index.load(index_dir)
+            )
+            if index.size != len(docs):
+                logger.warning(f"로컬 인덱스 손상 (벡터 {index.size}개, 문서 {len(docs)}개): {index_dir}")
+                return None
+            if index.lexical is None or index.lexical.num_docs != len(docs):
+                # BM25 역색인 없이 저장된 이전 인덱스
+                index.lexical = BM25Index.build(d.get('text', '') for d in docs)
+            return index
+        except Exception as e:
+            logger.warning(f"로컬 인덱스 로드 실패 {index_dir}: {e}")
+            return None
+
+
+class VectorSpill:
+    """인덱스 구축 중 임베딩 배치를 디스크 임시 파일(float32)에 이어 쓰는 버퍼
+
+    임베딩/업로드 루프 동안 메모리에는 배치 하나만 두고, 다 모이면 array()로 memmap을 열어
+    ModpackVectorIndex.build에 넘긴다. close()하면 임시 파일 삭제.
+    """
+
+    def __init__(self, directory: Optional[str] = None):
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        fd, self.path = tempfile.mkstemp(prefix='vectors_', suffix='.f32', dir=directory)
+        self._file = os.fdopen(fd, 'wb')
+        self.rows = 0
+        self.dim = 0
+
+    def __len__(self) -> int:
+        return self.rows
+
+    def append(self, vectors) -> None:
+        block = np.ascontiguousarray(np.asarray(vectors, dtype=np.float32))
+        if block.ndim != 2 or not block.shape[0]:
+            return
+        if self.dim and block.shape[1] != self.dim:
+            raise ValueError(f"임베딩 차원 불일치: {block.shape[1]} != {self.dim}")
+        self.dim = block.shape[1]
+        self._file.write(block.tobytes())
+        self.rows += block.shape[0]
+
+    def array(self) -> np.ndarray:
+        """지금까지 쓴 행 전체 (읽기 전용 memmap, 비어 있으면 (0, 0) 배열)"""
+        self._file.flush()
+        if not self.rows:
+            return np.zeros((0, self.dim), dtype=np.float32)
+        return np.memmap(self.path, dtype=np.float32, mode='r', shape=(self.rows, self.dim))
+
+    def close(self) -> None:
+        if not self._file.closed:
+            self._file.close()
+        try:
+            os.remove(self.path)
+        except OSError:
+            pass
+
+
+class VectorIndexCache:
+    """모드팩 인덱스 LRU 캐시 (메모리 예산 기반 축출)
+
+    키는 (modpack_name, modpack_version, generation)이며, 같은 모드팩의
+    새 세대가 들어오면 이전 세대는 즉시 제거된다.
+    """
+
+    def __init__(self, max_bytes: int):
+        self.max_bytes = max_bytes
+        self._entries: "OrderedDict[Tuple[str, str, str], ModpackVectorIndex]" = OrderedDict()
+        # 넣을 때 잰 항목별 크기와 그 합계 (축출 반복/통계 조회마다 다시 재지 않음)
+        self._sizes: Dict[Tuple[str, str, str], int] = {}
+        self._total_bytes = 0
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    @property
+    def total_bytes(self) -> int:
+        return self._total_bytes
+
+    def _remove(self, key: Tuple[str, str, str]) -> None:
+        del self._entries[key]
+        self._total_bytes -= self._sizes.pop(key)
+
+    def get(self, key: Tuple[str, str, str]) -> Optional[ModpackVectorIndex]:
+        with self._lock:
+            index = self._entries.get(key)
+            if index is None:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return index
+
+    def put(self, key: Tuple[str, str, str], index: ModpackVectorIndex) -> None:
+        with self._lock:
+            for old_key in [k for k in self._entries if k[:2] == key[:2]]:
+                self._remove(old_key)
+            self._entries[key] = index
+            self._sizes[key] = index.nbytes
+            self._total_bytes += self._sizes[key]
+
+            # 예산 초과 시 가장 오래 사용되지 않은 항목부터 제거 (방금 넣은 항목은 유지)
+            while len(self._entries) > 1 and self._total_bytes > self.max_bytes:
+                evicted_key = next(iter(self._entries))
+                self._remove(evicted_key)
+                self.evictions += 1
+                logger.info(f"♻️ 인덱스 캐시 축출: {evicted_key[0]} v{evicted_key[1]}")
+
+    def invalidate(self, modpack_name: str, modpack_version: str) -> None:
+        """해당 모드팩의 모든 세대 제거"""
+        with self._lock:
+            for key in [k for k in self._entries if k[:2] == (modpack_name, modpack_version)]:
+                self._remove(key)
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                'entries': len(self._entries),
+                'bytes': self.total_bytes,
+                'max_bytes': self.max_bytes,
+                'hits': self.hits,
+                'misses': self.misses,
+                'evictions': self.evictions
+            }
@@ -65,11 +65,10 @@ public class AIChatScreen extends Screen {
         // AI에게 질문 (비동기)
         if (this.client != null && this.client.player != null) {
             ModpackAIMod.getInstance().getAIManager()
-                    .askAIAsync(this.client.player.getUuidAsString(), message, "Unknown Modpack")
+                    .askAIAsync(this.client.player.getUuidAsString(), message, "Unknown Modpack",
+                            partial -> this.lastResponse = truncateResponse(partial))
                     .thenAccept(response -> {
-                        // 응답이 너무 길면 줄여서 표시
-                        this.lastResponse = response.length() > 300 ? 
-                                response.substring(0, 300) + "..." : response;
+                        this.lastResponse = truncateResponse(response);
                     })
                     .exceptionally(throwable -> {
                         this.lastResponse = "AI 응답 처리 중 오류가 발생했습니다.";
@@ -78,6 +77,13 @@ public class AIChatScreen extends Screen {
         }
     }
     
+    /**
+     * 응답이 너무 길면 줄여서 표시
+     */
+    private String truncateResponse(String response) {
+        return response.length() > 300 ? response.substring(0, 300) + "..." : response;
+    }
+    
     @Override
     public void render(DrawContext context, int mouseX, int mouseY, float delta) {
         // 배경 그리기
@@ -11,7 +11,10 @@ import java.net.http.HttpClient;
 import java.net.http.HttpRequest;
 import java.net.http.HttpResponse;
 import java.time.Duration;
+import java.util.Iterator;
 import java.util.concurrent.CompletableFuture;
+import java.util.function.Consumer;
+import java.util.stream.Stream;
 
 /**
  * Fabric 모드용 AI 매니저
@@ -48,6 +51,97 @@ public class ModpackAIManager {
         });
     }
     
+    /**
+     * AI에게 질문하고 응답을 스트리밍으로 받기 (비동기)
+     * 응답 조각이 도착할 때마다 지금까지 받은 답변 전체로 onPartial을 호출하고,
+     * 스트리밍을 사용할 수 없으면 일반 /chat 요청으로 폴백한다.
+     */
+    public CompletableFuture<String> askAIAsync(String playerUuid, String message, String modpackName, Consumer<String> onPartial) {
+        return CompletableFuture.supplyAsync(() -> {
+            try {
+                String streamed = askAIStreaming(playerUuid, message, modpackName, onPartial);
+                if (streamed != null) {
+                    return streamed;
+                }
+            } catch (Exception e) {
+                LOGGER.warn("스트리밍 AI 응답 실패, 일반 요청으로 폴백", e);
+            }
+            try {
+                return askAI(playerUuid, message, modpackName);
+            } catch (Exception e) {
+                LOGGER.error("비동기 AI 질문 처리 실패", e);
+                return "AI 응답 처리 중 오류가 발생했습니다.";
+            }
+        });
+    }
+    
+    /**
+     * /chat/stream(Server-Sent Events)으로 질문하고 응답 조각을 차례로 전달
+     * 스트리밍 엔드포인트를 쓸 수 없으면 null 반환
+     */
+    private String askAIStreaming(String playerUuid, String message, String modpackName, Consumer<String> onPartial) throws Exception {
+        JsonObject requestData = new JsonObject();
+        requestData.addProperty("message", message);
+        requestData.addProperty("player_uuid", playerUuid);
+        requestData.addProperty("modpack_name", modpackName != null ? modpackName : "Unknown");
+        requestData.addProperty("modpack_version", "1.0.0");
+        
+        HttpRequest request = HttpRequest.newBuilder()
+                .uri(URI.create(config.getBackendUrl() + "/chat/stream"))
+                .header("Content-Type", "application/json")
+                .header("Accept", "text/event-stream")
+                .timeout(Duration.ofSeconds(config.getRequestTimeout() / 1000))
+                .POST(HttpRequest.BodyPublishers.ofString(requestData.toString()))
+                .build();
+        
+        HttpResponse<Stream<String>> response = httpClient.send(request, HttpResponse.BodyHandlers.ofLines());
+        if (response.statusCode() != 200) {
+            response.body().close();
+            LOGGER.warn("스트리밍 요청 실패: HTTP {}", response.statusCode());
+            return null;
+        }
+        
+        StringBuilder answer = new StringBuilder();
+        String event = "message";
+        try (Stream<String> lines = response.body()) {
+            Iterator<String> iterator = lines.iterator();
+            while (iterator.hasNext()) {
+                String line = iterator.next();
+                if (line.isEmpty()) {
+                    event = "message";
+                } else if (line.startsWith("event:")) {
+                    event = line.substring(6).trim();
+                } else if (line.startsWith("data:")) {
+                    JsonObject data = gson.fromJson(line.substring(5).trim(), JsonObject.class);
+                    if ("token".equals(event)) {
+                        answer.append(data.get("text").getAsString());
+                        onPartial.accept(answer.toString());
+                    } else if ("done".equals(event)) {
+                        String aiResponse = data.has("response") ? data.get("response").getAsString() : answer.toString();
+                        LOGGER.info("AI 스트리밍 응답 완료: {}", aiResponse.substring(0, Math.min(100, aiResponse.length())));
+                        // 백엔드 응답 캐시에서 온 답변이면 표시
+                        if (data.has("cached") && data.get("cached").getAsBoolean()) {
+                            return aiResponse + "\n§7(캐시된 답변)";
+                        }
+                        return aiResponse;
+                    } else if ("error".equals(event)) {
+                        String error = data.has("error") ? data.get("error").getAsString() : "알 수 없는 오류";
+                        LOGGER.error("AI 스트리밍 응답 실패: {}", error);
+                        return "AI 응답 처리 중 오류가 발생했습니다: " + error;
+                    }
+                }
+            }
+        } catch (Exception e) {
+            // 이미 일부 답변을 보여줬다면 다시 요청하지 않고 받은 만큼 반환
+            if (answer.length() == 0) {
+                throw e;
+            }
+            LOGGER.warn("AI 스트리밍 응답 중단", e);
+        }
+        
+        return answer.length() > 0 ? answer + "\n§7(응답이 중단되었습니다)" : null;
+    }
+    
     /**
      * AI에게 질문하고 응답 받기 (동기)
      */
@@ -79,6 +173,10 @@ public class ModpackAIManager {
                 if (responseData.has("success") && responseData.get("success").getAsBoolean()) {
                     String aiResponse = responseData.get("response").getAsString();
                     LOGGER.info("AI 응답 성공: {}", aiResponse.substring(0, Math.min(100, aiResponse.length())));
+                    // 백엔드 응답 캐시에서 온 답변이면 표시
+                    if (responseData.has("cached") && responseData.get("cached").getAsBoolean()) {
+                        return aiResponse + "\n§7(캐시된 답변)";
+                    }
                     return aiResponse;
                 } else {
                     String error = responseData.has("error") ? responseData.get("error").getAsString() : "알 수 없는 오류";
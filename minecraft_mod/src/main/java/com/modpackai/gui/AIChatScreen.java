@@ -315,7 +315,15 @@ public class AIChatScreen extends Screen {
         // AI에게 메시지 전송 (비동기)
         String playerUuid = "client-player"; // 클라이언트에서는 임시 UUID
         ModpackAIMod.getInstance().getAIManager()
-                .askAIAsync(playerUuid, message, "Unknown Modpack")
+                .askAIAsync(playerUuid, message, "Unknown Modpack", partial -> {
+                    // 스트리밍 중에는 "처리 중" 메시지 자리에 지금까지 받은 답변 표시
+                    String partialLine = "§7[AI] 응답을 생성하는 중... §f" + partial;
+                    if (!chatHistory.isEmpty() && chatHistory.get(chatHistory.size() - 1).contains("응답을 생성하는 중")) {
+                        chatHistory.set(chatHistory.size() - 1, partialLine);
+                    } else {
+                        addChatMessage(partialLine);
+                    }
+                })
                 .thenAccept(response -> {
                     // 마지막 "처리 중" 메시지 제거
                     if (!chatHistory.isEmpty() && chatHistory.get(chatHistory.size() - 1).contains("응답을 생성하는 중")) {